@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+
+import os
+
+import numpy as np
+import pandas as pd
+
+"""
+Library Table Index for Combine_FMC_and_CDNS_lib.py / Combine_FMC_and_SNPS_lib.py
+
+One pass over the ldbx library collects every timing group, keyed by
+(cell, pin, related_pin, timing_type, when), with its nominal and LVF tables
+(values and index vectors) as NumPy arrays. The index is saved to an .npz cache,
+so the next report of the same library does not read the library again.
+
+The combine step then looks up the timing group of every FMC arc and gathers the
+table points [fir_index, sec_index] of all arcs at once; the CDNS and SNPS scripts
+only differ by the arc parsing, the unit and the column prefix.
+
+Table storage: the tables of a name are concatenated into one flat array, table i
+is values[values_offset[i]:values_offset[i+1]] (same for index_1 and index_2).
+"""
+
+INDEX_VERSION = 1
+
+KEY_FIELDS = ['cell', 'pin', 'related_pin', 'timing_type', 'when']
+TABLE_FIELDS = ['values', 'index_1', 'index_2']
+LVF_TABLE_PREFIXES = ['ocv_sigma_', 'ocv_std_dev_', 'ocv_skewness_', 'ocv_mean_shift_']
+NOMINAL_TABLE_TYPES = ['cell_rise', 'cell_fall', 'rise_transition', 'fall_transition',
+                       'rise_constraint', 'fall_constraint']
+
+# Table shape of each mode: 8x8 delay/slew tables, 5x5 hold tables
+TABLE_SHAPES = {'Delay': 8, 'Slew': 8, 'Hold': 5}
+
+
+def normalize_when(when):
+    """Sometimes A2&A3&!B1 is written A2&&A3&&!B1 in the lib: both give A2&A3&!B1"""
+    return when.replace('&&', '&')
+
+
+def get_table_names(table_types):
+    """Nominal and LVF table group names of the table types"""
+    table_names = []
+    for table_type in table_types:
+        table_names.append(table_type)
+        table_names.extend(prefix + table_type for prefix in LVF_TABLE_PREFIXES)
+    return table_names
+
+
+def concat_tables(tables):
+    """Flat array and offsets of a list of 1D tables"""
+    offsets = np.zeros(len(tables) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(table) for table in tables])
+    values = np.concatenate(tables) if tables else np.zeros(0)
+    return values.astype(float), offsets
+
+
+class LibTableIndex:
+    """
+    Timing groups of a library and their tables
+
+    keys: KEY_FIELDS -> string array, one entry per timing group
+    tables: table name -> dict of
+        group: timing group of each table (in library order)
+        sigma_type: sigma_type attribute of each table ('None' if not set)
+        values, index_1, index_2 and their _offset arrays
+    """
+
+    def __init__(self, keys, tables, lib_stat=None):
+        self.keys = keys
+        self.tables = tables
+        self.lib_stat = lib_stat
+        self.groups_by_pin = None
+
+    @classmethod
+    def from_lib(cls, lib, table_names):
+        """Collect the timing groups and tables of an ldbx library in one pass"""
+        keys = {field: [] for field in KEY_FIELDS}
+        tables = {name: {'group': [], 'sigma_type': [], 'values': [], 'index_1': [], 'index_2': []}
+                  for name in table_names}
+
+        for each_cell in lib.getChildren("cell"):
+            cell_name = each_cell.getName()
+            for each_pin in each_cell.getChildren("pin"):
+                pin_name = each_pin.getName()
+                for each_tim_group in each_pin.getChildren("timing"):
+                    tim_block_attr = {attr_tpl[0]: attr_tpl[1] for attr_tpl in each_tim_group.getAttr()}
+                    group = len(keys['cell'])
+                    keys['cell'].append(cell_name)
+                    keys['pin'].append(pin_name)
+                    keys['related_pin'].append(str(tim_block_attr.get('related_pin', 'None')))
+                    keys['timing_type'].append(str(tim_block_attr.get('timing_type', 'None')))
+                    keys['when'].append(str(tim_block_attr.get('when', 'None')))
+
+                    for each_tbl_grp in each_tim_group.getChildren():
+                        table = tables.get(each_tbl_grp.getHeader())
+                        if table is None:
+                            continue
+                        tbl_obj = each_tbl_grp.getTable()
+                        if tbl_obj.isEmpty():
+                            continue
+                        sigma_type = each_tbl_grp.getAttr(['sigma_type'])
+                        indices = tbl_obj.getIndices()
+                        table['group'].append(group)
+                        table['sigma_type'].append(str(sigma_type[0][1]) if sigma_type else 'None')
+                        table['values'].append(np.array(tbl_obj.getValue(), dtype=float).ravel())
+                        table['index_1'].append(np.array(indices[0] if len(indices) >= 1 else [], dtype=float))
+                        table['index_2'].append(np.array(indices[1] if len(indices) >= 2 else [], dtype=float))
+
+        keys = {field: np.array(values, dtype=str) for field, values in keys.items()}
+        for name, table in tables.items():
+            table['group'] = np.array(table['group'], dtype=np.int64)
+            table['sigma_type'] = np.array(table['sigma_type'], dtype=str)
+            for field in TABLE_FIELDS:
+                table[field], table[f"{field}_offset"] = concat_tables(table[field])
+        return cls(keys, tables)
+
+    def save(self, cache_path):
+        """Save the index to an .npz file (written to a temporary file, then renamed)"""
+        arrays = {'meta.version': np.array(INDEX_VERSION),
+                  'meta.lib_stat': np.array(self.lib_stat if self.lib_stat else [-1, -1], dtype=np.int64),
+                  'meta.table_names': np.array(list(self.tables), dtype=str)}
+        for field, values in self.keys.items():
+            arrays[f"keys.{field}"] = values
+        for name, table in self.tables.items():
+            for field, values in table.items():
+                arrays[f"{name}.{field}"] = values
+
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+
+    @classmethod
+    def load(cls, cache_path):
+        """Load an index saved by save()"""
+        with np.load(cache_path, allow_pickle=False) as data:
+            if int(data['meta.version']) != INDEX_VERSION:
+                return None
+            keys = {field: data[f"keys.{field}"] for field in KEY_FIELDS}
+            tables = {}
+            for name in data['meta.table_names'].tolist():
+                tables[name] = {field: data[f"{name}.{field}"]
+                                for field in ['group', 'sigma_type'] + TABLE_FIELDS +
+                                [f"{x}_offset" for x in TABLE_FIELDS]}
+            return cls(keys, tables, data['meta.lib_stat'].tolist())
+
+    def find_groups(self, cell_names, out_pins, rel_pins, whens, hold=False):
+        """
+        Timing group of every arc, -1 if the arc is not in the library
+
+        A group matches if its related_pin is the arc's related pin and its when is the
+        arc's when, or it has no when. A group with the arc's when is preferred over a
+        group without when. Hold arcs only match hold_* timing types.
+        """
+        if self.groups_by_pin is None:
+            self.groups_by_pin = {}
+            for group, (cell, pin, related_pin, timing_type, when) in enumerate(zip(
+                    *[self.keys[field].tolist() for field in KEY_FIELDS])):
+                self.groups_by_pin.setdefault((cell, pin, related_pin), []).append(
+                    (normalize_when(when), timing_type, group))
+
+        groups = np.full(len(cell_names), -1, dtype=np.int64)
+        for i, arc_key in enumerate(zip(cell_names, out_pins, rel_pins)):
+            arc_when = normalize_when(whens[i])
+            default_group = -1
+            for when, timing_type, group in self.groups_by_pin.get(arc_key, []):
+                if hold and 'hold_' not in timing_type:
+                    continue
+                if when == arc_when:
+                    default_group = group
+                    break
+                if when == 'None' and default_group < 0:
+                    default_group = group
+            groups[i] = default_group
+        return groups
+
+    def get_table_positions(self, table_name, groups, sigma_type=None):
+        """Position of the first table_name table (of sigma_type) of every group, -1 if none"""
+        positions = np.full(len(groups), -1, dtype=np.int64)
+        table = self.tables.get(table_name)
+        if table is None or len(table['group']) == 0:
+            return positions
+
+        candidates = np.arange(len(table['group']))
+        if sigma_type is not None:
+            candidates = candidates[table['sigma_type'] == sigma_type]
+        # np.unique returns the first occurrence of every group
+        table_groups, first = np.unique(table['group'][candidates], return_index=True)
+        group_positions = np.full(len(self.keys['cell']), -1, dtype=np.int64)
+        group_positions[table_groups] = candidates[first]
+
+        found = groups >= 0
+        positions[found] = group_positions[groups[found]]
+        return positions
+
+    def get_points(self, table_name, groups, fir_index, sec_index, shape, sigma_type=None):
+        """
+        Table point [fir_index, sec_index] of the (shape, shape) table_name table of every group,
+        with index_1[fir_index] and index_2[sec_index] of the table
+
+        Returns:
+            tuple: (values, index_1 values, index_2 values) arrays, NaN where not available
+        """
+        positions = self.get_table_positions(table_name, groups, sigma_type)
+        values = np.full(len(groups), np.nan)
+        index_1 = np.full(len(groups), np.nan)
+        index_2 = np.full(len(groups), np.nan)
+        found = positions >= 0
+        if not found.any():
+            return values, index_1, index_2
+
+        table = self.tables[table_name]
+        pos = positions[found]
+        fir = fir_index[found]
+        sec = sec_index[found]
+
+        start = table['values_offset'][pos]
+        size = table['values_offset'][pos + 1] - start
+        valid = (size == shape * shape) & (fir >= 0) & (fir < shape) & (sec >= 0) & (sec < shape)
+        points = np.full(len(pos), np.nan)
+        points[valid] = table['values'][(start + fir * shape + sec)[valid]]
+        values[found] = points
+
+        for field, field_index, out in [('index_1', fir, index_1), ('index_2', sec, index_2)]:
+            start = table[f"{field}_offset"][pos]
+            size = table[f"{field}_offset"][pos + 1] - start
+            valid = (field_index >= 0) & (field_index < size)
+            points = np.full(len(pos), np.nan)
+            points[valid] = table[field][(start + field_index)[valid]]
+            out[found] = points
+
+        return values, index_1, index_2
+
+
+def get_lib_stat(lib_file_path):
+    stat = os.stat(lib_file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def get_lib_table_index(lib_file_path, table_types, cache_path, read_lib, rebuild=False):
+    """
+    Load the library table index from cache_path, or build it with one pass over the
+    library (read_lib() returns the ldbx library) and save it to cache_path
+
+    The cache is rebuilt if the library file changed (size or modification time)
+    or it lacks tables of table_types.
+    """
+    table_names = get_table_names(sorted(set(NOMINAL_TABLE_TYPES) | set(table_types)))
+    lib_stat = get_lib_stat(lib_file_path)
+
+    if cache_path and os.path.isfile(cache_path) and not rebuild:
+        try:
+            lib_index = LibTableIndex.load(cache_path)
+        except Exception as e:
+            print(f"Warning: Cannot read library index {cache_path}: {e}")
+            lib_index = None
+        if lib_index is not None and lib_index.lib_stat == lib_stat and \
+                set(table_names) <= set(lib_index.tables):
+            print(f"Reading library index: {cache_path}")
+            return lib_index
+
+    lib = read_lib()
+    print("Reading:", lib.getName())
+    lib_index = LibTableIndex.from_lib(lib, table_names)
+    lib_index.lib_stat = lib_stat
+    print(f"Indexed {len(lib_index.keys['cell'])} timing groups of {len(set(lib_index.keys['cell']))} cells")
+    if cache_path:
+        lib_index.save(cache_path)
+        print(f"Saved library index: {cache_path}")
+    return lib_index
+
+
+def round_slews(values):
+    """rel_pin_slew values formatted to 1 decimal place"""
+    return np.array([round(x, 1) for x in values.tolist()], dtype=float)
+
+
+def get_lib_values(lib_index, arcs, table_types, mode, unit_change, nominal_check):
+    """
+    Library values of the FMC arcs
+
+    Args:
+        arcs: parse_arc_info results (cell_name, out_pin, rel_pin, when, when_poss, fir_index, sec_index)
+        table_types: Table_Type of every arc
+        mode: 'Delay', 'Slew' or 'Hold'
+
+    rel_pin_slew is index_1[fir_index] (Delay/Slew) or index_2[sec_index] (Hold) of the
+    first sigma table (0.0 if out of range). Without sigma table, it is the first
+    non-zero one of the std_dev/skewness/mean_shift (Delay/Slew) or nominal (Hold)
+    tables, else 0.0. Missing std_dev/skewness/mean_shift/nominal tables give 0.0,
+    arcs not found in the library NaN.
+
+    Returns:
+        dict: arc_found mask, rel_pin_slew list and early_sigma, late_sigma, std_dev,
+              skewness, mean_shift, nominal arrays
+    """
+    cell_names, out_pins, rel_pins, whens, _, fir_index, sec_index = zip(*arcs) if arcs else [()] * 7
+    fir_index = np.array(fir_index, dtype=np.int64)
+    sec_index = np.array(sec_index, dtype=np.int64)
+    table_types = np.asarray(table_types)
+    shape = TABLE_SHAPES[mode]
+    hold = mode == 'Hold'
+
+    groups = lib_index.find_groups(cell_names, out_pins, rel_pins, whens, hold=hold)
+    arc_found = groups >= 0
+
+    lib_values = {name: np.full(len(groups), np.nan) for name in
+                  ['early_sigma', 'late_sigma', 'std_dev', 'skewness', 'mean_shift', 'nominal']}
+    rel_pin_slew = np.zeros(len(groups))
+
+    for table_type in sorted(set(table_types.tolist())):
+        rows = np.flatnonzero(table_types == table_type)
+        row_groups = groups[rows]
+
+        def get_points(table_name, sigma_type=None):
+            """Table values and rel_pin_slew values (NaN if the table has no such index)"""
+            values, index_1, index_2 = lib_index.get_points(table_name, row_groups, fir_index[rows],
+                                                            sec_index[rows], shape, sigma_type)
+            return values * unit_change, round_slews((index_2 if hold else index_1) * unit_change)
+
+        def or_zero(values):
+            return np.where(np.isnan(values), 0.0, values)
+
+        sigma_table = 'ocv_sigma_' + table_type
+        has_sigma = lib_index.get_table_positions(sigma_table, row_groups) >= 0
+        sigma_value, sigma_slew = get_points(sigma_table)
+        nominal_value, nominal_slew = get_points(table_type)
+        lib_values['nominal'][rows] = or_zero(nominal_value)
+
+        if hold:
+            # Hold sigma tables have no early/late sigma_type
+            lib_values['late_sigma'][rows] = sigma_value
+            fallback_slews = [(nominal_value, nominal_slew)] if nominal_check else []
+        else:
+            lib_values['early_sigma'][rows] = get_points(sigma_table, 'early')[0]
+            lib_values['late_sigma'][rows] = get_points(sigma_table, 'late')[0]
+            std_dev_value, std_slew = get_points('ocv_std_dev_' + table_type)
+            skewness_value, skew_slew = get_points('ocv_skewness_' + table_type)
+            mean_shift_value, mean_slew = get_points('ocv_mean_shift_' + table_type)
+
+            has_std_and_skew = ~np.isnan(std_dev_value) & ~np.isnan(skewness_value)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                lib_values['skewness'][rows] = np.where(has_std_and_skew, skewness_value / std_dev_value, 0.0)
+            lib_values['std_dev'][rows] = np.where(has_std_and_skew, std_dev_value, 0.0)
+            lib_values['mean_shift'][rows] = or_zero(mean_shift_value)
+            fallback_slews = [(std_dev_value, std_slew), (skewness_value, skew_slew),
+                              (mean_shift_value, mean_slew)]
+
+        # rel_pin_slew of the first sigma table, else of the first other table that has one
+        slews = np.where(has_sigma, or_zero(sigma_slew), np.nan)
+        for values, fallback_slew in fallback_slews:
+            missing = ~has_sigma & (np.isnan(slews) | (slews == 0)) & ~np.isnan(values)
+            slews[missing] = fallback_slew[missing]
+        rel_pin_slew[rows] = or_zero(slews)
+
+    for values in lib_values.values():
+        values[~arc_found] = np.nan
+    rel_pin_slew[~arc_found] = 0.0
+
+    lib_values['arc_found'] = arc_found
+    lib_values['rel_pin_slew'] = rel_pin_slew.tolist()
+    return lib_values
+
+
+def get_comparison_columns(lib_prefix, param, mc_value, lib_value, mc_bounds=None):
+    """MC, Lib, Dif, Rel (and MC LB/UB) columns of a parameter"""
+    columns = {f'MC_{param}': mc_value, f'{lib_prefix}_{param}': lib_value,
+               f'{lib_prefix}_{param}_Dif': lib_value - mc_value,
+               f'{lib_prefix}_{param}_Rel': (lib_value - mc_value) / mc_value}
+    if mc_bounds is not None:
+        columns[f'MC_{param}_LB'], columns[f'MC_{param}_UB'] = mc_bounds
+    return columns
+
+
+def build_comparison_df(fmc_txt_df, lib_values, mode, nominal_check, lib_prefix):
+    """
+    FMC vs library comparison dataframe of the combine scripts
+
+    Args:
+        lib_prefix: 'CDNS_Lib' or 'SNPS_Lib'
+    """
+    def mc_column(name):
+        return fmc_txt_df[name].astype(float)
+
+    def param_columns(param, mc_name, lib_name):
+        return get_comparison_columns(lib_prefix, param, mc_column(f'MC_{mc_name}'), lib_values[lib_name],
+                                      mc_bounds=(mc_column(f'MC_{mc_name}_LB'), mc_column(f'MC_{mc_name}_UB')))
+
+    csv_info = {'Cell_Name': fmc_txt_df['Cell_Name'], 'Arc': fmc_txt_df['Arc'],
+                'rel_pin_slew': lib_values['rel_pin_slew']}
+
+    if mode == 'Delay' or mode == 'Slew':
+        if nominal_check:
+            csv_info.update({'MC_Nominal': mc_column('MC_Nominal'), f'{lib_prefix}_Nominal': lib_values['nominal']})
+        csv_info.update(param_columns('Early_Sigma', 'Early_Sigma', 'early_sigma'))
+        csv_info.update(param_columns('Late_Sigma', 'Late_Sigma', 'late_sigma'))
+        csv_info.update(param_columns('Std', 'Std', 'std_dev'))
+        csv_info.update(param_columns('Skew', 'Skew', 'skewness'))
+        csv_info.update(param_columns('Meanshift', 'Meansht', 'mean_shift'))
+    else:  # Hold
+        if nominal_check:
+            csv_info.update(get_comparison_columns(lib_prefix, 'Nominal', mc_column('MC_Nominal'),
+                                                   lib_values['nominal']))
+        csv_info.update(param_columns('Late_Sigma', 'Late_Sigma', 'late_sigma'))
+
+    csv_info['Table_Type'] = fmc_txt_df['Table_Type']
+
+    # Check for missing arcs
+    if not lib_values['arc_found'].all():
+        arc_list = fmc_txt_df['Arc'][~lib_values['arc_found']]
+        print(f"Warning: These Arcs {arc_list} not found")
+
+    return pd.DataFrame(csv_info)
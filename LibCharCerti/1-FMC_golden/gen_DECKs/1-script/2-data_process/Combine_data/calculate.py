@@ -2,56 +2,95 @@ import os
 import re
 import sys
 import csv
- 
-def parse_fmc_log(folder_path, file_name, csv_writer, log, node, corner, type_info):
+import argparse
+import concurrent.futures
+ 
+"""
+Harvest the FMC results of the arc folders of a corner into fmc_result_{node}_{corner}_{type}.csv
+ 
+- delay/slew: statistical behavior section of each arc's fastmontecarlo.log, read
+  only until the 'Max Percentile UB' line of the section
+- hold/mpw: first data line of the largest summary.*.csv of each arc
+ 
+The arc folders are read by a thread pool (--jobs), the rows are written sorted by
+arc, with a Parquet copy of the csv. Debug messages are only written to the
+data_run_*.log with --debug.
+"""
+ 
+DEFAULT_JOBS = 16
+ 
+OUTPUT_NAME_MAP = {
+    'delay': 'meas_delay',
+    'slew': 'meas_tt_out',
+    'seq_delay': 'cp2q',
+    'hold': 'cp2d'
+}
+ 
+SECTION_END = "Max Percentile UB"
+ 
+DELAY_SLEW_HEADER = [
+    "Arc", "Cell_Name", "output_pin", "rel_pin", "output_pin_dir", "rel_pin_dir", "when", "first_index", "sec_index",
+    "MC_Nominal", "MC_Early_Sigma", "MC_Early_Sigma_UB", "MC_Early_Sigma_LB",
+    "MC_Late_Sigma", "MC_Late_Sigma_UB", "MC_Late_Sigma_LB",
+    "MC_Meansht", "MC_Meansht_UB", "MC_Meansht_LB",
+    "MC_Std", "MC_Std_UB", "MC_Std_LB",
+    "MC_Skew", "MC_Skew_UB", "MC_Skew_LB",
+    "Table_Type"
+]
+ 
+HOLD_MPW_HEADER = [
+    "Arc", "Cell_Name", "output_pin", "rel_pin", "output_pin_dir", "rel_pin_dir", "when", "first_index", "sec_index",
+    "MC_Nominal", "MC_Late_Sigma", "MC_Late_Sigma_UB", "MC_Late_Sigma_LB",
+    "Table_Type"
+]
+ 
+def parse_fmc_log(folder_path, file_name, type_info, messages, debug=False):
+    """
+    Parse the statistical behavior section of an arc's fastmontecarlo.log
+ 
+    The log is read line by line, and only until the 'Max Percentile UB' line of the section.
+ 
+    Returns:
+        list: Report row of the arc, None if the log or the section is missing
+    """
     log_file_path = os.path.join(folder_path, file_name, 'fastmontecarlo.log')
     arc_name = re.sub(r'(\d)-(\d)', r'\1_\2', file_name)
-    print(f"Debug: Parsing file {log_file_path} for arc {arc_name}", file=log)
+    output_name = OUTPUT_NAME_MAP.get(type_info, 'unknown')
+    section_header = f"STATISTICAL BEHAVIOR FOR MEASUREMENT {output_name}"
+    if debug:
+        messages.append(f"Debug: Parsing file {log_file_path} for arc {arc_name}")
+        messages.append(f"Debug: Looking for output_name {output_name}")
+ 
+    FMC_result = {arc_name: {}}
+    section_found = False
  
     try:
         with open(log_file_path, 'r') as fin:
-            lines = fin.readlines()
+            for line in fin:
+                if not section_found:
+                    if section_header in line:
+                        section_found = True
+                        if debug:
+                            messages.append(f"\n--- Start of section for {arc_name} ---")
+                    continue
+ 
+                parse_fmc_line(line, FMC_result, arc_name)
+ 
+                if SECTION_END in line:
+                    if debug:
+                        messages.append(f"--- End of section for {arc_name} at '{SECTION_END}' ---\n")
+                    break
     except FileNotFoundError:
-        print(f"Error: Log file {log_file_path} not found.", file=log)
+        messages.append(f"Error: Log file {log_file_path} not found.")
         return None
  
-    FMC_result = {}
-    parsing = False
-    done_list = []
-    section_found = False
- 
-    output_name_map = {
-        'delay': 'meas_delay',
-        'slew': 'meas_tt_out',
-        'seq_delay': 'cp2q',
-        'hold': 'cp2d'
-    }
-    output_name = output_name_map.get(type_info, 'unknown')
-    print(f"Debug: Looking for output_name {output_name}", file=log)
- 
-    for line in lines:
-        if f"STATISTICAL BEHAVIOR FOR MEASUREMENT {output_name}" in line:
-            parsing = True
-            done_list.append(arc_name)
-            FMC_result[arc_name] = {}
-            section_found = True
-            print(f"\n--- Start of section for {arc_name} ---", file=log)
-            continue
- 
-        if parsing:
-            parse_fmc_line(line, FMC_result, arc_name)
- 
-            if "Max Percentile UB" in line:
-                parsing = False
-                print(f"--- End of section for {arc_name} at 'Max Percentile UB' ---\n", file=log)
-                continue
- 
     if not section_found:
-        print(f"Warning: Statistical behavior section not found for arc {arc_name}", file=log)
+        messages.append(f"Warning: Statistical behavior section not found for arc {arc_name}")
         return None
  
     cell_name, out_pin, out_pin_direction, rel_pin, rel_pin_direction, when, fir_index, sec_index = parse_arc_info(arc_name)
-    print(f"Debug: Output pin direction for {arc_name} is {out_pin_direction}", file=log)
+    if debug:
+        messages.append(f"Debug: Output pin direction for {arc_name} is {out_pin_direction}")
  
     if type_info == 'delay' and out_pin_direction == 'rise':
         table_type = 'cell_rise'
@@ -64,48 +103,54 @@ def parse_fmc_log(folder_path, file_name, csv_writer, log, node, corner, type_in
     else:
         table_type = 'unknown'
  
-    if arc_name in done_list:
-        mc_nominal = FMC_result[arc_name].get('nominal', 0)
-        mc_early_sigma_ub = (mc_nominal - FMC_result[arc_name].get('min_per_ub', 0)) / 3
-        mc_early_sigma_lb = (mc_nominal - FMC_result[arc_name].get('min_per_lb', 0)) / 3
-        mc_early_sigma = (mc_early_sigma_ub + mc_early_sigma_lb) / 2
- 
-        mc_late_sigma_ub = (FMC_result[arc_name].get('max_per_ub', 0) - mc_nominal) / 3
-        mc_late_sigma_lb = (FMC_result[arc_name].get('max_per_lb', 0) - mc_nominal) / 3
-        mc_late_sigma = (mc_late_sigma_ub + mc_late_sigma_lb) / 2
- 
-        report_data = [
-            arc_name, cell_name, out_pin, rel_pin, out_pin_direction, rel_pin_direction, when, fir_index, sec_index,
-            mc_nominal, mc_early_sigma, mc_early_sigma_ub, mc_early_sigma_lb,
-            mc_late_sigma, mc_late_sigma_ub, mc_late_sigma_lb,
-            FMC_result[arc_name].get('mean', 0) - mc_nominal, FMC_result[arc_name].get('mean_ub', 0) - mc_nominal, FMC_result[arc_name].get('mean_lb', 0) - mc_nominal,
-            FMC_result[arc_name].get('std', 0), FMC_result[arc_name].get('std_ub', 0), FMC_result[arc_name].get('std_lb', 0),
-            FMC_result[arc_name].get('skew', 0), FMC_result[arc_name].get('skew_ub', 0), FMC_result[arc_name].get('skew_lb', 0),
-            table_type
-        ]
- 
-        print(f"Debug: Writing report data for {arc_name}: {report_data}", file=log)
-        csv_writer.writerow(report_data)
-    return arc_name
- 
-def parse_summary_csv(folder_path, file_name, csv_writer, log, node, corner, type_info, done_list, missing_arcs):
+    result = FMC_result[arc_name]
+    mc_nominal = result.get('nominal', 0)
+    mc_early_sigma_ub = (mc_nominal - result.get('min_per_ub', 0)) / 3
+    mc_early_sigma_lb = (mc_nominal - result.get('min_per_lb', 0)) / 3
+    mc_early_sigma = (mc_early_sigma_ub + mc_early_sigma_lb) / 2
+ 
+    mc_late_sigma_ub = (result.get('max_per_ub', 0) - mc_nominal) / 3
+    mc_late_sigma_lb = (result.get('max_per_lb', 0) - mc_nominal) / 3
+    mc_late_sigma = (mc_late_sigma_ub + mc_late_sigma_lb) / 2
+ 
+    report_data = [
+        arc_name, cell_name, out_pin, rel_pin, out_pin_direction, rel_pin_direction, when, fir_index, sec_index,
+        mc_nominal, mc_early_sigma, mc_early_sigma_ub, mc_early_sigma_lb,
+        mc_late_sigma, mc_late_sigma_ub, mc_late_sigma_lb,
+        result.get('mean', 0) - mc_nominal, result.get('mean_ub', 0) - mc_nominal, result.get('mean_lb', 0) - mc_nominal,
+        result.get('std', 0), result.get('std_ub', 0), result.get('std_lb', 0),
+        result.get('skew', 0), result.get('skew_ub', 0), result.get('skew_lb', 0),
+        table_type
+    ]
+ 
+    if debug:
+        messages.append(f"Debug: Report data for {arc_name}: {report_data}")
+    return report_data
+ 
+def parse_summary_csv(folder_path, file_name, type_info, messages, debug=False):
+    """
+    Parse the first data line of the largest summary.*.csv of an arc (hold/mpw)
+ 
+    Returns:
+        list: Report row of the arc, None if the csv or one of its columns is missing
+    """
     csv_files = [f for f in os.listdir(os.path.join(folder_path, file_name)) if f.startswith("summary") and f.endswith(".csv")]
     if not csv_files:
-        print(f"Error: No summary.*.csv files found in {os.path.join(folder_path, file_name)}", file=log)
-        missing_arcs.append(file_name)
+        messages.append(f"Error: No summary.*.csv files found in {os.path.join(folder_path, file_name)}")
         return None
  
     largest_csv = max(csv_files, key=lambda f: int(re.search(r'\d+', f).group()))
     csv_file_path = os.path.join(folder_path, file_name, largest_csv)
     arc_name = re.sub(r'(\d)-(\d)', r'\1_\2', file_name)
-    print(f"Debug: Parsing file {csv_file_path} for arc {arc_name}", file=log)
+    if debug:
+        messages.append(f"Debug: Parsing file {csv_file_path} for arc {arc_name}")
  
+    # Only the header and the first data line are needed
     try:
         with open(csv_file_path, 'r') as fin:
-            lines = fin.readlines()
+            lines = [fin.readline(), fin.readline()]
     except FileNotFoundError:
-        print(f"Error: CSV file {csv_file_path} not found.", file=log)
-        missing_arcs.append(file_name)
+        messages.append(f"Error: CSV file {csv_file_path} not found.")
         return None
  
     header = lines[0].strip().split(',')
@@ -115,8 +160,7 @@ def parse_summary_csv(folder_path, file_name, csv_writer, log, node, corner, typ
             percentile_lb_index = header.index('Percentile LB')
             percentile_ub_index = header.index('Percentile UB')
     except ValueError as e:
-        print(f"Error: Missing expected column in header for {type_info}: {e}", file=log)
-        missing_arcs.append(file_name)
+        messages.append(f"Error: Missing expected column in header for {type_info}: {e}")
         return None
  
     try:
@@ -126,12 +170,12 @@ def parse_summary_csv(folder_path, file_name, csv_writer, log, node, corner, typ
             percentile_lb = float(data_line[percentile_lb_index]) * 1e12
             percentile_ub = float(data_line[percentile_ub_index]) * 1e12
     except (IndexError, ValueError) as e:
-        print(f"Error: Issue with data line in {csv_file_path} for {type_info}: {e}", file=log)
-        missing_arcs.append(file_name)
+        messages.append(f"Error: Issue with data line in {csv_file_path} for {type_info}: {e}")
         return None
  
     cell_name, out_pin, out_pin_direction, rel_pin, rel_pin_direction, when, fir_index, sec_index = parse_arc_info(arc_name)
-    print(f"Debug: Output pin direction for {arc_name} is {out_pin_direction}", file=log)
+    if debug:
+        messages.append(f"Debug: Output pin direction for {arc_name} is {out_pin_direction}")
  
     if type_info == 'hold':
         if out_pin_direction == 'rise':
@@ -158,11 +202,9 @@ def parse_summary_csv(folder_path, file_name, csv_writer, log, node, corner, typ
             table_type
         ]
  
-    print(f"Debug: Writing report data for {arc_name}: {report_data}", file=log)
-    csv_writer.writerow(report_data)
- 
-    done_list.append(file_name)
-    return arc_name
+    if debug:
+        messages.append(f"Debug: Report data for {arc_name}: {report_data}")
+    return report_data
  
 def parse_fmc_line(line, FMC_result, arc_name):
     if "Nominal" in line:
@@ -246,68 +288,96 @@ def parse_arc_info(key):
         replaced_list = [item.replace('not', '!') for item in when_condition]
         when = '&'.join(replaced_list)
  
-    result = (cell_name, out_pin, out_pin_direction, rel_pin, rel_pin_direction, when, fir_index, sec_index)
- 
-    print(f"Debug: Parsed arc info: {result}")
-    return result
+    return cell_name, out_pin, out_pin_direction, rel_pin, rel_pin_direction, when, fir_index, sec_index
+ 
+def harvest_arc(folder_path, file_name, type_info, debug=False):
+    """
+    Parse the FMC result of one arc folder (run by the thread pool)
+ 
+    Returns:
+        tuple: (file_name, report row or None, log messages)
+    """
+    messages = []
+    if type_info in ['delay', 'slew']:
+        report_data = parse_fmc_log(folder_path, file_name, type_info, messages, debug)
+    else:  # hold, mpw
+        report_data = parse_summary_csv(folder_path, file_name, type_info, messages, debug)
+    return file_name, report_data, messages
+ 
+def write_parquet_copy(report_file, header, rows, log):
+    """Parquet copy of the report csv (skipped if pandas/pyarrow are not available)"""
+    parquet_file = os.path.splitext(report_file)[0] + '.parquet'
+    try:
+        import pandas as pd
+        pd.DataFrame(rows, columns=header).to_parquet(parquet_file, index=False)
+    except ImportError as e:
+        print(f"Warning: Parquet copy not written ({e})", file=log)
+        return None
+    return parquet_file
  
-def main(node, corner, folder_path, type_info):
+def main(node, corner, folder_path, type_info, jobs=DEFAULT_JOBS, debug=False, parquet=True):
     print(f"Debug: Starting process with node: {node}, corner: {corner}, folder_path: {folder_path}, type_info: {type_info}")
-    file_list = [f for f in os.listdir(folder_path) if f.startswith(("combinational_", "edge_", "hold_","min_pulse_width"))]
+    file_list = sorted(f for f in os.listdir(folder_path) if f.startswith(("combinational_", "edge_", "hold_","min_pulse_width")))
  
     print(f"The number of files in the folder path are: {len(file_list)}")
     report_file = f'fmc_result_{node}_{corner}_{type_info}.csv'
     log_file = f'data_run_{node}_{corner}_{type_info}.log'
  
-    with open(report_file, 'w', newline='') as csvfile, open(log_file, 'w') as log:
-        csv_writer = csv.writer(csvfile)
-        done_list = []
-        missing_arcs = []
- 
-        header_written = False
- 
-        for file_name in file_list:
-            if not header_written:
-                if type_info in ['delay', 'slew']:
-                    header = [
-                        "Arc", "Cell_Name", "output_pin", "rel_pin", "output_pin_dir", "rel_pin_dir", "when", "first_index", "sec_index",
-                        "MC_Nominal", "MC_Early_Sigma", "MC_Early_Sigma_UB", "MC_Early_Sigma_LB",
-                        "MC_Late_Sigma", "MC_Late_Sigma_UB", "MC_Late_Sigma_LB",
-                        "MC_Meansht", "MC_Meansht_UB", "MC_Meansht_LB",
-                        "MC_Std", "MC_Std_UB", "MC_Std_LB",
-                        "MC_Skew", "MC_Skew_UB", "MC_Skew_LB",
-                        "Table_Type"
-                    ]
-                elif type_info in ['hold', 'mpw']:
-                    header = [
-                        "Arc", "Cell_Name", "output_pin", "rel_pin", "output_pin_dir", "rel_pin_dir", "when", "first_index", "sec_index",
-                        "MC_Nominal", "MC_Late_Sigma", "MC_Late_Sigma_UB", "MC_Late_Sigma_LB",
-                        "Table_Type"
-                    ]
-                csv_writer.writerow(header)
-                header_written = True
- 
-            if type_info in ['delay', 'slew']:
-                arc_name = parse_fmc_log(folder_path, file_name, csv_writer, log, node, corner, type_info)
-            elif type_info in ['hold', 'mpw']:
-                arc_name = parse_summary_csv(folder_path, file_name, csv_writer, log, node, corner, type_info, done_list, missing_arcs)
- 
-            if arc_name is None:
+    if type_info in ['delay', 'slew']:
+        header = DELAY_SLEW_HEADER
+    elif type_info in ['hold', 'mpw']:
+        header = HOLD_MPW_HEADER
+    else:
+        print(f"Error: Unknown type_info {type_info}, expected delay, slew, hold or mpw")
+        return 1
+ 
+    # The arc folders are read by a thread pool: reading the logs (on NFS) is I/O bound
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(lambda file_name: harvest_arc(folder_path, file_name, type_info, debug),
+                                    file_list))
+ 
+    rows = []
+    done_list = []
+    missing_arcs = []
+    with open(log_file, 'w') as log:
+        for file_name, report_data, messages in results:
+            for message in messages:
+                print(message, file=log)
+            if report_data is None:
                 missing_arcs.append(file_name)
+            else:
+                rows.append(report_data)
+                done_list.append(report_data[0])
+ 
+        # One output, sorted by arc
+        rows.sort(key=lambda row: row[0])
+        with open(report_file, 'w', newline='') as csvfile:
+            csv_writer = csv.writer(csvfile)
+            csv_writer.writerow(header)
+            csv_writer.writerows(rows)
+ 
+        if parquet:
+            parquet_file = write_parquet_copy(report_file, header, rows, log)
+            if parquet_file:
+                print(f"Parquet copy: {parquet_file}", file=log)
  
         print(f"Completed with {len(done_list)} arcs processed and {len(missing_arcs)} arcs missing.", file=log)
         print("Done arcs:", ', '.join(done_list), file=log)
         print("Missing arcs:", ', '.join(missing_arcs), file=log)
  
-if __name__ == "__main__":
-    if len(sys.argv) < 5:
-        print("Usage: python script.py <folder_path> <node> <corner> <type_info>")
-        sys.exit(1)
- 
-    folder_path = sys.argv[1]
-    node = sys.argv[2]
-    corner = sys.argv[3]
-    type_info = sys.argv[4]
- 
-    main(node, corner, folder_path, type_info)
+    print(f"Wrote {len(rows)} arcs to {report_file}, {len(missing_arcs)} arcs missing (see {log_file})")
+    return 0
  
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest the FMC results of the arc folders of a corner")
+    parser.add_argument("folder_path", help="DECKS directory with the arc folders")
+    parser.add_argument("node", help="Node name of the output file, e.g. n2p_v1p0")
+    parser.add_argument("corner", help="Corner, e.g. ssgnp_0p450v_m40c")
+    parser.add_argument("type_info", choices=['delay', 'slew', 'hold', 'mpw'], help="Arc type")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Arc folders read at the same time (default: {DEFAULT_JOBS})")
+    parser.add_argument("--debug", action='store_true', help="Write the per-arc debug messages to the data_run_*.log")
+    parser.add_argument("--no_parquet", action='store_true', help="Don't write the Parquet copy of the csv")
+    args = parser.parse_args()
+ 
+    sys.exit(main(args.node, args.corner, args.folder_path, args.type_info,
+                  jobs=args.jobs, debug=args.debug, parquet=not args.no_parquet))
@@ -12,6 +12,8 @@ Features:
 - Delay & slew overlap analysis
 - Comprehensive reporting with summary tables
 - Organized output in separate subdirectories
+- CI checks computed as column masks, files processed in parallel (--jobs)
+- Detailed calculations only for failing rows, or all rows with --detailed_calculation all
  
 Validation Approach:
 - Input: Sigma data from CSV files (post-processed from simulation percentile data)
@@ -21,6 +23,7 @@ Validation Approach:
 """
  
 import argparse
+import concurrent.futures
 import os
 import sys
 import pandas as pd
@@ -29,21 +32,44 @@ from datetime import datetime
 import logging
 import numpy as np
  
+# Columns of the per-row validation functions
+CI_COLUMNS = ['MC_Nominal', 'MC_Early_Sigma_UB', 'MC_Early_Sigma_LB', 'MC_Late_Sigma_UB', 'MC_Late_Sigma_LB']
+ 
+# Validation_Summary of the per-row and the column-mask checks. The arrow is
+# followed by a no-break space, as in the summaries written so far.
+DELAY_SLEW_SUMMARY = ("Early_per: range={early_range:.3f}, %={early_pct:.2f}%, pass={early_pass} | "
+                      "Late_per: range={late_range:.3f}, %={late_pct:.2f}%, pass={late_pass} | Overall: {overall_pass}")
+HOLD_MPW_RANGE_SUMMARY = "CI_per_range={ci_per_range:.3f}ps <= 10ps â†’\u00a0PASS"
+HOLD_MPW_SUMMARY = ("CI_per_range={ci_per_range:.3f}, ratio1={ratio1:.3f}<=1.15?{condition1}, "
+                    "ratio2={ratio2:.3f}<=1.035?{condition2}, range<=10?{condition3} â†’\u00a0{result}")
+           
 class CIValidator:
-    def __init__(self, data_path, types, corners, log_file):
+    def __init__(self, data_path, types, corners, log_file, jobs=None, detailed_calculation='failed'):
         self.data_path = data_path
         self.types = types
         self.corners = corners
         self.log_file = log_file
+        self.jobs = jobs if jobs else min(8, os.cpu_count() or 1)
+        self.detailed_calculation = detailed_calculation
         self.validation_results = []
         self.summary_stats = {}
         self.validated_arcs_by_type_corner = {}  # Track validated arcs by type and corner
+        self.validated_frames_by_type_corner = {}  # Validated rows by type and corner, for cross-corner output
        
         # Setup logging
         self.setup_logging()
        
         # Create output subdirectories
         self.create_output_directories()
+           
+    def __getstate__(self):
+        """Worker processes get the settings only, not the results collected so far"""
+        state = self.__dict__.copy()
+        state['validation_results'] = []
+        state['summary_stats'] = {}
+        state['validated_arcs_by_type_corner'] = {}
+        state['validated_frames_by_type_corner'] = {}
+        return state
        
     def create_output_directories(self):
         """Create subdirectories for organizing output files"""
@@ -223,8 +249,10 @@ class CIValidator:
             calc_details.append(f"OVERALL RESULT: {overall_pass} (Early PASS AND Late PASS)")
            
             # Summary for CSV
-            summary = f"Early_per: range={early_per_range:.3f}, %={early_per_range/abs(nominal)*100:.2f}%, pass={early_pass} | " + \
-                     f"Late_per: range={late_per_range:.3f}, %={late_per_range/abs(nominal)*100:.2f}%, pass={late_pass} | Overall: {overall_pass}"
+            summary = DELAY_SLEW_SUMMARY.format(
+                early_range=early_per_range, early_pct=early_per_range/abs(nominal)*100, early_pass=early_pass,
+                late_range=late_per_range, late_pct=late_per_range/abs(nominal)*100, late_pass=late_pass,
+                overall_pass=overall_pass)
            
             detailed_calc = " | ".join(calc_details)
            
@@ -270,7 +298,7 @@ class CIValidator:
            
             if condition3:
                 calc_details.append(f"RESULT: PASS (Condition 3 satisfied)")
-                summary = f"CI_per_range={ci_per_range:.3f}ps <= 10ps â†’ PASS"
+                summary = HOLD_MPW_RANGE_SUMMARY.format(ci_per_range=ci_per_range)
                 detailed_calc = " | ".join(calc_details)
                 return True, summary, detailed_calc
            
@@ -329,8 +357,9 @@ class CIValidator:
             calc_details.append(f"  (Condition 1 AND Condition 2) = {condition1 and condition2}")
             calc_details.append(f"  OVERALL: ({condition1 and condition2}) OR {condition3} = {overall_pass}")
            
-            summary = f"CI_per_range={ci_per_range:.3f}, ratio1={ratio1:.3f}<=1.15?{condition1}, " + \
-                     f"ratio2={ratio2:.3f}<=1.035?{condition2}, range<=10?{condition3} â†’ {'PASS' if overall_pass else 'FAIL'}"
+            summary = HOLD_MPW_SUMMARY.format(
+                ci_per_range=ci_per_range, ratio1=ratio1, condition1=condition1, ratio2=ratio2,
+                condition2=condition2, condition3=condition3, result='PASS' if overall_pass else 'FAIL')
            
             detailed_calc = " | ".join(calc_details)
            
@@ -339,6 +368,113 @@ class CIValidator:
         except Exception as e:
             return False, f"Error in validation: {str(e)}", f"Calculation error: {str(e)}"
    
+    def check_ci_delay_slew(self, df, type_name):
+        """
+        Validate CI for all delay/slew rows at once - same criteria as validate_ci_row_delay_slew
+           
+        Returns:
+            tuple: (pass mask, list of summaries)
+        """
+        if type_name == 'delay':
+            percentage_threshold = 0.04  # 4%
+            absolute_threshold = 2       # 2ps
+        else:  # slew
+            percentage_threshold = 0.08  # 8%
+            absolute_threshold = 4       # 4ps
+           
+        nominal = df['MC_Nominal'].to_numpy(dtype=float)
+        abs_nominal = np.abs(nominal)
+        nominal_too_small = abs_nominal < 1e-12
+           
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # mc_per = mc_nominal - 3 * mc_early_sigma, mc_per = mc_nominal + 3 * mc_late_sigma
+            early_per_range = np.abs((nominal - 3 * df['MC_Early_Sigma_UB'].to_numpy(dtype=float)) -
+                                     (nominal - 3 * df['MC_Early_Sigma_LB'].to_numpy(dtype=float)))
+            late_per_range = np.abs((nominal + 3 * df['MC_Late_Sigma_UB'].to_numpy(dtype=float)) -
+                                    (nominal + 3 * df['MC_Late_Sigma_LB'].to_numpy(dtype=float)))
+            early_ratio = early_per_range / abs_nominal
+            late_ratio = late_per_range / abs_nominal
+            early_pass = (early_ratio <= percentage_threshold) | (early_per_range <= absolute_threshold)
+            late_pass = (late_ratio <= percentage_threshold) | (late_per_range <= absolute_threshold)
+        overall_pass = ~nominal_too_small & early_pass & late_pass
+           
+        summaries = [
+            "MC_Nominal value too close to zero" if too_small else
+            DELAY_SLEW_SUMMARY.format(early_range=early_range, early_pct=early_pct, early_pass=early_ok,
+                                      late_range=late_range, late_pct=late_pct, late_pass=late_ok,
+                                      overall_pass=ok)
+            for too_small, early_range, early_pct, early_ok, late_range, late_pct, late_ok, ok in zip(
+                nominal_too_small.tolist(), early_per_range.tolist(), (early_ratio * 100).tolist(),
+                early_pass.tolist(), late_per_range.tolist(), (late_ratio * 100).tolist(),
+                late_pass.tolist(), overall_pass.tolist())
+        ]
+        return overall_pass, summaries
+           
+    def check_ci_hold_mpw(self, df, type_name):
+        """
+        Validate CI for all hold/mpw rows at once - same criteria as validate_ci_row_hold_mpw
+           
+        Returns:
+            tuple: (pass mask, list of summaries)
+        """
+        nominal = df['MC_Nominal'].to_numpy(dtype=float)
+        ci_per_ub = nominal + 3 * df['MC_Late_Sigma_UB'].to_numpy(dtype=float)
+        ci_per_lb = nominal + 3 * df['MC_Late_Sigma_LB'].to_numpy(dtype=float)
+        ci_per_range = np.abs(ci_per_ub - ci_per_lb)
+        ci_per_middle = (ci_per_ub + ci_per_lb) / 2
+           
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Condition 3: CI range <= 10ps, then conditions 1 and 2 (if their denominators are not ~0)
+            condition3 = ci_per_range <= 10
+            denominator1 = ci_per_lb - nominal
+            denominator1_too_small = ~condition3 & (np.abs(denominator1) < 1e-12)
+            denominator2 = ci_per_middle - nominal
+            denominator2_too_small = ~condition3 & ~denominator1_too_small & (np.abs(denominator2) < 1e-12)
+            ratio1 = np.abs((ci_per_ub - nominal) / denominator1)
+            ratio2 = ci_per_range / np.abs(denominator2)
+            condition1 = ratio1 <= 1.15
+            condition2 = ratio2 <= 1.035
+        overall_pass = condition3 | (~denominator1_too_small & ~denominator2_too_small & condition1 & condition2)
+           
+        summaries = []
+        for cond3, den1_small, den2_small, per_range, r1, cond1, r2, cond2, ok in zip(
+                condition3.tolist(), denominator1_too_small.tolist(), denominator2_too_small.tolist(),
+                ci_per_range.tolist(), ratio1.tolist(), condition1.tolist(), ratio2.tolist(),
+                condition2.tolist(), overall_pass.tolist()):
+            if cond3:
+                summaries.append(HOLD_MPW_RANGE_SUMMARY.format(ci_per_range=per_range))
+            elif den1_small:
+                summaries.append("CI_Per_LB - MC_Nominal too close to zero")
+            elif den2_small:
+                summaries.append("CI_per_middle - MC_Nominal too close to zero")
+            else:
+                summaries.append(HOLD_MPW_SUMMARY.format(
+                    ci_per_range=per_range, ratio1=r1, condition1=cond1, ratio2=r2, condition2=cond2,
+                    condition3=cond3, result='PASS' if ok else 'FAIL'))
+        return overall_pass, summaries
+           
+    def get_detailed_calculations(self, df, type_name, is_valid):
+        """
+        Detailed calculation strings from the per-row validation functions, built only for
+        the failing rows (or all rows with detailed_calculation 'all'); empty for the others
+        """
+        details = [''] * len(df)
+        if self.detailed_calculation == 'all':
+            rows = range(len(df))
+        else:
+            rows = np.flatnonzero(~is_valid).tolist()
+        if type_name in ['delay', 'slew']:
+            validate_row = self.validate_ci_row_delay_slew
+        else:  # hold, mpw
+            validate_row = self.validate_ci_row_hold_mpw
+           
+        columns = [col for col in CI_COLUMNS if col in df.columns]
+        values = {col: df[col].tolist() for col in columns}
+        for i in rows:
+            row = {col: values[col][i] for col in columns}
+            details[i] = validate_row(row, type_name)[2]
+        return details
+           
     def validate_data_types(self, df, type_name):
         """Validate data types in CSV"""
         numeric_columns = ['MC_Nominal', 'MC_Late_Sigma', 'MC_Late_Sigma_UB', 'MC_Late_Sigma_LB']
@@ -357,16 +493,44 @@ class CIValidator:
         return True
    
     def process_csv_file(self, file_path, corner, type_name):
-        """Process a single CSV file and generate validated/failed output files"""
+        """
+        Validate the structure of a single CSV file, validate CI and generate validated/failed output files
+           
+        Runs in a worker process with --jobs > 1, so the validator state is only updated
+        from the returned result, by record_file_result.
+           
+        Returns:
+            dict: Row counts and validated rows of the file, None if the file failed
+        """
         try:
-            self.logger.info(f"\nProcessing: {os.path.basename(file_path)}")
+            self.logger.info(f"\nValidating structure: {os.path.basename(file_path)}")
            
-            # Read CSV file
+            # Read CSV file once, for structure validation and processing
             df = pd.read_csv(file_path)
            
-            if df.empty:
-                self.logger.warning(f"  File is empty, skipping")
-                return True
+            # Basic validations
+            if df.empty:
+                self.logger.error(f"  ERROR: File is empty")
+                return None
+           
+            # Log basic info
+            self.logger.info(f"  Rows: {len(df)}, Columns: {len(df.columns)}")
+            self.logger.info(f"  Headers: {list(df.columns)}")
+           
+            # Validate headers
+            if not self.validate_headers(df, type_name):
+                return None
+           
+            # Validate data types
+            if not self.validate_data_types(df, type_name):
+                return None
+           
+        except Exception as e:
+            self.logger.error(f"  ERROR processing {file_path}: {str(e)}")
+            return None
+           
+        try:
+            self.logger.info(f"\nProcessing: {os.path.basename(file_path)}")
            
             # Convert numeric columns
             numeric_columns = ['MC_Nominal', 'MC_Late_Sigma', 'MC_Late_Sigma_UB', 'MC_Late_Sigma_LB']
@@ -377,34 +541,20 @@ class CIValidator:
                 if col in df.columns:
                     df[col] = pd.to_numeric(df[col], errors='coerce')
            
+            # Apply validation to all rows at once
+            if type_name in ['delay', 'slew']:
+                is_valid, summaries = self.check_ci_delay_slew(df, type_name)
+            else:  # hold, mpw
+                is_valid, summaries = self.check_ci_hold_mpw(df, type_name)
+           
             # Add validation result columns
-            df['Validation_Result'] = ''
-            df['Validation_Summary'] = ''
-            df['Validation_Detailed_Calculation'] = ''
-           
-            # Apply validation to each row
-            validated_rows = []
-            failed_rows = []
-           
-            for idx, row in df.iterrows():
-                if type_name in ['delay', 'slew']:
-                    is_valid, summary, detailed_calc = self.validate_ci_row_delay_slew(row, type_name)
-                else:  # hold, mpw
-                    is_valid, summary, detailed_calc = self.validate_ci_row_hold_mpw(row, type_name)
-               
-                # Update validation columns
-                df.at[idx, 'Validation_Result'] = 'PASS' if is_valid else 'FAIL'
-                df.at[idx, 'Validation_Summary'] = summary
-                df.at[idx, 'Validation_Detailed_Calculation'] = detailed_calc
-               
-                if is_valid:
-                    validated_rows.append(idx)
-                else:
-                    failed_rows.append(idx)
+            df['Validation_Result'] = np.where(is_valid, 'PASS', 'FAIL')
+            df['Validation_Summary'] = summaries
+            df['Validation_Detailed_Calculation'] = self.get_detailed_calculations(df, type_name, is_valid)
            
             # Create output DataFrames
-            validated_df = df.loc[validated_rows].copy()
-            failed_df = df.loc[failed_rows].copy()
+            validated_df = df[is_valid].copy()
+            failed_df = df[~is_valid].copy()
            
             # Generate output file names and save to subdirectories
             base_name = os.path.splitext(os.path.basename(file_path))[0]
@@ -438,40 +588,80 @@ class CIValidator:
                     if i >= 1:  # Only show first 2 examples
                         break
            
-            # Store statistics for summary table
-            key = f"{corner}_{type_name}"
-            if key not in self.summary_stats:
-                self.summary_stats[key] = {
-                    'corner': corner,
-                    'type': type_name,
-                    'total_files': 0,
-                    'total_rows': 0,
-                    'validated_rows': 0,
-                    'failed_rows': 0
-                }
-           
-            self.summary_stats[key]['total_files'] += 1
-            self.summary_stats[key]['total_rows'] += total_rows
-            self.summary_stats[key]['validated_rows'] += validated_count
-            self.summary_stats[key]['failed_rows'] += failed_count
-           
-            # Track validated arcs for cross-corner analysis
-            if not validated_df.empty and 'Arc' in validated_df.columns:
-                type_corner_key = f"{type_name}_{corner}"
-                validated_arcs = set(validated_df['Arc'].unique())
-               
-                if type_corner_key not in self.validated_arcs_by_type_corner:
-                    self.validated_arcs_by_type_corner[type_corner_key] = set()
-               
-                self.validated_arcs_by_type_corner[type_corner_key].update(validated_arcs)
-               
-                self.logger.info(f"  Tracked {len(validated_arcs)} unique validated arcs for {type_name}-{corner}")
-           
-            return True
+            return {
+                'total_rows': total_rows,
+                'validated_rows': validated_count,
+                'failed_rows': failed_count,
+                'validated_file': os.path.basename(validated_file),
+                'validated_df': validated_df
+            }
            
         except Exception as e:
             self.logger.error(f"  Error processing {file_path}: {str(e)}")
-            return False
+            return None
+           
+    def record_file_result(self, corner, type_name, result):
+        """Add the result of process_csv_file to the summary statistics and cross-corner data"""
+        # Store statistics for summary table
+        key = f"{corner}_{type_name}"
+        if key not in self.summary_stats:
+            self.summary_stats[key] = {
+                'corner': corner,
+                'type': type_name,
+                'total_files': 0,
+                'total_rows': 0,
+                'validated_rows': 0,
+                'failed_rows': 0
+            }
+           
+        self.summary_stats[key]['total_files'] += 1
+        self.summary_stats[key]['total_rows'] += result['total_rows']
+        self.summary_stats[key]['validated_rows'] += result['validated_rows']
+        self.summary_stats[key]['failed_rows'] += result['failed_rows']
+           
+        # Track validated arcs (and keep the validated rows) for cross-corner analysis
+        validated_df = result['validated_df']
+        if not validated_df.empty and 'Arc' in validated_df.columns:
+            type_corner_key = f"{type_name}_{corner}"
+            validated_arcs = set(validated_df['Arc'].unique())
+           
+            if type_corner_key not in self.validated_arcs_by_type_corner:
+                self.validated_arcs_by_type_corner[type_corner_key] = set()
+                self.validated_frames_by_type_corner[type_corner_key] = []
+           
+            self.validated_arcs_by_type_corner[type_corner_key].update(validated_arcs)
+            self.validated_frames_by_type_corner[type_corner_key].append((result['validated_file'], validated_df))
+           
+            self.logger.info(f"  Tracked {len(validated_arcs)} unique validated arcs for {type_name}-{corner}")
+           
+    def iter_file_results(self, tasks):
+        """
+        Process the (corner, type, file) tasks with self.jobs processes
+           
+        Yields:
+            tuple: (corner, type_name, result of process_csv_file), in task order; the
+                   log messages of each file are logged in the same order
+        """
+        jobs = min(self.jobs, len(tasks))
+        if jobs <= 1:
+            for corner, type_name, file_path in tasks:
+                yield corner, type_name, self.process_csv_file(file_path, corner, type_name)
+            return
+           
+        self.logger.info(f"Processing {len(tasks)} files with {jobs} processes")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(process_csv_file_task, self, file_path, corner, type_name)
+                       for corner, type_name, file_path in tasks]
+            for (corner, type_name, file_path), future in zip(tasks, futures):
+                try:
+                    result, records = future.result()
+                except Exception as e:
+                    self.logger.error(f"  ERROR processing {file_path}: {str(e)}")
+                    yield corner, type_name, None
+                    continue
+                for level, msg in records:
+                    self.logger.log(level, msg)
+                yield corner, type_name, result
    
     def validate_csv_structure_and_process(self, csv_files):
         """Validate CSV file structure and process files"""
@@ -481,49 +671,19 @@ class CIValidator:
        
         validation_passed = True
         processed_files = 0
-        total_validated_rows = 0
-        total_failed_rows = 0
        
+        tasks = []
         for corner in self.corners:
             for type_name in self.types:
-                files = csv_files.get(corner, {}).get(type_name, [])
+                for file_path in csv_files.get(corner, {}).get(type_name, []):
+                    tasks.append((corner, type_name, file_path))
                
-                for file_path in files:
-                    try:
-                        self.logger.info(f"\nValidating structure: {os.path.basename(file_path)}")
-                       
-                        # Read CSV file for structure validation
-                        df = pd.read_csv(file_path)
-                       
-                        # Basic validations
-                        if df.empty:
-                            self.logger.error(f"  ERROR: File is empty")
-                            validation_passed = False
-                            continue
-                       
-                        # Log basic info
-                        self.logger.info(f"  Rows: {len(df)}, Columns: {len(df.columns)}")
-                        self.logger.info(f"  Headers: {list(df.columns)}")
-                       
-                        # Validate headers
-                        if not self.validate_headers(df, type_name):
-                            validation_passed = False
-                            continue
-                       
-                        # Validate data types
-                        if not self.validate_data_types(df, type_name):
-                            validation_passed = False
-                            continue
-                       
-                        # Process the file (validate CI and generate output files)
-                        if self.process_csv_file(file_path, corner, type_name):
-                            processed_files += 1
-                        else:
-                            validation_passed = False
-                       
-                    except Exception as e:
-                        self.logger.error(f"  ERROR processing {file_path}: {str(e)}")
-                        validation_passed = False
+        for corner, type_name, result in self.iter_file_results(tasks):
+            if result is None:
+                validation_passed = False
+                continue
+            self.record_file_result(corner, type_name, result)
+            processed_files += 1
        
         self.logger.info(f"\nProcessing Summary: {processed_files} files processed successfully")
         return validation_passed
@@ -590,40 +750,42 @@ class CIValidator:
             arc_details = []
            
             for corner in self.corners:
-                # Look for validated files for this type and corner
-                pattern = os.path.join(self.validated_dir, f"fmc_*_{corner}_{type_name}_VALIDATED.csv")
-                matching_files = glob.glob(pattern)
-               
-                for file_path in matching_files:
-                    try:
-                        df = pd.read_csv(file_path)
-                        if 'Arc' in df.columns:
-                            # Filter for arcs that are in our cross-corner validated set
-                            filtered_df = df[df['Arc'].isin(validated_arcs)].copy()
-                            if not filtered_df.empty:
-                                filtered_df['Source_Corner'] = corner
-                                filtered_df['Source_File'] = os.path.basename(file_path)
-                                arc_details.append(filtered_df)
-                    except Exception as e:
-                        self.logger.warning(f"  Error reading {file_path}: {str(e)}")
+                # Validated rows of this type and corner, kept in memory by record_file_result
+                type_corner_key = f"{type_name}_{corner}"
+                for validated_file, df in self.validated_frames_by_type_corner.get(type_corner_key, []):
+                    # Filter for arcs that are in our cross-corner validated set
+                    filtered_df = df[df['Arc'].isin(validated_arcs)].copy()
+                    if not filtered_df.empty:
+                        filtered_df['Source_Corner'] = corner
+                        filtered_df['Source_File'] = validated_file
+                        arc_details.append(filtered_df)
            
             if arc_details:
                 # Combine all data
                 combined_df = pd.concat(arc_details, ignore_index=True)
                
+                # Collect corners, files and occurrences of every arc in one pass
+                arc_corners = {}
+                arc_files = {}
+                arc_occurrences = {}
+                for arc, corner, file_name in zip(combined_df['Arc'], combined_df['Source_Corner'],
+                                                  combined_df['Source_File']):
+                    arc_corners.setdefault(arc, set()).add(corner)
+                    arc_files.setdefault(arc, set()).add(file_name)
+                    arc_occurrences[arc] = arc_occurrences.get(arc, 0) + 1
+           
                 # Create summary by arc
                 arc_summary = []
                 for arc in sorted(validated_arcs):
-                    arc_data = combined_df[combined_df['Arc'] == arc]
-                    corners_found = sorted(arc_data['Source_Corner'].unique())
-                    files_found = sorted(arc_data['Source_File'].unique())
+                    corners_found = sorted(arc_corners.get(arc, set()))
+                    files_found = sorted(arc_files.get(arc, set()))
                    
                     arc_summary.append({
                         'Arc': arc,
                         'Validated_Corners': ', '.join(corners_found),
                         'Corners_Count': len(corners_found),
                         'Source_Files': ', '.join(files_found),
-                        'Total_Occurrences': len(arc_data)
+                        'Total_Occurrences': arc_occurrences.get(arc, 0)
                     })
                
                 # Save summary file
@@ -1020,12 +1182,39 @@ class CIValidator:
         self.logger.info("CI Validation completed successfully!")
         return True
  
+class BufferedLogger:
+    """Collects the log messages of a worker process, logged by the main process in file order"""
+    def __init__(self):
+        self.records = []
+           
+    def log(self, level, msg):
+        self.records.append((level, msg))
+           
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+           
+    def warning(self, msg):
+        self.log(logging.WARNING, msg)
+           
+    def error(self, msg):
+        self.log(logging.ERROR, msg)
+           
+def process_csv_file_task(validator, file_path, corner, type_name):
+    """Worker process entry: process_csv_file of the validator copy, with its log messages"""
+    validator.logger = BufferedLogger()
+    result = validator.process_csv_file(file_path, corner, type_name)
+    return result, validator.logger.records
+           
 def main():
     parser = argparse.ArgumentParser(description='CI Validation Script')
     parser.add_argument('--data_path', required=True, help='Path to data directory')
     parser.add_argument('--types', nargs='+', required=True, help='List of types')
     parser.add_argument('--corners', nargs='+', required=True, help='List of corners')
     parser.add_argument('--log_file', required=True, help='Log file path')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Number of files processed in parallel (default: number of CPUs, at most 8)')
+    parser.add_argument('--detailed_calculation', choices=['failed', 'all'], default='failed',
+                        help='Rows that get the Validation_Detailed_Calculation column (default: failed)')
    
     args = parser.parse_args()
    
@@ -1035,7 +1224,8 @@ def main():
         sys.exit(1)
    
     # Create validator and run validation
-    validator = CIValidator(args.data_path, args.types, args.corners, args.log_file)
+    validator = CIValidator(args.data_path, args.types, args.corners, args.log_file,
+                            jobs=args.jobs, detailed_calculation=args.detailed_calculation)
    
     try:
         success = validator.run_validation()
@@ -1046,4 +1236,3 @@ def main():
  
 if __name__ == "__main__":
     main()
- 
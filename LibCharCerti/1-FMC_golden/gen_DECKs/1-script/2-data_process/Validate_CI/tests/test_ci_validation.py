@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ci_validation import CIValidator, CI_COLUMNS  # noqa: E402
+
+NAN = float('nan')
+
+# MC_Nominal, MC_Early_Sigma_UB, MC_Early_Sigma_LB, MC_Late_Sigma_UB, MC_Late_Sigma_LB
+DELAY_SLEW_ROWS = [
+    (50.0, 1.0, 0.9, 1.1, 1.0),       # pass
+    (50.0, 4.0, 1.0, 1.1, 1.0),       # early range too wide
+    (1e-13, 1.0, 0.9, 1.1, 1.0),      # nominal too close to zero
+    (NAN, 1.0, 0.9, 1.1, 1.0),
+    (50.0, NAN, 0.9, 1.1, 1.0),
+]
+HOLD_MPW_ROWS = [
+    (20.0, 0.0, 0.0, 2.0, 1.0),       # range <= 10ps
+    (20.0, 0.0, 0.0, 30.0, 20.0),     # conditions 1 and 2
+    (20.0, 0.0, 0.0, 40.0, 10.0),     # ratios fail
+    (20.0, 0.0, 0.0, 5.0, 0.0),       # CI_Per_LB - MC_Nominal too close to zero
+    (20.0, 0.0, 0.0, 5.0, -5.0),      # CI_per_middle - MC_Nominal too close to zero
+    (NAN, 0.0, 0.0, 30.0, 20.0),
+    (20.0, 0.0, 0.0, NAN, 20.0),
+]
+
+
+def _validator(tmp_path):
+    return CIValidator(str(tmp_path), ['delay', 'slew', 'hold', 'mpw'], [],
+                       str(tmp_path / "ci_validation.log"))
+
+
+def _checkSameAsPerRow(df, type_name, check, validate_row):
+    is_valid, summaries = check(df, type_name)
+    for i, row in enumerate(df.to_dict('records')):
+        row_valid, row_summary, _ = validate_row(row, type_name)
+        assert summaries[i] == row_summary, (type_name, row)
+        assert bool(is_valid[i]) == row_valid, (type_name, row)
+
+
+def test_check_ci_delay_slew_summaries(tmp_path):
+    validator = _validator(tmp_path)
+    df = pd.DataFrame(DELAY_SLEW_ROWS, columns=CI_COLUMNS)
+    for type_name in ('delay', 'slew'):
+        _checkSameAsPerRow(df, type_name, validator.check_ci_delay_slew,
+                           validator.validate_ci_row_delay_slew)
+
+
+def test_check_ci_hold_mpw_summaries(tmp_path):
+    validator = _validator(tmp_path)
+    df = pd.DataFrame(HOLD_MPW_ROWS, columns=CI_COLUMNS)
+    for type_name in ('hold', 'mpw'):
+        _checkSameAsPerRow(df, type_name, validator.check_ci_hold_mpw,
+                           validator.validate_ci_row_hold_mpw)
+    _, summaries = validator.check_ci_hold_mpw(df, 'hold')
+    # The arrow of the summaries is followed by a no-break space
+    assert summaries[0].endswith("\u00a0PASS") and summaries[2].endswith("\u00a0FAIL")
@@ -7,6 +7,10 @@ import sys
 import logging
 import datetime
 from pathlib import Path
+
+# Shared criteria engine in get_PR/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pr_criteria
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.table import Table
@@ -48,6 +52,8 @@ Outputs:
 - moments_PR_table_with_waivers.csv (moments only, 3 pass rates)
 - combined_sigma_moments_PR_summary.csv (combined summary table)
 - combined_sigma_moments_visualization.png (combined pivot heatmap)
+
+The checks are evaluated over whole columns by pr_criteria.evaluate_waivers.
 """
 
 def setup_logging(input_file):
@@ -63,178 +69,6 @@ def setup_logging(input_file):
     logging.info(f"Processing file: {os.path.basename(input_file)}")
     return None
 
-def check_pass_with_waivers_moments(row, type_name, param_name, mc_prefix='MC', lib_prefix='Lib'):
-    """
-    Unified pass checking function with structured waivers for moments data
-
-    Base Pass Criteria:
-    - Check 1: Error-Based Pass (rel_pass OR abs_pass)
-    - Base Pass = Check 1 ONLY (CI bounds NOT included in base)
-
-    Waivers:
-    - Waiver 1: CI Enlargement (CI +/- 6%)
-      * CI bounds checking ONLY applied here with 6% enlargement
-      * lib_value within [CI_LB - 6%*CI_width, CI_UB + 6%*CI_width]
-    - Waiver 2: Optimistic Error Only (lib < mc)
-
-    Args:
-        row: DataFrame row with data
-        type_name: 'delay' or 'slew'
-        param_name: Parameter name ('Std', 'Skew', 'Meanshift')
-        mc_prefix: Prefix for MC columns (default: 'MC')
-        lib_prefix: Prefix for lib columns (default: 'Lib')
-
-    Returns:
-        dict: {
-            'base_pass': bool,
-            'pass_reason': str,  # rel_pass|abs_pass|both|fail
-            'waiver1_ci_enlarged': bool,
-            'error_direction': 'optimistic'|'pessimistic',
-            'final_status': 'Pass'|'Waived_CI'|'Fail',
-            'abs_err': float,
-            'rel_err': float,
-            'mc_value': float,
-            'lib_value': float,
-            'mc_ci_lb': float,
-            'mc_ci_ub': float
-        }
-    """
-    arc_name = row['Arc']
-    logging.debug(f"Checking {param_name} for Arc: {arc_name}")
-
-    # Extract necessary values
-    rel_pin_slew = row['rel_pin_slew']
-
-    try:
-        # Get MC and Lib values
-        mc_value = row[f"{mc_prefix}_{param_name}"]
-        lib_value = row[f"{lib_prefix}_{param_name}"]
-
-        # Get absolute error
-        if f"{param_name}_abs_err" in row:
-            abs_err = row[f"{param_name}_abs_err"]
-        else:
-            abs_err = lib_value - mc_value
-
-        # Use original moments method - get pre-calculated relative errors if available
-        if f"{param_name}_rel_err" in row:
-            rel_err = row[f"{param_name}_rel_err"]
-            logging.debug(f"  Using pre-calculated rel_err: {rel_err}")
-        else:
-            rel_err = (lib_value - mc_value) / abs(mc_value) if mc_value != 0 else 0
-            logging.debug(f"  Calculated rel_err using MC value denominator: {rel_err}")
-
-        # For moments data, we need to estimate CI bounds since they're not explicitly provided
-        # Use a conservative 10% margin around the MC value as CI bounds
-        mc_value_abs = abs(mc_value)
-        ci_width_percent = 0.1  # 10% of the value as CI width
-        mc_ci_lb = mc_value - mc_value_abs * ci_width_percent
-        mc_ci_ub = mc_value + mc_value_abs * ci_width_percent
-
-        logging.debug(f"  rel_pin_slew: {rel_pin_slew}")
-        logging.debug(f"  {mc_prefix}_{param_name}: {mc_value}")
-        logging.debug(f"  {lib_prefix}_{param_name}: {lib_value}")
-        logging.debug(f"  Estimated MC CI: [{mc_ci_lb}, {mc_ci_ub}]")
-        logging.debug(f"  abs_err: {abs_err}, rel_err: {rel_err}")
-
-    except KeyError as e:
-        logging.error(f"Missing column for {param_name}: {e}")
-        return {
-            'base_pass': False, 'pass_reason': 'missing_data', 'waiver1_ci_enlarged': False,
-            'error_direction': 'unknown', 'final_status': 'Fail',
-            'abs_err': None, 'rel_err': None, 'mc_value': None, 'lib_value': None,
-            'mc_ci_lb': None, 'mc_ci_ub': None
-        }
-
-    # Set thresholds based on type and parameter (preserved from original)
-    if type_name == 'delay':
-        if param_name == 'Meanshift':
-            rel_threshold = 0.01  # 1% for moments meanshift
-            ps_value = 1
-            slew_multiplier = 0.005
-        elif param_name == 'Std':
-            rel_threshold = 0.02  # 2% for moments std
-            ps_value = 1
-            slew_multiplier = 0.005
-        else:  # Skew
-            rel_threshold = 0.05  # 5% for moments skew
-            ps_value = 1
-            slew_multiplier = 0.005
-    else:  # slew
-        if param_name == 'Meanshift':
-            rel_threshold = 0.02  # 2% for moments meanshift
-            ps_value = 2  # 2ps for slew
-            slew_multiplier = 0.005
-        elif param_name == 'Std':
-            rel_threshold = 0.04  # 4% for moments std
-            ps_value = 2
-            slew_multiplier = 0.005
-        else:  # Skew
-            rel_threshold = 0.10  # 10% for moments skew
-            ps_value = 2
-            slew_multiplier = 0.005
-
-    # **CHECK 1: Error-Based Pass (rel OR abs)**
-    rel_pass = abs(rel_err) <= rel_threshold
-    abs_threshold = max(slew_multiplier * rel_pin_slew, ps_value * 1e-12)
-    abs_pass = abs(abs_err) <= abs_threshold
-
-    error_based_pass = rel_pass or abs_pass
-
-    # **BASE PASS = Check 1 ONLY (error-based)**
-    # CI bounds checking is REMOVED from base pass
-    base_pass = error_based_pass
-
-    # Determine pass reason
-    if base_pass:
-        if rel_pass and abs_pass:
-            pass_reason = "both"
-        elif rel_pass:
-            pass_reason = "rel_pass"
-        elif abs_pass:
-            pass_reason = "abs_pass"
-        else:
-            pass_reason = "unknown"
-    else:
-        pass_reason = "fail"
-
-    # **WAIVER 1: CI Enlargement (6%)**
-    # CI bounds checking is ONLY applied here with 6% enlargement
-    ci_lb = min(mc_ci_lb, mc_ci_ub)
-    ci_ub = max(mc_ci_lb, mc_ci_ub)
-    ci_width = abs(ci_ub - ci_lb)
-    ci_enlargement_amount = ci_width * 0.06  # 6% enlargement
-    enlarged_lb = ci_lb - ci_enlargement_amount
-    enlarged_ub = ci_ub + ci_enlargement_amount
-    waiver1_ci_enlarged = (enlarged_lb <= lib_value <= enlarged_ub)
-
-    # **WAIVER 2: Determine Error Direction**
-    error_direction = 'optimistic' if lib_value < mc_value else 'pessimistic'
-
-    # **FINAL STATUS**
-    if base_pass:
-        final_status = "Pass"
-    elif waiver1_ci_enlarged:
-        final_status = "Waived_CI"
-    else:
-        final_status = "Fail"
-
-    logging.debug(f"  Results for {param_name}: base_pass={base_pass}, waiver1={waiver1_ci_enlarged}, error_dir={error_direction}, final={final_status}")
-
-    return {
-        'base_pass': base_pass,
-        'pass_reason': pass_reason,
-        'waiver1_ci_enlarged': waiver1_ci_enlarged,
-        'error_direction': error_direction,
-        'final_status': final_status,
-        'abs_err': abs_err,
-        'rel_err': rel_err,
-        'mc_value': mc_value,
-        'lib_value': lib_value,
-        'mc_ci_lb': mc_ci_lb,
-        'mc_ci_ub': mc_ci_ub
-    }
-
 def enhanced_corner_extraction(file_name):
     """Enhanced corner extraction using regex"""
     base_name = file_name.replace('.rpt', '').replace('MC_', '')
@@ -393,149 +227,23 @@ def process_moments_file_with_waivers(file_path, type_name):
         # Process each parameter with waiver system
         waiver_summary = {}  # Track waiver statistics
 
-        for param in ['Std', 'Skew', 'Meanshift']:
+        rel_pin_slew = df['rel_pin_slew'].to_numpy()
+        for param in pr_criteria.MOMENTS_PARAMS:
             logging.info(f"Processing moments parameter with waiver system: {param}")
 
-            # Initialize tracking lists for new waiver system
-            mc_value_list = []
-            lib_value_list = []
-            mc_ci_lb_list = []
-            mc_ci_ub_list = []
-            abs_err_list = []
-            rel_err_list = []
-            base_pass_list = []
-            pass_reason_list = []
-            waiver1_ci_enlarged_list = []
-            error_direction_list = []
-            final_status_list = []
-
-            # Statistics for new waiver system (optimistic tracking AFTER Waiver1)
-            waiver_stats = {
-                'base_pass': 0,
-                'pass_with_waiver1': 0,
-                'total_arcs': 0,
-                'optimistic_errors': 0,
-                'pessimistic_errors': 0,
-                'optimistic_pass_waiver1': 0,     # Optimistic that pass Waiver1
-                'optimistic_fail_waiver1': 0,     # Optimistic that fail Waiver1 (can be waived)
-                'pessimistic_pass_waiver1': 0,    # Pessimistic that pass Waiver1
-                'pessimistic_fail_waiver1': 0     # Pessimistic that fail Waiver1 (cannot be waived)
-            }
-
-            for idx, row in df.iterrows():
-                arc_name = row['Arc']
-                logging.debug(f"Processing row {idx}, Arc: {arc_name}")
-
-                waiver_results = check_pass_with_waivers_moments(row, type_name, param)
-
-                # Extract results
-                base_pass = waiver_results['base_pass']
-                pass_reason = waiver_results['pass_reason']
-                waiver1_ci_enlarged = waiver_results['waiver1_ci_enlarged']
-                error_direction = waiver_results['error_direction']
-                final_status = waiver_results['final_status']
-
-                mc_value = waiver_results['mc_value']
-                lib_value = waiver_results['lib_value']
-                mc_ci_lb = waiver_results['mc_ci_lb']
-                mc_ci_ub = waiver_results['mc_ci_ub']
-                abs_err = waiver_results['abs_err']
-                rel_err = waiver_results['rel_err']
-
-                # Store results in lists
-                mc_value_list.append(mc_value)
-                lib_value_list.append(lib_value)
-                mc_ci_lb_list.append(mc_ci_lb)
-                mc_ci_ub_list.append(mc_ci_ub)
-                abs_err_list.append(abs_err)
-                rel_err_list.append(rel_err)
-                base_pass_list.append("Pass" if base_pass else "Fail")
-                pass_reason_list.append(pass_reason)
-                waiver1_ci_enlarged_list.append("Pass" if waiver1_ci_enlarged else "Fail")
-                error_direction_list.append(error_direction)
-                final_status_list.append(final_status)
-
-                # Update statistics
-                waiver_stats['total_arcs'] += 1
-
-                # Base pass rate
-                if base_pass:
-                    waiver_stats['base_pass'] += 1
-
-                # Pass with waiver1 (CI enlarged)
-                if base_pass or waiver1_ci_enlarged:
-                    waiver_stats['pass_with_waiver1'] += 1
-
-                # Track optimistic/pessimistic errors AFTER Waiver1
-                passes_waiver1 = base_pass or waiver1_ci_enlarged
-
-                if error_direction == 'optimistic':
-                    waiver_stats['optimistic_errors'] += 1
-                    if passes_waiver1:
-                        waiver_stats['optimistic_pass_waiver1'] += 1
-                    else:
-                        # Optimistic error that fails Waiver1 - can be waived
-                        waiver_stats['optimistic_fail_waiver1'] += 1
-                else:  # pessimistic
-                    waiver_stats['pessimistic_errors'] += 1
-                    if passes_waiver1:
-                        waiver_stats['pessimistic_pass_waiver1'] += 1
-                    else:
-                        # Pessimistic error that fails Waiver1 - cannot be waived
-                        waiver_stats['pessimistic_fail_waiver1'] += 1
-
-                logging.debug(f"  Results for {arc_name}, {param}: base_pass={base_pass}, waiver1={waiver1_ci_enlarged}, error_dir={error_direction}, final={final_status}")
+            # Evaluate the checks and waivers for all arcs at once
+            inputs = pr_criteria.get_moments_inputs(df, param)
+            waiver_results = pr_criteria.evaluate_waivers(inputs, rel_pin_slew, type_name, param)
 
             # Add columns to result dataframe with new structure (as per requirement)
-            result_df[f'{param}_MC_value'] = mc_value_list
-            result_df[f'{param}_Lib_value'] = lib_value_list
-            result_df[f'{param}_MC_CI_LB'] = mc_ci_lb_list
-            result_df[f'{param}_MC_CI_UB'] = mc_ci_ub_list
-            result_df[f'{param}_abs_err'] = abs_err_list
-            result_df[f'{param}_rel_err'] = rel_err_list
-            result_df[f'{param}_Base_Pass'] = base_pass_list
-            result_df[f'{param}_Pass_Reason'] = pass_reason_list
-            result_df[f'{param}_Waiver1_CI_Enlarged'] = waiver1_ci_enlarged_list
-            result_df[f'{param}_Error_Direction'] = error_direction_list
-            result_df[f'{param}_Final_Status'] = final_status_list
+            for column, values in pr_criteria.get_waiver_columns(param, waiver_results):
+                result_df[column] = values
 
             # Calculate 3 pass rates with NEW logic (optimistic tracking AFTER Waiver1)
-            total_count = waiver_stats['total_arcs']
-            if total_count > 0:
-                # Pass Rate 1: Base (error-based only)
-                base_pr = (waiver_stats['base_pass'] / total_count) * 100
-
-                # Pass Rate 2: With Waiver1 (Base + CI enlargement)
-                pr_with_waiver1 = (waiver_stats['pass_with_waiver1'] / total_count) * 100
-
-                # Pass Rate 3: Optimistic After Waiver1
-                # = (Arcs that pass Waiver1) + (Pessimistic arcs that fail Waiver1, now waived)
-                # This focuses only on optimistic errors - pessimistic failures are waived
-                pr_optimistic_after_waiver1 = ((waiver_stats['pass_with_waiver1'] + waiver_stats['pessimistic_fail_waiver1']) / total_count) * 100
-
-                waiver_summary[param] = {
-                    'base_pr': base_pr,
-                    'pr_with_waiver1': pr_with_waiver1,
-                    'pr_optimistic_after_waiver1': pr_optimistic_after_waiver1,
-                    'total_arcs': total_count,
-                    'optimistic_errors': waiver_stats['optimistic_errors'],
-                    'pessimistic_errors': waiver_stats['pessimistic_errors'],
-                    'optimistic_fail_waiver1': waiver_stats['optimistic_fail_waiver1'],
-                    'pessimistic_fail_waiver1': waiver_stats['pessimistic_fail_waiver1'],
-                    'pass_with_waiver1_count': waiver_stats['pass_with_waiver1'],
-                    'base_pass_count': waiver_stats['base_pass']
-                }
-
-                # Log detailed waiver statistics (1 digit precision)
-                logging.info(f"  {param} Waiver Analysis:")
-                logging.info(f"    Total arcs: {total_count}")
-                logging.info(f"    Optimistic errors (Lib < MC): {waiver_stats['optimistic_errors']} ({waiver_stats['optimistic_errors']/total_count*100:.1f}%)")
-                logging.info(f"    Pessimistic errors (Lib >= MC): {waiver_stats['pessimistic_errors']} ({waiver_stats['pessimistic_errors']/total_count*100:.1f}%)")
-                logging.info(f"    Base PR: {base_pr:.1f}%")
-                logging.info(f"    PR with Waiver1 (CI enlarged): {pr_with_waiver1:.1f}%")
-                logging.info(f"    After Waiver1: Optimistic failures (counted as real failures): {waiver_stats['optimistic_fail_waiver1']}")
-                logging.info(f"    After Waiver1: Pessimistic failures (waived): {waiver_stats['pessimistic_fail_waiver1']}")
-                logging.info(f"    PR with Optimistic Waiver (after Waiver1): {pr_optimistic_after_waiver1:.1f}%")
+            param_summary = pr_criteria.summarize_waivers(waiver_results)
+            if param_summary is not None:
+                waiver_summary[param] = param_summary
+                pr_criteria.log_waiver_summary(param, param_summary)
 
         # Save waiver summary for this file
         if hasattr(process_moments_file_with_waivers, 'waiver_summaries'):
@@ -9,6 +9,10 @@ import datetime
 import argparse
 from pathlib import Path
  
+# Shared criteria engine in get_PR/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pr_criteria
+ 
 """
 Enhanced Sigma Pass Rate Calculation Script
  
@@ -34,6 +38,8 @@ Final Version Features:
 - Type â†’ Corner organization with visual separators
  
 Output: sigma_PR_table.csv for moments integration
+ 
+The tiers are evaluated over whole columns by pr_criteria.evaluate_tiers.
 """
  
 def parse_arguments():
@@ -86,353 +92,6 @@ def setup_logging(input_file):
     logging.info(f"Log file created at: {log_file}")
     return log_file
  
-def detect_vendor_columns(df):
-    """
-    Auto-detect whether this is CDNS or SNPS data based on column names
-    Returns the appropriate column prefix
-    """
-    columns = df.columns.tolist()
- 
-    # Check for CDNS columns (case insensitive)
-    cdns_patterns = ['cdns_lib', 'CDNS_Lib', 'Cdns_Lib']
-    snps_patterns = ['snps_lib', 'SNPS_Lib', 'Snps_Lib']
- 
-    for col in columns:
-        for pattern in cdns_patterns:
-            if pattern in col:
-                logging.info(f"Detected CDNS vendor from column: {col}")
-                return 'CDNS_Lib'
-        for pattern in snps_patterns:
-            if pattern in col:
-                logging.info(f"Detected SNPS vendor from column: {col}")
-                return 'SNPS_Lib'
- 
-    # If no exact match, try partial matching
-    for col in columns:
-        if 'cdns' in col.lower():
-            logging.info(f"Detected CDNS vendor (partial match) from column: {col}")
-            return 'CDNS_Lib'
-        elif 'snps' in col.lower():
-            logging.info(f"Detected SNPS vendor (partial match) from column: {col}")
-            return 'SNPS_Lib'
- 
-    # Default to CDNS if nothing found
-    logging.warning("Could not detect vendor, defaulting to CDNS_Lib")
-    return 'CDNS_Lib'
- 
-def check_pass_with_waivers(row, type_name, param_name, mc_prefix='MC', lib_prefix=None):
-    """
-    Unified pass checking function with structured waivers for both sigma and moments
-
-    Base Pass Criteria:
-    - Check 1: Error-Based Pass (rel_pass OR abs_pass)
-    - Check 2: CI Bounds Pass (lib value within MC CI bounds)
-    - Base Pass = Check 1 OR Check 2
-
-    Waivers:
-    - Waiver 1: CI Enlargement (CI ± 6%)
-    - Waiver 2: Optimistic Error Only (lib < mc)
-
-    Args:
-        row: DataFrame row with data
-        type_name: 'delay', 'slew', or 'hold'
-        param_name: Parameter name (e.g., 'Early_Sigma', 'Std', 'Meanshift')
-        mc_prefix: Prefix for MC columns (default: 'MC')
-        lib_prefix: Prefix for lib columns (auto-detect if None)
-
-    Returns:
-        dict: {
-            'base_pass': bool,
-            'pass_reason': str,  # rel_pass|abs_pass|ci_bounds|fail
-            'waiver1_ci_enlarged': bool,
-            'error_direction': 'optimistic'|'pessimistic',
-            'final_status': 'Pass'|'Waived_CI'|'Fail',
-            'abs_err': float,
-            'rel_err': float,
-            'mc_value': float,
-            'lib_value': float,
-            'mc_ci_lb': float,
-            'mc_ci_ub': float
-        }
-    """
-    arc_name = row['Arc']
-    logging.debug(f"Checking {param_name} for Arc: {arc_name}")
-
-    # Extract necessary values
-    rel_pin_slew = row['rel_pin_slew']
-
-    # Auto-detect lib prefix if not provided (for sigma files)
-    if lib_prefix is None:
-        lib_prefix = detect_vendor_columns(pd.DataFrame([row]))
-
-    try:
-        # Get MC and Lib values
-        mc_value = row[f"{mc_prefix}_{param_name}"]
-        lib_value = row[f"{lib_prefix}_{param_name}"]
-
-        # Get CI bounds
-        mc_ci_lb = row[f"{mc_prefix}_{param_name}_LB"]
-        mc_ci_ub = row[f"{mc_prefix}_{param_name}_UB"]
-
-        # Get or calculate errors
-        if f"{lib_prefix}_{param_name}_Dif" in row:
-            abs_err = row[f"{lib_prefix}_{param_name}_Dif"]  # Pre-calculated
-        else:
-            abs_err = lib_value - mc_value  # Calculate
-
-        if f"{lib_prefix}_{param_name}_Rel" in row:
-            rel_err = row[f"{lib_prefix}_{param_name}_Rel"]  # Pre-calculated
-        else:
-            rel_err = (lib_value - mc_value) / abs(mc_value) if mc_value != 0 else 0  # Calculate
-
-        logging.debug(f"  rel_pin_slew: {rel_pin_slew}")
-        logging.debug(f"  {mc_prefix}_{param_name}: {mc_value}")
-        logging.debug(f"  {lib_prefix}_{param_name}: {lib_value}")
-        logging.debug(f"  MC CI: [{mc_ci_lb}, {mc_ci_ub}]")
-        logging.debug(f"  abs_err: {abs_err}, rel_err: {rel_err}")
-
-    except KeyError as e:
-        logging.error(f"Missing column for {param_name}: {e}")
-        return {
-            'base_pass': False, 'pass_reason': 'missing_data', 'waiver1_ci_enlarged': False,
-            'error_direction': 'unknown', 'final_status': 'Fail',
-            'abs_err': None, 'rel_err': None, 'mc_value': None, 'lib_value': None,
-            'mc_ci_lb': None, 'mc_ci_ub': None
-        }
-
-    # Set thresholds based on type and parameter
-    if type_name == 'delay':
-        if param_name in ['Early_Sigma', 'Late_Sigma']:
-            rel_threshold = 0.03  # 3% for sigma
-            ps_value = 1
-            slew_multiplier = 0.005
-        elif param_name == 'Meanshift':
-            rel_threshold = 0.01  # 1% for moments meanshift
-            ps_value = 1
-            slew_multiplier = 0.005
-        elif param_name == 'Std':
-            rel_threshold = 0.02  # 2% for moments std
-            ps_value = 1
-            slew_multiplier = 0.005
-        else:  # Skew
-            rel_threshold = 0.05  # 5% for moments skew
-            ps_value = 1
-            slew_multiplier = 0.005
-    elif type_name == 'slew':
-        if param_name in ['Early_Sigma', 'Late_Sigma']:
-            rel_threshold = 0.06  # 6% for sigma
-            ps_value = 2
-            slew_multiplier = 0.01
-        elif param_name == 'Meanshift':
-            rel_threshold = 0.02  # 2% for moments meanshift
-            ps_value = 1  # 1ps for slew in moments script
-            slew_multiplier = 0.005
-        elif param_name == 'Std':
-            rel_threshold = 0.04  # 4% for moments std
-            ps_value = 1
-            slew_multiplier = 0.005
-        else:  # Skew
-            rel_threshold = 0.10  # 10% for moments skew
-            ps_value = 1
-            slew_multiplier = 0.005
-    else:  # hold
-        rel_threshold = 0.03  # 3% for hold
-        ps_value = 10
-        slew_multiplier = 0.005
-
-    # **CHECK 1: Error-Based Pass (rel OR abs)**
-    rel_pass = abs(rel_err) <= rel_threshold
-    abs_threshold = max(slew_multiplier * rel_pin_slew, ps_value * 1e-12)
-    abs_pass = abs(abs_err) <= abs_threshold
-
-    error_based_pass = rel_pass or abs_pass
-
-    # **CHECK 2: CI Bounds Pass**
-    ci_lb = min(mc_ci_lb, mc_ci_ub)
-    ci_ub = max(mc_ci_lb, mc_ci_ub)
-    ci_bounds_pass = (ci_lb <= lib_value <= ci_ub)
-
-    # **BASE PASS = Check 1 OR Check 2**
-    base_pass = error_based_pass or ci_bounds_pass
-
-    # Determine pass reason
-    if base_pass:
-        if rel_pass and abs_pass:
-            pass_reason = "both"
-        elif rel_pass:
-            pass_reason = "rel_pass"
-        elif abs_pass:
-            pass_reason = "abs_pass"
-        elif ci_bounds_pass:
-            pass_reason = "ci_bounds"
-        else:
-            pass_reason = "unknown"
-    else:
-        pass_reason = "fail"
-
-    # **WAIVER 1: CI Enlargement (6%)**
-    ci_width = abs(ci_ub - ci_lb)
-    ci_enlargement_amount = ci_width * 0.06  # 6% enlargement
-    enlarged_lb = ci_lb - ci_enlargement_amount
-    enlarged_ub = ci_ub + ci_enlargement_amount
-    waiver1_ci_enlarged = (enlarged_lb <= lib_value <= enlarged_ub)
-
-    # **WAIVER 2: Determine Error Direction**
-    error_direction = 'optimistic' if lib_value < mc_value else 'pessimistic'
-
-    # **FINAL STATUS**
-    if base_pass:
-        final_status = "Pass"
-    elif waiver1_ci_enlarged:
-        final_status = "Waived_CI"
-    else:
-        final_status = "Fail"
-
-    logging.debug(f"  Results for {param_name}: base_pass={base_pass}, waiver1={waiver1_ci_enlarged}, error_dir={error_direction}, final={final_status}")
-
-    return {
-        'base_pass': base_pass,
-        'pass_reason': pass_reason,
-        'waiver1_ci_enlarged': waiver1_ci_enlarged,
-        'error_direction': error_direction,
-        'final_status': final_status,
-        'abs_err': abs_err,
-        'rel_err': rel_err,
-        'mc_value': mc_value,
-        'lib_value': lib_value,
-        'mc_ci_lb': mc_ci_lb,
-        'mc_ci_ub': mc_ci_ub
-    }
-
-def check_sigma_pass_fail_with_tiers(row, type_name, sigma_type, vendor_prefix):
-    """
-    Check sigma parameter using four-tier system with detailed tier tracking
- 
-    Args:
-        row: DataFrame row with sigma data
-        type_name: 'delay', 'slew', or 'hold'
-        sigma_type: 'Early_Sigma' or 'Late_Sigma'
-        vendor_prefix: 'CDNS_Lib' or 'SNPS_Lib'
- 
-    Returns:
-        dict: Detailed results for each tier
-    """
-    arc_name = row['Arc']
-    logging.debug(f"Checking {sigma_type} for Arc: {arc_name}")
- 
-    # Extract the necessary values
-    rel_pin_slew = row['rel_pin_slew']
- 
-    # Extract FMC and Lib values with error handling
-    try:
-        fmc_value = row[f"MC_{sigma_type}"]              # FMC golden (sim_sigma)
-        lib_value = row[f"{vendor_prefix}_{sigma_type}"] # Library value (lib_sigma)
-        fmc_lb = row[f"MC_{sigma_type}_LB"]              # FMC lower bound
-        fmc_ub = row[f"MC_{sigma_type}_UB"]              # FMC upper bound
-        abs_err = row[f"{vendor_prefix}_{sigma_type}_Dif"]      # lib_sigma - sim_sigma
-        rel_err = row[f"{vendor_prefix}_{sigma_type}_Rel"]      # Pre-calculated relative error
- 
-        # Get nominal value for denominator calculation (if available)
-        lib_nominal = row.get(f'{vendor_prefix}_Nominal', None)
- 
-        logging.debug(f"  rel_pin_slew: {rel_pin_slew}")
-        logging.debug(f"  MC_{sigma_type}: {fmc_value}")
-        logging.debug(f"  {vendor_prefix}_{sigma_type}: {lib_value}")
-        logging.debug(f"  MC_{sigma_type}_LB: {fmc_lb}")
-        logging.debug(f"  MC_{sigma_type}_UB: {fmc_ub}")
- 
-    except KeyError as e:
-        logging.error(f"Missing column: {e}")
-        return {
-            'tier1_pass': False, 'tier2_pass': False, 'tier3_pass': False, 'tier4_pass': False,
-            'overall_pass': False, 'pass_reason': 'missing_data'
-        }
- 
-    # Set thresholds based on type
-    if type_name == 'delay':
-        sigma_rel_threshold = 0.03      # 3% for delay
-        ps_value = 1                    # 1ps for delay
-        slew_multiplier = 0.005         # 0.005*slew for delay
-    elif type_name == 'slew':
-        sigma_rel_threshold = 0.06      # 6% for slew
-        ps_value = 2                    # 2ps for slew
-        slew_multiplier = 0.01          # 0.01*slew for slew
-    else:  # hold/constraint
-        sigma_rel_threshold = 0.03      # 3% for constraint
-        ps_value = 10                   # 10ps for constraint
-        slew_multiplier = 0.005         # 0.005*slew for constraint
- 
-    # CI enlargement factor (6% as per slides)
-    ci_enlargement = 0.06
- 
-    # Calculate proper relative error using max denominator
-    if lib_nominal is not None:
-        max_denom = max(abs(lib_nominal), abs(fmc_value))
-        sigma_rel_err = (lib_value - fmc_value) / max_denom
-    else:
-        sigma_rel_err = (lib_value - fmc_value) / abs(fmc_value)
- 
-    # Initialize tier results
-    tier_results = {
-        'tier1_pass': False,  # Relative threshold
-        'tier2_pass': False,  # CI bounds
-        'tier3_pass': False,  # CI enlarged
-        'tier4_pass': False,  # Absolute threshold
-        'overall_pass': False,
-        'pass_reason': 'fail'
-    }
- 
-    # **TIER 1: Relative error within threshold**
-    tier1_pass = abs(sigma_rel_err) <= sigma_rel_threshold
-    tier_results['tier1_pass'] = tier1_pass
-    logging.debug(f"  Tier 1 - Relative error: |{sigma_rel_err}| <= {sigma_rel_threshold} -> {tier1_pass}")
- 
-    if tier1_pass:
-        tier_results['overall_pass'] = True
-        tier_results['pass_reason'] = 'tier1_rel'
-        return tier_results
- 
-    # **TIER 2: Value within original CI bounds**
-    ci_lb = min(fmc_lb, fmc_ub)
-    ci_ub = max(fmc_lb, fmc_ub)
-    tier2_pass = (ci_lb <= lib_value <= ci_ub)
-    tier_results['tier2_pass'] = tier2_pass
-    logging.debug(f"  Tier 2 - CI bounds: {ci_lb} <= {lib_value} <= {ci_ub} -> {tier2_pass}")
- 
-    if tier2_pass:
-        tier_results['overall_pass'] = True
-        tier_results['pass_reason'] = 'tier2_ci'
-        return tier_results
- 
-    # **TIER 3: Value within CI + enlargement**
-    ci_width = abs(ci_ub - ci_lb)
-    ci_enlargement_amount = ci_width * ci_enlargement
-    enlarged_lb = ci_lb - ci_enlargement_amount
-    enlarged_ub = ci_ub + ci_enlargement_amount
-    tier3_pass = (enlarged_lb <= lib_value <= enlarged_ub)
-    tier_results['tier3_pass'] = tier3_pass
-    logging.debug(f"  Tier 3 - CI enlarged: {enlarged_lb} <= {lib_value} <= {enlarged_ub} -> {tier3_pass}")
- 
-    if tier3_pass:
-        tier_results['overall_pass'] = True
-        tier_results['pass_reason'] = 'tier3_waived'
-        return tier_results
- 
-    # **TIER 4: Absolute error check**
-    abs_threshold = max(slew_multiplier * rel_pin_slew, ps_value * 1e-12)
-    tier4_pass = abs(abs_err) <= abs_threshold
-    tier_results['tier4_pass'] = tier4_pass
-    logging.debug(f"  Tier 4 - Absolute error: |{abs_err}| <= {abs_threshold} -> {tier4_pass}")
- 
-    if tier4_pass:
-        tier_results['overall_pass'] = True
-        tier_results['pass_reason'] = 'tier4_abs'
-        return tier_results
- 
-    # **FAILED all tiers**
-    tier_results['pass_reason'] = 'fail_all_tiers'
-    return tier_results
- 
 def debug_available_files(root_path):
     """
     Debug helper to show what files are actually available
@@ -534,7 +193,7 @@ def process_sigma_file(file_path, type_name):
         logging.debug(f"CSV columns: {list(df.columns)}")
  
         # Detect vendor (CDNS or SNPS) from column names
-        vendor_prefix = detect_vendor_columns(df)
+        vendor_prefix = pr_criteria.detect_vendor_columns(df)
         logging.info(f"Using vendor prefix: {vendor_prefix}")
  
         # Check if required columns exist
@@ -569,65 +228,22 @@ def process_sigma_file(file_path, type_name):
         # Process each sigma parameter with tier tracking
         tier_summary = {}  # Track tier-by-tier statistics
  
+        rel_pin_slew = df['rel_pin_slew'].to_numpy()
         for param in sigma_params:
             logging.info(f"Processing sigma parameter: {param}")
  
-            # Initialize tracking lists
-            tier1_list = []
-            tier2_list = []
-            tier3_list = []
-            tier4_list = []
-            overall_pass_list = []
-            pass_reason_list = []
- 
-            # Tier statistics
-            tier_stats = {
-                'tier1_only': 0, 'tier2_cumulative': 0, 'tier3_cumulative': 0, 'tier4_cumulative': 0,
-                'total_arcs': 0
-            }
- 
-            for idx, row in df.iterrows():
-                arc_name = row['Arc']
-                logging.debug(f"Processing row {idx}, Arc: {arc_name}")
- 
-                tier_results = check_sigma_pass_fail_with_tiers(row, type_name, param, vendor_prefix)
- 
-                # Extract results
-                tier1_pass = tier_results['tier1_pass']
-                tier2_pass = tier_results['tier2_pass']
-                tier3_pass = tier_results['tier3_pass']
-                tier4_pass = tier_results['tier4_pass']
-                overall_pass = tier_results['overall_pass']
-                pass_reason = tier_results['pass_reason']
- 
-                # Convert to strings for CSV
-                tier1_list.append("Pass" if tier1_pass else "Fail")
-                tier2_list.append("Pass" if tier2_pass else "Fail")
-                tier3_list.append("Pass" if tier3_pass else "Fail")
-                tier4_list.append("Pass" if tier4_pass else "Fail")
-                overall_pass_list.append("Pass" if overall_pass else "Fail")
-                pass_reason_list.append(pass_reason)
- 
-                # Update tier statistics
-                tier_stats['total_arcs'] += 1
-                if tier1_pass:
-                    tier_stats['tier1_only'] += 1
-                if tier1_pass or tier2_pass:
-                    tier_stats['tier2_cumulative'] += 1
-                if tier1_pass or tier2_pass or tier3_pass:
-                    tier_stats['tier3_cumulative'] += 1
-                if tier1_pass or tier2_pass or tier3_pass or tier4_pass:
-                    tier_stats['tier4_cumulative'] += 1
- 
-                logging.debug(f"  Results for {arc_name}, {param}: T1={tier1_pass}, T2={tier2_pass}, T3={tier3_pass}, T4={tier4_pass}, overall={overall_pass}, reason={pass_reason}")
+            # Evaluate the four tiers for all arcs at once
+            inputs = pr_criteria.get_sigma_inputs(df, param, vendor_prefix, zero_mc_as_pass=False)
+            tier_results = pr_criteria.evaluate_tiers(inputs, rel_pin_slew, type_name, param)
+            tier_stats = pr_criteria.summarize_tiers(tier_results)
  
             # Add columns to result dataframe
-            result_df[f'{param}_tier1'] = tier1_list
-            result_df[f'{param}_tier2'] = tier2_list
-            result_df[f'{param}_tier3'] = tier3_list
-            result_df[f'{param}_tier4'] = tier4_list
-            result_df[f'{param}'] = overall_pass_list
-            result_df[f'{param}_reason'] = pass_reason_list
+            result_df[f'{param}_tier1'] = pr_criteria.pass_fail(tier_results['tier1_pass'])
+            result_df[f'{param}_tier2'] = pr_criteria.pass_fail(tier_results['tier2_pass'])
+            result_df[f'{param}_tier3'] = pr_criteria.pass_fail(tier_results['tier3_pass'])
+            result_df[f'{param}_tier4'] = pr_criteria.pass_fail(tier_results['tier4_pass'])
+            result_df[f'{param}'] = pr_criteria.pass_fail(tier_results['overall_pass'])
+            result_df[f'{param}_reason'] = tier_results['pass_reason']
  
             # Calculate pass rates for each tier
             total_count = tier_stats['total_arcs']
@@ -653,7 +269,7 @@ def process_sigma_file(file_path, type_name):
                 logging.info(f"    Tier 1+2+3+4 (+ abs_tol): {tier_stats['tier4_cumulative']}/{total_count} ({tier4_rate:.1f}%)")
  
                 # Final pass rate (same as tier4_cumulative)
-                pass_count = overall_pass_list.count("Pass")
+                pass_count = int(np.count_nonzero(tier_results['overall_pass']))
                 final_pass_rate = (pass_count / total_count) * 100
                 logging.info(f"    Final pass rate: {pass_count}/{total_count} ({final_pass_rate:.1f}%)")
  
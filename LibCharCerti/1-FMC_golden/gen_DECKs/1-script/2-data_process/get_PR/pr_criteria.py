@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+
+import logging
+
+import numpy as np
+
+"""
+Shared Pass/Fail Criteria Engine for the get_PR Sigma and Moments Scripts
+
+The LVF checking criteria are evaluated as NumPy boolean masks over whole columns
+of an RPT dataframe instead of row by row:
+- Relative error <= threshold, absolute error <= max(slew_multiplier*slew, X ps)
+- Lib value within the MC CI bounds, and within the CI + 6% enlargement
+- Error direction (optimistic: lib < mc)
+
+Used by:
+- Sigma/check_sigma.py: four-tier system (evaluate_tiers)
+- Sigma/check_sigma_with_waivers.py and Moments/check_moments_with_waivers.py:
+  unified waiver system (evaluate_waivers)
+
+Comparisons keep the results of the former row-by-row checks, including for
+missing (NaN) values: a NaN never passes a check.
+"""
+
+CI_ENLARGEMENT = 0.06   # Waiver 1 / tier 3: CI +/- 6%
+MOMENTS_CI_WIDTH = 0.1  # Moments RPTs have no CI: MC value +/- 10%
+
+SIGMA_PARAMS = ['Early_Sigma', 'Late_Sigma']
+MOMENTS_PARAMS = ['Std', 'Skew', 'Meanshift']
+
+# (rel_threshold, ps_value, slew_multiplier): abs threshold is
+# max(slew_multiplier * rel_pin_slew, ps_value * 1ps)
+SIGMA_THRESHOLDS = {
+    'delay': (0.03, 1, 0.005),
+    'slew': (0.06, 2, 0.01),
+    'hold': (0.03, 10, 0.005),
+}
+MOMENTS_THRESHOLDS = {
+    'delay': {'Meanshift': (0.01, 1, 0.005), 'Std': (0.02, 1, 0.005), 'Skew': (0.05, 1, 0.005)},
+    'slew': {'Meanshift': (0.02, 2, 0.005), 'Std': (0.04, 2, 0.005), 'Skew': (0.10, 2, 0.005)},
+}
+
+
+def get_thresholds(type_name, param_name):
+    """
+    Get the thresholds of a type and parameter
+
+    Sigma: delay, slew, and everything else as hold/constraint.
+    Moments: delay, and everything else as slew; Skew for any other parameter.
+
+    Returns:
+        tuple: (rel_threshold, ps_value, slew_multiplier)
+    """
+    if param_name in SIGMA_PARAMS:
+        return SIGMA_THRESHOLDS.get(type_name, SIGMA_THRESHOLDS['hold'])
+    type_thresholds = MOMENTS_THRESHOLDS['delay' if type_name == 'delay' else 'slew']
+    return type_thresholds.get(param_name, type_thresholds['Skew'])
+
+
+def detect_vendor_columns(df):
+    """
+    Auto-detect whether this is CDNS or SNPS data based on column names
+    Returns the appropriate column prefix
+    """
+    columns = df.columns.tolist()
+
+    # Check for CDNS columns (case insensitive)
+    cdns_patterns = ['cdns_lib', 'CDNS_Lib', 'Cdns_Lib']
+    snps_patterns = ['snps_lib', 'SNPS_Lib', 'Snps_Lib']
+
+    for col in columns:
+        for pattern in cdns_patterns:
+            if pattern in col:
+                logging.info(f"Detected CDNS vendor from column: {col}")
+                return 'CDNS_Lib'
+        for pattern in snps_patterns:
+            if pattern in col:
+                logging.info(f"Detected SNPS vendor from column: {col}")
+                return 'SNPS_Lib'
+
+    # If no exact match, try partial matching
+    for col in columns:
+        if 'cdns' in col.lower():
+            logging.info(f"Detected CDNS vendor (partial match) from column: {col}")
+            return 'CDNS_Lib'
+        elif 'snps' in col.lower():
+            logging.info(f"Detected SNPS vendor (partial match) from column: {col}")
+            return 'SNPS_Lib'
+
+    # Default to CDNS if nothing found
+    logging.warning("Could not detect vendor, defaulting to CDNS_Lib")
+    return 'CDNS_Lib'
+
+
+def py_min(a, b):
+    """Element-wise min(a, b), with the NaN handling of the builtin min"""
+    return np.where(b < a, b, a)
+
+
+def py_max(a, b):
+    """Element-wise max(a, b), with the NaN handling of the builtin max"""
+    return np.where(b > a, b, a)
+
+
+def compute_rel_err(mc_value, lib_value, lib_nominal=None, zero_mc_as_pass=True):
+    """
+    Relative error (lib - mc) / denominator
+
+    Args:
+        lib_nominal: Nominal column; if given the denominator is max(|nominal|, |mc|)
+        zero_mc_as_pass: Without nominal, a zero MC value gives a relative error of 0
+                         (otherwise inf/NaN, which fails)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if lib_nominal is not None:
+            return (lib_value - mc_value) / py_max(np.abs(lib_nominal), np.abs(mc_value))
+        rel_err = (lib_value - mc_value) / np.abs(mc_value)
+        if zero_mc_as_pass:
+            rel_err = np.where(mc_value != 0, rel_err, 0)
+        return rel_err
+
+
+def get_sigma_inputs(df, param_name, lib_prefix, zero_mc_as_pass=True):
+    """
+    Get the criteria inputs of a sigma parameter from a sigma RPT dataframe
+
+    abs_err is the pre-calculated {lib}_{param}_Dif column; rel_err uses the
+    max(|{lib}_Nominal|, |MC|) denominator if there is a nominal column.
+
+    Returns:
+        dict: mc_value, lib_value, mc_ci_lb, mc_ci_ub, abs_err, rel_err arrays
+    """
+    mc_value = df[f"MC_{param_name}"].to_numpy()
+    lib_value = df[f"{lib_prefix}_{param_name}"].to_numpy()
+    nominal_col = f"{lib_prefix}_Nominal"
+    lib_nominal = df[nominal_col].to_numpy() if nominal_col in df.columns else None
+    return {
+        'mc_value': mc_value,
+        'lib_value': lib_value,
+        'mc_ci_lb': df[f"MC_{param_name}_LB"].to_numpy(),
+        'mc_ci_ub': df[f"MC_{param_name}_UB"].to_numpy(),
+        'abs_err': df[f"{lib_prefix}_{param_name}_Dif"].to_numpy(),
+        'rel_err': compute_rel_err(mc_value, lib_value, lib_nominal, zero_mc_as_pass)
+    }
+
+
+def get_moments_inputs(df, param_name, mc_prefix='MC', lib_prefix='Lib'):
+    """
+    Get the criteria inputs of a moments parameter from a moments RPT dataframe
+
+    The errors are the pre-calculated {param}_abs_err/{param}_rel_err columns if
+    present. Moments RPTs have no CI, so the CI is estimated as MC +/- 10%.
+
+    Returns:
+        dict: mc_value, lib_value, mc_ci_lb, mc_ci_ub, abs_err, rel_err arrays
+    """
+    mc_value = df[f"{mc_prefix}_{param_name}"].to_numpy()
+    lib_value = df[f"{lib_prefix}_{param_name}"].to_numpy()
+
+    if f"{param_name}_abs_err" in df.columns:
+        abs_err = df[f"{param_name}_abs_err"].to_numpy()
+    else:
+        abs_err = lib_value - mc_value
+
+    if f"{param_name}_rel_err" in df.columns:
+        rel_err = df[f"{param_name}_rel_err"].to_numpy()
+    else:
+        rel_err = compute_rel_err(mc_value, lib_value)
+
+    ci_half_width = np.abs(mc_value) * MOMENTS_CI_WIDTH
+    return {
+        'mc_value': mc_value,
+        'lib_value': lib_value,
+        'mc_ci_lb': mc_value - ci_half_width,
+        'mc_ci_ub': mc_value + ci_half_width,
+        'abs_err': abs_err,
+        'rel_err': rel_err
+    }
+
+
+def within_ci(lib_value, mc_ci_lb, mc_ci_ub, enlargement=None):
+    """Mask of lib values within [CI_LB, CI_UB], optionally enlarged by enlargement*CI_width"""
+    ci_lb = py_min(mc_ci_lb, mc_ci_ub)
+    ci_ub = py_max(mc_ci_lb, mc_ci_ub)
+    if enlargement is not None:
+        ci_enlargement_amount = np.abs(ci_ub - ci_lb) * enlargement
+        ci_lb = ci_lb - ci_enlargement_amount
+        ci_ub = ci_ub + ci_enlargement_amount
+    return (ci_lb <= lib_value) & (lib_value <= ci_ub)
+
+
+def get_error_masks(inputs, rel_pin_slew, type_name, param_name):
+    """Masks of rel_pass (|rel_err| <= threshold) and abs_pass (|abs_err| <= abs threshold)"""
+    rel_threshold, ps_value, slew_multiplier = get_thresholds(type_name, param_name)
+    abs_threshold = py_max(slew_multiplier * rel_pin_slew, ps_value * 1e-12)
+    with np.errstate(invalid='ignore'):
+        rel_pass = np.abs(inputs['rel_err']) <= rel_threshold
+        abs_pass = np.abs(inputs['abs_err']) <= abs_threshold
+    return rel_pass, abs_pass
+
+
+def pass_fail(mask):
+    return np.where(mask, "Pass", "Fail")
+
+
+def evaluate_waivers(inputs, rel_pin_slew, type_name, param_name):
+    """
+    Unified waiver system over whole columns
+
+    Base Pass = rel_pass OR abs_pass (CI bounds NOT included in base)
+    Waiver 1: lib value within CI +/- 6% of the CI width
+    Waiver 2: error direction, optimistic if lib < mc
+
+    Args:
+        inputs: dict from get_sigma_inputs or get_moments_inputs
+        rel_pin_slew: rel_pin_slew column
+        type_name: 'delay', 'slew', or 'hold'
+        param_name: e.g. 'Early_Sigma', 'Std', 'Meanshift'
+
+    Returns:
+        dict: inputs plus the base_pass, waiver1_ci_enlarged and optimistic masks
+              and the pass_reason, error_direction and final_status columns
+    """
+    rel_pass, abs_pass = get_error_masks(inputs, rel_pin_slew, type_name, param_name)
+    base_pass = rel_pass | abs_pass
+    with np.errstate(invalid='ignore'):
+        waiver1_ci_enlarged = within_ci(inputs['lib_value'], inputs['mc_ci_lb'],
+                                        inputs['mc_ci_ub'], CI_ENLARGEMENT)
+        optimistic = inputs['lib_value'] < inputs['mc_value']
+
+    results = dict(inputs)
+    results.update({
+        'base_pass': base_pass,
+        'pass_reason': np.select([rel_pass & abs_pass, rel_pass, abs_pass],
+                                 ["both", "rel_pass", "abs_pass"], "fail"),
+        'waiver1_ci_enlarged': waiver1_ci_enlarged,
+        'optimistic': optimistic,
+        'error_direction': np.where(optimistic, 'optimistic', 'pessimistic'),
+        'final_status': np.select([base_pass, waiver1_ci_enlarged], ["Pass", "Waived_CI"],
+                                  "Fail")
+    })
+    return results
+
+
+def get_waiver_columns(param_name, results):
+    """Per-row output columns of the waiver scripts, in output order"""
+    return [
+        (f'{param_name}_MC_value', results['mc_value']),
+        (f'{param_name}_Lib_value', results['lib_value']),
+        (f'{param_name}_MC_CI_LB', results['mc_ci_lb']),
+        (f'{param_name}_MC_CI_UB', results['mc_ci_ub']),
+        (f'{param_name}_abs_err', results['abs_err']),
+        (f'{param_name}_rel_err', results['rel_err']),
+        (f'{param_name}_Base_Pass', pass_fail(results['base_pass'])),
+        (f'{param_name}_Pass_Reason', results['pass_reason']),
+        (f'{param_name}_Waiver1_CI_Enlarged', pass_fail(results['waiver1_ci_enlarged'])),
+        (f'{param_name}_Error_Direction', results['error_direction']),
+        (f'{param_name}_Final_Status', results['final_status']),
+    ]
+
+
+def summarize_waivers(results):
+    """
+    Waiver statistics and the 3 pass rates (optimistic tracking AFTER Waiver1)
+
+    Returns:
+        dict: Waiver summary of the parameter, None if there are no arcs
+    """
+    total_count = len(results['base_pass'])
+    if total_count == 0:
+        return None
+
+    base_pass = results['base_pass']
+    passes_waiver1 = base_pass | results['waiver1_ci_enlarged']
+    optimistic = results['optimistic']
+
+    base_pass_count = int(np.count_nonzero(base_pass))
+    pass_with_waiver1 = int(np.count_nonzero(passes_waiver1))
+    optimistic_errors = int(np.count_nonzero(optimistic))
+    optimistic_fail_waiver1 = int(np.count_nonzero(optimistic & ~passes_waiver1))
+    pessimistic_fail_waiver1 = int(np.count_nonzero(~optimistic & ~passes_waiver1))
+
+    return {
+        # Pass Rate 1: Base (error-based only)
+        'base_pr': (base_pass_count / total_count) * 100,
+        # Pass Rate 2: With Waiver1 (Base + CI enlargement)
+        'pr_with_waiver1': (pass_with_waiver1 / total_count) * 100,
+        # Pass Rate 3: Waiver1 passes + pessimistic arcs that fail Waiver1 (waived)
+        'pr_optimistic_after_waiver1': ((pass_with_waiver1 + pessimistic_fail_waiver1) / total_count) * 100,
+        'total_arcs': total_count,
+        'optimistic_errors': optimistic_errors,
+        'pessimistic_errors': total_count - optimistic_errors,
+        'optimistic_fail_waiver1': optimistic_fail_waiver1,
+        'pessimistic_fail_waiver1': pessimistic_fail_waiver1,
+        'pass_with_waiver1_count': pass_with_waiver1,
+        'base_pass_count': base_pass_count
+    }
+
+
+def log_waiver_summary(param_name, summary):
+    """Log detailed waiver statistics (1 digit precision)"""
+    total_count = summary['total_arcs']
+    logging.info(f"  {param_name} Waiver Analysis:")
+    logging.info(f"    Total arcs: {total_count}")
+    logging.info(f"    Optimistic errors (Lib < MC): {summary['optimistic_errors']} ({summary['optimistic_errors']/total_count*100:.1f}%)")
+    logging.info(f"    Pessimistic errors (Lib >= MC): {summary['pessimistic_errors']} ({summary['pessimistic_errors']/total_count*100:.1f}%)")
+    logging.info(f"    Base PR: {summary['base_pr']:.1f}%")
+    logging.info(f"    PR with Waiver1 (CI enlarged): {summary['pr_with_waiver1']:.1f}%")
+    logging.info(f"    After Waiver1: Optimistic failures (counted as real failures): {summary['optimistic_fail_waiver1']}")
+    logging.info(f"    After Waiver1: Pessimistic failures (waived): {summary['pessimistic_fail_waiver1']}")
+    logging.info(f"    PR with Optimistic Waiver (after Waiver1): {summary['pr_optimistic_after_waiver1']:.1f}%")
+
+
+def evaluate_tiers(inputs, rel_pin_slew, type_name, param_name):
+    """
+    Four-tier system over whole columns; an arc passes at the first passing tier
+    and the later tiers are not checked (reported as Fail)
+
+    1. Relative error <= threshold -> Pass
+    2. Value within original CI bounds -> Pass
+    3. Value within CI + 6% enlargement -> Waived (treated as Pass)
+    4. Absolute error <= slew-dependent threshold -> Pass
+
+    Returns:
+        dict: tier1_pass..tier4_pass and overall_pass masks, pass_reason column
+    """
+    rel_pass, abs_pass = get_error_masks(inputs, rel_pin_slew, type_name, param_name)
+    with np.errstate(invalid='ignore'):
+        ci_pass = within_ci(inputs['lib_value'], inputs['mc_ci_lb'], inputs['mc_ci_ub'])
+        ci_enlarged_pass = within_ci(inputs['lib_value'], inputs['mc_ci_lb'],
+                                     inputs['mc_ci_ub'], CI_ENLARGEMENT)
+
+    tier1_pass = rel_pass
+    tier2_pass = ~tier1_pass & ci_pass
+    tier3_pass = ~(tier1_pass | tier2_pass) & ci_enlarged_pass
+    tier4_pass = ~(tier1_pass | tier2_pass | tier3_pass) & abs_pass
+    overall_pass = tier1_pass | tier2_pass | tier3_pass | tier4_pass
+
+    return {
+        'tier1_pass': tier1_pass,
+        'tier2_pass': tier2_pass,
+        'tier3_pass': tier3_pass,
+        'tier4_pass': tier4_pass,
+        'overall_pass': overall_pass,
+        'pass_reason': np.select([tier1_pass, tier2_pass, tier3_pass, tier4_pass],
+                                 ['tier1_rel', 'tier2_ci', 'tier3_waived', 'tier4_abs'],
+                                 'fail_all_tiers')
+    }
+
+
+def summarize_tiers(results):
+    """
+    Cumulative tier counts
+
+    Returns:
+        dict: tier1_only, tier2_cumulative, tier3_cumulative, tier4_cumulative, total_arcs
+    """
+    tier1 = results['tier1_pass']
+    tier2 = tier1 | results['tier2_pass']
+    tier3 = tier2 | results['tier3_pass']
+    tier4 = tier3 | results['tier4_pass']
+    return {
+        'tier1_only': int(np.count_nonzero(tier1)),
+        'tier2_cumulative': int(np.count_nonzero(tier2)),
+        'tier3_cumulative': int(np.count_nonzero(tier3)),
+        'tier4_cumulative': int(np.count_nonzero(tier4)),
+        'total_arcs': len(tier1)
+    }
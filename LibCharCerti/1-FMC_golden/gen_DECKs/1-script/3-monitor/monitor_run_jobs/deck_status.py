@@ -0,0 +1,254 @@
+"""
+Status collection of the simulation decks of <folder_path>/<corner>_DECKS/<type>/DECKS.
+
+Every poll lists each DECKS folder once with os.scandir and stats the deck
+directories. A deck directory is only listed again when its mtime changed, because
+its files can only have been created or removed then. The job scheduler is queried
+once per poll (see JobScheduler) and the unfinished decks are joined with the job
+names in memory, instead of a grep of the bjobs output per deck.
+"""
+import abc
+import csv
+import json
+import logging
+import os
+import subprocess
+import time
+from datetime import datetime
+
+DECK_FILES = ("mc_sim.sp", "nominal_sim.sp", "mc_sim.mt0", "mc_sim.err")
+STATUSES = ("completed", "running", "failed", "not_started")
+
+STATUS_CACHE_VERSION = 1
+# Hidden, so that the DECKS/* globs of the flow don't see it
+STATUS_CACHE_FILE = ".deck_status_cache.json"
+# A deck directory that changed this recently is listed again on the next poll: a
+# file created in the same mtime tick (e.g. on NFS) does not change the mtime
+MTIME_RACE_SECONDS = 2.0
+
+
+class JobScheduler(abc.ABC):
+    """Interface of the scheduler query: one call per poll."""
+
+    @abc.abstractmethod
+    def get_active_jobs(self):
+        """Returns {job_name: job_status} of the pending and running jobs."""
+
+
+class LsfScheduler(JobScheduler):
+    """Queries LSF with a single bjobs call."""
+
+    def __init__(self, command=None):
+        self.command = command or ["bjobs", "-w", "-noheader", "-o", "stat job_name"]
+
+    def get_active_jobs(self):
+        try:
+            result = subprocess.run(self.command, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, universal_newlines=True)
+        except FileNotFoundError:
+            logging.error(f"Scheduler command not found: {self.command[0]}")
+            return {}
+        return parse_job_lines(result.stdout.splitlines())
+
+
+class FileScheduler(JobScheduler):
+    """Reads the jobs from a file in the format of LsfScheduler; stands in for
+    bjobs in tests and on machines without LSF."""
+
+    def __init__(self, jobs_file):
+        self.jobs_file = jobs_file
+
+    def get_active_jobs(self):
+        try:
+            with open(self.jobs_file, 'r') as f:
+                return parse_job_lines(f)
+        except OSError:
+            return {}
+
+
+def parse_job_lines(lines):
+    """Parses 'STAT JOB_NAME' lines (bjobs -o "stat job_name" -noheader)."""
+    jobs = {}
+    for line in lines:
+        fields = line.strip().split(None, 1)
+        if len(fields) == 2:
+            jobs[fields[1]] = fields[0]
+    return jobs
+
+
+def get_job_deck_names(active_jobs):
+    """
+    Returns the deck folder names of the jobs: the jobs are submitted with the deck
+    folder as job name (bsub -J <folder>), and plain bjobs truncates long names to
+    '*<end of name>'.
+    """
+    return {os.path.basename(job_name.lstrip('*').rstrip('/')) for job_name in active_jobs}
+
+
+def get_deck_status(folder, files, active_deck_names):
+    """Returns the status of a deck from its files, None if it has no decks."""
+    if not ("mc_sim.sp" in files and "nominal_sim.sp" in files):
+        return None
+    if "mc_sim.mt0" in files:
+        return "completed"
+    if "mc_sim.err" in files:
+        try:
+            if os.path.getsize(os.path.join(folder, "mc_sim.err")) > 0:
+                return "failed"
+        except OSError:
+            pass
+    if os.path.basename(folder) in active_deck_names:
+        return "running"
+    return "not_started"
+
+
+class DeckStatusCollector:
+    """
+    Collects the deck status of DECKS folders; keep one instance over the polls of a
+    monitor so unchanged deck directories are not listed again.
+    """
+
+    def __init__(self, scheduler=None, use_cache_file=True):
+        self.scheduler = scheduler or LsfScheduler()
+        self.use_cache_file = use_cache_file
+        # Per DECKS folder: {deck name: {'mtime': mtime, 'files': deck files}}
+        self.decks_cache = {}
+        self.reported_failures = set()
+
+    def load_cache(self, decks_folder):
+        if decks_folder in self.decks_cache:
+            return self.decks_cache[decks_folder]
+        decks = {}
+        if self.use_cache_file:
+            try:
+                with open(os.path.join(decks_folder, STATUS_CACHE_FILE), 'r') as f:
+                    cache_data = json.load(f)
+                if cache_data.get('version') == STATUS_CACHE_VERSION:
+                    decks = cache_data.get('decks', {})
+            except (OSError, ValueError):
+                pass
+        self.decks_cache[decks_folder] = decks
+        return decks
+
+    def save_cache(self, decks_folder):
+        if not self.use_cache_file:
+            return
+        cache_file = os.path.join(decks_folder, STATUS_CACHE_FILE)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': STATUS_CACHE_VERSION,
+                           'decks': self.decks_cache[decks_folder]}, f)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logging.warning(f"Could not write status cache {cache_file}: {str(e)}")
+
+    def scan_decks_folder(self, decks_folder):
+        """
+        Returns the (folder, deck files) of every deck directory of a DECKS folder,
+        listing only the deck directories whose mtime changed since the last scan.
+        """
+        cached_decks = self.load_cache(decks_folder)
+        race_time = time.time() - MTIME_RACE_SECONDS
+        decks = {}
+        num_listed = 0
+        try:
+            entries = sorted((entry for entry in os.scandir(decks_folder)
+                              if not entry.name.startswith('.')), key=lambda x: x.name)
+        except OSError:
+            entries = []
+        for entry in entries:
+            try:
+                if not entry.is_dir():
+                    continue
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            cached = cached_decks.get(entry.name)
+            if cached is not None and cached['mtime'] == mtime and mtime < race_time:
+                decks[entry.name] = cached
+                continue
+            try:
+                files = sorted(x.name for x in os.scandir(entry.path) if x.name in DECK_FILES)
+            except OSError:
+                continue
+            decks[entry.name] = {'mtime': mtime, 'files': files}
+            num_listed += 1
+
+        self.decks_cache[decks_folder] = decks
+        if num_listed:
+            self.save_cache(decks_folder)
+        return [(os.path.join(decks_folder, name), set(decks[name]['files']))
+                for name in sorted(decks)]
+
+    def collect(self, corners, types, folder_path):
+        """
+        Returns the status of the decks of every corner and type: the overall
+        counts, the counts per (corner, type) and the status of every deck.
+        """
+        active_deck_names = get_job_deck_names(self.scheduler.get_active_jobs())
+        status = {
+            'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': new_counts(),
+            'by_corner_type': [],
+            'decks': [],
+            'failed_jobs': []
+        }
+        if isinstance(types, str):
+            types = [types]
+        for corner in corners:
+            for sim_type in types:
+                decks_folder = os.path.join(folder_path, f"{corner}_DECKS", sim_type,
+                                            "DECKS")
+                counts = new_counts()
+                for folder, files in self.scan_decks_folder(decks_folder):
+                    deck_status = get_deck_status(folder, files, active_deck_names)
+                    counts['total'] += 1
+                    status['summary']['total'] += 1
+                    if deck_status is None:
+                        continue
+                    counts[deck_status] += 1
+                    status['summary'][deck_status] += 1
+                    status['decks'].append({'corner': corner, 'type': sim_type,
+                                            'folder': folder, 'status': deck_status})
+                    if deck_status == "failed":
+                        err_file = os.path.join(folder, "mc_sim.err")
+                        status['failed_jobs'].append({'folder': folder,
+                                                      'error_file': err_file})
+                        self.report_failure(folder, err_file)
+                status['by_corner_type'].append(dict(corner=corner, type=sim_type,
+                                                     **counts))
+        return status
+
+    def report_failure(self, folder, err_file):
+        if folder in self.reported_failures:
+            return
+        self.reported_failures.add(folder)
+        try:
+            with open(err_file, 'r') as f:
+                error_content = f.read(500)
+            logging.error(f"Error in {folder}:\n{error_content}...")
+        except OSError as e:
+            logging.error(f"Error checking folder {folder}: {str(e)}")
+
+
+def new_counts():
+    counts = {'total': 0}
+    for deck_status in STATUSES:
+        counts[deck_status] = 0
+    return counts
+
+
+def write_status_json(status, output_file):
+    with open(output_file, 'w') as f:
+        json.dump(status, f, indent=2)
+
+
+def write_status_csv(status, output_file):
+    """Writes the counts per corner and type, and the overall counts as 'ALL'."""
+    fieldnames = ['corner', 'type', 'total'] + list(STATUSES)
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(status['by_corner_type'])
+        writer.writerow(dict(corner='ALL', type='ALL', **status['summary']))
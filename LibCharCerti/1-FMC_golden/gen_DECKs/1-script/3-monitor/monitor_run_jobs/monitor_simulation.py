@@ -1,10 +1,12 @@
 import os
-import glob
 import time
 import logging
 import argparse
 from datetime import datetime
  
+from deck_status import (DeckStatusCollector, FileScheduler, LsfScheduler,
+                         write_status_csv, write_status_json)
+ 
 # Set up logging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -15,71 +17,23 @@ logging.basicConfig(
     ]
 )
  
-def check_simulation_status(corners, types, folder_path):
-    """Monitor HSPICE simulation results by checking .mt0 files."""
-    status_summary = {
-        'total': 0,
-        'completed': 0,
-        'running': 0,
-        'failed': 0,
-        'not_started': 0,
-        'failed_jobs': []
-    }
+def check_simulation_status(corners, types, folder_path, collector=None):
+    """Monitor HSPICE simulation results by checking .mt0 files.
  
+    The decks are scanned with a DeckStatusCollector (pass the same one on every
+    poll) and the scheduler is queried once for all of the unfinished decks.
+    """
+    if collector is None:
+        collector = DeckStatusCollector()
     for corner in corners:
         decks_folder = os.path.join(folder_path, f"{corner}_DECKS", types, "DECKS")
         logging.info(f"\nChecking simulations in {decks_folder}")
  
-        # Find all spice folders
-        spice_folders = glob.glob(os.path.join(decks_folder, "*"))
- 
-        for folder in spice_folders:
-            if not os.path.isdir(folder):
-                continue
- 
-            status_summary['total'] += 1
- 
-            # Check for required files
-            mc_sim = os.path.join(folder, "mc_sim.sp")
-            nominal_sim = os.path.join(folder, "nominal_sim.sp")
-            if not (os.path.exists(mc_sim) and os.path.exists(nominal_sim)):
-                continue
- 
-            # Check for .mt0 file
-            mt0_file = os.path.join(folder, "mc_sim.mt0")
-            err_file = os.path.join(folder, "mc_sim.err")
- 
-            try:
-                # Check if simulation completed successfully (.mt0 exists)
-                if os.path.exists(mt0_file):
-                    status_summary['completed'] += 1
-                    continue
- 
-                # Check for errors
-                if os.path.exists(err_file) and os.path.getsize(err_file) > 0:
-                    status_summary['failed'] += 1
-                    status_summary['failed_jobs'].append({
-                        'folder': folder,
-                        'error_file': err_file
-                    })
- 
-                    # Log error details
-                    with open(err_file, 'r') as f:
-                        error_content = f.read()
-                        logging.error(f"Error in {folder}:\n{error_content[:500]}...")
-                    continue
- 
-                # Check if job is in bjobs queue
-                folder_name = os.path.basename(folder)
-                bjobs_check = os.popen(f"bjobs | grep {folder_name}").read()
-                if bjobs_check:
-                    status_summary['running'] += 1
-                else:
-                    status_summary['not_started'] += 1
- 
-            except Exception as e:
-                logging.error(f"Error checking folder {folder}: {str(e)}")
- 
+    status = collector.collect(corners, types, folder_path)
+    status_summary = dict(status['summary'])
+    status_summary['failed_jobs'] = status['failed_jobs']
+    status_summary['by_corner_type'] = status['by_corner_type']
+    status_summary['status'] = status
     return status_summary
  
 def print_status_report(status_summary):
@@ -102,6 +56,14 @@ def print_status_report(status_summary):
         print(f"Failed:                {status_summary['failed']} ({failed_pct:.1f}%)")
         print(f"Not Started:           {status_summary['not_started']} ({not_started_pct:.1f}%)")
  
+        if len(status_summary.get('by_corner_type', [])) > 1:
+            print(f"\n{'Corner':<25} {'Type':<10} {'Total':>7} {'Done':>7} {'Run':>7} "
+                  f"{'Failed':>7} {'Pending':>7}")
+            for counts in status_summary['by_corner_type']:
+                print(f"{counts['corner']:<25} {counts['type']:<10} {counts['total']:>7} "
+                      f"{counts['completed']:>7} {counts['running']:>7} "
+                      f"{counts['failed']:>7} {counts['not_started']:>7}")
+ 
         if status_summary['failed'] > 0:
             print("\nFailed Simulations:")
             for job in status_summary['failed_jobs']:
@@ -109,12 +71,24 @@ def print_status_report(status_summary):
  
     print("="*50 + "\n")
  
-def monitor_simulations(corners, types, folder_path, interval=300):
+def write_status_files(status_summary, status_json=None, status_csv=None):
+    """Write the machine-readable status of a poll."""
+    if status_json:
+        write_status_json(status_summary['status'], status_json)
+    if status_csv:
+        write_status_csv(status_summary['status'], status_csv)
+ 
+def monitor_simulations(corners, types, folder_path, interval=300, scheduler=None,
+                        status_json=None, status_csv=None, once=False):
     """Continuous monitoring of simulation status."""
+    collector = DeckStatusCollector(scheduler)
     try:
         while True:
-            status_summary = check_simulation_status(corners, types, folder_path)
+            status_summary = check_simulation_status(corners, types, folder_path, collector)
             print_status_report(status_summary)
+            write_status_files(status_summary, status_json, status_csv)
+            if once:
+                break
  
             # Exit if all simulations are either completed or failed
             total_done = status_summary['completed'] + status_summary['failed']
@@ -135,10 +109,17 @@ def main():
     parser.add_argument("--corners", nargs='+', required=True, help="List of corners to monitor")
     parser.add_argument("--types", required=True, help="Type of simulation (e.g., 'delay', 'hold')")
     parser.add_argument("--folder_path", required=True, help="Base path to the simulation folders")
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between two checks")
+    parser.add_argument("--once", action="store_true", help="Check once and exit")
+    parser.add_argument("--status_json", help="Write the status (counts and decks) to this JSON file")
+    parser.add_argument("--status_csv", help="Write the counts by corner/type to this CSV file")
+    parser.add_argument("--jobs_file", help="Read the jobs ('STAT JOB_NAME' lines) from this file instead of bjobs")
     args = parser.parse_args()
  
-    monitor_simulations(args.corners, args.types, args.folder_path, interval=300)
+    scheduler = FileScheduler(args.jobs_file) if args.jobs_file else LsfScheduler()
+    monitor_simulations(args.corners, args.types, args.folder_path, interval=args.interval,
+                        scheduler=scheduler, status_json=args.status_json,
+                        status_csv=args.status_csv, once=args.once)
  
 if __name__ == "__main__":
     main()
- 
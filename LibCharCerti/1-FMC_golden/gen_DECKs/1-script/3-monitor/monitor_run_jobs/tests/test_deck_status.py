@@ -0,0 +1,122 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deck_status  # noqa: E402
+from deck_status import DeckStatusCollector, FileScheduler, JobScheduler  # noqa: E402
+
+CORNER = "ssgnp_0p450v_m40c"
+SIM_TYPE = "delay"
+OLD_MTIME = 1000000000
+
+# Deck files of every status
+DECKS = {
+    "deck_completed": ("mc_sim.sp", "nominal_sim.sp", "mc_sim.mt0"),
+    "deck_failed": ("mc_sim.sp", "nominal_sim.sp", "mc_sim.err"),
+    "deck_running": ("mc_sim.sp", "nominal_sim.sp"),
+    "deck_pending": ("mc_sim.sp", "nominal_sim.sp", "mc_sim.err"),
+    "deck_not_started": ("mc_sim.sp", "nominal_sim.sp"),
+}
+JOB_LINES = ["RUN  deck_running", "PEND deck_pending"]
+
+
+def _writeDecks(tmp_path):
+    decks_folder = tmp_path / ("%s_DECKS" % CORNER) / SIM_TYPE / "DECKS"
+    for deck_name, deck_files in DECKS.items():
+        deck_path = decks_folder / deck_name
+        deck_path.mkdir(parents=True)
+        for deck_file in deck_files:
+            # Only the mc_sim.err of a failed deck has an error
+            (deck_path / deck_file).write_text(
+                "Error: convergence\n" if deck_name == "deck_failed" else "")
+        # Older than MTIME_RACE_SECONDS, so the deck directories are cached
+        os.utime(str(deck_path), (OLD_MTIME, OLD_MTIME))
+    jobs_file = tmp_path / "bjobs.txt"
+    jobs_file.write_text('\n'.join(JOB_LINES) + '\n')
+    return str(decks_folder), FileScheduler(str(jobs_file))
+
+
+def _collect(collector, tmp_path):
+    return collector.collect([CORNER], SIM_TYPE, str(tmp_path))
+
+
+def _getDeckStatuses(status):
+    return dict((os.path.basename(x['folder']), x['status']) for x in status['decks'])
+
+
+def _countScandirs(monkeypatch):
+    scanned = list()
+    scandir = os.scandir
+
+    def countingScandir(path):
+        scanned.append(os.path.basename(path))
+        return scandir(path)
+    monkeypatch.setattr(deck_status.os, "scandir", countingScandir)
+    return scanned
+
+
+class TestDeckStatus:
+    def test_scheduler_interface(self):
+        with pytest.raises(TypeError):
+            JobScheduler()
+
+    def test_deck_statuses(self, tmp_path):
+        _, scheduler = _writeDecks(tmp_path)
+        status = _collect(DeckStatusCollector(scheduler), tmp_path)
+        # Pending and running jobs are both active
+        assert _getDeckStatuses(status) == {
+            "deck_completed": "completed", "deck_failed": "failed",
+            "deck_running": "running", "deck_pending": "running",
+            "deck_not_started": "not_started"}
+        assert status['summary'] == {'total': 5, 'completed': 1, 'running': 2,
+                                     'failed': 1, 'not_started': 1}
+        assert [os.path.basename(x['folder']) for x in status['failed_jobs']] == \
+            ["deck_failed"]
+
+    def test_unchanged_decks_are_not_listed(self, tmp_path, monkeypatch):
+        decks_folder, scheduler = _writeDecks(tmp_path)
+        collector = DeckStatusCollector(scheduler)
+        _collect(collector, tmp_path)
+        assert os.path.exists(os.path.join(decks_folder, deck_status.STATUS_CACHE_FILE))
+
+        # Only the DECKS folder is listed again
+        scanned = _countScandirs(monkeypatch)
+        _collect(collector, tmp_path)
+        assert scanned == ["DECKS"]
+
+        # A deck whose simulation finished
+        deck_path = os.path.join(decks_folder, "deck_running")
+        open(os.path.join(deck_path, "mc_sim.mt0"), 'w').close()
+        os.utime(deck_path, (OLD_MTIME + 1, OLD_MTIME + 1))
+        del scanned[:]
+        status = _collect(collector, tmp_path)
+        assert scanned == ["DECKS", "deck_running"]
+        assert _getDeckStatuses(status)["deck_running"] == "completed"
+
+        # A new collector reads the cache file
+        del scanned[:]
+        assert _getDeckStatuses(_collect(DeckStatusCollector(scheduler), tmp_path)) == \
+            _getDeckStatuses(status)
+        assert scanned == ["DECKS"]
+
+    def test_status_files(self, tmp_path):
+        _, scheduler = _writeDecks(tmp_path)
+        status = _collect(DeckStatusCollector(scheduler, use_cache_file=False), tmp_path)
+        json_file = str(tmp_path / "status.json")
+        deck_status.write_status_json(status, json_file)
+        with open(json_file, 'r') as f:
+            assert json.load(f) == status
+
+        csv_file = str(tmp_path / "status.csv")
+        deck_status.write_status_csv(status, csv_file)
+        with open(csv_file, 'r') as f:
+            rows = list(csv.DictReader(f))
+        assert [(x['corner'], x['type']) for x in rows] == [(CORNER, SIM_TYPE),
+                                                             ("ALL", "ALL")]
+        assert rows[0] == dict(rows[1], corner=CORNER, type=SIM_TYPE)
+        assert rows[1]['running'] == "2" and rows[1]['total'] == "5"
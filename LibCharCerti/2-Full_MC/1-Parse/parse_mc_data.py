@@ -4,316 +4,381 @@ import sys
 import re
 import os
 import csv
+import mmap
+import argparse
+import concurrent.futures
 import traceback
 from datetime import datetime
  
-# Debug log function
-def debug_log(message):
-    """Print debug message with timestamp"""
+"""
+Parse the Full-MC results of the arc folders (mc_sim.sp + OUT.ava.report)
+ 
+- mc_sim.sp: header (line 2 to the '* TEMPLATE_DECK' marker), '.param cl' and
+  '.param rel_pin_slew' lines; the deck is read only until both params are found
+  after the marker
+- OUT.ava.report: moments table of the ##Sample_Moments section; the section is
+  found with mmap and only its bytes are decoded
+ 
+Single arc (as called by parse_mc_data.sh before):
+    parse_mc_data.py <mc_sim.sp> <OUT.ava.report> <csv_output> <txt_output> <arc_name> <corner_name>
+Whole corner, with a thread pool over the arc folders:
+    parse_mc_data.py --corner_dir <corner folder> --output_dir <Parse/corner> [--jobs N]
+writes the per-arc stats.csv/netlist_params.txt, and one table of the moments and
+quantiles of all arcs, mc_stats.csv (+ Parquet copy). Debug messages are only
+printed with --debug.
+"""
+ 
+DEBUG = False
+DEFAULT_JOBS = 16
+ 
+MEAS_COLUMNS = ["half_tt_out", "meas_delay", "meas_tt_out"]
+TEMPLATE_MARKER = '* TEMPLATE_DECK'
+SECTION_START = "##Sample_Moments"
+SECTION_END = "##Response_Correlation_Matrix"
+CORNER_TABLE_NAME = "mc_stats.csv"
+CORNER_TABLE_HEADER = ["Arc", "Corner", "Statistic"] + MEAS_COLUMNS
+ 
+# Log functions; with messages the lines are collected instead of printed
+def log_message(level, message, messages=None):
+    """Print log message with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[DEBUG {timestamp}] {message}")
+    line = f"[{level} {timestamp}] {message}"
+    if messages is None:
+        print(line)
+    else:
+        messages.append(line)
  
-def parse_mc_sim(file_path):
+def debug_log(message, messages=None):
+    """Print debug message with timestamp (only with --debug)"""
+    if DEBUG:
+        log_message("DEBUG", message, messages)
+ 
+def parse_mc_sim(file_path, messages=None):
     """
     Parse mc_sim.sp file to extract:
     1. Content from second line to *TEMPLATE_DECK
     2. Line with .param cl
     3. Line with .param rel_pin_slew
+ 
+    The file is streamed and closed once the marker and both params are found.
     """
-    debug_log(f"Starting to parse mc_sim file: {file_path}")
-    results = []
+    debug_log(f"Starting to parse mc_sim file: {file_path}", messages)
+    header_lines = []
+    template_found = False
+    cl_line = ""
+    rel_pin_slew_line = ""
    
     try:
         with open(file_path, 'r') as file:
-            debug_log(f"Successfully opened file: {file_path}")
-            lines = file.readlines()
-            debug_log(f"Read {len(lines)} lines from file")
+            for i, line in enumerate(file):
+                if not template_found:
+                    if TEMPLATE_MARKER in line:
+                        template_found = True
+                        debug_log(f"Found * TEMPLATE_DECK at line {i}", messages)
+                    elif i > 0:
+                        header_lines.append(line)
            
-            # Extract content from second line to *TEMPLATE_DECK
-            if len(lines) > 1:
-                template_index = -1
-                for i, line in enumerate(lines):
-                    if '* TEMPLATE_DECK' in line:
-                        template_index = i
-                        debug_log(f"Found * TEMPLATE_DECK at line {i}")
-                        break
+                stripped = line.strip()
+                if stripped.startswith(".param cl "):
+                    cl_line = stripped
+                    debug_log(f"Found .param cl at line {i+1}: {cl_line}", messages)
+                elif stripped.startswith(".param rel_pin_slew"):
+                    rel_pin_slew_line = stripped
+                    debug_log(f"Found .param rel_pin_slew at line {i+1}: {rel_pin_slew_line}", messages)
                
-                if template_index > 1:  # Make sure we found * TEMPLATE_DECK
-                    header_content = ''.join(lines[1:template_index]).strip()
-                    debug_log(f"Extracted header content from line 2 to line {template_index}")
-                    results.append(header_content)
-                else:
-                    debug_log("WARNING: Could not find * TEMPLATE_DECK marker")
-                    results.append("")  # Empty string if not found
-            else:
-                debug_log("WARNING: File has less than 2 lines")
-           
-            # Find lines with specific parameters
-            cl_line = ""
-            rel_pin_slew_line = ""
-           
-            for i, line in enumerate(lines):
-                if line.strip().startswith(".param cl "):
-                    cl_line = line.strip()
-                    debug_log(f"Found .param cl at line {i+1}: {cl_line}")
-                elif line.strip().startswith(".param rel_pin_slew"):
-                    rel_pin_slew_line = line.strip()
-                    debug_log(f"Found .param rel_pin_slew at line {i+1}: {rel_pin_slew_line}")
-           
-            if not cl_line:
-                debug_log("WARNING: .param cl not found in the file")
+                if template_found and cl_line and rel_pin_slew_line:
+                    debug_log(f"Stopped reading after line {i+1}", messages)
+                    break
            
-            if not rel_pin_slew_line:
-                debug_log("WARNING: .param rel_pin_slew not found in the file")
+        header_content = ''.join(header_lines).strip() if template_found else ""
+        if not template_found:
+            log_message("WARNING", "Could not find * TEMPLATE_DECK marker", messages)
+        if not cl_line:
+            log_message("WARNING", ".param cl not found in the file", messages)
+        if not rel_pin_slew_line:
+            log_message("WARNING", ".param rel_pin_slew not found in the file", messages)
            
-            results.append(cl_line)
-            results.append(rel_pin_slew_line)
-       
-        debug_log(f"Completed parsing mc_sim file with {sum(1 for r in results if r)} successful extractions")
+        results = [header_content, cl_line, rel_pin_slew_line]
+        debug_log(f"Completed parsing mc_sim file with {sum(1 for r in results if r)} successful extractions", messages)
         return results
     except Exception as e:
-        debug_log(f"ERROR parsing mc_sim.sp: {str(e)}")
-        debug_log(traceback.format_exc())
+        log_message("ERROR", f"parsing mc_sim.sp: {str(e)}", messages)
+        debug_log(traceback.format_exc(), messages)
         return ["", "", ""]
  
-def parse_ava_report(file_path):
+def read_report_section(file_path, messages=None):
     """
-    Parse OUT.ava.report to extract the moments table between
-    "#95% Bootstrap confidence intervals for moments based on 500 re-samples" and "##Response_Correlation_Matrix"
+    Text of OUT.ava.report from "##Sample_Moments" up to "##Response_Correlation_Matrix"
+    (None if not found); mmap finds both patterns, only the section is decoded
     """
-    debug_log(f"Starting to parse ava report file: {file_path}")
-    debug_log("Note: Changed end pattern to '##Response_Correlation_Matrix'")
-    try:
-        with open(file_path, 'r') as file:
-            debug_log(f"Successfully opened file: {file_path}")
-            content = file.read()
-            debug_log(f"Read {len(content)} characters from file")
-           
-            # Define the start and end patterns
-            start_pattern = "##Sample_Moments"
-            end_pattern = "##Response_Correlation_Matrix"
-           
-            # Extract the section
-            start_idx = content.find(start_pattern)
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            log_message("ERROR", f"Empty report file: {file_path}", messages)
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            start_idx = content.find(SECTION_START.encode())
             if start_idx == -1:
-                debug_log(f"ERROR: Start pattern not found: '{start_pattern}'")
-                return []
-            else:
-                debug_log(f"Found start pattern at position {start_idx}")
-               
-            # Find the end_pattern after the start_pattern
-            end_idx = content.find(end_pattern, start_idx)
+                log_message("ERROR", f"Start pattern not found: '{SECTION_START}'", messages)
+                return None
+            debug_log(f"Found start pattern at position {start_idx}", messages)
+ 
+            # Find the end pattern after the start pattern
+            end_idx = content.find(SECTION_END.encode(), start_idx)
             if end_idx == -1:
-                debug_log(f"ERROR: End pattern not found: '{end_pattern}'")
-                return []
-            else:
-                debug_log(f"Found end pattern at position {end_idx}")
-               
-            section = content[start_idx:end_idx].strip()
-            debug_log(f"Extracted section of {len(section)} characters")
-           
-            # Process the moments and quantiles tables to extract data
-            lines = section.split('\n')
-            debug_log(f"Split section into {len(lines)} lines")
-           
-            results = []
-            moments_table_found = False
-            quantiles_table_found = False
-            header_idx = -1
- 
-            for i, line in enumerate(lines):
-                if "half_tt_out" in line and "meas_delay" in line and "meas_tt_out" in line:
-                    if not moments_table_found:
-                        header_idx = i
-                        moments_table_found = True
-                        debug_log(f"Found moments table header line at index {i}: {line}")
-                    else:
-                        quantiles_table_found = True
-                        header_idx = i
-                        debug_log(f"Found quantiles table header line at index {i}: {line}")
-                    break
+                log_message("ERROR", f"End pattern not found: '{SECTION_END}'", messages)
+                return None
+            debug_log(f"Found end pattern at position {end_idx}", messages)
  
-            if not moments_table_found:
-                debug_log("ERROR: Could not find header line with required columns for moments table")
-                return []
+            section = content[start_idx:end_idx]
+    return section.decode(errors='replace').replace('\r\n', '\n').strip()
  
-            # Process table data for both moments and quantiles
-            table_data = []
-            if moments_table_found:
-                table_data = extract_table_data(lines, header_idx)
-            if quantiles_table_found:
-                table_data += extract_quantiles_data(lines, header_idx)
+def parse_ava_report(file_path, messages=None):
+    """
+    Parse OUT.ava.report to extract the moments table between
+    "##Sample_Moments" and "##Response_Correlation_Matrix"
  
-            debug_log(f"Total parsed rows: {len(table_data)}")
-            return table_data
-                 
+    The table starts at the first line with the half_tt_out, meas_delay and
+    meas_tt_out columns and runs to the end of the section.
+    """
+    debug_log(f"Starting to parse ava report file: {file_path}", messages)
+    try:
+        section = read_report_section(file_path, messages)
+        if section is None:
+            return []
+        debug_log(f"Extracted section of {len(section)} characters", messages)
+           
+        lines = section.split('\n')
+        for i, line in enumerate(lines):
+            if all(col in line for col in MEAS_COLUMNS):
+                debug_log(f"Found moments table header line at index {i}: {line}", messages)
+                table_data = extract_table_data(lines, i, messages)
+                debug_log(f"Total parsed rows: {len(table_data)}", messages)
+                return table_data
+           
+        log_message("ERROR", "Could not find header line with required columns for moments table", messages)
+        return []
     except Exception as e:
-        debug_log(f"ERROR parsing OUT.ava.report: {str(e)}")
-        debug_log(traceback.format_exc())
+        log_message("ERROR", f"parsing OUT.ava.report: {str(e)}", messages)
+        debug_log(traceback.format_exc(), messages)
         return []
  
-def extract_table_data(lines, header_idx):
+def extract_table_data(lines, header_idx, messages=None):
     """
     Extract and format data from table section starting at header_idx.
     """
     results = []
     header_cols = [col for col in re.split(r'\s+', lines[header_idx].strip()) if col]
-    debug_log(f"Original header columns: {header_cols}")
- 
-    formatted_header = [""]
-    for col in header_cols:
-        if col in ["half_tt_out", "meas_delay", "meas_tt_out"]:
-            formatted_header.append(col)
+    debug_log(f"Original header columns: {header_cols}", messages)
  
-    debug_log(f"Formatted header with empty first column: {formatted_header}")
+    formatted_header = [""] + [col for col in header_cols if col in MEAS_COLUMNS]
+    debug_log(f"Formatted header with empty first column: {formatted_header}", messages)
     results.append(formatted_header)
  
-    data_rows = 0
     for i in range(header_idx + 1, len(lines)):
         line = lines[i].strip()
         if not line or line.startswith('#'):
             continue
  
-        columns = [col for col in re.split(r'\s+', line) if col]
-        if not columns:
-            continue
- 
-        row_data = [columns[0]]
-        for j in range(1, len(columns)):
-            if j < len(columns):
-                row_data.append(columns[j])
- 
-        debug_log(f"Parsed data row {data_rows+1}: {row_data}")
+        row_data = line.split()
+        debug_log(f"Parsed data row {len(results)}: {row_data}", messages)
         results.append(row_data)
-        data_rows += 1
  
-    debug_log(f"Total parsed: 1 header row + {data_rows} data rows in moments table")
+    debug_log(f"Total parsed: 1 header row + {len(results) - 1} data rows in moments table", messages)
     return results
  
-def extract_quantiles_data(lines, header_idx):
+def get_statistics_rows(ava_results):
     """
-    Extract and format data from quantiles section starting at header_idx.
+    (statistic, {meas column: value}) of each row of the moments and quantiles tables
+ 
+    The values are the last tokens of a row, one per measurement column of the
+    header; the statistic is the rest of the row, e.g. a quantile label with spaces.
+    Repeated header lines and rows without numeric values are skipped.
     """
-    results = []
-    quantiles_header_cols = [col for col in re.split(r'\s+', lines[header_idx].strip()) if col]
-    debug_log(f"Quantiles header columns: {quantiles_header_cols}")
+    if not ava_results:
+        return []
+    meas_names = ava_results[0][1:]
+    num_values = len(meas_names)
+    rows = []
+    for row_data in ava_results[1:]:
+        if len(row_data) <= num_values:
+            continue
+        values = row_data[-num_values:]
+        try:
+            [float(value) for value in values]
+        except ValueError:
+            continue
+        rows.append((' '.join(row_data[:-num_values]), dict(zip(meas_names, values))))
+    return rows
  
-    formatted_header = [""]
-    for col in quantiles_header_cols:
-        if col in ["half_tt_out", "meas_delay", "meas_tt_out"]:
-            formatted_header.append(col)
+def write_arc_outputs(mc_sim_results, ava_results, csv_output, txt_output, arc_name, corner_name, messages=None):
+    """Write the netlist_params.txt and stats.csv of an arc"""
+    # Create output directories if they don't exist
+    os.makedirs(os.path.dirname(txt_output) or '.', exist_ok=True)
+    os.makedirs(os.path.dirname(csv_output) or '.', exist_ok=True)
  
-    debug_log(f"Formatted header with empty first column for quantiles: {formatted_header}")
-    results.append(formatted_header)
+    # Write to TXT file (write mode, not append, since we have a file per arc now)
+    debug_log(f"Writing to TXT file: {txt_output}", messages)
+    try:
+        with open(txt_output, 'w') as txt_file:
+            txt_file.write(f"// ARC: {arc_name} - CORNER: {corner_name}\n")
+            for result in mc_sim_results:
+                if result:  # Only write non-empty results
+                    txt_file.write(f"{result}\n")
+            txt_file.write("\n")
+    except Exception as e:
+        log_message("ERROR", f"writing TXT file: {str(e)}", messages)
+        debug_log(traceback.format_exc(), messages)
+        return False
  
-    data_rows = 0
-    for i in range(header_idx + 1, len(lines)):
-        line = lines[i].strip()
-        if not line or line.startswith('#'):
-            continue
+    # Write to CSV file exactly as it appears in the original file
+    if not ava_results:
+        debug_log("No ava_results to write to CSV", messages)
+        return True
+    debug_log(f"Writing {len(ava_results)} rows to CSV file: {csv_output}", messages)
+    try:
+        with open(csv_output, 'w', newline='') as csv_file:
+            csv.writer(csv_file).writerows(ava_results)
+    except Exception as e:
+        log_message("ERROR", f"writing CSV file: {str(e)}", messages)
+        debug_log(traceback.format_exc(), messages)
+        return False
+    return True
  
-        columns = [col for col in re.split(r'\s+', line) if col]
-        if not columns:
-            continue
+def parse_arc(arc_dir, arc_output_dir, arc_name, corner_name):
+    """
+    Parse and write the outputs of one arc folder (run by the thread pool)
  
-        row_data = []
-        first_col_end_idx = line.find(')')
-        row_data.append(line[:first_col_end_idx + 1])
+    Returns:
+        tuple: (arc_name, status, statistics rows, log messages); status is
+               'success', 'missing' (no mc_sim.sp/OUT.ava.report) or 'error'
+    """
+    messages = []
+    mc_sim_file = os.path.join(arc_dir, "mc_sim.sp")
+    report_file = os.path.join(arc_dir, "OUT.ava.report")
+    if not os.path.isfile(mc_sim_file) or not os.path.isfile(report_file):
+        log_message("WARNING", f"Required files not found in arc: {arc_name}", messages)
+        return arc_name, 'missing', [], messages
  
-        remaining_cols = [col for col in re.split(r'\s+', line[first_col_end_idx + 1:].strip()) if col]
-        row_data += remaining_cols
+    mc_sim_results = parse_mc_sim(mc_sim_file, messages)
+    ava_results = parse_ava_report(report_file, messages)
+    if not write_arc_outputs(mc_sim_results, ava_results,
+                             os.path.join(arc_output_dir, "stats.csv"),
+                             os.path.join(arc_output_dir, "netlist_params.txt"),
+                             arc_name, corner_name, messages):
+        return arc_name, 'error', [], messages
+    return arc_name, 'success', get_statistics_rows(ava_results), messages
        
-        debug_log(f"Parsed quantiles data row {data_rows+1}: {row_data}")
-        results.append(row_data)
-        data_rows += 1
+def write_parquet_copy(table_file, header, rows):
+    """Parquet copy of the corner table (skipped if pandas/pyarrow are not available)"""
+    parquet_file = os.path.splitext(table_file)[0] + '.parquet'
+    try:
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=header)
+        df[MEAS_COLUMNS] = df[MEAS_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        df.to_parquet(parquet_file, index=False)
+    except ImportError as e:
+        log_message("WARNING", f"Parquet copy not written ({e})")
+        return None
+    return parquet_file
  
-    debug_log(f"Total parsed: 1 header row + {data_rows} data rows in quantiles table")
-    return results
+def parse_corner(corner_dir, output_dir, corner_name, arcs=None, jobs=DEFAULT_JOBS, parquet=True):
+    """
+    Parse all arc folders of a corner with a thread pool (the work is I/O bound),
+    and write the moments and quantiles of all arcs to output_dir/mc_stats.csv,
+    one row per arc and statistic, sorted by arc
+    """
+    if not os.path.isdir(corner_dir):
+        log_message("ERROR", f"Corner directory not found: {corner_dir}")
+        return 1
+ 
+    arc_names = sorted(name for name in os.listdir(corner_dir) if os.path.isdir(os.path.join(corner_dir, name)))
+    if arcs:
+        arc_names = [name for name in arc_names if name in arcs]
+    log_message("INFO", f"Processing {len(arc_names)} arcs of corner {corner_name} with {jobs} threads")
+    os.makedirs(output_dir, exist_ok=True)
+ 
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(
+            lambda arc_name: parse_arc(os.path.join(corner_dir, arc_name), os.path.join(output_dir, arc_name),
+                                       arc_name, corner_name),
+            arc_names))
+ 
+    rows = []
+    status_counts = {'success': 0, 'missing': 0, 'error': 0}
+    for arc_name, status, statistics_rows, messages in results:
+        for message in messages:
+            print(message)
+        status_counts[status] += 1
+        if status == 'success':
+            log_message("SUCCESS", f"Processed arc: {arc_name}")
+        elif status == 'error':
+            log_message("ERROR", f"Failed to write the outputs of arc: {arc_name}")
+        for statistic, values in statistics_rows:
+            rows.append([arc_name, corner_name, statistic] + [values.get(col, "") for col in MEAS_COLUMNS])
+ 
+    table_file = os.path.join(output_dir, CORNER_TABLE_NAME)
+    with open(table_file, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(CORNER_TABLE_HEADER)
+        csv_writer.writerows(rows)
+    log_message("INFO", f"Wrote {len(rows)} rows to {table_file}")
+    if parquet:
+        parquet_file = write_parquet_copy(table_file, CORNER_TABLE_HEADER, rows)
+        if parquet_file:
+            log_message("INFO", f"Parquet copy: {parquet_file}")
+ 
+    log_message("INFO", f"Total arcs found: {len(arc_names)}")
+    log_message("INFO", f"Successfully processed: {status_counts['success']}")
+    log_message("INFO", f"Errors/warnings: {status_counts['missing'] + status_counts['error']}")
+    return 0
  
 def main():
-    debug_log("=" * 50)
-    debug_log("Starting MC data parsing script")
+    global DEBUG
    
-    if len(sys.argv) != 7:
-        debug_log(f"ERROR: Incorrect number of arguments. Got {len(sys.argv)-1}, expected 6")
-        print("Usage: python parse_mc_data.py <mc_sim.sp> <OUT.ava.report> <csv_output> <txt_output> <arc_name> <corner_name>")
+    parser = argparse.ArgumentParser(
+        description="Parse the Full-MC results of one arc, or of all arc folders of a corner",
+        usage="%(prog)s <mc_sim.sp> <OUT.ava.report> <csv_output> <txt_output> <arc_name> <corner_name>\n"
+              "       %(prog)s --corner_dir DIR --output_dir DIR [--corner NAME] [--arcs A,B] [--jobs N]")
+    parser.add_argument("files", nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument("--corner_dir", help="Corner folder with the arc folders (whole corner mode)")
+    parser.add_argument("--output_dir", help="Output folder of the corner, e.g. Parse/<corner>")
+    parser.add_argument("--corner", help="Corner name (default: name of --corner_dir)")
+    parser.add_argument("--arcs", help="Comma separated arcs to process (default: all)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Arc folders read at the same time (default: {DEFAULT_JOBS})")
+    parser.add_argument("--no_parquet", action='store_true', help="Don't write the Parquet copy of mc_stats.csv")
+    parser.add_argument("--debug", action='store_true', help="Print the debug messages")
+    args = parser.parse_args()
+    DEBUG = args.debug
+ 
+    if args.corner_dir:
+        if not args.output_dir:
+            parser.error("--corner_dir needs --output_dir")
+        corner_name = args.corner or os.path.basename(os.path.normpath(args.corner_dir))
+        arcs = set(args.arcs.split(',')) if args.arcs else None
+        sys.exit(parse_corner(args.corner_dir, args.output_dir, corner_name, arcs,
+                              jobs=args.jobs, parquet=not args.no_parquet))
+ 
+    if len(args.files) != 6:
+        log_message("ERROR", f"Incorrect number of arguments. Got {len(args.files)}, expected 6")
+        parser.print_usage()
         sys.exit(1)
        
-    mc_sim_file = sys.argv[1]
-    report_file = sys.argv[2]
-    csv_output = sys.argv[3]
-    txt_output = sys.argv[4]
-    arc_name = sys.argv[5]
-    corner_name = sys.argv[6]
-   
-    debug_log(f"Arguments:")
-    debug_log(f"  mc_sim_file: {mc_sim_file}")
-    debug_log(f"  report_file: {report_file}")
-    debug_log(f"  csv_output: {csv_output}")
-    debug_log(f"  txt_output: {txt_output}")
-    debug_log(f"  arc_name: {arc_name}")
-    debug_log(f"  corner_name: {corner_name}")
+    mc_sim_file, report_file, csv_output, txt_output, arc_name, corner_name = args.files
+    debug_log(f"Arguments: {args.files}")
    
     # Check if input files exist
     if not os.path.exists(mc_sim_file):
-        debug_log(f"ERROR: mc_sim file does not exist: {mc_sim_file}")
+        log_message("ERROR", f"mc_sim file does not exist: {mc_sim_file}")
         sys.exit(1)
    
     if not os.path.exists(report_file):
-        debug_log(f"ERROR: report file does not exist: {report_file}")
+        log_message("ERROR", f"report file does not exist: {report_file}")
         sys.exit(1)
    
-    # Parse mc_sim.sp
-    debug_log("Calling parse_mc_sim function")
     mc_sim_results = parse_mc_sim(mc_sim_file)
-    debug_log(f"Got {len(mc_sim_results)} results from mc_sim parse")
-   
-    # Parse OUT.ava.report
-    debug_log("Calling parse_ava_report function")
     ava_results = parse_ava_report(report_file)
-    debug_log(f"Got {len(ava_results)} rows from ava_report parse")
-   
-    # Create output directories if they don't exist
-    os.makedirs(os.path.dirname(txt_output), exist_ok=True)
-    os.makedirs(os.path.dirname(csv_output), exist_ok=True)
-   
-    # Write to TXT file (write mode, not append, since we have a file per arc now)
-    debug_log(f"Writing to TXT file: {txt_output}")
-    try:
-        with open(txt_output, 'w') as txt_file:
-            txt_file.write(f"// ARC: {arc_name} - CORNER: {corner_name}\n")
-            for i, result in enumerate(mc_sim_results):
-                if result:  # Only write non-empty results
-                    debug_log(f"Writing result {i+1} to TXT file ({len(result)} characters)")
-                    txt_file.write(f"{result}\n")
-                else:
-                    debug_log(f"Skipping empty result {i+1}")
-            txt_file.write("\n")
-        debug_log("Successfully wrote TXT file")
-    except Exception as e:
-        debug_log(f"ERROR writing TXT file: {str(e)}")
-        debug_log(traceback.format_exc())
-   
-    # Write to CSV file exactly as it appears in the original file
-    if ava_results:
-        debug_log(f"Writing to CSV file: {csv_output}")
-        try:
-            with open(csv_output, 'w', newline='') as csv_file:
-                writer = csv.writer(csv_file)
-                # Write all rows directly from the parsed results
-                for i, row in enumerate(ava_results):
-                    debug_log(f"Writing row {i+1} to CSV: {row}")
-                    writer.writerow(row)
-            debug_log("Successfully wrote CSV file")
-        except Exception as e:
-            debug_log(f"ERROR writing CSV file: {str(e)}")
-            debug_log(traceback.format_exc())
-    else:
-        debug_log("No ava_results to write to CSV")
-   
+    write_arc_outputs(mc_sim_results, ava_results, csv_output, txt_output, arc_name, corner_name)
     debug_log("Script completed successfully")
-    debug_log("=" * 50)
  
 if __name__ == "__main__":
     main()
- 
@@ -6,6 +6,7 @@ working_path="/SIM/DFDS_20211231/Personal/ynie/3-LibCharCerti/2025/N2P_v1.0/1-MC
 corners=("ssgnp_0p450v_m40c")
 script_path="/SIM/DFDS_20211231/Personal/ynie/3-LibCharCerti/2025/N2P_v1.0/1-MC_golden/1-Full_MC_golden/0-script/1-Parse/"
 specific_arcs=""
+jobs=16
 #specific_arcs="combinational_FA1MDLIMZD4BWP130HPNPN3P48CPD_S_fall_CI_fall_A_B_4-4 combinational_FA1MDLIMZD4BWP130HPNPN3P48CPD_S_rise_CI_rise_A_B_5-5 combinational_XNR4MDLIMZD4BWP130HPNPN3P48CPD_ZN_fall_A2_rise_notA1_notA3_notA4_6-6"
  
 # Divider function for log file
@@ -64,70 +65,23 @@ for corner in "${corners[@]}"; do
     # Create corner directory in OUTPUT
     mkdir -p "${working_path}/Parse/${corner}"
    
-    # Process each arc subdirectory
-    echo "[$timestamp] Searching for arc directories in $running_path" >> $log_file
-    arc_count=0
-    success_count=0
-    error_count=0
+    # Parse all arc folders of the corner with a thread pool; the script writes
+    # Parse/<corner>/<arc>/stats.csv + netlist_params.txt, the corner table
+    # Parse/<corner>/mc_stats.csv (+ .parquet) and the per-arc SUCCESS/WARNING lines
+    echo "[$timestamp] Parsing arc directories in $running_path with $jobs threads" >> $log_file
+    arc_option=()
+    if [ -n "$specific_arcs" ]; then
+        arc_option=(--arcs "$(echo $specific_arcs | tr ' ' ',')")
+    fi
    
-    print_divider
+    /usr/local/python/3.9.10/bin/python3 $python_script --corner_dir "$running_path" --output_dir "${working_path}/Parse/${corner}" --corner "$corner" --jobs $jobs "${arc_option[@]}" >> $log_file 2>&1
    
-    # Find all directories in the running path
-    for arc_dir in "$running_path"/*/ ; do
-        if [ -d "$arc_dir" ]; then
-            arc_name=$(basename "$arc_dir")
-           
-            # Check if we should process only specific arcs
-            if [ -n "$specific_arcs" ]; then
-                # Check if the current arc is in the list of specific arcs
-                if ! echo "$specific_arcs" | grep -q -w "$arc_name"; then
-                    # Skip this arc if it's not in the list
-                    continue
-                fi
-            fi
-           
-            echo "[$timestamp] Processing arc: $arc_name" >> $log_file
-           
-            # Check if required files exist
-            mc_sim_file="${arc_dir}/mc_sim.sp"
-            report_file="${arc_dir}/OUT.ava.report"
-           
-            if [ ! -f "$mc_sim_file" ] || [ ! -f "$report_file" ]; then
-                echo "[$timestamp] WARNING: Required files not found in arc: $arc_name" >> $log_file
-                ((error_count++))
-                continue
-            fi
-           
-            # Create subdirectory for this arc
-            arc_dir_output="${working_path}/Parse/${corner}/${arc_name}"
-            mkdir -p "$arc_dir_output"
-           
-            # Define output files for this arc
-            csv_output="${arc_dir_output}/stats.csv"
-            txt_output="${arc_dir_output}/netlist_params.txt"
-           
-            # Call Python script to parse the files
-            /usr/local/python/3.9.10/bin/python3 $python_script "$mc_sim_file" "$report_file" "$csv_output" "$txt_output" "$arc_name" "$corner" >> $log_file 2>&1
-           
-            if [ $? -eq 0 ]; then
-                ((arc_count++))
-                ((success_count++))
-                echo "[$timestamp] SUCCESS: Processed arc: $arc_name" >> $log_file
-            else
-                echo "[$timestamp] ERROR: Python script failed for arc: $arc_name" >> $log_file
-                ((error_count++))
-            fi
-           
-            # Add a small separator between arcs for better readability
-            echo "-----------------------------------------------------------------" >> $log_file
-        fi
-    done
+    if [ $? -ne 0 ]; then
+        echo "[$timestamp] ERROR: Python script failed for corner: $corner" >> $log_file
+    fi
    
     print_divider
     echo "[$timestamp] Completed processing corner: $corner" >> $log_file
-    echo "[$timestamp] Total arcs found: $arc_count" >> $log_file
-    echo "[$timestamp] Successfully processed: $success_count" >> $log_file
-    echo "[$timestamp] Errors/warnings: $error_count" >> $log_file
     print_divider
 done
  
@@ -2,6 +2,7 @@ import glob
 import os
 import subprocess
  
+import batchMode.manifest as kitManifest
 import lineParser.funcs as line_parser
  
  
@@ -98,6 +99,42 @@ def printKitLibTypes(lib_objs_list):
  
  
 def getLVFKitInfo(kit_path, user_lib_combos):
+    """
+    Returns the Library objects of the kit, with the files, VDD, temperature and
+    netlist subdirectory of the valid libraries, from the kit manifest (see
+    batchMode.manifest): the kit tree is listed once and the char.tcl files of the
+    valid libraries are read once, in parallel, and only again when they change.
+    """
+    kit_manifest = kitManifest.getKitManifest(kit_path)
+    lib_objs_list = createLibObjsFromManifest(kit_path, kit_manifest)
+    printKitLibTypes(lib_objs_list)
+    filterLibObjs(lib_objs_list, user_lib_combos)
+    printFinalLibraryInfo(lib_objs_list)
+ 
+    # Get the template, char.tcl, and corner.inc files for each valid library
+    libraries = dict(((x['lib_type'], x['lgvt'], x['corner']), x)
+                     for x in kit_manifest.libraries())
+    valid_lib_objs_gen = getValidLibGenerator(lib_objs_list)
+    for lib_obj in valid_lib_objs_gen:
+        populateLibObjFilePathsFromManifest(lib_obj, libraries[(
+            lib_obj.lib_type, lib_obj.lgvt, lib_obj.corner)])
+ 
+    # Read the char.tcl files that are not in the manifest yet
+    kit_manifest.updateCharFiles([lib_obj.kit_char_file for lib_obj in
+                                  getValidLibGenerator(lib_objs_list)])
+ 
+    # Get the VDD, Temperature and Netlist subdirectory for each valid library
+    valid_lib_objs_gen = getValidLibGenerator(lib_objs_list)
+    for lib_obj in valid_lib_objs_gen:
+        populateLibObjCharInfo(lib_obj, kit_manifest.getCharInfo(lib_obj.kit_char_file))
+ 
+    return lib_objs_list
+ 
+ 
+def getLVFKitInfoByGrep(kit_path, user_lib_combos):
+    """
+    The glob and grep based kit discovery, kept as the reference for getLVFKitInfo.
+    """
     lib_objs_list = createAvailLibObjs(kit_path)
     printKitLibTypes(lib_objs_list)
     filterLibObjs(lib_objs_list, user_lib_combos)
@@ -144,6 +181,16 @@ def createAvailLibObjs(kit_path):
     return lib_objs_list
  
  
+def createLibObjsFromManifest(kit_path, kit_manifest):
+    lib_objs_list = list()
+    for library in kit_manifest.libraries():
+        libobj = Library(library['lib_type'], library['lgvt'], library['corner'],
+                         kit_path)
+        lib_objs_list.append(libobj)
+ 
+    return lib_objs_list
+ 
+ 
 def filterLibObjs(lib_objs_list, user_lib_combos):
     # Generator of user's combinations
     combos_gen = (formLibCombo(combination) for combination in user_lib_combos)
@@ -183,6 +230,34 @@ def populateLibObjFilePaths(lib_obj):
         lib_obj.kit_include_file = inc_file
  
  
+def populateLibObjFilePathsFromManifest(lib_obj, library):
+    for file_key, file_desc, attribute in (
+            ('template_file', "a template file", 'kit_template_file'),
+            ('char_file', "a char file", 'kit_char_file'),
+            ('inc_file', "an include file", 'kit_include_file')):
+        if library[file_key] is None:
+            print("Couldn't find %s for library %s %s %s" % (
+                file_desc, lib_obj.lib_type, lib_obj.lgvt, lib_obj.corner))
+            print("Marking this library as invalid.")
+            lib_obj.valid_lib = False
+        else:
+            setattr(lib_obj, attribute, library[file_key])
+ 
+ 
+def populateLibObjCharInfo(lib_obj, char_info):
+    for info_key, info_desc, attribute in (
+            ('vdd_value', "'set VOLT'", 'vdd_value'),
+            ('temper', "'set TEMP'", 'temper'),
+            ('netlist_subdir', "a 'Netlist/' path", 'netlist_subdir')):
+        if char_info[info_key] is None:
+            print("Couldn't find %s in the char file of library %s %s %s" % (
+                info_desc, lib_obj.lib_type, lib_obj.lgvt, lib_obj.corner))
+            print("Marking this library as invalid.")
+            lib_obj.valid_lib = False
+        else:
+            setattr(lib_obj, attribute, char_info[info_key])
+ 
+ 
 def populateLibObjVDD(lib_obj):
     stdout, stdin = pygrep(lib_obj.kit_char_file, "set VOLT")
     lib_obj_vdd = stdout.decode().strip().split()[-1]
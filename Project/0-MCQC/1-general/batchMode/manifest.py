@@ -0,0 +1,273 @@
+"""
+This module contains the LVF kit manifest.
+
+The kit tree (<kit_path>/<lib_type>/<lgvt>/Char/<corner>.inc, next to the
+char_<corner>.tcl and Template/*<corner>*.template.tcl files) is scanned once with
+os.scandir, and each char.tcl that is needed is read once, in a thread pool, for its
+VDD, temperature, netlist subdirectory, include file lookup and cell list. The
+result is kept in a manifest file keyed on the directory and file mtimes, so later
+runs of batchRunMonteCarlo and scld__mcqc only stat the kit instead of globbing and
+grepping it again.
+"""
+
+import concurrent.futures
+import fnmatch
+import hashlib
+import json
+import os
+
+import hybrid_char_helper
+import utilities.fileIO as ioutils
+
+KIT_MANIFEST_VERSION = 1
+# Kept outside of the kit: writing into the kit directory would change the directory
+# mtimes the manifest is keyed on
+KIT_MANIFEST_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".mcqc_cache")
+
+MAX_READ_THREADS = 16
+
+_kit_manifests = dict()
+
+
+def scanKitTree(kit_path):
+    """
+    A function that walks the kit tree once and lists its libraries
+
+    Returns:
+        libraries (list):
+            One dict per <corner>.inc file of a Char directory, with the lib_type,
+            lgvt, corner and the paths of its include, char and template files
+            (None if missing); the same files as the globs of batchMode.funcs
+        dir_mtimes (dict):
+            The mtime of every directory that was listed, including the empty ones
+    """
+    libraries = list()
+    dir_mtimes = dict()
+    dir_mtimes[kit_path] = os.stat(kit_path).st_mtime
+    for lib_type, is_dir in ioutils.listDir(kit_path):
+        lib_type_path = os.path.join(kit_path, lib_type)
+        if not is_dir:
+            continue
+        dir_mtimes[lib_type_path] = os.stat(lib_type_path).st_mtime
+
+        for lgvt, is_dir in ioutils.listDir(lib_type_path):
+            lgvt_path = os.path.join(lib_type_path, lgvt)
+            if not is_dir:
+                continue
+            dir_mtimes[lgvt_path] = os.stat(lgvt_path).st_mtime
+
+            char_path = os.path.join(lgvt_path, "Char")
+            template_path = os.path.join(lgvt_path, "Template")
+            char_names = [name for name, _ in ioutils.listDir(char_path)]
+            # Empty directories too: a file created in them changes their mtime
+            if os.path.isdir(char_path):
+                dir_mtimes[char_path] = os.stat(char_path).st_mtime
+            if not char_names:
+                continue
+            template_names = [name for name, _ in ioutils.listDir(template_path)]
+            if os.path.isdir(template_path):
+                dir_mtimes[template_path] = os.stat(template_path).st_mtime
+
+            char_name_set = set(char_names)
+            for inc_name in char_names:
+                if not inc_name.endswith(".inc"):
+                    continue
+                corner = inc_name.split('.inc')[0]
+                char_name = "char_%s.tcl" % corner
+                template_pattern = "*%s*.template.tcl" % corner
+                template_name = next((x for x in template_names
+                                      if fnmatch.fnmatch(x, template_pattern)), None)
+                libraries.append({
+                    'lib_type': lib_type,
+                    'lgvt': lgvt,
+                    'corner': corner,
+                    'inc_file': os.path.join(char_path, inc_name),
+                    'char_file': os.path.join(char_path, char_name)
+                    if char_name in char_name_set else None,
+                    'template_file': os.path.join(template_path, template_name)
+                    if template_name is not None else None,
+                })
+
+    return libraries, dir_mtimes
+
+
+def readCharFile(char_file):
+    """
+    A function that reads a char.tcl once and extracts the library data from it
+
+    Returns:
+        char_info (dict):
+            'vdd_value'/'temper' are the last fields of the first 'set VOLT'/'set TEMP'
+            lines, 'netlist_subdir' comes from the first line containing 'Netlist'
+            (batchMode) and 'spi_netlist_subdir' from the last one that also contains
+            'spi' (scld__mcqc). 'inc_file_lookup' and 'cells' are the same as
+            hybrid_char_helper.parse_chartcl_for_inc/parse_chartcl_for_cells; if the
+            include lookup fails, it is None and 'inc_file_error' holds the error.
+            Values that are not found are None.
+    """
+    stat = os.stat(char_file)
+    with open(char_file, 'r', errors='replace') as f:
+        char_lines = f.readlines()
+
+    char_info = {'mtime': stat.st_mtime, 'size': stat.st_size, 'vdd_value': None,
+                 'temper': None, 'netlist_subdir': None, 'spi_netlist_subdir': None,
+                 'inc_file_lookup': None, 'inc_file_error': None, 'cells': None}
+    netlist_line_seen = False
+    for line in char_lines:
+        if char_info['vdd_value'] is None and "set VOLT" in line:
+            char_info['vdd_value'] = line.strip().split()[-1]
+        elif char_info['temper'] is None and "set TEMP" in line:
+            char_info['temper'] = line.strip().split()[-1]
+        if 'Netlist' in line:
+            netlist_info = line.strip().split('Netlist/')
+            if not netlist_line_seen and len(netlist_info) > 1:
+                char_info['netlist_subdir'] = os.path.dirname(netlist_info[1])
+            netlist_line_seen = True
+            if 'spi' in line and len(netlist_info) > 1:
+                char_info['spi_netlist_subdir'] = os.path.dirname(netlist_info[1])
+
+    chartcl = [x for x in (line.strip() for line in char_lines) if x]
+    try:
+        char_info['inc_file_lookup'] = hybrid_char_helper.parse_chartcl_for_inc(
+            char_file, chartcl)
+    except (AssertionError, IndexError, OSError, ValueError) as e:
+        char_info['inc_file_error'] = "%s" % e
+    char_info['cells'] = hybrid_char_helper.parse_chartcl_for_cells(char_file, chartcl)
+
+    return char_info
+
+
+def getKitManifestFile(kit_path):
+    """
+    Returns the manifest file of the kit in KIT_MANIFEST_CACHE_DIR.
+    """
+    kit_path = os.path.abspath(kit_path)
+    path_hash = hashlib.sha1(kit_path.encode()).hexdigest()[:16]
+    return os.path.join(KIT_MANIFEST_CACHE_DIR, "kit_manifest_%s.json" % path_hash)
+
+
+class KitManifest(object):
+    """
+    The manifest of one LVF kit.
+    """
+
+    def __init__(self, kit_path, manifest_file=None):
+        self.kit_path = os.path.abspath(kit_path)
+        self.manifest_file = manifest_file or getKitManifestFile(kit_path)
+        self._libraries = list()
+        self._dir_mtimes = dict()
+        self._char_files = dict()
+        self._tree_checked = False
+        self._checked = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest_data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if manifest_data.get('version') != KIT_MANIFEST_VERSION or \
+                manifest_data.get('kit_path') != self.kit_path:
+            return
+        self._libraries = manifest_data.get('libraries', list())
+        self._dir_mtimes = manifest_data.get('dir_mtimes', dict())
+        self._char_files = manifest_data.get('char_files', dict())
+
+    def save(self):
+        manifest_data = {'version': KIT_MANIFEST_VERSION,
+                         'kit_path': self.kit_path,
+                         'libraries': self._libraries,
+                         'dir_mtimes': self._dir_mtimes,
+                         'char_files': self._char_files}
+        tmp_file = "%s.%s.tmp" % (self.manifest_file, os.getpid())
+        try:
+            manifest_dir = os.path.dirname(self.manifest_file)
+            if not os.path.isdir(manifest_dir):
+                os.makedirs(manifest_dir, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(manifest_data, f)
+            os.replace(tmp_file, self.manifest_file)
+        except (IOError, OSError) as e:
+            print("WARNING:\t Could not write kit manifest %s (%s)" % (self.manifest_file,
+                                                                      e))
+
+    def isTreeCurrent(self):
+        if not self._dir_mtimes:
+            return False
+        for dir_path, mtime in self._dir_mtimes.items():
+            try:
+                if os.stat(dir_path).st_mtime != mtime:
+                    return False
+            except OSError as _:
+                return False
+        return True
+
+    def libraries(self):
+        """
+        Returns the libraries of the kit (see scanKitTree), re-scanning the kit tree
+        only if one of its directories changed since the manifest was written.
+        """
+        if not self._tree_checked:
+            self._tree_checked = True
+            if not self.isTreeCurrent():
+                print("INFO:\t Scanning the LVF kit %s" % self.kit_path)
+                self._libraries, self._dir_mtimes = scanKitTree(self.kit_path)
+                self.save()
+        return self._libraries
+
+    def updateCharFiles(self, char_files, jobs=None):
+        """
+        Makes sure the given char.tcl files are in the manifest, reading (in a thread
+        pool) the ones that are new or whose mtime/size changed, and saves the
+        manifest if needed. Files are only checked once per process.
+        """
+        to_read = list()
+        for char_file in char_files:
+            char_file = os.path.abspath(char_file)
+            if char_file in self._checked:
+                continue
+            self._checked.add(char_file)
+            try:
+                stat = os.stat(char_file)
+            except OSError:
+                # Missing files fail when they are looked up
+                self._char_files.pop(char_file, None)
+                continue
+            entry = self._char_files.get(char_file)
+            if entry is None or entry['mtime'] != stat.st_mtime or \
+                    entry['size'] != stat.st_size:
+                to_read.append(char_file)
+
+        if not to_read:
+            return
+
+        if jobs is None:
+            jobs = min(MAX_READ_THREADS, len(to_read))
+        print("INFO:\t Reading %s char.tcl files with %s threads." % (len(to_read), jobs))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(readCharFile, to_read))
+
+        for char_file, char_info in zip(to_read, results):
+            self._char_files[char_file] = char_info
+        self.save()
+
+    def getCharInfo(self, char_file):
+        char_file = os.path.abspath(char_file)
+        if char_file not in self._checked:
+            self.updateCharFiles([char_file], jobs=1)
+        try:
+            return self._char_files[char_file]
+        except KeyError:
+            # Not there: reading raises the same error as grepping the file did
+            return readCharFile(char_file)
+
+
+def getKitManifest(kit_path):
+    """
+    Returns the (per process) KitManifest of an LVF kit.
+    """
+    key = os.path.abspath(kit_path)
+    if key not in _kit_manifests:
+        _kit_manifests[key] = KitManifest(kit_path)
+    return _kit_manifests[key]
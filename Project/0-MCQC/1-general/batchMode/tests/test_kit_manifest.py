@@ -0,0 +1,64 @@
+import os
+import sys
+sys.path.append('./')
+import batchMode.manifest as kitManifest
+
+CORNER = "ssgnp_0p450v_m40c_cworst_CCworst_T"
+NEW_CORNER = "ffgnp_0p880v_125c_cbest_CCbest_T"
+
+
+def _writeKit(tmp_path):
+    """
+    A kit with one library (base/lvt) and an lgvt (base/ulvt) whose Char directory is
+    empty. All of the directories are older than the scan.
+    """
+    kit_path = tmp_path / "kit"
+    char_path = kit_path / "base" / "lvt" / "Char"
+    template_path = kit_path / "base" / "lvt" / "Template"
+    char_path.mkdir(parents=True)
+    template_path.mkdir()
+    (kit_path / "base" / "ulvt" / "Char").mkdir(parents=True)
+    (char_path / ("%s.inc" % CORNER)).write_text("")
+    (char_path / ("char_%s.tcl" % CORNER)).write_text("set VOLT 0.45\n")
+    (template_path / ("base_%s.template.tcl" % CORNER)).write_text("")
+    for dir_path, _, _ in os.walk(str(kit_path)):
+        os.utime(dir_path, (0, 0))
+    return str(kit_path)
+
+
+def _getManifest(tmp_path, kit_path):
+    return kitManifest.KitManifest(kit_path, str(tmp_path / "kit_manifest.json"))
+
+
+def _getLibraries(kit_manifest):
+    return sorted((x['lgvt'], x['corner']) for x in kit_manifest.libraries())
+
+
+class TestKitManifest:
+    def test_empty_directories_are_recorded(self, tmp_path):
+        kit_path = _writeKit(tmp_path)
+        _, dir_mtimes = kitManifest.scanKitTree(kit_path)
+        assert os.path.join(kit_path, "base", "ulvt", "Char") in dir_mtimes
+        assert os.path.join(kit_path, "base", "lvt", "Template") in dir_mtimes
+
+    def test_rescan_after_a_change(self, tmp_path):
+        kit_path = _writeKit(tmp_path)
+        assert _getLibraries(_getManifest(tmp_path, kit_path)) == [("lvt", CORNER)]
+        assert _getManifest(tmp_path, kit_path).isTreeCurrent()
+
+        # A new file in a Char directory with libraries
+        with open(os.path.join(kit_path, "base", "lvt", "Char", "%s.inc" % NEW_CORNER),
+                  'w'):
+            pass
+        kit_manifest = _getManifest(tmp_path, kit_path)
+        assert not kit_manifest.isTreeCurrent()
+        assert _getLibraries(kit_manifest) == [("lvt", NEW_CORNER), ("lvt", CORNER)]
+
+        # The first file of an empty Char directory
+        with open(os.path.join(kit_path, "base", "ulvt", "Char", "%s.inc" % CORNER), 'w'):
+            pass
+        kit_manifest = _getManifest(tmp_path, kit_path)
+        assert not kit_manifest.isTreeCurrent()
+        assert _getLibraries(kit_manifest) == [("lvt", NEW_CORNER), ("lvt", CORNER),
+                                               ("ulvt", CORNER)]
+        assert _getManifest(tmp_path, kit_path).isTreeCurrent()
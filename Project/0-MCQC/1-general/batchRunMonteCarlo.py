@@ -1,11 +1,18 @@
+import collections
 import fnmatch
 import getopt
+import multiprocessing
 import os
 import sys
+import time
  
+import hybrid_char_helper
 import runMonteCarlo
 import batchMode.funcs as batchMode
+import charTemplateParser.funcs as templateParser
 import globalsFileReader.funcs as globalsFileReader
+import netlistIndex.funcs as netlistIndex
+import qaTemplateMaker.funcs as createQATemplate
  
  
 def usage():
@@ -31,12 +38,18 @@ def usage():
         ("", "", "\tArcs in this file are sensitized."),
         ("", "", "\tFor examples of this file, see the 'examples' directory in the "
                  "root path %s" % os.path.dirname(sys.argv[0])),
+        ("--jobs=", ":", "Number of libraries generated concurrently, in a pool of "
+                         "processes. Default is [1]"),
+        ("", "", "\tLibraries sharing an LPE netlist directory are grouped; the "
+                 "template.tcl and netlists of a group are parsed once."),
         ("--estimate_cpus", ":", "A flag that will print resource estimation for "
                                  "simulating the library."),
         ("--spice_deck_format=", ":", "Determines the SPICE deck format that will be "
                                       "used. Default is [hspice]"),
         ("", "", "\tThe other valid option is 'thanos' which creates FMC formatted "
-                 "SPICE decks.")
+                 "SPICE decks."),
+        ("--no_template_cache", ":", "Don't keep the parsed template.tcl files in the "
+                                     "parse cache <root_output_path>/.template_cache.")
     ]
  
     # Print
@@ -59,7 +72,8 @@ def usage():
  
     - If the user wants the SPICE decks to simultaneously be generated when the
     globals.txt file is generated, simply specify the 'generate_all_combinations'
-    argument when calling this script.
+    argument when calling this script. With '--jobs', the libraries are generated
+    concurrently and a per-library wall time and throughput report is printed.
     """ % sys.argv[0])
  
     # Globals info
@@ -132,7 +146,10 @@ def parseInputArgs(input_args):
                  "globals_file=",
                  "arc_csv_filter_file=",
                  "generate_all_combinations",
-                 "spice_deck_format="
+                 "estimate_cpus",
+                 "jobs=",
+                 "spice_deck_format=",
+                 "no_template_cache"
                  ]
     (optlst, remainder) = getopt.gnu_getopt(input_args, short_opts, long_opts)
  
@@ -140,6 +157,8 @@ def parseInputArgs(input_args):
     input_options['GENERATE_ALL_COMBINATIONS'] = 0
     input_options['ESTIMATE_CPUS'] = False
     input_options['SPICE_DECK_FORMAT'] = "HSPICE"
+    input_options['NUM_JOBS'] = 1
+    input_options['TEMPLATE_CACHE'] = True
     if not len(input_args)-1:
         usage()
         sys.exit(0)
@@ -157,6 +176,10 @@ def parseInputArgs(input_args):
             input_options['ESTIMATE_CPUS'] = True
         elif opt in "--spice_deck_format":
             input_options['SPICE_DECK_FORMAT'] = arg.upper()
+        elif opt in "--jobs":
+            input_options['NUM_JOBS'] = max(1, int(arg))
+        elif opt in "--no_template_cache":
+            input_options['TEMPLATE_CACHE'] = False
  
     return input_options
  
@@ -269,6 +292,7 @@ def getLibRootOutputPath(lib_obj):
                                             "DECKS")
         if not os.path.exists(lib_root_output_path):
             break
+        count += 1
     return lib_root_output_path
  
  
@@ -293,6 +317,137 @@ def makeGlobalsBuffer(lib_options):
     return write_buffer
  
  
+def getLibraryKey(lib_obj):
+    return "%s/%s/%s" % (lib_obj.lib_type, lib_obj.lgvt, lib_obj.corner)
+ 
+ 
+def getRunOptions(lib_obj, lib_options, template_cache_dir=None):
+    """
+    Returns a copy of the library settings with the inputs runMonteCarlo.main needs
+    besides the globals file: the kit char.tcl, the include file of the batch and the
+    template parse cache directory (None if the cache is turned off).
+    """
+    run_options = dict(lib_options)
+    run_options['TEMPLATE_CACHE_DIR'] = template_cache_dir
+    run_options['CHARTCL_FILE'] = lib_obj.kit_char_file
+    run_options['INCLUDE_FILE_LOOKUP'] = {'traditional': lib_obj.output_include_file}
+    # Libraries are the unit of parallelism, each one writes its decks serially
+    run_options['NUM_JOBS'] = 1
+    return run_options
+ 
+ 
+def getLibraryGroups(lib_runs):
+    """
+    Groups the (library key, run options) pairs by shared inputs: the libraries of a
+    group use the same LPE netlist directory (and mostly the same template.tcl).
+    """
+    lib_groups = collections.OrderedDict()
+    for lib_key, run_options in lib_runs:
+        lib_groups.setdefault(run_options['ROOT_NETLIST_PATH'], list()).append(
+            (lib_key, run_options))
+    return list(lib_groups.values())
+ 
+ 
+def getExtractedCells(template_info, chartcl_cells, cell_pattern_list):
+    # The same cells as runMonteCarlo.main and getQAArcCharacteristics
+    valid_cells = set(chartcl_cells or template_info.getTclVar('cells', ()))
+    return [cell_obj.name() for cell_obj in template_info.getAllCells()
+            if cell_obj.name() in valid_cells and
+            createQATemplate.checkValidCell(cell_obj.name(), cell_pattern_list)]
+ 
+ 
+def prepareLibraryGroup(group_runs, netlist_jobs=1):
+    """
+    Parses the shared inputs of a group of libraries once: each template.tcl (into
+    the template parse cache, if it is on) and the netlists of the cells to be
+    extracted (into the netlist index of the group). The deck generation of the
+    libraries then only loads them. Of the char.tcl of a library, only the 'set
+    cells' list is read here; its ChartclModel is built by runMonteCarlo.main in the
+    process that generates the library.
+ 
+    Returns:
+        elapsed (float):
+            The wall time in seconds
+    """
+    start = time.time()
+    template_infos = dict()
+    netlist_index = netlistIndex.getNetlistIndex(group_runs[0][1]['ROOT_NETLIST_PATH'])
+    netlist_paths = set()
+    for _, run_options in group_runs:
+        template_file = run_options['TEMPLATE_FILE']
+        if template_file not in template_infos:
+            template_infos[template_file] = templateParser.parseTemplateFile(
+                template_file, cache_dir=run_options['TEMPLATE_CACHE_DIR'])
+        chartcl_cells = hybrid_char_helper.parse_chartcl_for_cells(run_options['CHARTCL_FILE'])
+        netlist_paths.update(netlist_index.resolvePath(cell_name) for cell_name in
+                             getExtractedCells(template_infos[template_file], chartcl_cells,
+                                               run_options['CELL_PATTERN_LIST']))
+    netlist_index.update(sorted(netlist_paths), jobs=netlist_jobs)
+    return time.time() - start
+ 
+ 
+def countDecks(spice_info):
+    return sum(1 for table_point in spice_info for arc_num in spice_info[table_point]
+               if spice_info[table_point][arc_num]['VALID_ARC'] is not False)
+ 
+ 
+def runLibrary(lib_run):
+    """
+    Generates the SPICE decks of one library.
+ 
+    Returns:
+        lib_key (str), elapsed (float), num_decks (int):
+            The library, its wall time in seconds and the number of decks written
+            (0 when only estimating CPUs)
+    """
+    lib_key, run_options = lib_run
+    start = time.time()
+    spice_info = runMonteCarlo.main(run_options)
+    num_decks = 0 if run_options['ESTIMATE_CPUS'] else countDecks(spice_info)
+    return lib_key, time.time() - start, num_decks
+ 
+ 
+def runLibraries(lib_runs, jobs=1):
+    """
+    Generates the SPICE decks of all libraries. The libraries are grouped by shared
+    inputs, the inputs of every group are parsed once, then the libraries run in a
+    pool of jobs processes (in group order) and a run report is printed.
+    """
+    start = time.time()
+    group_runs = getLibraryGroups(lib_runs)
+    ordered_runs = [lib_run for runs in group_runs for lib_run in runs]
+    jobs = min(jobs, len(ordered_runs))
+    print("INFO:\t Generating %s libraries (%s groups of shared inputs) with %s "
+          "processes." % (len(ordered_runs), len(group_runs), jobs))
+ 
+    if jobs > 1:
+        pool = multiprocessing.Pool(processes=jobs)
+        try:
+            group_times = pool.map(prepareLibraryGroup, group_runs, chunksize=1)
+            run_results = pool.map(runLibrary, ordered_runs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        group_times = [prepareLibraryGroup(runs, netlist_jobs=None) for runs in group_runs]
+        run_results = [runLibrary(lib_run) for lib_run in ordered_runs]
+ 
+    printRunReport(run_results, sum(group_times), time.time() - start)
+    return run_results
+ 
+ 
+def printRunReport(run_results, prepare_time, total_time):
+    print("\n### LIBRARY RUN REPORT ###")
+    print('\t{0:<50} {1:>10} {2:>12}'.format("Library", "Decks", "Wall [s]"))
+    for lib_key, elapsed, num_decks in run_results:
+        print('\t{0:<50} {1:>10} {2:>12.1f}'.format(lib_key, num_decks, elapsed))
+    total_decks = sum(num_decks for _, _, num_decks in run_results)
+    print("Parsed the shared inputs in %.1f s (summed over groups)." % prepare_time)
+    print("Generated %s decks for %s libraries in %.1f s (%.1f decks/s)." % (
+        total_decks, len(run_results), total_time,
+        total_decks / total_time if total_time > 0 else 0.0))
+ 
+ 
 def writeGlobalsFile(lib_obj, globals_buffer):
     globals_file = os.path.join(lib_obj.script_output_path, "globals.txt")
  
@@ -322,6 +477,11 @@ def main(input_args=None):
  
  
     valid_lib_obj_list = batchMode.getValidLibGenerator(lib_objs_list)
+    template_cache_dir = None
+    if user_options.get('TEMPLATE_CACHE', True):
+        template_cache_dir = os.path.join(user_options['ROOT_OUTPUT_PATH'],
+                                          templateParser.TEMPLATE_CACHE_DIRNAME)
+    lib_runs = list()
     for lib_obj in valid_lib_obj_list:
         print("Creating directory structure, include file, and globals for library %s"
               % "\t{0:<10} {1:<10} {2:<50}".format(lib_obj.lib_type, lib_obj.lgvt,
@@ -336,11 +496,13 @@ def main(input_args=None):
         # Create the globals file
         globals_buffer = makeGlobalsBuffer(lib_options)
         writeGlobalsFile(lib_obj, globals_buffer)
+        lib_runs.append((getLibraryKey(lib_obj), getRunOptions(lib_obj, lib_options,
+                                                               template_cache_dir)))
  
-        # Run generation
-        if user_options['GENERATE_ALL_COMBINATIONS']:
-            print("Generation is turned on.")
-            _ = runMonteCarlo.main(lib_options)
+    # Run generation
+    if user_options['GENERATE_ALL_COMBINATIONS']:
+        print("Generation is turned on.")
+        runLibraries(lib_runs, int(user_options.get('NUM_JOBS', 1)))
  
     print("Finished creating globals files.")
     print("Find all data in the root path %s" % user_options['ROOT_OUTPUT_PATH'])
@@ -0,0 +1,474 @@
+"""
+Helpers shared by the benchmarks: the timer and the writers of the synthetic inputs.
+The equivalence of the rewritten readers with the reference implementations is
+checked by the unit tests next to each package (e.g. libraryParser/tests), which
+write their own small inputs and do not import this module.
+
+Importing this module puts the 1-general directory on sys.path, so the benchmarks
+can import the flow packages.
+"""
+import contextlib
+import glob
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+GENERAL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if GENERAL_DIR not in sys.path:
+    sys.path.insert(0, GENERAL_DIR)
+
+# The template decks of the flow
+TEMPLATE_DECK_DIR = os.path.join(os.path.dirname(GENERAL_DIR), "2-flow")
+
+# Header infos of getTemplateDeckArcInfo: plain, glitch minq and glitch maxq
+TEMPLATE_DECK_HEADER_INFOS = ("hold__template__CP__rise__D__fall__1",
+                              "hold__template__CP__rise__D__fall__glitch__minq__1",
+                              "hold__template__CP__rise__D__fall__glitch__maxq__1")
+
+# Measurements of writeSyntheticMT0
+MT0_MEASUREMENTS = ("cp2d", "cp2q_del1", "d2q", "temper")
+
+# Library tables and MC objects of createSyntheticJoinData
+JOIN_PINS = ("D", "SE", "SI", "D1", "D2")
+# findMatchingMCObjs fails in bundle mode for library pins without a "D"
+JOIN_BUNDLE_PINS = ("D", "D1", "D2", "D3")
+JOIN_TIMING_TYPES = ("hold_rising", "setup_rising", "hold_falling")
+JOIN_TABLE_POINTS = ("1-1", "2-3", "5-5")
+
+# Percentile header blocks of writeSyntheticMPP0
+MPP0_PERCENTILE_BLOCKS = (("Q0.135", "Q2.275", "Q15.865"),
+                          ("Q50", "Q84.135", "Q97.725", "Q99.865"))
+
+# The hspice stand-in of getStubLocalExecutor
+STUB_SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "stub_simulator.py")
+
+# Parameter list of the modifyLPE benchmark and tests
+LPE_PARAMETER_LIST = ("parl1", "parl2", "plo_tox", "plo_dxl", "plo_dhfin", "plo_dtfin")
+
+# Library tables of writeSyntheticLibrary
+LIB_TABLE_SIZE = 5
+LIB_DELAY_TABLES = ("cell_rise", "cell_fall", "rise_transition", "fall_transition")
+LIB_CONSTRAINT_TABLES = ("rise_constraint", "fall_constraint")
+
+
+def timed(label, func, *args, **kwargs):
+    """Runs func, prints its wall time and returns its result."""
+    start = time.time()
+    result = func(*args, **kwargs)
+    print("%-40s %8.3f s" % (label, time.time() - start))
+    return result
+
+
+def timedThroughput(label, size_mb, func, *args, **kwargs):
+    """Same as timed, and prints the throughput over size_mb megabytes."""
+    start = time.time()
+    result = func(*args, **kwargs)
+    elapsed = time.time() - start
+    print("%-40s %8.3f s %8.1f MB/s" % (label, elapsed, size_mb / elapsed))
+    return result
+
+
+@contextlib.contextmanager
+def workDir(prefix, work_dir=None):
+    """A temporary directory (or work_dir, kept) for the synthetic inputs."""
+    if work_dir is not None:
+        yield work_dir
+        return
+    work_dir = tempfile.mkdtemp(prefix=prefix)
+    try:
+        yield work_dir
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def writeLines(path, lines):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _libTable(name, template, sigma_type, seed):
+    axis = ", ".join("%.4f" % (0.001 * (k + 1) * (seed % 7 + 1))
+                     for k in range(LIB_TABLE_SIZE))
+    lines = ["        ocv_sigma_%s (%s_template_%dx%d) {" % (name, template, LIB_TABLE_SIZE,
+                                                            LIB_TABLE_SIZE),
+             "          sigma_type : %s;" % sigma_type,
+             "          index_1 (\"%s\");" % axis,
+             "          index_2 (\"%s\");" % axis,
+             "          values ( \\"]
+    for row in range(LIB_TABLE_SIZE):
+        values = ", ".join("%.6f" % (((seed * 31 + row * 7 + col) % 997) * 1e-5)
+                           for col in range(LIB_TABLE_SIZE))
+        lines.append("            \"%s\"%s" % (values,
+                                              ", \\" if row < LIB_TABLE_SIZE - 1 else " \\"))
+    lines.extend(["          );", "        }"])
+    return lines
+
+
+def _libCellLines(cell_idx):
+    cell = "SYNDFF%05dD1" % cell_idx
+    lines = ["  cell (%s) {" % cell]
+    seed = cell_idx
+    lines.extend(["    pin (Q) {", "      direction : output;"])
+    for when in ("SE", "!SE"):
+        lines.extend(["      timing () {",
+                      "        related_pin : \"CP\";",
+                      "        timing_type : rising_edge;",
+                      "        timing_sense : non_unate;",
+                      "        when : \"%s\";" % when])
+        for name in LIB_DELAY_TABLES:
+            for sigma_type in ("early", "late"):
+                seed += 1
+                lines.extend(_libTable(name, "delay", sigma_type, seed))
+        lines.append("      }")
+    lines.append("    }")
+    lines.extend(["    pin (D) {", "      direction : input;"])
+    for timing_type in ("hold_rising", "setup_rising"):
+        lines.extend(["      timing () {",
+                      "        related_pin : \"CP\";",
+                      "        timing_type : %s;" % timing_type])
+        for name in LIB_CONSTRAINT_TABLES:
+            for sigma_type in ("early", "late"):
+                seed += 1
+                lines.extend(_libTable(name, "constraint", sigma_type, seed))
+        lines.append("      }")
+    lines.extend(["    }", "  }"])
+    return cell, lines
+
+
+def writeSyntheticLibrary(path, size_mb=None, num_cells=None):
+    """
+    Writes an LVF sensitivity file (delay and constraint tables, early/late sigma,
+    5x5 tables) of about size_mb megabytes, or of num_cells cells.
+
+    Returns:
+        cells (list):
+            The cell names
+    """
+    cells = list()
+    target = size_mb * 1024 * 1024 if size_mb is not None else None
+    with open(path, 'w') as f:
+        f.write("library (synthetic_lvf) {\n")
+        while (f.tell() < target) if target is not None else (len(cells) < num_cells):
+            cell, lines = _libCellLines(len(cells))
+            f.write("\n".join(lines) + "\n")
+            cells.append(cell)
+        f.write("}\n")
+    return cells
+
+
+def getTemplateDecks(template_dir=TEMPLATE_DECK_DIR):
+    """The *.sp template decks (with a DONT_TOUCH_PINS line) of template_dir."""
+    import spiceDeckMaker.funcs as spiceDeckMaker
+
+    template_decks = list()
+    for template_deck in sorted(glob.glob(os.path.join(template_dir, "**", "*.sp"),
+                                          recursive=True)):
+        lines = spiceDeckMaker.getFileLines(template_deck)
+        if len(lines) > 1 and 'DONT_TOUCH_PINS' in lines[1]:
+            template_decks.append(template_deck)
+    return template_decks
+
+
+def getTemplateDeckArcInfo(template_deck, arc_num):
+    """
+    A synthetic arc of template_deck; arc_num picks the header (plain, glitch minq
+    or maxq), the pushout sign, the when condition and the side pin states.
+    """
+    import spiceDeckMaker.funcs as spiceDeckMaker
+
+    var_names = set()
+    for line in spiceDeckMaker.getFileLines(template_deck):
+        if '$' in line:
+            var_names.update(spiceDeckMaker.splitDollarNames(line))
+    arc_info = dict((name, "%s_%s" % (name.lower(), arc_num)) for name in var_names)
+    arc_info.update({
+        'TEMPLATE_DECK': os.path.basename(template_deck),
+        'HEADER_INFO': TEMPLATE_DECK_HEADER_INFOS[arc_num % len(TEMPLATE_DECK_HEADER_INFOS)],
+        'PUSHOUT_PER': "-0.4" if arc_num % 2 else "0.4",
+        'GLITCH': "0.1",
+        'CONSTR_PIN': "D",
+        'REL_PIN': "CP",
+        'OUTPUT_PINS': ["Q"],
+        'WHEN': "NO_CONDITION" if arc_num % 4 else "!SE&SI",
+        'TEMPLATE_PINLIST': "D CP SE SI Q VDD VSS",
+        'NETLIST_PINS': "D CP SE SI Q VDD VSS VPP VBB VDDR",
+        'SIDE_PIN_STATES': [('SE', 'low')] if arc_num % 3 else [],
+        'VECTOR': "",
+        'DONT_TOUCH_PINS': spiceDeckMaker.getDontTouchPins(template_deck),
+    })
+    return arc_info
+
+
+def writeSyntheticTemplate(template_file, num_cells, arcs_per_cell):
+    """
+    Writes a template.tcl with num_cells cells: define_cell with -when lists,
+    define_arc and define_index blocks, set_var and tcl list variables.
+    """
+    cells = ["SYNDFFQ%05dD1" % i for i in range(num_cells)]
+    lines = ["# Synthetic template.tcl",
+             "set_var slew_lower_rise 0.1",
+             "set_var constraint_glitch_peak 0.1",
+             "set cells {"]
+    lines.extend("    %s" % cell for cell in cells)
+    lines.append("}")
+    lines.extend(["define_template -type constraint \\",
+                  "    -index_1 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    -index_2 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    constraint_template_5x5",
+                  "define_template -type delay \\",
+                  "    -index_1 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    -index_2 { 0.0005 0.0012 0.0028 0.0060 0.0124 } \\",
+                  "    delay_template_5x5"])
+    for cell in cells:
+        lines.extend(["define_cell \\",
+                      "    -input { D SE SI } \\",
+                      "    -output { Q } \\",
+                      "    -clock { CP } \\",
+                      "    -pinlist { D SE SI CP Q } \\",
+                      "    -when { \\",
+                      "        \"!SE\" \"SE&SI\" } \\",
+                      "    -user_arcs_only \\",
+                      "    -delay delay_template_5x5 \\",
+                      "    -constraint constraint_template_5x5 \\",
+                      "    %s" % cell])
+        for arc_num in range(arcs_per_cell):
+            arc_type = ("hold", "setup", "combinational")[arc_num % 3]
+            lines.extend(["define_arc \\",
+                          "    -type %s \\" % arc_type,
+                          "    -vector {RxxxF} \\",
+                          "    -related_pin CP \\",
+                          "    -pin %s \\" % ("D", "SE", "SI", "Q")[arc_num % 4],
+                          "    -when \"!SE&SI\" \\",
+                          "    -probe { Q } \\",
+                          "    %s" % cell])
+        lines.extend(["define_index \\",
+                      "    -type hold \\",
+                      "    -pin D \\",
+                      "    -related_pin CP \\",
+                      "    -index_1 { 0.002 0.01 0.05 0.1 0.2 } \\",
+                      "    %s" % cell])
+    writeLines(template_file, lines)
+
+
+def writeSyntheticMT0(mt0_file, sample_numbers, rng, wrap=False, failed_rate=0.0,
+                      measurements=MT0_MEASUREMENTS):
+    """
+    Writes an MC mt0 file with one record per sample number. With wrap, the header
+    and the records are wrapped over two lines like HSPICE does for many
+    measurements; failed_rate of the first measurement values are 'failed'.
+    """
+    columns = ["index"] + list(measurements) + ["alter#"]
+    lines = ["$DATA1 SOURCE='HSPICE' VERSION='P-2019.06-SP1' PARAM_COUNT=0",
+             ".TITLE '* synthetic mc_sim'"]
+    if wrap:
+        lines.extend([" ".join(columns[:3]), " ".join(columns[3:])])
+    else:
+        lines.append(" ".join(columns))
+    for sample_number in sample_numbers:
+        values = ["%.6e" % rng.gauss(2e-11, 1e-12) for _ in measurements]
+        if failed_rate and rng.random() < failed_rate:
+            values[0] = "failed"
+        record = [str(sample_number)] + values + ["1.0000"]
+        if wrap:
+            lines.extend([" ".join(record[:3]), " ".join(record[3:])])
+        else:
+            lines.append(" ".join(record))
+    writeLines(mt0_file, lines)
+
+
+def writeSyntheticMPP0(mpp0_file, names):
+    """
+    Writes an mpp0 file of the measurement names, with a sample moments section and
+    the percentiles of MPP0_PERCENTILE_BLOCKS split over several header blocks.
+    """
+    rng = random.Random(5)
+
+    def values(num_values):
+        return " ".join("%.5e" % rng.gauss(2e-11, 1e-12) for _ in range(num_values))
+
+    lines = ["HSPICE Monte Carlo post-processing",
+             "Number of Samples: 5000",
+             "",
+             "Sample_Moments",
+             "   CI   mean   median   stdDev   mad   skewness   kurtosis"]
+    for name in names:
+        lines.extend(["   0.95 %s" % values(6), "%s %s" % (name, values(7)),
+                      "   0.95 %s" % values(6)])
+    for block in MPP0_PERCENTILE_BLOCKS:
+        lines.extend(["", "Percentiles", "   %s" % "   ".join(block)])
+        for name in names:
+            lines.extend(["   lb %s" % values(len(block)),
+                          "%s %s" % (name, values(len(block))),
+                          "   ub %s" % values(len(block))])
+    writeLines(mpp0_file, lines)
+
+
+def extractAllMPP0Data(parser, mpp0_file, names):
+    """
+    The (MPP0Data attributes, column header) of every measurement and percentile,
+    extracted with parser (parseMPP0File or parseMPP0FileByLine).
+    """
+    results = list()
+    for name in names:
+        for block in MPP0_PERCENTILE_BLOCKS:
+            for percentile in block:
+                mpp0_data, column_header = parser(mpp0_file, name, "*%s*" % percentile)
+                results.append((vars(mpp0_data), column_header))
+    return results
+
+
+def writeSyntheticNetlistDecks(work_dir, num_decks, num_netlists):
+    """
+    Writes num_netlists LPE netlists of 10 to 500 transistors under
+    work_dir/Netlist and a DECKS directory of num_decks decks, each with a
+    nominal_sim.sp that includes one of the netlists.
+
+    Returns:
+        The DECKS directory
+    """
+    rng = random.Random(11)
+    netlist_dir = os.path.join(work_dir, "Netlist", "LPE_cworst_T_m25c")
+    netlist_paths = list()
+    for netlist_num in range(num_netlists):
+        netlist_path = os.path.join(netlist_dir, "SYNDFF%04dBWP_c_qa.spi" % netlist_num)
+        lines = [".subckt SYNDFF%04dBWP CP D Q VDD VSS" % netlist_num]
+        for device_num in range(rng.randint(10, 500)):
+            lines.append("M%s n%s n%s VSS VSS nch_svt_mac l=8n" % (device_num, device_num,
+                                                                   device_num + 1))
+            lines.append("Rpar%s n%s n%s 0.1" % (device_num, device_num, device_num + 1))
+        lines.append(".ends")
+        writeLines(netlist_path, lines)
+        netlist_paths.append(netlist_path)
+
+    root_output_path = os.path.join(work_dir, "DECKS")
+    for deck_num in range(num_decks):
+        writeLines(os.path.join(root_output_path, "deck%05d" % deck_num, "nominal_sim.sp"),
+                   ["* nominal", ".inc '/models/model.inc'",
+                    ".inc '%s'" % rng.choice(netlist_paths), ".end"])
+    return root_output_path
+
+
+def getDeckEffortsByGrep(deck_paths):
+    """The efforts of launchscript.funcs.getDeckEfforts by two greps per deck."""
+    import launchscript.funcs as launchScript
+    import runtime.funcs as runtimeEstimate
+
+    deck_efforts = list()
+    for deck_path in deck_paths:
+        netlist_path = launchScript.getNetlistPathFromNominalSpiceDeckByGrep(
+            os.path.join(deck_path, "nominal_sim.sp"))
+        nxtor, _ = runtimeEstimate.getXTORandPODECounts(netlist_path)
+        deck_efforts.append(runtimeEstimate.getApproxEffort(nxtor))
+    return deck_efforts
+
+
+def writeSyntheticDecks(root_output_path, num_decks):
+    """Writes num_decks deck directories with a nominal_sim.sp and an mc_sim.sp."""
+    for deck_num in range(num_decks):
+        deck_path = os.path.join(root_output_path, "deck%05d" % deck_num)
+        for deck_file in ("nominal_sim.sp", "mc_sim.sp"):
+            writeLines(os.path.join(deck_path, deck_file),
+                       ["* %s of deck %s" % (deck_file, deck_num), ".end"])
+
+
+def getStubLocalExecutor(samples, sleep, fail_rate, jobs, retries=1):
+    """
+    An executor.funcs.LocalExecutor that simulates with STUB_SIMULATOR; fail_rate
+    of the simulations fail on their first run.
+    """
+    import executor.funcs as executor
+
+    stub_args = "--samples %s --sleep %s --fail_rate %s" % (samples, sleep, fail_rate)
+    return executor.LocalExecutor(
+        nominal_command="%s %s -i {deck_path}/nominal_sim.sp -o "
+                        "{deck_path}/nominal_sim.lis %s" % (sys.executable,
+                                                            STUB_SIMULATOR, stub_args),
+        mc_command="%s %s -mt {cpus} -i {deck_path}/mc_sim.sp -o {deck_path} %s" % (
+            sys.executable, STUB_SIMULATOR, stub_args),
+        jobs=jobs, retries=retries)
+
+
+def writeSyntheticLPEs(lpe_path, num_netlists, min_devices=100, max_devices=2000):
+    """
+    Writes num_netlists LPE netlists of min_devices to max_devices transistors, with
+    continuation lines, commented out transistors and parasitic resistors.
+    """
+    rng = random.Random(3)
+    for netlist_num in range(num_netlists):
+        lines = ["* LPE netlist",
+                 ".SUBCKT SYNDFF%04dBWP CP D Q" % netlist_num,
+                 "+ VDD VSS"]
+        for device_num in range(rng.randint(min_devices, max_devices)):
+            model = rng.choice(["nch_svt_mac", "pch_svt_mac", "nch_svt_mac_pode"])
+            lines.append("XM%s n%s n%s n%s VSS %s l=8n nfin=2" % (
+                device_num, device_num, device_num + 1, device_num + 2, model))
+            lines.append("+ sa=1e-07 sb=1e-07")
+            if rng.random() < 0.05:
+                lines.append("*XMC%s n%s n%s n%s VSS %s l=8n" % (
+                    device_num, device_num, device_num + 1, device_num + 2, model))
+            for res_num in range(3):
+                lines.append("R%s_%s n%s n%s_%s 0.1" % (device_num, res_num, device_num,
+                                                        device_num, res_num))
+        lines.append(".ENDS")
+        writeLines(os.path.join(lpe_path, "SYNDFF%04dBWP_c.spi" % netlist_num), lines)
+
+
+def rewriteLPEs(rewriter, lpe_jobs, parameter_list=LPE_PARAMETER_LIST):
+    """Rewrites the LPEs of lpe_jobs one by one with rewriter."""
+    for input_lpe, output_lpe in lpe_jobs:
+        rewriter(input_lpe, output_lpe, list(parameter_list))
+
+
+def createSyntheticJoinData(num_cells, pins):
+    """
+    Sensitivity data of num_cells cells and one scld__generate_spreadsheet.MCData
+    per arc and table point.
+
+    Returns:
+        lib_data (dict), mc_objs_list (list)
+    """
+    import scld__generate_spreadsheet as spreadsheet
+
+    rng = random.Random(3)
+    lib_data = dict()
+    mc_objs_list = list()
+    for cell_num in range(num_cells):
+        cell = "SYNDFF%04dD1" % cell_num
+        for pin in pins:
+            for t_type in JOIN_TIMING_TYPES:
+                tables = lib_data.setdefault(cell, dict()).setdefault(pin, dict()) \
+                    .setdefault("CP", dict()).setdefault(t_type, dict()) \
+                    .setdefault("!SE", dict()).setdefault("none", dict())
+                for table_name in ("rise_constraint", "fall_constraint"):
+                    tables[table_name] = {
+                        'index_1': ["0.1"] * 5, 'index_2': ["0.1"] * 5,
+                        'early': ["%.5f" % rng.random() for _ in range(25)],
+                        'late': ["%.5f" % rng.random() for _ in range(25)]}
+                    pin_dir = table_name.split('_')[0]
+                    rel_pin_dir = "rise" if "rising" in t_type else "fall"
+                    for table_point in JOIN_TABLE_POINTS:
+                        mc_objs_list.append(spreadsheet.MCData(
+                            "", t_type, cell, pin, pin_dir, "CP", rel_pin_dir, "notSE",
+                            "!SE", table_point, len(mc_objs_list) + 1))
+    return lib_data, mc_objs_list
+
+
+def storeVarietyDataByScan(mc_objs_list, lib_data, bundle_mode):
+    """The join of storeAllVarietyDataInMCObjs as a scan of all MC objects per table."""
+    import libraryParser.funcs as library_parser
+    import scld__generate_spreadsheet as spreadsheet
+
+    for cell, pin, rel_pin, t_type, when, t_sense, table_name, sigma in \
+            library_parser.flattenLibData(lib_data):
+        for mc_obj in spreadsheet.findMatchingMCObjs(cell, pin, rel_pin, t_type, when,
+                                                     table_name, sigma, mc_objs_list,
+                                                     bundle_mode):
+            vec_point = spreadsheet.convertTablePointToVectorPoint(mc_obj.table_point)
+            mc_obj.variety_sigma = float(lib_data[cell][pin][rel_pin][t_type][when][
+                t_sense][table_name][sigma][vec_point])*1e3
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the launch planning of launchscript.funcs: the deck efforts from the
+LPE netlist index (getDeckEfforts) against two greps per deck
+(getNetlistPathFromNominalSpiceDeckByGrep + runtime.funcs.getXTORandPODECounts),
+and the job array launch script against one bsub line per deck and simulation.
+
+A synthetic DECKS directory with --num_decks decks over --num_netlists netlists is
+written. The equivalence of both effort lookups and the job array index files are
+checked by launchscript/tests.
+
+    python3 benchmarks/bench_launch_planner.py --num_decks 2000 --num_netlists 200
+"""
+import argparse
+import sys
+
+from _common import getDeckEffortsByGrep, timed, workDir, writeSyntheticNetlistDecks
+
+import launchscript.funcs as launchScript
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the launch planner.")
+    parser.add_argument("--num_decks", type=int, default=2000,
+                        help="Number of decks in the synthetic DECKS directory")
+    parser.add_argument("--num_netlists", type=int, default=200,
+                        help="Number of LPE netlists of the decks")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    with workDir("bench_launch_planner_") as work_dir:
+        root_output_path = writeSyntheticNetlistDecks(work_dir, args.num_decks,
+                                                      args.num_netlists)
+        deck_paths = launchScript.getDeckPaths(root_output_path)
+
+        timed("Two greps per deck", getDeckEffortsByGrep, deck_paths)
+        deck_efforts = timed("Netlist index", launchScript.getDeckEfforts, deck_paths)
+
+        launch_script = timed("Job array launch script", launchScript.createLaunchScript,
+                              root_output_path, "/path/lsf.cfg")
+        with open(launch_script, 'r') as f:
+            num_submissions = len([x for x in f if x.startswith("bsub")])
+        print("INFO:\t %s bsub lines instead of %s" % (num_submissions,
+                                                      2 * len(deck_paths)))
+
+        nominal_jobs = launchScript.packNominalJobs(deck_paths, deck_efforts,
+                                                    launchScript.NOMINAL_DECKS_PER_JOB)
+        effort_of_deck = dict(zip(deck_paths, deck_efforts))
+        job_efforts = [sum(effort_of_deck[x] for x in job) for job in nominal_jobs]
+        print("INFO:\t %s nominal jobs, effort max/mean %.3f" % (
+            len(nominal_jobs), max(job_efforts) / (sum(job_efforts) / len(job_efforts))))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
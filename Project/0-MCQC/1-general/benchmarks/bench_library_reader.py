@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark for libraryParser.reader (single-pass streaming reader) against the
+linecache-based parseLibraryFileByLine.
+
+A synthetic LVF sensitivity file of --size_mb megabytes is generated (delay and
+constraint tables, early/late sigma, 5x5 tables) and parsed with the streaming
+reader, with and without a cell filter. Pass --legacy to also time the
+line-by-line parser on the full file (slow, and it caches the whole file in memory).
+The equivalence of both parsers is checked by libraryParser/tests.
+
+    python3 benchmarks/bench_library_reader.py --size_mb 300
+"""
+import argparse
+import os
+import resource
+import sys
+
+from _common import timed, timedThroughput, workDir, writeSyntheticLibrary
+
+import libraryParser.funcs as library_parser
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming Liberty reader.")
+    parser.add_argument("--size_mb", type=int, default=300,
+                        help="Approximate size of the synthetic library in MB")
+    parser.add_argument("--work_dir", default=None,
+                        help="Where the synthetic library is written (default: a temp dir)")
+    parser.add_argument("--filter_fraction", type=float, default=0.1,
+                        help="Fraction of cells kept by the cell filter run")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Also time parseLibraryFileByLine on the full library")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    with workDir("bench_library_reader_", args.work_dir) as work_dir:
+        big_lib = os.path.join(work_dir, "synthetic_%dMB.sens" % args.size_mb)
+        cells = timed("Writing synthetic library", writeSyntheticLibrary, big_lib,
+                      size_mb=args.size_mb)
+        size_mb = os.path.getsize(big_lib) / (1024.0 * 1024.0)
+        print("Library: %s (%.0f MB, %d cells)" % (big_lib, size_mb, len(cells)))
+
+        timedThroughput("Streaming reader (all cells)", size_mb,
+                        library_parser.parseLibraryFile, big_lib, "variation")
+
+        keep = set(cells[::max(1, int(round(1.0 / args.filter_fraction)))])
+        timedThroughput("Streaming reader (%d cells kept)" % len(keep), size_mb,
+                        library_parser.parseLibraryFile, big_lib, "variation",
+                        cell_filter=keep)
+
+        if args.legacy:
+            timedThroughput("Line-by-line parser (linecache)", size_mb,
+                            library_parser.parseLibraryFileByLine, big_lib, "variation")
+
+    print("Peak RSS: %.0f MB" % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput of the flow on one machine: deck generation, simulation with
+executor.funcs.LocalExecutor and benchmarks/stub_simulator.py, and postprocessing
+with scld__postprocess.
+
+--num_decks synthetic deck directories are written (the generation step writes
+the deck files only; it does not parse a kit). The simulations are run once with
+one process and once with --jobs processes; --fail_rate of the decks fail on their
+first run and are retried. That every deck is simulated and ends up with one
+summary row is checked by tests/test_local_executor.py.
+
+    python3 benchmarks/bench_local_executor.py --num_decks 200 --jobs 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+from _common import getStubLocalExecutor, timed, workDir, writeSyntheticDecks
+
+import scld__postprocess as postprocess
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the local executor.")
+    parser.add_argument("--num_decks", type=int, default=200,
+                        help="Number of synthetic decks")
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="MC samples written by the stub simulator")
+    parser.add_argument("--sleep", type=float, default=0.05,
+                        help="Seconds the stub simulator sleeps per simulation")
+    parser.add_argument("--fail_rate", type=float, default=0.05,
+                        help="Fraction of the simulations whose first run fails")
+    parser.add_argument("--jobs", type=int, default=min(8, multiprocessing.cpu_count()),
+                        help="Simulations that run at the same time")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    for jobs in (1, args.jobs):
+        with workDir("bench_local_executor_") as work_dir:
+            root_output_path = os.path.join(work_dir, "DECKS")
+            timed("Deck generation", writeSyntheticDecks, root_output_path, args.num_decks)
+            local_executor = getStubLocalExecutor(args.samples, args.sleep, args.fail_rate,
+                                                  jobs)
+            timed("Simulation (%s processes)" % jobs, local_executor.run, root_output_path)
+
+            user_options = postprocess.loadDefaultOptions()
+            user_options.update({'ROOT_DIRECTORY': work_dir, 'FORMAT': "mt0",
+                                 'GET_RUNTIME': False, 'NUM_JOBS': jobs})
+            timed("Postprocessing (%s processes)" % jobs, postprocess.main, user_options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the single pass LPE rewriter of modifyLPE.funcs (createLPEWithParams)
+against the three greps per netlist and list lookups of createLPEWithParamsByGrep,
+and of the parallel, incremental modifyLPEFiles over a synthetic LPE directory.
+
+The netlists of both rewriters and the skipping of up to date netlists are
+checked by modifyLPE/tests.
+
+    python3 benchmarks/bench_modify_lpe.py --num_netlists 200 --jobs 4
+"""
+import argparse
+import os
+import sys
+
+from _common import LPE_PARAMETER_LIST, rewriteLPEs, timed, workDir, writeSyntheticLPEs
+
+import modifyLPE.funcs as modifyLPE
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the LPE rewriter.")
+    parser.add_argument("--num_netlists", type=int, default=200,
+                        help="Number of netlists in the synthetic LPE directory")
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="Processes of the parallel run")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    parameter_list = list(LPE_PARAMETER_LIST)
+    with workDir("bench_modify_lpe_") as work_dir:
+        lpe_path = os.path.join(work_dir, "Netlist", "LPE_cworst_T_m25c")
+        writeSyntheticLPEs(lpe_path, args.num_netlists)
+        grep_path = os.path.join(work_dir, "by_grep")
+        os.makedirs(grep_path)
+
+        lpe_jobs = modifyLPE.getLPEJobs(lpe_path)
+        grep_jobs = modifyLPE.getLPEJobs(lpe_path, grep_path)
+        timed("Three greps per netlist", rewriteLPEs, modifyLPE.createLPEWithParamsByGrep,
+              grep_jobs)
+        timed("Single pass", rewriteLPEs, modifyLPE.createLPEWithParams, lpe_jobs)
+
+        for _, output_lpe in lpe_jobs:
+            os.remove(output_lpe)
+        timed("Single pass, %s processes" % args.jobs, modifyLPE.modifyLPEFiles, lpe_jobs,
+              parameter_list, jobs=args.jobs, skip_up_to_date=True)
+        timed("Up to date rerun", modifyLPE.modifyLPEFiles, lpe_jobs, parameter_list,
+              jobs=args.jobs, skip_up_to_date=True)
+        timed("Rerun with another parameter list", modifyLPE.modifyLPEFiles, lpe_jobs,
+              parameter_list[:2], jobs=args.jobs, skip_up_to_date=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
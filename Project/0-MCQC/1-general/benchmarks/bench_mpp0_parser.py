@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the section-indexed mpp0 parser of utilities.hspiceUtilities
+(parseMPP0File on top of getMPP0Info) against the buffer scanning parser
+(parseMPP0FileByLine).
+
+A synthetic mpp0 file with --num_measurements measurements is written, with a
+sample moments section and the percentiles split over two header blocks. Every
+measurement is extracted for every percentile with both parsers, and all of them
+at once with getAllMeasurements. The equivalence of the parsers is checked by
+utilities/tests.
+
+    python3 benchmarks/bench_mpp0_parser.py --num_measurements 200
+"""
+import argparse
+import os
+import sys
+
+from _common import (MPP0_PERCENTILE_BLOCKS, extractAllMPP0Data, timed, workDir,
+                     writeSyntheticMPP0)
+
+import utilities.hspiceUtilities as hspiceUtilities
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the mpp0 parser.")
+    parser.add_argument("--num_measurements", type=int, default=200,
+                        help="Number of measurements in the synthetic mpp0 file")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    with workDir("bench_mpp0_parser_") as work_dir:
+        mpp0_file = os.path.join(work_dir, "mc_sim.mpp0")
+        names = ["meas_%s" % x for x in range(args.num_measurements - 3)] + \
+            ["delay", "slew", "half_tt_out"]
+        writeSyntheticMPP0(mpp0_file, names)
+        num_extractions = len(names) * sum(len(x) for x in MPP0_PERCENTILE_BLOCKS)
+        print("INFO:\t %s measurements, %s extractions" % (len(names), num_extractions))
+
+        timed("Buffer scanning parser", extractAllMPP0Data,
+              hspiceUtilities.parseMPP0FileByLine, mpp0_file, names)
+        timed("Section-indexed parser", extractAllMPP0Data, hspiceUtilities.parseMPP0File,
+              mpp0_file, names)
+        hspiceUtilities.loadMPP0Info.cache_clear()
+        timed("getAllMeasurements (all percentiles)",
+              hspiceUtilities.getMPP0Info(mpp0_file).getAllMeasurements)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
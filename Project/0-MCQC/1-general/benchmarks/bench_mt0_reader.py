@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the MT0 reader and moment engine of utilities.hspiceUtilities
+(getMonteCarloValuesFromMT0File + computeSampleMoments) against the line-by-line
+reader (getMonteCarloDataFromMT0FileByLine) and the per-statistic functions.
+
+A synthetic MC mt0 file with --num_samples samples (with repeated sample numbers
+and 'failed' measurements) is written twice, with single line records and with
+records wrapped over several lines like HSPICE does for many measurements. The
+equivalence of the readers and statistics is checked by utilities/tests.
+
+    python3 benchmarks/bench_mt0_reader.py --num_samples 20000
+"""
+import argparse
+import os
+import random
+import sys
+
+from _common import MT0_MEASUREMENTS, timed, workDir, writeSyntheticMT0
+
+import utilities.hspiceUtilities as hspiceUtilities
+
+PERCENTILES = ["99.865", "0.135", "50"]
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the MT0 reader.")
+    parser.add_argument("--num_samples", type=int, default=20000,
+                        help="Number of MC samples in the synthetic mt0 file")
+    return parser.parse_args()
+
+
+def getSampleNumbers(num_samples):
+    rng = random.Random(1)
+    sample_numbers = list(range(1, num_samples + 1))
+    # Resumed runs repeat some samples
+    sample_numbers.extend(rng.sample(sample_numbers, num_samples // 100))
+    return sample_numbers
+
+
+def byLineStatistics(mc_file):
+    mc_data = hspiceUtilities.getMonteCarloDataFromMT0FileByLine(mc_file,
+                                                                 MT0_MEASUREMENTS[0])
+    data_values = [mc_data[x] for x in mc_data]
+    return ([hspiceUtilities.getPercentileValueFromMeasurements(data_values, x)
+             for x in PERCENTILES],
+            hspiceUtilities.computeStdDevFromMeasurements(data_values),
+            hspiceUtilities.getSkewnessValueFromMeasurements(data_values),
+            hspiceUtilities.getKurtosisValueFromMeasurements(data_values))
+
+
+def vectorizedStatistics(mc_file):
+    mc_values = hspiceUtilities.getMonteCarloValuesFromMT0File(mc_file, MT0_MEASUREMENTS)
+    _, data_values = mc_values[MT0_MEASUREMENTS[0]]
+    return hspiceUtilities.computeSampleMoments(data_values, PERCENTILES)
+
+
+def main():
+    args = parseArgs()
+    print("INFO:\t NumPy %s" % ("available" if hspiceUtilities.np is not None
+                                 else "not available, using the pure Python path"))
+    sample_numbers = getSampleNumbers(args.num_samples)
+    with workDir("bench_mt0_reader_") as work_dir:
+        mt0_file = os.path.join(work_dir, "mc_sim.mt0")
+        wrapped_mt0_file = os.path.join(work_dir, "mc_sim_wrapped.mt0")
+        writeSyntheticMT0(mt0_file, sample_numbers, random.Random(1), failed_rate=0.002)
+        writeSyntheticMT0(wrapped_mt0_file, sample_numbers, random.Random(1), wrap=True,
+                          failed_rate=0.002)
+
+        timed("Line-by-line reader + statistics", byLineStatistics, mt0_file)
+        timed("MT0 reader + computeSampleMoments", vectorizedStatistics, mt0_file)
+        timed("Same, wrapped records", vectorizedStatistics, wrapped_mt0_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the sample coverage scan of incremental MC resume: the streaming
+bitmap scan (getSampleCoverage + getMissingSampleRanges) against the whole-file
+reader (getSimulatedSampleIndices + getMissingSampleIndices).
+
+A synthetic simulation directory is written with --num_samples samples spread over
+--num_workers DP workers (mc_sim_dp/worker*/mc_sim.mt0) and a backed up run
+(sim__run__0/mc_sim.mt0); about 1% of the samples are missing. The scan of the
+same data with records wrapped over several lines is timed too. The equivalence of
+the scans is checked by incremental/tests.
+
+    python3 benchmarks/bench_sample_coverage.py --num_samples 200000 --num_workers 200
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+
+from _common import timed, workDir, writeSyntheticMT0
+
+import incremental.funcs as incremental
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the sample coverage scan.")
+    parser.add_argument("--num_samples", type=int, default=200000,
+                        help="Number of MC samples of the synthetic run")
+    parser.add_argument("--num_workers", type=int, default=200,
+                        help="Number of DP worker mt0 files")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Processes of the streaming scan (default: up to 8)")
+    return parser.parse_args()
+
+
+def writeSimPath(sim_path, num_samples, num_workers, wrap=False):
+    """
+    Writes the mt0 files of an MC run of num_samples samples, about 1% of them
+    missing: a backed up run (sim__run__0/mc_sim.mt0) with the first tenth and
+    num_workers DP workers (mc_sim_dp/worker*/mc_sim.mt0) with the rest.
+    """
+    rng = random.Random(7)
+    sample_numbers = [x for x in range(1, num_samples + 1) if rng.random() > 0.01]
+    backup_samples = sample_numbers[:len(sample_numbers) // 10]
+    writeSyntheticMT0(os.path.join(sim_path, "sim__run__0", "mc_sim.mt0"), backup_samples,
+                      rng, wrap=wrap)
+    worker_samples = sample_numbers[len(backup_samples):]
+    per_worker = len(worker_samples) // num_workers + 1
+    for worker in range(num_workers):
+        writeSyntheticMT0(os.path.join(sim_path, "mc_sim_dp", "worker%s" % worker,
+                                       "mc_sim.mt0"),
+                          worker_samples[worker * per_worker:(worker + 1) * per_worker],
+                          rng, wrap=wrap)
+
+
+def wholeFileScan(sim_path, num_samples):
+    """The missing samples of incremental MC resume, reading whole mt0 files."""
+    worker_mt0_files = incremental.collectExistingWorkerMt0(sim_path)
+    simulated_sample_indices = incremental.getSimulatedSampleIndices(worker_mt0_files)
+    return sorted(incremental.getMissingSampleIndices(num_samples,
+                                                      simulated_sample_indices))
+
+
+def streamingScan(sim_path, num_samples, jobs=None):
+    """The missing sample ranges of incremental MC resume, by the streaming bitmap scan."""
+    worker_mt0_files = incremental.collectExistingWorkerMt0(sim_path)
+    sample_coverage = incremental.getSampleCoverage(worker_mt0_files, num_samples,
+                                                    jobs=jobs)
+    return incremental.getMissingSampleRanges(sample_coverage)
+
+
+def main():
+    args = parseArgs()
+    print("INFO:\t NumPy %s" % ("available" if incremental.np is not None
+                                 else "not available, using the pure Python path"))
+    with workDir("bench_sample_coverage_") as work_dir:
+        sim_path = os.path.join(work_dir, "sim")
+        wrapped_sim_path = os.path.join(work_dir, "sim_wrapped")
+        writeSimPath(sim_path, args.num_samples, args.num_workers)
+        writeSimPath(wrapped_sim_path, args.num_samples, args.num_workers, wrap=True)
+
+        whole_file = timed("Whole-file scan + set difference", wholeFileScan, sim_path,
+                           args.num_samples)
+        serial = timed("Streaming bitmap scan (1 process)", streamingScan, sim_path,
+                       args.num_samples, 1)
+        timed("Streaming bitmap scan (pool)", streamingScan, sim_path, args.num_samples,
+              args.jobs)
+        timed("Same, wrapped records", streamingScan, wrapped_sim_path, args.num_samples,
+              args.jobs)
+        print("INFO:\t %s missing samples in %s ranges, e.g. monte=list(%s...)" % (
+            len(whole_file), len(serial), incremental.formatSampleRanges(serial[:5])))
+
+        decks_path = os.path.join(work_dir, "DECKS")
+        os.makedirs(decks_path)
+        for deck_num in range(4):
+            shutil.copytree(sim_path, os.path.join(decks_path, "deck%s" % deck_num))
+        timed("DECKS tree scan (4 decks)", incremental.getDecksSampleCoverage,
+              decks_path, args.num_samples, args.jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the library <-> MC data join of scld__generate_spreadsheet: the
+indexed join (storeAllVarietyDataInMCObjs) against the linear scan of all MC objects
+per library table (findMatchingMCObjs).
+
+Synthetic sensitivity data for --num_cells cells and one MC object per arc and
+table point are joined with both, in normal and bundle mode. The equivalence of
+both joins is checked by tests/test_spreadsheet_join.py.
+
+    python3 benchmarks/bench_spreadsheet_join.py --num_cells 400
+"""
+import argparse
+import sys
+
+from _common import (JOIN_BUNDLE_PINS, JOIN_PINS, createSyntheticJoinData,
+                     storeVarietyDataByScan, timed)
+
+import scld__generate_spreadsheet as spreadsheet
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the spreadsheet join.")
+    parser.add_argument("--num_cells", type=int, default=400,
+                        help="Number of cells in the synthetic sensitivity data")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    for bundle_mode in (False, True):
+        lib_data, mc_objs_list = createSyntheticJoinData(
+            args.num_cells, JOIN_BUNDLE_PINS if bundle_mode else JOIN_PINS)
+        print("INFO:\t %s cells, %s MC objects" % (len(lib_data), len(mc_objs_list)))
+        mode = "bundle" if bundle_mode else "normal"
+        timed("Linear scan (%s)" % mode, storeVarietyDataByScan, mc_objs_list, lib_data,
+              bundle_mode)
+        timed("Indexed join (%s)" % mode, spreadsheet.storeAllVarietyDataInMCObjs,
+              mc_objs_list, lib_data, bundle_mode)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
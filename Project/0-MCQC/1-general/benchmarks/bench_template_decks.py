@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the compiled template deck renderer
+(spiceDeckMaker.getNominalSpiceDeckBuffer) against the line-by-line renderer
+(spiceDeckMaker.getNominalSpiceDeckBufferByLine) over a real template directory.
+
+Every template deck is rendered for --arcs_per_template synthetic arcs (plain,
+glitch minq and glitch maxq headers, positive and negative pushout). The
+equivalence of both renderers is checked by spiceDeckMaker/tests.
+
+    python3 benchmarks/bench_template_decks.py --template_dir ../2-flow
+"""
+import argparse
+import sys
+import time
+
+from _common import TEMPLATE_DECK_DIR, getTemplateDeckArcInfo, getTemplateDecks
+
+import spiceDeckMaker.funcs as spiceDeckMaker
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the template deck renderers.")
+    parser.add_argument("--template_dir", default=TEMPLATE_DECK_DIR,
+                        help="Directory searched recursively for *.sp template decks")
+    parser.add_argument("--arcs_per_template", type=int, default=30,
+                        help="Number of decks rendered from each template")
+    return parser.parse_args()
+
+
+def timeRenderer(renderer, jobs):
+    start = time.time()
+    for template_deck, arc_info in jobs:
+        renderer(template_deck, arc_info)
+    return time.time() - start
+
+
+def main():
+    args = parseArgs()
+    template_decks = getTemplateDecks(args.template_dir)
+    if not template_decks:
+        print("ERROR:\t No template decks found in %s" % args.template_dir)
+        return 1
+
+    jobs = [(template_deck, getTemplateDeckArcInfo(template_deck, arc_num))
+            for arc_num in range(args.arcs_per_template)
+            for template_deck in template_decks]
+    print("INFO:\t %s template decks, %s decks to render" % (len(template_decks), len(jobs)))
+
+    spiceDeckMaker.compileTemplateDeck.cache_clear()
+    by_line = timeRenderer(spiceDeckMaker.getNominalSpiceDeckBufferByLine, jobs)
+    compiled = timeRenderer(spiceDeckMaker.getNominalSpiceDeckBuffer, jobs)
+    print("%-30s %8.3f s  %8.1f us/deck" % ("Line-by-line renderer", by_line,
+                                            1e6 * by_line / len(jobs)))
+    print("%-30s %8.3f s  %8.1f us/deck" % ("Compiled renderer", compiled,
+                                            1e6 * compiled / len(jobs)))
+    print("%-30s %8.1fx" % ("Speedup", by_line / compiled))
+    print(spiceDeckMaker.compileTemplateDeck.cache_info())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark of charTemplateParser.parseTemplateFile (single-pass tokenizer and parse
+cache) against the linecache based parseTemplateFileByLine.
+
+A synthetic template.tcl with --num_cells cells (define_cell with -when lists,
+define_arc and define_index blocks, set_var and tcl list variables) is generated and
+parsed with both parsers. The equivalence of the parsed models is checked by
+charTemplateParser/tests.
+
+    python3 benchmarks/bench_template_parser.py --num_cells 5000
+"""
+import argparse
+import linecache
+import os
+import sys
+
+from _common import timed, workDir, writeSyntheticTemplate
+
+import charTemplateParser.funcs as templateParser
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Benchmark the template.tcl parser.")
+    parser.add_argument("--num_cells", type=int, default=5000,
+                        help="Number of cells in the synthetic template")
+    parser.add_argument("--arcs_per_cell", type=int, default=12,
+                        help="Number of define_arc blocks per cell")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    with workDir("bench_template_parser_") as work_dir:
+        template_file = os.path.join(work_dir, "synthetic.template.tcl")
+        writeSyntheticTemplate(template_file, args.num_cells, args.arcs_per_cell)
+        print("Template: %s (%.1f MB)" % (template_file,
+                                          os.path.getsize(template_file) / (1024.0 * 1024.0)))
+
+        cache_dir = os.path.join(work_dir, templateParser.TEMPLATE_CACHE_DIRNAME)
+
+        timed("Line-by-line parser (linecache)", templateParser.parseTemplateFileByLine,
+              template_file)
+        linecache.clearcache()
+        timed("Single-pass tokenizer", templateParser.parseTemplateFile, template_file)
+        timed("Tokenizer + writing parse cache", templateParser.parseTemplateFile,
+              template_file, cache_dir=cache_dir)
+        timed("Loading from parse cache", templateParser.parseTemplateFile, template_file,
+              cache_dir=cache_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+A stand-in for hspice/hspice64 that writes a synthetic mt0 file, to run the
+simulation step of the flow (executor.funcs.LocalExecutor) without a simulator.
+
+The mt0 file is <output directory>/<deck name>.mt0, where the output directory is
+-o if it is a directory and its dirname otherwise (like 'hspice -i mc_sim.sp -o
+DECK' and 'hspice -i nominal_sim.sp -o DECK/nominal_sim.lis'). Decks named mc_*
+get --samples records, the others one.
+
+    python3 benchmarks/stub_simulator.py -i DECK/mc_sim.sp -o DECK --samples 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+MEASUREMENTS = ["cp2d", "cp2q_del1", "d2q"]
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Stub simulator.")
+    parser.add_argument("-i", dest="input_deck", required=True)
+    parser.add_argument("-o", dest="output", required=True)
+    parser.add_argument("-mt", type=int, default=1, help="Ignored")
+    parser.add_argument("--samples", type=int, default=1000,
+                        help="Number of records of the MC decks")
+    parser.add_argument("--sleep", type=float, default=0.0,
+                        help="Seconds to sleep before writing the results")
+    parser.add_argument("--fail_rate", type=float, default=0.0,
+                        help="Fraction of the decks whose first run fails")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+    output_dir = args.output if os.path.isdir(args.output) else os.path.dirname(args.output)
+    deck_name = os.path.splitext(os.path.basename(args.input_deck))[0]
+    rng = random.Random("%s/%s" % (os.path.abspath(output_dir), deck_name))
+
+    # Fail the first run of some of the decks, to exercise the retries
+    fail_marker = os.path.join(output_dir, ".stub_failed_%s" % deck_name)
+    if rng.random() < args.fail_rate and not os.path.exists(fail_marker):
+        open(fail_marker, 'w').close()
+        print("Error: stub failure of %s" % args.input_deck, file=sys.stderr)
+        return 1
+
+    time.sleep(args.sleep)
+    num_samples = args.samples if deck_name.startswith("mc") else 1
+    lines = ["$DATA1 SOURCE='HSPICE' VERSION='P-2019.06-SP1' PARAM_COUNT=0",
+             ".TITLE '* %s'" % deck_name,
+             " ".join(["index"] + MEASUREMENTS + ["temper", "alter#"])]
+    for sample_number in range(1, num_samples + 1):
+        lines.append(" ".join([str(sample_number)] +
+                              ["%.6e" % rng.gauss(2e-11, 1e-12) for _ in MEASUREMENTS] +
+                              ["25.0000", "1.0000"]))
+    with open(os.path.join(output_dir, "%s.mt0" % deck_name), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,6 +47,9 @@ class TemplateInfo(object):
     def getAllCells(self):
         return list(self._cell_list.values())
  
+    def getTclVar(self, var_name, default=None):
+        return self._tcl_vars.get(var_name, default)
+ 
     def getCell(self, cell_name):
         """
         Args:
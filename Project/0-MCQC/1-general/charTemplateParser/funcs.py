@@ -3,6 +3,8 @@ import linecache
 import os
 import re
 import copy
+import hashlib
+import pickle
  
 from charTemplateParser.classes import TemplateInfo
 from charTemplateParser.classes import DefineTemplateInfo
@@ -10,8 +12,259 @@ from charTemplateParser.classes import Cell
 from charTemplateParser.classes import Arc
 from charTemplateParser.classes import Index
  
+# Bump when the parser or the classes change, so stale parse caches are ignored
+TEMPLATE_PARSER_VERSION = 1
+# The parse cache directory of a run, next to its output (see parseTemplateFile)
+TEMPLATE_CACHE_DIRNAME = ".template_cache"
  
-def parseTemplateFile(template_file):
+ 
+def parseTemplateFile(template_file, cache_dir=None):
+    """
+    A function that parses the template file and returns a data structure
+    representation of its contents
+ 
+    The file is read once and tokenized in a single pass (see parseTemplateLines).
+    If cache_dir is given, the parsed TemplateInfo is stored in a parse cache in that
+    directory, keyed on the template path, size, mtime (and those of its .sis
+    template) and the parser version, so later runs sharing the template skip
+    parsing. The flows put it next to their output (TEMPLATE_CACHE_DIRNAME) and
+    turn it off with --no_template_cache.
+ 
+    Args:
+        template_file (str):
+            The path to the template file
+        cache_dir (str):
+            The parse cache directory. Default is None (no parse cache)
+    Returns:
+        template_info (TemplateInfo):
+            The data structure representing the template file
+    """
+    sis_path = getSISTemplatePath(template_file)
+    cache_key = getTemplateCacheKey(template_file, sis_path)
+    if cache_dir is not None:
+        template_info = loadCachedTemplateInfo(template_file, cache_key, cache_dir)
+        if template_info is not None:
+            print("INFO:\t Loaded parsed template from cache %s" %
+                  getTemplateCacheFile(template_file, cache_dir))
+            return template_info
+ 
+    template_info = parseTemplateLines(template_file, readTemplateLines(template_file))
+    if os.path.exists(sis_path):
+        sis_info = parseSISTemplate(sis_path)
+        template_info._sis_template = sis_info
+ 
+    if cache_dir is not None:
+        storeCachedTemplateInfo(template_file, cache_key, template_info, cache_dir)
+    return template_info
+ 
+ 
+def getSISTemplatePath(template_file):
+    sis_path = template_file.replace('/Template/', '/Template_sis/')
+    return sis_path + '.sis'
+ 
+ 
+def getTemplateCacheKey(template_file, sis_path):
+    stat = os.stat(template_file)
+    key = [TEMPLATE_PARSER_VERSION, os.path.abspath(template_file), stat.st_size,
+           stat.st_mtime]
+    if os.path.exists(sis_path):
+        sis_stat = os.stat(sis_path)
+        key.extend([sis_stat.st_size, sis_stat.st_mtime])
+    return tuple(key)
+ 
+ 
+def getTemplateCacheFile(template_file, cache_dir):
+    path_hash = hashlib.sha1(os.path.abspath(template_file).encode()).hexdigest()
+    return os.path.join(cache_dir, "%s.pkl" % path_hash)
+ 
+ 
+def loadCachedTemplateInfo(template_file, cache_key, cache_dir):
+    cache_file = getTemplateCacheFile(template_file, cache_dir)
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, template_info = pickle.load(f)
+    except Exception:
+        # Missing, unreadable or written by another version of the classes
+        return None
+    if cached_key != cache_key:
+        return None
+    return template_info
+ 
+ 
+def storeCachedTemplateInfo(template_file, cache_key, template_info, cache_dir):
+    cache_file = getTemplateCacheFile(template_file, cache_dir)
+    tmp_file = "%s.%s.tmp" % (cache_file, os.getpid())
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((cache_key, template_info), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except (IOError, OSError, pickle.PicklingError) as e:
+        print("WARNING:\t Could not write template parse cache %s (%s)" % (cache_file, e))
+ 
+ 
+def readTemplateLines(template_file):
+    with open(template_file, 'r') as f:
+        template_lines = f.readlines()
+    # Same as linecache: the last line always ends with a newline
+    if template_lines and not template_lines[-1].endswith('\n'):
+        template_lines[-1] += '\n'
+    return template_lines
+ 
+ 
+def parseTemplateLines(template_file, template_lines):
+    """
+    A function that tokenizes the lines of a template file and builds the
+    TemplateInfo, Cell, Arc and Index objects from them. Every line is checked for
+    set_var/set/define_* statements, exactly like parseTemplateFileByLine.
+ 
+    Args:
+        template_file (str):
+            The path to the template file
+        template_lines (list):
+            The lines of the template file
+    Returns:
+        template_info (TemplateInfo):
+            The data structure representing the template file
+    """
+    template_info = TemplateInfo(template_file)
+    for i, current_line in enumerate(template_lines):
+        if 'set_var' in current_line:
+            storeToolVar(current_line, template_info)
+ 
+        elif 'set ' in current_line:
+            var_name, var_val = getTclVarFromLines(current_line, i, template_lines)
+            template_info.addTclVar(var_name, var_val)
+ 
+        elif 'define_template' in current_line:
+            template_name, template = getDefineBlock(i, template_lines)
+            storeDefineTemplateBlockInfo(template_info, template_name, template)
+ 
+        elif 'define_cell' in current_line:
+            cell_name, cell = getDefineCellBlock(i, template_lines)
+            storeDefineCellBlockInfo(template_info, cell_name, cell)
+ 
+        elif 'define_arc' in current_line:
+            cell_name, arc = getDefineBlock(i, template_lines)
+            # Add default values for some define_arc attributes if they were not defined
+            if "when" not in arc:
+                arc['when'] = 'NO_CONDITION'
+            if "type" not in arc:
+                arc['type'] = 'combinational'
+            storeDefineArcBlockInfo(template_info, cell_name, arc)
+ 
+        elif 'define_index' in current_line:
+            cell_name, index = getDefineBlock(i, template_lines)
+            storeDefineIndexBlockInfo(template_info, cell_name, index)
+    return template_info
+ 
+ 
+def _getLine(template_lines, i):
+    return template_lines[i] if i < len(template_lines) else ''
+ 
+ 
+def getDefineBlock(i, template_lines):
+    """
+    A function to get the attributes and name of the define_template, define_arc or
+    define_index block starting on line i (0-based). The backslash continuations are
+    followed forward and every line is stripped once.
+ 
+    Returns:
+        block_name (str):
+            The name at the end of the block
+        block (dict):
+            The attribute values of the block, keyed on attribute name
+    """
+    block = dict()
+    while 1:
+        i += 1
+        stripped_line = _getLine(template_lines, i).strip()
+        # Like the line-by-line parser, a block ending in a blank line or EOF is an error
+        if not stripped_line:
+            raise IndexError("Unterminated block on line %s" % (i + 1))
+        if stripped_line[-1] != '\\':
+            return stripped_line, block
+        # Same split as getBlockAttribute
+        first_space = stripped_line.index(' ')
+        value = stripped_line[first_space:-1].strip()
+        if '{' in value:
+            value = removeCurlyBracesAndStrip(value)
+        block[stripped_line[1:first_space].strip()] = value
+ 
+ 
+def getDefineCellBlock(i, template_lines):
+    """
+    A function to get the attributes and name of the define_cell block starting on
+    line i (0-based), skipping user_arcs_only and the -when lists like
+    parseDefineCellBlock.
+    """
+    cell = dict()
+    while 1:
+        i += 1
+        current_line = _getLine(template_lines, i)
+        if not current_line.strip():
+            raise IndexError("Unterminated define_cell block on line %s" % (i + 1))
+        if current_line.strip()[-1] != '\\':
+            return current_line.strip(), cell
+        elif 'user_arcs_only' in current_line:
+            continue
+        elif '-when' in current_line:
+            while 1:
+                i += 1
+                if i >= len(template_lines):
+                    raise IndexError("Unterminated -when list in define_cell block")
+                current_line = template_lines[i]
+                s_cur_line = current_line.strip()
+                if s_cur_line and s_cur_line[-1] != '\\':
+                    i -= 1
+                    break
+                if '"' in current_line or '-' in current_line:
+                    break
+        else:
+            attribute, value = getBlockAttribute(current_line)
+            if len(value) == 0:
+                value = "True"
+            elif '{' in value:
+                value = removeCurlyBracesAndStrip(value)
+            cell[attribute] = value
+ 
+ 
+def getTclVarFromLines(line, i, template_lines):
+    """
+    Same as getTclVar, reading a '{' list from the lines after line i (0-based).
+    """
+    var_info = line.strip().split('set ')[1].split()
+    var_name = var_info[0]
+    if len(var_info) > 2:
+        if var_info[1] == '{':
+            var_val_list = set()
+            while 1:
+                i += 1
+                current_line = _getLine(template_lines, i)
+                if current_line == '':
+                    print("ERROR: Couldn't finish storing tcl var from '%s'" % line)
+                    print("Fatal error. Exiting now.")
+                    sys.exit(0)
+ 
+                current_val = current_line.strip().split()[0]
+                if current_val == '}':
+                    break
+                var_val_list.add(current_val)
+ 
+                if '}' in current_line:
+                    break
+            var_val = var_val_list
+        else:
+            var_val = var_info[1]
+    else:
+        try:
+            var_val = var_info[1]
+        except IndexError:
+            var_val = None
+    return var_name, var_val
+ 
+ 
+def parseTemplateFileByLine(template_file):
     """
     A function that parses the template file and returns a data structure
     representation of its contents
@@ -24,6 +277,9 @@ def parseTemplateFile(template_file):
     definitions for the different cells of the template file. It also returns the
     definition for the various template blocks.
  
+    This is the linecache based parser that parseTemplateFile replaces; it is kept
+    as the reference implementation.
+ 
     Args:
         template_file (str):
             The path to the template file
@@ -0,0 +1,103 @@
+import os
+import sys
+sys.path.append('./')
+import charTemplateParser.funcs as templateParser
+
+
+def _writeTemplate(template_file, num_cells, arcs_per_cell):
+    """
+    A template.tcl of num_cells cells: define_cell with -when lists, define_arc and
+    define_index blocks, set_var and tcl list variables.
+    """
+    cells = ["SYNDFFQ%05dD1" % i for i in range(num_cells)]
+    lines = ["# Synthetic template.tcl",
+             "set_var slew_lower_rise 0.1",
+             "set_var constraint_glitch_peak 0.1",
+             "set cells {"]
+    lines.extend("    %s" % cell for cell in cells)
+    lines.append("}")
+    lines.extend(["define_template -type constraint \\",
+                  "    -index_1 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    -index_2 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    constraint_template_5x5",
+                  "define_template -type delay \\",
+                  "    -index_1 { 0.0015 0.0142 0.0396 0.0904 0.1920 } \\",
+                  "    -index_2 { 0.0005 0.0012 0.0028 0.0060 0.0124 } \\",
+                  "    delay_template_5x5"])
+    for cell in cells:
+        lines.extend(["define_cell \\",
+                      "    -input { D SE SI } \\",
+                      "    -output { Q } \\",
+                      "    -clock { CP } \\",
+                      "    -pinlist { D SE SI CP Q } \\",
+                      "    -when { \\",
+                      "        \"!SE\" \"SE&SI\" } \\",
+                      "    -user_arcs_only \\",
+                      "    -delay delay_template_5x5 \\",
+                      "    -constraint constraint_template_5x5 \\",
+                      "    %s" % cell])
+        for arc_num in range(arcs_per_cell):
+            arc_type = ("hold", "setup", "combinational")[arc_num % 3]
+            lines.extend(["define_arc \\",
+                          "    -type %s \\" % arc_type,
+                          "    -vector {RxxxF} \\",
+                          "    -related_pin CP \\",
+                          "    -pin %s \\" % ("D", "SE", "SI", "Q")[arc_num % 4],
+                          "    -when \"!SE&SI\" \\",
+                          "    -probe { Q } \\",
+                          "    %s" % cell])
+        lines.extend(["define_index \\",
+                      "    -type hold \\",
+                      "    -pin D \\",
+                      "    -related_pin CP \\",
+                      "    -index_1 { 0.002 0.01 0.05 0.1 0.2 } \\",
+                      "    %s" % cell])
+    with open(template_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _modelDict(obj):
+    if hasattr(obj, '__dict__'):
+        return dict((k, _modelDict(v)) for k, v in vars(obj).items())
+    if isinstance(obj, dict):
+        return dict((k, _modelDict(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [_modelDict(v) for v in obj]
+    return obj
+
+
+class TestTemplateParser:
+    def test_same_model_as_line_parser(self, tmp_path):
+        template_file = str(tmp_path / "synthetic.template.tcl")
+        _writeTemplate(template_file, num_cells=5, arcs_per_cell=6)
+        by_line = templateParser.parseTemplateFileByLine(template_file)
+        tokenized = templateParser.parseTemplateFile(template_file)
+        assert len(tokenized.getAllCells()) == 5
+        assert _modelDict(tokenized) == _modelDict(by_line)
+
+    def test_parse_cache(self, tmp_path, capsys):
+        cache_dir = str(tmp_path / "cache")
+        template_file = str(tmp_path / "synthetic.template.tcl")
+        _writeTemplate(template_file, num_cells=5, arcs_per_cell=6)
+        parsed = templateParser.parseTemplateFile(template_file, cache_dir=cache_dir)
+        assert os.path.exists(templateParser.getTemplateCacheFile(template_file, cache_dir))
+        capsys.readouterr()
+        cached = templateParser.parseTemplateFile(template_file, cache_dir=cache_dir)
+        assert "Loaded parsed template from cache" in capsys.readouterr().out
+        assert _modelDict(cached) == _modelDict(parsed)
+
+        # A modified template is parsed again
+        _writeTemplate(template_file, num_cells=3, arcs_per_cell=6)
+        os.utime(template_file, (0, 0))
+        assert len(templateParser.parseTemplateFile(
+            template_file, cache_dir=cache_dir).getAllCells()) == 3
+
+    def test_no_parse_cache_by_default(self, tmp_path, monkeypatch):
+        # Nothing is written, in the run directory or the home directory
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        monkeypatch.chdir(tmp_path)
+        template_file = str(tmp_path / "synthetic.template.tcl")
+        _writeTemplate(template_file, num_cells=2, arcs_per_cell=2)
+        templateParser.parseTemplateFile(template_file)
+        templateParser.parseTemplateFile(template_file)
+        assert os.listdir(str(tmp_path)) == ["synthetic.template.tcl"]
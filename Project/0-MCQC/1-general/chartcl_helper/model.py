@@ -0,0 +1,73 @@
+"""
+An immutable view of a chartcl file.
+
+The chartcl is read and scanned once; the set_var values, the per-cell overrides
+(output load, glitch, delay degrade), the 'set cells' list and the include file
+lookup are stored in read-only mappings that are shared by arc extraction and
+SPICE info creation, so per-cell queries are dict hits instead of regex scans.
+"""
+import os
+import types
+
+import hybrid_char_helper
+from chartcl_helper.parser import ChartclParser
+
+_models = dict()
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return types.MappingProxyType(dict((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ChartclModel:
+    def __init__(self, filepath):
+        parser = ChartclParser(filepath)
+        parser.parse_set_var()
+        parser.parse_condition_glitch()
+        parser.parse_condition_load()
+        parser.parse_condition_delay_degrade()
+        parser.parse_amd_smc_degrade()
+        parser.parse_amd_glitch_high_threshold()
+
+        # Arc extraction uses the first output load override of a cell, the
+        # conditions keep the last one (same as ChartclParser)
+        output_load_index = dict()
+        for cell, index in parser.find_condition_load():
+            if cell not in output_load_index:
+                output_load_index[cell] = int(index)
+
+        self.filepath = filepath
+        self.vars = _freeze(parser.vars)
+        self.conditions = _freeze(parser.conditions)
+        self.output_load_index = types.MappingProxyType(output_load_index)
+        self.set_cells = tuple(hybrid_char_helper.parse_chartcl_for_cells(filepath))
+        self._inc_file_lookup = None
+
+    def get_output_load_index(self, cell_name, default=2):
+        return self.output_load_index.get(cell_name, default)
+
+    def get_condition(self, cell_name, name, default=None):
+        return self.conditions.get(cell_name, dict()).get(name, default)
+
+    def inc_file_lookup(self):
+        # Built on first use: it checks that every model card exists
+        if self._inc_file_lookup is None:
+            self._inc_file_lookup = types.MappingProxyType(
+                hybrid_char_helper.parse_chartcl_for_inc(self.filepath))
+        return dict(self._inc_file_lookup)
+
+
+def get_chartcl_model(filepath):
+    """
+    Returns the ChartclModel of filepath, parsing the file only once per process
+    (until it is modified).
+    """
+    stat = os.stat(filepath)
+    key = (os.path.abspath(filepath), stat.st_mtime, stat.st_size)
+    if key not in _models:
+        _models[key] = ChartclModel(filepath)
+    return _models[key]
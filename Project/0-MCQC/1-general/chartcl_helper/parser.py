@@ -42,10 +42,12 @@ class ChartclParser:
                 var_value = splited[2]
                 self.vars[var_name] = var_value.replace('index_', '')
  
-    def parse_condition_load(self):
+    def find_condition_load(self):
         condition = 'if.{0,50}{.{0,10}string compare.{0,10}"(\w{0,50})".{0,50}constraint_output_load.{0,10}index_(\w{0,2})'
+        return re.findall(condition, self.content_raw, flags=re.DOTALL)
  
-        for cell, index in re.findall(condition, self.content_raw, flags=re.DOTALL):
+    def parse_condition_load(self):
+        for cell, index in self.find_condition_load():
             if cell not in self.conditions:
                 self.conditions[cell] = dict()
                 self.conditions[cell]['OUTPUT_LOAD'] = index
@@ -0,0 +1,32 @@
+import sys
+sys.path.append('./')
+from chartcl_helper.model import get_chartcl_model
+
+CHARTCL = """set_var constraint_glitch_peak 0.1
+set_var constraint_output_load index_2
+set cells { CELLA CELLB }
+if { [string compare $cell "CELLA"] == 0 } {
+  set_var constraint_output_load index_3
+}
+if { [string compare $cell "CELLA"] == 0 } {
+  set_var constraint_output_load index_1
+}
+if { [string compare $cell "CELLB"] == 0 } {
+  set_var constraint_glitch_peak 0.2
+}
+"""
+
+
+class TestModel:
+    def test_chartcl_model(self, tmp_path):
+        chartcl = tmp_path / 'char_ssgnp.tcl'
+        chartcl.write_text(CHARTCL)
+        model = get_chartcl_model(str(chartcl))
+        assert model is get_chartcl_model(str(chartcl))
+        assert dict(model.vars) == {'constraint_glitch_peak': '0.1', 'constraint_output_load': '2'}
+        assert model.set_cells == ('CELLA', 'CELLB')
+        # The first output load override wins, like the per-arc regex scan did
+        assert model.get_output_load_index('CELLA') == 3
+        assert model.get_output_load_index('CELLC') == 2
+        assert model.get_condition('CELLB', 'GLITCH') == '0.2'
+        assert model.get_condition('CELLC', 'GLITCH') is None
@@ -0,0 +1,6 @@
+__version__ = "1.0.0"
+__date__ = "2026-10-16"
+__author__ = "rahulk"
+__maintainer__ = "rahulk"
+__email__ = "rahulk@tsmc.com"
+__name__ = "executor"
@@ -0,0 +1,210 @@
+"""
+This module contains the executors that run the simulations of a DECKS directory.
+
+LSFExecutor writes (and optionally submits) the job array launch script of
+launchscript.funcs. LocalExecutor runs the nominal and MC simulation of every deck
+on the local machine: a configurable simulator command per (deck, simulation), at
+most 'jobs' simulator processes at a time, with retries of the simulations that fail
+and the runtime of every simulation written to a report file.
+"""
+
+import abc
+import concurrent.futures
+import csv
+import os
+import shlex
+import subprocess
+import time
+
+import launchscript.funcs as launchScript
+
+# Simulator commands of LocalExecutor. {deck_path} is the deck directory and {cpus}
+# the number of threads of an MC simulation.
+NOMINAL_COMMAND = "hspice -i {deck_path}/nominal_sim.sp -o {deck_path}/nominal_sim.lis"
+MC_COMMAND = "hspice64 -mt {cpus} -i {deck_path}/mc_sim.sp -o {deck_path}"
+
+# (simulation, deck file, result file, log file prefix)
+SIMULATIONS = (("nominal", "nominal_sim.sp", "nominal_sim.mt0", "nominal"),
+               ("mc", "mc_sim.sp", "mc_sim.mt0", "mc"))
+
+EXECUTOR_REPORT_FILE = "executor_report.csv"
+EXECUTOR_REPORT_COLUMNS = ["Deck", "Simulation", "Status", "Attempts", "Runtime [s]"]
+
+
+class Executor(abc.ABC):
+    """
+    Runs the simulations of the decks of a DECKS directory.
+    """
+
+    @abc.abstractmethod
+    def run(self, root_output_path):
+        pass
+
+
+class LSFExecutor(Executor):
+    """
+    Writes the launch script of launchscript.funcs.createLaunchScript, and runs it
+    (which submits the jobs) if submit is True.
+    """
+
+    def __init__(self, lsf_cfg_file, submit=False, **launch_options):
+        self.lsf_cfg_file = lsf_cfg_file
+        self.submit = submit
+        self.launch_options = launch_options
+
+    def run(self, root_output_path):
+        launch_script = launchScript.createLaunchScript(root_output_path, self.lsf_cfg_file,
+                                                        **self.launch_options)
+        print("INFO:\t Find launch script at %s" % launch_script)
+        if self.submit:
+            subprocess.check_call(["tcsh", "-f", launch_script])
+        return launch_script
+
+
+class LocalExecutor(Executor):
+    """
+    Runs the simulations with at most jobs simulator processes at a time.
+
+    Args:
+        nominal_command, mc_command (str):
+            The simulator command lines (see NOMINAL_COMMAND and MC_COMMAND)
+        jobs (int):
+            The number of simulations that run at the same time
+        retries (int):
+            How many times a failed simulation is run again. A simulation fails if
+            the command fails or does not write its mt0 file.
+        mc_cpus (int):
+            The {cpus} of the MC command
+        timeout (float):
+            Seconds after which a simulation is killed (and fails), no limit if None
+        skip_done (bool):
+            Don't run the simulations that already have their mt0 file
+    """
+
+    def __init__(self, nominal_command=NOMINAL_COMMAND, mc_command=MC_COMMAND, jobs=1,
+                 retries=1, mc_cpus=1, timeout=None, skip_done=False):
+        self.commands = {"nominal": nominal_command, "mc": mc_command}
+        self.jobs = max(1, jobs)
+        self.retries = max(0, retries)
+        self.mc_cpus = mc_cpus
+        self.timeout = timeout
+        self.skip_done = skip_done
+
+    def getTasks(self, deck_paths):
+        """
+        Returns the (deck_path, simulation, result file, log prefix) of every
+        simulation to run, all of the nominal simulations first.
+        """
+        tasks = list()
+        for simulation, deck_file, result_file, log_prefix in SIMULATIONS:
+            for deck_path in deck_paths:
+                if not os.path.exists(os.path.join(deck_path, deck_file)):
+                    continue
+                if self.skip_done and os.path.exists(os.path.join(deck_path, result_file)):
+                    continue
+                tasks.append((deck_path, simulation, result_file, log_prefix))
+        return tasks
+
+    def runTask(self, task):
+        """
+        Runs one simulation, with retries.
+
+        Returns:
+            task_result (dict):
+                The report row of the simulation
+        """
+        deck_path, simulation, result_file, log_prefix = task
+        command = shlex.split(self.commands[simulation].format(deck_path=deck_path,
+                                                               cpus=self.mc_cpus))
+        result_path = os.path.join(deck_path, result_file)
+        status = "FAILED"
+        attempts = 0
+        start = time.time()
+        while attempts <= self.retries:
+            attempts += 1
+            if os.path.exists(result_path):
+                os.remove(result_path)
+            with open(os.path.join(deck_path, "%s.log" % log_prefix), 'w') as log_f, \
+                    open(os.path.join(deck_path, "%s.err" % log_prefix), 'w') as err_f:
+                try:
+                    return_code = subprocess.call(command, stdout=log_f, stderr=err_f,
+                                                  cwd=deck_path, timeout=self.timeout)
+                except subprocess.TimeoutExpired as _:
+                    err_f.write("Killed after %s s\n" % self.timeout)
+                    return_code = None
+                except OSError as e:
+                    err_f.write("%s\n" % e)
+                    return_code = None
+            if return_code == 0 and os.path.exists(result_path):
+                status = "DONE"
+                break
+
+        return {"Deck": os.path.basename(deck_path), "Simulation": simulation,
+                "Status": status, "Attempts": attempts,
+                "Runtime [s]": "%.3f" % (time.time() - start)}
+
+    def run(self, root_output_path):
+        """
+        Runs the simulations of the decks of root_output_path and writes the report
+        file next to it.
+
+        Returns:
+            task_results (list):
+                The report row of every simulation, in the order of getTasks
+        """
+        deck_paths = launchScript.getDeckPaths(root_output_path)
+        tasks = self.getTasks(deck_paths)
+        print("INFO:\t Running %s simulations of %s decks with %s processes." % (
+            len(tasks), len(deck_paths), self.jobs))
+
+        start = time.time()
+        # The simulations are separate processes, the threads only wait for them
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            task_results = list(executor.map(self.runTask, tasks))
+        wall_time = time.time() - start
+
+        report_file = os.path.join(os.path.dirname(root_output_path), EXECUTOR_REPORT_FILE)
+        writeExecutorReport(report_file, task_results)
+        printExecutorSummary(task_results, wall_time)
+        return task_results
+
+
+def writeExecutorReport(report_file, task_results):
+    tmp_file = "%s.%s.tmp" % (report_file, os.getpid())
+    with open(tmp_file, 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=EXECUTOR_REPORT_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(task_results)
+    os.replace(tmp_file, report_file)
+    print("INFO:\t Wrote the runtime of %s simulations to %s" % (len(task_results),
+                                                                 report_file))
+
+
+def printExecutorSummary(task_results, wall_time):
+    num_failed = len([x for x in task_results if x["Status"] != "DONE"])
+    num_retried = len([x for x in task_results if x["Attempts"] > 1])
+    cpu_time = sum(float(x["Runtime [s]"]) for x in task_results)
+    print("INFO:\t %s simulations done, %s failed, %s retried." % (
+        len(task_results) - num_failed, num_failed, num_retried))
+    if wall_time > 0:
+        print("INFO:\t Wall time %.1f s, %.1f simulations/s, simulation time %.1f s." % (
+            wall_time, len(task_results) / wall_time, cpu_time))
+
+
+def getExecutor(user_options):
+    """
+    Returns the executor of the EXECUTOR option ('lsf' or 'local').
+    """
+    if user_options['EXECUTOR'] == "local":
+        return LocalExecutor(nominal_command=user_options['NOMINAL_COMMAND'],
+                             mc_command=user_options['MC_COMMAND'],
+                             jobs=user_options['NUM_JOBS'],
+                             retries=user_options['RETRIES'],
+                             mc_cpus=user_options['MC_CPUS'],
+                             timeout=user_options['TIMEOUT'],
+                             skip_done=user_options['SKIP_DONE'])
+    if user_options['EXECUTOR'] == "lsf":
+        return LSFExecutor(user_options['LSF_CFG_FILE'], submit=user_options['SUBMIT'],
+                           max_cpus=user_options['MAX_DP_WORKERS'],
+                           max_running=user_options['MAX_RUNNING_JOBS'])
+    raise ValueError("Unknown executor '%s'" % user_options['EXECUTOR'])
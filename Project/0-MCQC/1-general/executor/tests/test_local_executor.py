@@ -0,0 +1,99 @@
+import os
+import sys
+sys.path.append('./')
+import executor.funcs as executor
+import scld__postprocess as postprocess
+
+NUM_DECKS = 6
+
+# A stand-in for hspice: writes <output directory>/<deck name>.mt0, where the output
+# directory is -o if it is a directory and its dirname otherwise. The first run of
+# fail_rate of the decks fails.
+STUB_SIMULATOR = '''
+import argparse, os, random, sys, time
+parser = argparse.ArgumentParser()
+parser.add_argument("-i", dest="input_deck")
+parser.add_argument("-o", dest="output")
+parser.add_argument("-mt", type=int, default=1)
+parser.add_argument("--samples", type=int)
+parser.add_argument("--sleep", type=float)
+parser.add_argument("--fail_rate", type=float)
+args = parser.parse_args()
+output_dir = args.output if os.path.isdir(args.output) else os.path.dirname(args.output)
+deck_name = os.path.splitext(os.path.basename(args.input_deck))[0]
+rng = random.Random("%s/%s" % (os.path.abspath(output_dir), deck_name))
+fail_marker = os.path.join(output_dir, ".stub_failed_%s" % deck_name)
+if rng.random() < args.fail_rate and not os.path.exists(fail_marker):
+    open(fail_marker, 'w').close()
+    sys.exit(1)
+time.sleep(args.sleep)
+lines = ["$DATA1 SOURCE='HSPICE' VERSION='P-2019.06-SP1' PARAM_COUNT=0",
+         ".TITLE '* %s'" % deck_name, "index cp2d cp2q_del1 d2q temper alter#"]
+for sample_number in range(1, (args.samples if deck_name.startswith("mc") else 1) + 1):
+    lines.append(" ".join([str(sample_number)] +
+                          ["%.6e" % rng.gauss(2e-11, 1e-12) for _ in range(3)] +
+                          ["25.0000", "1.0000"]))
+with open(os.path.join(output_dir, "%s.mt0" % deck_name), 'w') as f:
+    f.write('\\n'.join(lines) + '\\n')
+'''
+
+
+def _writeDecks(tmp_path):
+    root_output_path = str(tmp_path / "DECKS")
+    for deck_num in range(NUM_DECKS):
+        deck_path = os.path.join(root_output_path, "deck%05d" % deck_num)
+        os.makedirs(deck_path)
+        for deck_file in ("nominal_sim.sp", "mc_sim.sp"):
+            with open(os.path.join(deck_path, deck_file), 'w') as f:
+                f.write("* %s of deck %s\n.end\n" % (deck_file, deck_num))
+    return root_output_path
+
+
+def _getStubExecutor(tmp_path, samples=20, sleep=0, fail_rate=0.0, jobs=3, retries=1):
+    stub_simulator = tmp_path / "stub_simulator.py"
+    stub_simulator.write_text(STUB_SIMULATOR)
+    stub_command = "%s %s --samples %s --sleep %s --fail_rate %s" % (
+        sys.executable, stub_simulator, samples, sleep, fail_rate)
+    return executor.LocalExecutor(
+        nominal_command="%s -i {deck_path}/nominal_sim.sp -o "
+                        "{deck_path}/nominal_sim.lis" % stub_command,
+        mc_command="%s -mt {cpus} -i {deck_path}/mc_sim.sp -o {deck_path}" % stub_command,
+        jobs=jobs, retries=retries)
+
+
+class TestLocalExecutor:
+    def test_all_simulations_done(self, tmp_path):
+        root_output_path = _writeDecks(tmp_path)
+        task_results = _getStubExecutor(tmp_path).run(root_output_path)
+        assert len(task_results) == 2 * NUM_DECKS
+        assert all(x["Status"] == "DONE" and x["Attempts"] == 1 for x in task_results)
+        assert os.path.exists(str(tmp_path / executor.EXECUTOR_REPORT_FILE))
+        for deck_name in os.listdir(root_output_path):
+            for mt0_file in ("nominal_sim.mt0", "mc_sim.mt0"):
+                assert os.path.exists(os.path.join(root_output_path, deck_name, mt0_file))
+
+    def test_failed_simulations_are_retried(self, tmp_path):
+        # Every first run fails
+        root_output_path = _writeDecks(tmp_path)
+        task_results = _getStubExecutor(tmp_path, fail_rate=1.0).run(root_output_path)
+        assert all(x["Status"] == "DONE" and x["Attempts"] == 2 for x in task_results)
+
+    def test_failed_simulations_without_retries(self, tmp_path):
+        root_output_path = _writeDecks(tmp_path)
+        task_results = _getStubExecutor(tmp_path, fail_rate=1.0,
+                                        retries=0).run(root_output_path)
+        assert all(x["Status"] == "FAILED" for x in task_results)
+
+    def test_summary_row_per_deck(self, tmp_path):
+        # The mt0 files of the executor are read by the post-processing
+        root_output_path = _writeDecks(tmp_path)
+        task_results = _getStubExecutor(tmp_path, samples=50, fail_rate=0.5,
+                                        jobs=2).run(root_output_path)
+        assert all(x["Status"] == "DONE" for x in task_results)
+
+        user_options = postprocess.loadDefaultOptions()
+        user_options.update({'ROOT_DIRECTORY': str(tmp_path), 'FORMAT': "mt0",
+                             'GET_RUNTIME': False, 'NUM_JOBS': 2})
+        postprocess.main(user_options)
+        with open(str(tmp_path / "statistics_summary.csv"), 'r') as f:
+            assert len(f.readlines()) == NUM_DECKS + 1
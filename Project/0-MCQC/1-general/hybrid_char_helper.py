@@ -17,8 +17,10 @@ def get_char_types(s_line):
     return char_types
  
  
-def parse_chartcl_for_inc(path):
-    chartcl = utils.load_list(path)
+def parse_chartcl_for_inc(path, chartcl=None):
+    # chartcl: the already read (stripped, non-empty) lines of path
+    if chartcl is None:
+        chartcl = utils.load_list(path)
     inc_file_lookup = {}
     for i, line in enumerate(chartcl):
         line = line.strip()
@@ -53,8 +55,10 @@ def parse_chartcl_for_inc(path):
     return inc_file_lookup
  
  
-def parse_chartcl_for_cells(path):
-    chartcl = utils.load_list(path)
+def parse_chartcl_for_cells(path, chartcl=None):
+    # chartcl: the already read (stripped, non-empty) lines of path
+    if chartcl is None:
+        chartcl = utils.load_list(path)
     cells = []
     for line in chartcl:
         if 'set cells' not in line:
@@ -2,29 +2,43 @@ import shutil
 import os
 import glob
 import fnmatch
+import collections
+import itertools
+import multiprocessing
  
 import utilities.fileIO as ioutils
  
+try:
+    import numpy as np
+except ImportError:
+    np = None
  
-def main(sim_path, nsamples):
+# Lines of an mt0 data block that are split into tokens at once
+MT0_SCAN_LINES = 65536
+# Below this many mt0 files to scan, a process pool is not worth starting
+MIN_PARALLEL_SCANS = 4
+ 
+ 
+def main(sim_path, nsamples, jobs=None):
     print("Starting incremental deck generation.")
     # Extract the data
     print("BEGIN PHASE 1.")
     print("Collecting mt0 files.")
     worker_mt0_files = collectExistingWorkerMt0(sim_path)
     print("Extracting simulated samples.")
-    simulated_sample_indices = getSimulatedSampleIndices(worker_mt0_files)
+    sample_coverage = getSampleCoverage(worker_mt0_files, nsamples, jobs=jobs)
     print("Identifying missing samples.")
-    missing_sample_indices = getMissingSampleIndices(nsamples, simulated_sample_indices)
+    missing_sample_ranges = getMissingSampleRanges(sample_coverage)
+    num_missing_samples = countSamplesInRanges(missing_sample_ranges)
     print("Checking if all simulated samples are done.")
-    if not len(missing_sample_indices):
+    if not num_missing_samples:
         print("All %s samples were simulated!" % nsamples)
         print("Creating sim.cfg for hspice datamining.")
         sim_cfg = createCFGForHSDatamining(sim_path, worker_mt0_files)
         print("Finished writing sim.cfg %s" % sim_cfg)
  
     else:
-        print("%s samples still need to be simulated." % len(missing_sample_indices))
+        print("%s samples still need to be simulated." % num_missing_samples)
         # Move all other files to a backup path in this dir
         print("BEGIN PHASE 2.")
         print("Creating backup folder.")
@@ -42,7 +56,7 @@ def main(sim_path, nsamples):
         # Create the incremental SPICE deck
         print("BEGIN PHASE 3.")
         print("Generating incremental deck buffer.")
-        inc_buff = getIncrementalMCDeckBuffer(sim_path, missing_sample_indices, nsamples)
+        inc_buff = getIncrementalMCDeckBuffer(sim_path, missing_sample_ranges, nsamples)
         incremental_mc_deck = os.path.join(sim_path, "incremental_mc_sim.sp")
         print("Writing incremental deck to %s" % incremental_mc_deck)
         ioutils.writeBufferToFile(inc_buff, incremental_mc_deck)
@@ -60,15 +74,23 @@ def main(sim_path, nsamples):
  
  
 # New deck functions
-def getIncrementalMCDeckBuffer(sim_path, missing_sample_indices, nsamples):
+def getIncrementalMCDeckBuffer(sim_path, missing_sample_ranges, nsamples):
     """
     A function that will copy the original mc_sim.sp file and modify it to only
     simulate the missing samples.
+ 
+    The missing samples are given as (first, last) ranges (see
+    getMissingSampleRanges) and written as a range list, e.g. monte=list(1:40,57);
+    a list of sample indices is converted to ranges first.
     """
  
     # Read MC contents
     mc_buffer = ioutils.readFile(os.path.join(sim_path, "mc_sim.sp"))
  
+    if missing_sample_ranges and not isinstance(missing_sample_ranges[0], tuple):
+        missing_sample_ranges = getSampleRangesFromIndices(missing_sample_ranges)
+    sample_list = formatSampleRanges(missing_sample_ranges)
+ 
     # Get sampling method
     sampling_method = getMCSamplingMethod(mc_buffer)
  
@@ -79,10 +101,9 @@ def getIncrementalMCDeckBuffer(sim_path, missing_sample_indices, nsamples):
             lhs_line = line.split('monte=')[0]
             if sampling_method.lower() == "lhs":
                 rhs_line = "monte=list(%s) lhs_sample_size=%s\n" % \
-                           (','.join([str(x) for x in missing_sample_indices]), nsamples)
+                           (sample_list, nsamples)
             else:
-                rhs_line = "monte=list(%s)\n" % (','.join([str(x) for x in
-                                                           missing_sample_indices]))
+                rhs_line = "monte=list(%s)\n" % sample_list
             wline = "%s %s" % (lhs_line, rhs_line)
             output_buffer.append(wline)
         else:
@@ -190,26 +211,30 @@ def collectExistingWorkerMt0(sim_path):
     # ./*.mt0
     # ./sim__run__*/*_dp/*/*.mt0
     # ./sim__run__*/*.mt0
+    #
+    # The directories are listed once each (like glob, hidden entries are skipped)
  
     worker_mt0_files = list()
- 
-    # ./*_dp/*/*.mt0
-    _ = [worker_mt0_files.append(x) for x in glob.glob(os.path.join(sim_path, "*_dp",
-                                                                    "*", "*.mt0"))]
- 
-    # ./*.mt0
-    _ = [worker_mt0_files.append(x) for x in glob.glob(os.path.join(sim_path, "*.mt0"))]
- 
-    # ./sim__run__*/*_dp/*/*.mt0
-    _ = [worker_mt0_files.append(x) for x in glob.glob(os.path.join(sim_path,
-                                                                    "sim__run__*",
-                                                                    "*_dp", "*",
-                                                                    "*.mt0"))]
- 
-    # ./sim__run__*/*.mt0
-    _ = [worker_mt0_files.append(x) for x in glob.glob(os.path.join(sim_path,
-                                                                    "sim__run__*",
-                                                                    "*.mt0"))]
+    run_paths = [sim_path] + [os.path.join(sim_path, name) for name, is_dir
+                              in ioutils.listDir(sim_path)
+                              if is_dir and fnmatch.fnmatch(name, "sim__run__*")]
+    for run_path in run_paths:
+        run_entries = ioutils.listDir(run_path)
+        # ./*_dp/*/*.mt0
+        for dp_name, is_dir in run_entries:
+            if not is_dir or not dp_name.endswith("_dp"):
+                continue
+            dp_path = os.path.join(run_path, dp_name)
+            for worker_name, is_dir in ioutils.listDir(dp_path):
+                if not is_dir:
+                    continue
+                worker_path = os.path.join(dp_path, worker_name)
+                worker_mt0_files.extend(os.path.join(worker_path, name) for name, is_dir
+                                        in ioutils.listDir(worker_path)
+                                        if not is_dir and name.endswith(".mt0"))
+        # ./*.mt0
+        worker_mt0_files.extend(os.path.join(run_path, name) for name, is_dir
+                                in run_entries if not is_dir and name.endswith(".mt0"))
  
     # Clean up any files we don't need
     worker_mt0_files = cleanupWorkerMt0FileList(worker_mt0_files)
@@ -235,10 +260,205 @@ def cleanupWorkerMt0FileList(worker_mt0_files):
     return new_worker_mt0_files
  
  
+def readMt0HeaderColumns(mt0_file_obj):
+    """
+    Reads the header of an open mt0 file up to its last line and returns its column
+    names (None if there is no header). The header starts with the 'index' column
+    and HSPICE wraps it over several lines, ending with the 'alter#' column, when
+    there are many measurements.
+    """
+    for line in mt0_file_obj:
+        if line.startswith("index "):
+            break
+    else:
+        return None
+ 
+    columns = line.split()
+    while "alter#" not in columns:
+        line = next(mt0_file_obj, None)
+        if line is None:
+            return None
+        columns.extend(line.split())
+    return columns
+ 
+ 
+def scanMt0SampleIndices(mt0_file):
+    """
+    A function that streams the index column of an mt0 file.
+ 
+    The data block is read MT0_SCAN_LINES lines at a time and cut into records of
+    one token per column, so records wrapped over several lines are handled. A last
+    record that is still being written is not counted.
+ 
+    Returns:
+        sample_indices (numpy.ndarray or list):
+            The sample index of every complete record (an int64 array if NumPy is
+            available)
+    """
+    index_blocks = list()
+    with open(mt0_file, 'r', errors='replace') as f:
+        columns = readMt0HeaderColumns(f)
+        if columns is None:
+            print("WARNING:\t No mt0 header in %s, no samples read from it." % mt0_file)
+            return np.zeros(0, dtype=np.int64) if np is not None else list()
+        num_columns = len(columns)
+        index_col = columns.index("index")
+ 
+        leftover_tokens = list()
+        while True:
+            lines = list(itertools.islice(f, MT0_SCAN_LINES))
+            if not lines:
+                break
+            tokens = leftover_tokens + ' '.join(lines).split()
+            records_end = (len(tokens) // num_columns) * num_columns
+            index_blocks.append(tokens[index_col:records_end:num_columns])
+            leftover_tokens = tokens[records_end:]
+ 
+    if np is not None:
+        if not index_blocks:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.array(block, dtype=np.float64)
+                               for block in index_blocks]).astype(np.int64)
+    return [int(float(x)) for block in index_blocks for x in block]
+ 
+ 
+def getCoverageBitmap(nsamples):
+    # One flag per sample index, 0 is not a sample
+    if np is not None:
+        return np.zeros(nsamples + 1, dtype=bool)
+    return bytearray(nsamples + 1)
+ 
+ 
+def addSamplesToCoverage(sample_coverage, sample_indices):
+    nsamples = len(sample_coverage) - 1
+    if np is not None:
+        sample_indices = np.asarray(sample_indices, dtype=np.int64)
+        sample_indices = sample_indices[(sample_indices >= 1) & (sample_indices <= nsamples)]
+        sample_coverage[sample_indices] = True
+    else:
+        for sample_index in sample_indices:
+            if 1 <= sample_index <= nsamples:
+                sample_coverage[sample_index] = 1
+ 
+ 
+def scanMt0Files(mt0_files, jobs=None):
+    """
+    Returns the scanMt0SampleIndices of every mt0 file, in order, scanning the files
+    in a pool of processes if there are enough of them.
+    """
+    if jobs is None:
+        jobs = min(8, multiprocessing.cpu_count())
+    if jobs > 1 and len(mt0_files) >= MIN_PARALLEL_SCANS:
+        print("INFO:\t Scanning %s mt0 files with %s processes." % (len(mt0_files), jobs))
+        pool = multiprocessing.Pool(processes=jobs)
+        try:
+            return pool.map(scanMt0SampleIndices, mt0_files,
+                            chunksize=max(1, len(mt0_files) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+    return [scanMt0SampleIndices(mt0_file) for mt0_file in mt0_files]
+ 
+ 
+def getSampleCoverage(worker_mt0_files, nsamples, jobs=None):
+    """
+    A function that scans the existing mt0 files for the samples that have already
+    been simulated.
+ 
+    Returns:
+        sample_coverage (numpy.ndarray or bytearray):
+            nsamples + 1 flags, set for the simulated sample indices (index 0 is not
+            used); a bool array if NumPy is available
+    """
+    sample_coverage = getCoverageBitmap(nsamples)
+    for sample_indices in scanMt0Files(worker_mt0_files, jobs=jobs):
+        addSamplesToCoverage(sample_coverage, sample_indices)
+    return sample_coverage
+ 
+ 
+def getMissingSampleRanges(sample_coverage):
+    """
+    A function that gets the sample indices that are missing from a coverage bitmap.
+ 
+    Returns:
+        missing_sample_ranges (list):
+            The (first, last) sample index of every run of missing samples, in order
+    """
+    nsamples = len(sample_coverage) - 1
+    if np is not None:
+        missing = np.concatenate(([False], ~np.asarray(sample_coverage[1:], dtype=bool),
+                                  [False])).astype(np.int8)
+        edges = np.diff(missing)
+        starts = np.flatnonzero(edges == 1) + 1
+        ends = np.flatnonzero(edges == -1)
+        return [(int(start), int(end)) for start, end in zip(starts, ends)]
+ 
+    missing_sample_ranges = list()
+    start = sample_coverage.find(0, 1)
+    while start != -1:
+        end = sample_coverage.find(1, start)
+        if end == -1:
+            end = nsamples + 1
+        missing_sample_ranges.append((start, end - 1))
+        start = sample_coverage.find(0, end)
+    return missing_sample_ranges
+ 
+ 
+def getSampleRangesFromIndices(sample_indices):
+    sample_ranges = list()
+    for sample_index in sorted(set(sample_indices)):
+        if sample_ranges and sample_ranges[-1][1] == sample_index - 1:
+            sample_ranges[-1] = (sample_ranges[-1][0], sample_index)
+        else:
+            sample_ranges.append((sample_index, sample_index))
+    return sample_ranges
+ 
+ 
+def countSamplesInRanges(sample_ranges):
+    return sum(last - first + 1 for first, last in sample_ranges)
+ 
+ 
+def formatSampleRanges(sample_ranges):
+    # HSPICE monte=list() syntax: single samples and first:last ranges
+    return ','.join(str(first) if first == last else "%s:%s" % (first, last)
+                    for first, last in sample_ranges)
+ 
+ 
+def getDecksSampleCoverage(decks_path, nsamples, jobs=None):
+    """
+    A function that scans the mt0 files of all deck directories of a DECKS tree in
+    one pool.
+ 
+    Returns:
+        missing_sample_ranges (OrderedDict):
+            The getMissingSampleRanges of every deck directory, in name order
+    """
+    deck_mt0_files = collections.OrderedDict()
+    for deck_name, is_dir in ioutils.listDir(decks_path):
+        if is_dir:
+            deck_mt0_files[deck_name] = collectExistingWorkerMt0(
+                os.path.join(decks_path, deck_name))
+ 
+    all_mt0_files = [mt0_file for mt0_files in deck_mt0_files.values()
+                     for mt0_file in mt0_files]
+    all_sample_indices = iter(scanMt0Files(all_mt0_files, jobs=jobs))
+ 
+    missing_sample_ranges = collections.OrderedDict()
+    for deck_name, mt0_files in deck_mt0_files.items():
+        sample_coverage = getCoverageBitmap(nsamples)
+        for _ in mt0_files:
+            addSamplesToCoverage(sample_coverage, next(all_sample_indices))
+        missing_sample_ranges[deck_name] = getMissingSampleRanges(sample_coverage)
+    return missing_sample_ranges
+ 
+ 
 def getSimulatedSampleIndices(worker_mt0_files):
     """
     A function that will crawl through the existing mt0 files to get the list of
     samples that have already been simulated.
+ 
+    This is the whole-file reader that getSampleCoverage replaces; it is kept as
+    the reference implementation.
     """
  
     simulated_sample_indices = list()
@@ -262,6 +482,8 @@ def getSimulatedSampleIndices(worker_mt0_files):
 def getMissingSampleIndices(sample_num, existing_sample_indices):
     """
     A function that gets the list of sample indices that are missing.
+ 
+    See getMissingSampleRanges for the bitmap based version.
     """
  
     all_indices = set(range(1,sample_num+1))
@@ -289,13 +511,3 @@ def getMt0ParameterLine(mt0_lines):
 def getIndexColumnFromMt0ParamLine(mt0_parameter_line):
     index_col = mt0_parameter_line.strip().split().index("index")
     return index_col
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
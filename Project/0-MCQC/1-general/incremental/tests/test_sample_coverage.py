@@ -0,0 +1,102 @@
+import os
+import random
+import shutil
+import sys
+
+import pytest
+sys.path.append('./')
+import incremental.funcs as incremental
+
+NUM_SAMPLES = 2000
+NUM_WORKERS = 6
+# The whole-file reader finds the header by its temper column
+MEASUREMENTS = ("cp2d", "d2q", "temper")
+
+# The NumPy path, if NumPy is installed, and the pure Python path
+NP_PATHS = [None] + ([incremental.np] if incremental.np is not None else [])
+
+
+def _writeMT0(mt0_file, sample_numbers, wrap):
+    columns = ["index"] + list(MEASUREMENTS) + ["alter#"]
+    records = [[str(x)] + ["2.0e-11"] * len(MEASUREMENTS) + ["1.0000"]
+               for x in sample_numbers]
+    lines = ["$DATA1 SOURCE='HSPICE' VERSION='P-2019.06-SP1' PARAM_COUNT=0",
+             ".TITLE '* synthetic mc_sim'"]
+    # HSPICE wraps the header and the records of many measurements
+    for fields in [columns] + records:
+        if wrap:
+            lines.extend([" ".join(fields[:2]), " ".join(fields[2:])])
+        else:
+            lines.append(" ".join(fields))
+    os.makedirs(os.path.dirname(mt0_file), exist_ok=True)
+    with open(mt0_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _writeSimPath(sim_path, wrap=False):
+    """
+    The mt0 files of an MC run with about 1% of the samples missing: a backed up run
+    (sim__run__0) with the first tenth and DP workers (mc_sim_dp/worker*) with the
+    rest. Returns the missing sample numbers.
+    """
+    rng = random.Random(7)
+    sample_numbers = [x for x in range(1, NUM_SAMPLES + 1) if rng.random() > 0.01]
+    backup_samples = sample_numbers[:len(sample_numbers) // 10]
+    _writeMT0(os.path.join(sim_path, "sim__run__0", "mc_sim.mt0"), backup_samples, wrap)
+    worker_samples = sample_numbers[len(backup_samples):]
+    per_worker = len(worker_samples) // NUM_WORKERS + 1
+    for worker in range(NUM_WORKERS):
+        _writeMT0(os.path.join(sim_path, "mc_sim_dp", "worker%s" % worker, "mc_sim.mt0"),
+                  worker_samples[worker * per_worker:(worker + 1) * per_worker], wrap)
+    return sorted(set(range(1, NUM_SAMPLES + 1)) - set(sample_numbers))
+
+
+def _getMissingSamplesByWholeFileScan(sim_path):
+    # The reference: the whole-file reader and a set difference
+    worker_mt0_files = incremental.collectExistingWorkerMt0(sim_path)
+    simulated_sample_indices = incremental.getSimulatedSampleIndices(worker_mt0_files)
+    return sorted(incremental.getMissingSampleIndices(NUM_SAMPLES,
+                                                      simulated_sample_indices))
+
+
+def _expandSampleRanges(sample_ranges):
+    return [x for first, last in sample_ranges for x in range(first, last + 1)]
+
+
+@pytest.mark.parametrize("np_module", NP_PATHS)
+class TestSampleCoverage:
+    def test_same_missing_samples_as_whole_file_scan(self, tmp_path, monkeypatch,
+                                                      np_module):
+        monkeypatch.setattr(incremental, 'np', np_module)
+        sim_path = str(tmp_path / "sim")
+        missing_samples = _writeSimPath(sim_path)
+        assert missing_samples
+        assert _getMissingSamplesByWholeFileScan(sim_path) == missing_samples
+
+        worker_mt0_files = incremental.collectExistingWorkerMt0(sim_path)
+        assert len(worker_mt0_files) == NUM_WORKERS + 1
+        sample_coverage = incremental.getSampleCoverage(worker_mt0_files, NUM_SAMPLES,
+                                                        jobs=1)
+        missing_sample_ranges = incremental.getMissingSampleRanges(sample_coverage)
+        assert _expandSampleRanges(missing_sample_ranges) == missing_samples
+
+    def test_pool_and_wrapped_records(self, tmp_path, monkeypatch, np_module):
+        monkeypatch.setattr(incremental, 'np', np_module)
+        monkeypatch.setattr(incremental, 'MIN_PARALLEL_SCANS', 1)
+        sim_path = str(tmp_path / "sim_wrapped")
+        missing_samples = _writeSimPath(sim_path, wrap=True)
+        sample_coverage = incremental.getSampleCoverage(
+            incremental.collectExistingWorkerMt0(sim_path), NUM_SAMPLES, jobs=2)
+        missing_sample_ranges = incremental.getMissingSampleRanges(sample_coverage)
+        assert _expandSampleRanges(missing_sample_ranges) == missing_samples
+
+    def test_decks_tree_scan(self, tmp_path, monkeypatch, np_module):
+        monkeypatch.setattr(incremental, 'np', np_module)
+        sim_path = str(tmp_path / "sim")
+        missing_samples = _writeSimPath(sim_path)
+        decks_path = tmp_path / "DECKS"
+        for deck_num in range(3):
+            shutil.copytree(sim_path, str(decks_path / ("deck%s" % deck_num)))
+        decks = incremental.getDecksSampleCoverage(str(decks_path), NUM_SAMPLES, jobs=1)
+        assert list(decks) == ["deck0", "deck1", "deck2"]
+        assert all(_expandSampleRanges(x) == missing_samples for x in decks.values())
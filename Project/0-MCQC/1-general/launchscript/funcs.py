@@ -1,44 +1,273 @@
+import heapq
 import math
 import os
 import glob
+import re
+import stat
 import subprocess
 import sys
 sys.path.insert(0, '/CAD/stdcell/DesignKits/Sponsor/Script/MCQC_automation/Tool_home/deck_generation/v3.5.5')
 import runtime.funcs as runtimeEstimate
+import netlistIndex.funcs as netlistIndex
 import utilities.fileIO as fileIO
  
-def createLaunchScript(root_output_path, lsf_cfg_file, min_effort):
+LSF_SUBMIT_OPTIONS = "-q all.q -R \"select[ostype=any]\""
+HSPICE_SETUP_LINE = "source /tools/dotfile_new/cshrc.hspice L-2016.03"
+ 
+# Directory (next to DECKS) with the job scripts and the job array index files
+LAUNCH_DIR = "launch"
+# Nominal simulations are short, so they are run in batches of about this many decks
+NOMINAL_DECKS_PER_JOB = 50
+# LSF limits the job array indices to MAX_JOB_ARRAY_SIZE (1000 by default)
+MAX_JOB_ARRAY_SIZE = 1000
+ 
+# The include line of grep '.inc' | grep BWP, with a literal dot
+NETLIST_INCLUDE_RE = re.compile(r"\.inc")
+ 
+ 
+def createLaunchScript(root_output_path, lsf_cfg_file, min_effort=None, job_arrays=True,
+                       nominal_decks_per_job=NOMINAL_DECKS_PER_JOB, max_cpus=None,
+                       max_running=None):
+    """
+    A function that writes the launch script of the decks of a DECKS directory
+ 
+    Args:
+        min_effort (float):
+            The effort one DP worker runs in the target wall time; an MC job gets
+            ceil(effort / min_effort) workers. Default is the smallest deck effort,
+            so the smallest deck runs on one worker.
+        job_arrays (bool):
+            If True, the nominal simulations are packed into nominal_decks_per_job
+            sized batches and the nominal and MC jobs are submitted as LSF job
+            arrays over index files (see planLaunch). Otherwise there is one bsub
+            line per deck for nominal and one for MC.
+        max_cpus (int):
+            The largest number of DP workers of an MC job (no limit if None)
+        max_running (int):
+            The number of jobs of an array that LSF runs at the same time (no limit
+            if None)
+ 
+    Returns:
+        launch_script (str):
+            The path of launch_all.csh, next to the DECKS directory
+    """
+    launch_script = os.path.join(os.path.dirname(root_output_path), "launch_all.csh")
+    deck_paths = getDeckPaths(root_output_path)
+    deck_efforts = getDeckEfforts(deck_paths)
+    if min_effort is None:
+        min_effort = getMinEffort(deck_efforts)
+    nominal_jobs, mc_jobs = planLaunch(deck_paths, deck_efforts, min_effort,
+                                       nominal_decks_per_job, max_cpus)
+ 
     header_buffer = formHeaderBuffer()
     header_buffer.append('\n')
     nom_buffer = ['\n']
     mc_buffer = ['\n']
-    launch_script = os.path.join(os.path.dirname(root_output_path), "launch_all.csh")
- 
-    for deck_path in glob.glob(os.path.join(root_output_path, "*")):
-        nominal_deck = os.path.join(deck_path, "nominal_sim.sp")
-        netlist_path = getNetlistPathFromNominalSpiceDeck(nominal_deck)
-        nxtor, _ = runtimeEstimate.getXTORandPODECounts(netlist_path)
-        current_effort = runtimeEstimate.getApproxEffort(nxtor)
-        req_cpus = math.ceil(current_effort / min_effort)
- 
-        nom_launch_cmd = formNomLaunchCmd(deck_path)
-        mc_launch_cmd = formMCLaunchCmd(deck_path, req_cpus, lsf_cfg_file)
- 
-        nom_buffer.append(nom_launch_cmd)
-        mc_buffer.append(mc_launch_cmd)
+    if job_arrays:
+        launch_dir = os.path.join(os.path.dirname(root_output_path), LAUNCH_DIR)
+        nom_buffer.extend(writeNomJobArrays(launch_dir, nominal_jobs, max_running))
+        mc_buffer.extend(writeMCJobArrays(launch_dir, mc_jobs, lsf_cfg_file,
+                                          max_running))
+    else:
+        for deck_path, req_cpus in mc_jobs:
+            nom_buffer.append(formNomLaunchCmd(deck_path))
+            mc_buffer.append(formMCLaunchCmd(deck_path, req_cpus, lsf_cfg_file))
  
     # Write
     fileIO.writeBufferToFile(header_buffer, launch_script, delimeter='\n', mode='w')
     fileIO.writeBufferToFile(nom_buffer, launch_script, delimeter='\n', mode='a')
     fileIO.writeBufferToFile(mc_buffer, launch_script, delimeter='\n', mode='a')
  
+    print("INFO:\t %s decks: %s nominal jobs, %s MC jobs with %s DP workers in total." % (
+        len(deck_paths), len(nominal_jobs), len(mc_jobs),
+        sum(req_cpus for _, req_cpus in mc_jobs)))
     return launch_script
  
  
+def getDeckPaths(root_output_path):
+    return sorted(x for x in glob.glob(os.path.join(root_output_path, "*"))
+                  if os.path.isdir(x))
+ 
+ 
+def getDeckEfforts(deck_paths):
+    """
+    Returns the approximate effort (runtime.funcs.getApproxEffort) of every deck,
+    from the transistor counts of the LPE netlist index instead of a grep per deck.
+    """
+    netlist_paths = [getNetlistPathFromNominalSpiceDeck(
+        os.path.join(deck_path, "nominal_sim.sp")) for deck_path in deck_paths]
+ 
+    # Index the netlists of every LPE directory at once
+    root_netlist_paths = dict()
+    for netlist_path in netlist_paths:
+        root_netlist_paths.setdefault(os.path.dirname(netlist_path), set()).add(
+            netlist_path)
+    for root_netlist_path in root_netlist_paths:
+        netlistIndex.getNetlistIndex(root_netlist_path).update(
+            sorted(root_netlist_paths[root_netlist_path]))
+ 
+    deck_efforts = list()
+    for netlist_path in netlist_paths:
+        nxtor, _ = netlistIndex.getNetlistIndex(
+            os.path.dirname(netlist_path)).getDeviceCounts(netlist_path)
+        deck_efforts.append(runtimeEstimate.getApproxEffort(nxtor))
+    return deck_efforts
+ 
+ 
+def getMinEffort(deck_efforts):
+    # The effort polynomial is not positive for every transistor count
+    positive_efforts = [x for x in deck_efforts if x > 0]
+    if not positive_efforts:
+        return 1.0
+    return min(positive_efforts)
+ 
+ 
+def getReqCPUs(effort, min_effort, max_cpus=None):
+    req_cpus = max(1, int(math.ceil(effort / min_effort)))
+    if max_cpus is not None:
+        req_cpus = min(req_cpus, max_cpus)
+    return req_cpus
+ 
+ 
+def packNominalJobs(deck_paths, deck_efforts, nominal_decks_per_job):
+    """
+    Packs the nominal simulations into ceil(decks / nominal_decks_per_job) jobs,
+    balancing the effort of the jobs: the decks are assigned from the largest effort
+    down, each to the job with the smallest effort so far.
+ 
+    Returns:
+        nominal_jobs (list):
+            The deck paths of every job, in DECKS order
+    """
+    if not deck_paths:
+        return list()
+    num_jobs = int(math.ceil(len(deck_paths) / float(nominal_decks_per_job)))
+    job_efforts = [(0.0, job_idx) for job_idx in range(num_jobs)]
+    job_decks = [list() for _ in range(num_jobs)]
+    deck_order = sorted(range(len(deck_paths)), key=lambda x: -deck_efforts[x])
+    for deck_idx in deck_order:
+        job_effort, job_idx = heapq.heappop(job_efforts)
+        job_decks[job_idx].append(deck_idx)
+        heapq.heappush(job_efforts, (job_effort + max(deck_efforts[deck_idx], 0.0),
+                                     job_idx))
+    return [[deck_paths[x] for x in sorted(deck_idxs)] for deck_idxs in job_decks]
+ 
+ 
+def planLaunch(deck_paths, deck_efforts, min_effort,
+               nominal_decks_per_job=NOMINAL_DECKS_PER_JOB, max_cpus=None):
+    """
+    Plans the simulation jobs of the decks.
+ 
+    Returns:
+        nominal_jobs (list):
+            The deck paths of every nominal job (see packNominalJobs)
+        mc_jobs (list):
+            The (deck_path, DP workers) of every MC job
+    """
+    nominal_jobs = packNominalJobs(deck_paths, deck_efforts, nominal_decks_per_job)
+    mc_jobs = [(deck_path, getReqCPUs(effort, min_effort, max_cpus))
+               for deck_path, effort in zip(deck_paths, deck_efforts)]
+    return nominal_jobs, mc_jobs
+ 
+ 
+def writeJobArrayIndexFiles(launch_dir, prefix, index_lines):
+    """
+    Writes the index files of a job array, MAX_JOB_ARRAY_SIZE lines per file; line
+    LSB_JOBINDEX holds the arguments of a job.
+ 
+    Returns:
+        index_files (list):
+            The (index_file, number of jobs) of every index file
+    """
+    index_files = list()
+    for first_idx in range(0, len(index_lines), MAX_JOB_ARRAY_SIZE):
+        chunk = index_lines[first_idx:first_idx + MAX_JOB_ARRAY_SIZE]
+        index_file = os.path.join(launch_dir, "%s.%s.idx" % (prefix, len(index_files)))
+        fileIO.writeBufferToFile(chunk + [''], index_file, delimeter='\n', mode='w')
+        index_files.append((index_file, len(chunk)))
+    return index_files
+ 
+ 
+def writeJobScript(job_script, script_buffer):
+    fileIO.writeBufferToFile(script_buffer + [''], job_script, delimeter='\n', mode='w')
+    os.chmod(job_script, os.stat(job_script).st_mode | stat.S_IXUSR | stat.S_IXGRP)
+ 
+ 
+def writeNomJobArrays(launch_dir, nominal_jobs, max_running=None):
+    """
+    Writes the nominal job script and index files and returns the bsub lines of the
+    nominal job arrays.
+    """
+    os.makedirs(launch_dir, exist_ok=True)
+    job_script = os.path.join(launch_dir, "nominal_job.csh")
+    writeJobScript(job_script, formNomJobScriptBuffer())
+    index_lines = [' '.join(deck_paths) for deck_paths in nominal_jobs]
+    return [formJobArrayLaunchCmd("nominal_mcqc", launch_dir, index_file, num_jobs,
+                                  job_script, [], max_running)
+            for index_file, num_jobs in writeJobArrayIndexFiles(launch_dir, "nominal",
+                                                                 index_lines)]
+ 
+ 
+def writeMCJobArrays(launch_dir, mc_jobs, lsf_dp_cfg, max_running=None):
+    """
+    Writes the MC job script and index files and returns the bsub lines of the MC
+    job arrays.
+    """
+    os.makedirs(launch_dir, exist_ok=True)
+    job_script = os.path.join(launch_dir, "mc_job.csh")
+    writeJobScript(job_script, formMCJobScriptBuffer())
+    index_lines = ["%s %s" % (req_cpus, deck_path) for deck_path, req_cpus in mc_jobs]
+    return [formJobArrayLaunchCmd("mc_mcqc", launch_dir, index_file, num_jobs,
+                                  job_script, [lsf_dp_cfg], max_running)
+            for index_file, num_jobs in writeJobArrayIndexFiles(launch_dir, "mc",
+                                                                 index_lines)]
+ 
+ 
+def formJobArrayLaunchCmd(job_name, launch_dir, index_file, num_jobs, job_script,
+                          job_args, max_running=None):
+    array_spec = "%s[1-%s]" % (job_name, num_jobs)
+    if max_running is not None:
+        array_spec = "%s%%%s" % (array_spec, max_running)
+    index_name = os.path.splitext(os.path.basename(index_file))[0]
+    output_log = os.path.join(launch_dir, "%s.%%I.log" % index_name)
+    output_err = os.path.join(launch_dir, "%s.%%I.err" % index_name)
+    launch_cmd = "bsub %s -J \"%s\" -o %s -e %s %s %s" % (
+        LSF_SUBMIT_OPTIONS, array_spec, output_log, output_err, job_script,
+        ' '.join([index_file] + job_args))
+    return launch_cmd
+ 
+ 
+def formNomJobScriptBuffer():
+    """
+    The job script of the nominal job arrays: it runs the nominal simulation of the
+    decks of line LSB_JOBINDEX of the index file ($1), like formNomLaunchCmd.
+    """
+    return ["#!/bin/tcsh -f",
+            HSPICE_SETUP_LINE,
+            "foreach deck_path (`sed -n \"${LSB_JOBINDEX}p\" $1`)",
+            "    (hspice -i $deck_path/nominal_sim.sp -o $deck_path/nominal_sim.lis "
+            "> $deck_path/nominal.log) >& $deck_path/nominal.err",
+            "end"]
+ 
+ 
+def formMCJobScriptBuffer():
+    """
+    The job script of the MC job arrays: line LSB_JOBINDEX of the index file ($1)
+    holds the number of DP workers and the deck path, $2 is the DP config file,
+    like formMCLaunchCmd.
+    """
+    return ["#!/bin/tcsh -f",
+            HSPICE_SETUP_LINE,
+            "set job_info = (`sed -n \"${LSB_JOBINDEX}p\" $1`)",
+            "set deck_path = $job_info[2]",
+            "(hspice64 -dp $job_info[1] -dpconfig $2 -i $deck_path/mc_sim.sp "
+            "-o $deck_path > $deck_path/mc.log) >& $deck_path/mc.err"]
+ 
+ 
 def formHeaderBuffer():
     header_buffer = list()
     hb_line = "#!/bin/tcsh -f"
-    tool_line = "source /tools/dotfile_new/cshrc.hspice L-2016.03"
+    tool_line = HSPICE_SETUP_LINE
     header_buffer.append(hb_line)
     header_buffer.append(tool_line)
     return header_buffer
@@ -49,9 +278,8 @@ def formNomLaunchCmd(deck_path):
     output_err = os.path.join(deck_path, "nominal.err")
     input_deck = os.path.join(deck_path, "nominal_sim.sp")
     output_lis = os.path.join(deck_path, "nominal_sim.lis")
-    nom_launch_cmd = "bsub -q all.q -R \"select[ostype=any]\" -J nominal_mcqc -o %s " \
-                     "-e %s hspice -i %s -o %s" % \
-                     (output_log, output_err, input_deck, output_lis)
+    nom_launch_cmd = "bsub %s -J nominal_mcqc -o %s -e %s hspice -i %s -o %s" % \
+                     (LSF_SUBMIT_OPTIONS, output_log, output_err, input_deck, output_lis)
     return nom_launch_cmd
  
  
@@ -59,13 +287,30 @@ def formMCLaunchCmd(deck_path, cpu_num, lsf_dp_cfg):
     output_log = os.path.join(deck_path, "mc.log")
     output_err = os.path.join(deck_path, "mc.err")
     input_deck = os.path.join(deck_path, "mc_sim.sp")
-    mc_launch_cmd = "bsub -q all.q -R \"select[ostype=any]\" -J mc_mcqc -o %s -e %s " \
-                    "hspice64 -dp %s -dpconfig %s -i %s -o %s" % \
-                    (output_log, output_err, cpu_num, lsf_dp_cfg, input_deck, deck_path)
+    mc_launch_cmd = "bsub %s -J mc_mcqc -o %s -e %s hspice64 -dp %s -dpconfig %s " \
+                    "-i %s -o %s" % \
+                    (LSF_SUBMIT_OPTIONS, output_log, output_err, cpu_num, lsf_dp_cfg,
+                     input_deck, deck_path)
     return mc_launch_cmd
  
  
 def getNetlistPathFromNominalSpiceDeck(nominal_deck):
+    """
+    Returns the LPE netlist included by a nominal deck: the first include line that
+    names a BWP cell, read in process.
+    """
+    with open(nominal_deck, 'r') as f:
+        for line in f:
+            if "BWP" in line and NETLIST_INCLUDE_RE.search(line):
+                return line.strip().split("'")[1]
+    raise IndexError("Couldn't find the netlist include of %s" % nominal_deck)
+ 
+ 
+def getNetlistPathFromNominalSpiceDeckByGrep(nominal_deck):
+    """
+    The grep based lookup that getNetlistPathFromNominalSpiceDeck replaces; it is
+    kept as the reference implementation.
+    """
     grep_cmd1 = ["bash", "-c", "grep '.inc' %s" % nominal_deck]
     p1 = subprocess.Popen(grep_cmd1, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     grep_cmd2 = ["bash", "-c", "grep BWP"]
@@ -74,4 +319,3 @@ def getNetlistPathFromNominalSpiceDeck(nominal_deck):
     stdout,stderr = p2.communicate()
     netlist_path = stdout.decode().strip().split("'")[1]
     return netlist_path
- 
@@ -0,0 +1,94 @@
+import os
+import random
+import sys
+sys.path.append('./')
+import launchscript.funcs as launchScript
+import runtime.funcs as runtimeEstimate
+
+NUM_DECKS = 40
+NUM_NETLISTS = 8
+
+
+def _writeDecks(work_dir):
+    """
+    LPE netlists of 10 to 500 transistors and a DECKS directory whose nominal decks
+    include one of them. Returns the DECKS directory.
+    """
+    rng = random.Random(11)
+    netlist_dir = os.path.join(work_dir, "Netlist", "LPE_cworst_T_m25c")
+    os.makedirs(netlist_dir)
+    netlist_paths = list()
+    for netlist_num in range(NUM_NETLISTS):
+        netlist_path = os.path.join(netlist_dir, "SYNDFF%04dBWP_c_qa.spi" % netlist_num)
+        lines = [".subckt SYNDFF%04dBWP CP D Q VDD VSS" % netlist_num]
+        for device_num in range(rng.randint(10, 500)):
+            lines.append("M%s n%s n%s VSS VSS nch_svt_mac l=8n" % (device_num, device_num,
+                                                                   device_num + 1))
+            lines.append("Rpar%s n%s n%s 0.1" % (device_num, device_num, device_num + 1))
+        lines.append(".ends")
+        with open(netlist_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        netlist_paths.append(netlist_path)
+
+    root_output_path = os.path.join(work_dir, "DECKS")
+    for deck_num in range(NUM_DECKS):
+        deck_path = os.path.join(root_output_path, "deck%05d" % deck_num)
+        os.makedirs(deck_path)
+        with open(os.path.join(deck_path, "nominal_sim.sp"), 'w') as f:
+            f.write("* nominal\n.inc '/models/model.inc'\n.inc '%s'\n.end\n" %
+                    rng.choice(netlist_paths))
+    return root_output_path
+
+
+def _getDeckEffortsByGrep(deck_paths):
+    # The reference: two greps per deck
+    deck_efforts = list()
+    for deck_path in deck_paths:
+        netlist_path = launchScript.getNetlistPathFromNominalSpiceDeckByGrep(
+            os.path.join(deck_path, "nominal_sim.sp"))
+        nxtor, _ = runtimeEstimate.getXTORandPODECounts(netlist_path)
+        deck_efforts.append(runtimeEstimate.getApproxEffort(nxtor))
+    return deck_efforts
+
+
+def _readIndexFiles(launch_dir):
+    nominal_decks = list()
+    mc_decks = list()
+    for name in sorted(os.listdir(launch_dir)):
+        with open(os.path.join(launch_dir, name), 'r') as f:
+            if name.startswith("nominal."):
+                nominal_decks.extend(f.read().split())
+            elif name.startswith("mc."):
+                mc_decks.extend(line.split()[1] for line in f)
+    return nominal_decks, mc_decks
+
+
+def _countSubmissions(launch_script):
+    with open(launch_script, 'r') as f:
+        return len([x for x in f if x.startswith("bsub")])
+
+
+class TestLaunchPlanner:
+    def test_same_efforts_as_grep(self, tmp_path):
+        root_output_path = _writeDecks(str(tmp_path))
+        deck_paths = launchScript.getDeckPaths(root_output_path)
+        assert len(deck_paths) == NUM_DECKS
+        assert launchScript.getDeckEfforts(deck_paths) == _getDeckEffortsByGrep(deck_paths)
+
+    def test_job_array_index_files(self, tmp_path, monkeypatch):
+        # Several index files per job array
+        monkeypatch.setattr(launchScript, 'MAX_JOB_ARRAY_SIZE', 15)
+        root_output_path = _writeDecks(str(tmp_path))
+        deck_paths = launchScript.getDeckPaths(root_output_path)
+        launch_script = launchScript.createLaunchScript(root_output_path, "/path/lsf.cfg",
+                                                        nominal_decks_per_job=4)
+        nominal_decks, mc_decks = _readIndexFiles(str(tmp_path / launchScript.LAUNCH_DIR))
+        assert sorted(nominal_decks) == deck_paths
+        assert mc_decks == deck_paths
+        assert _countSubmissions(launch_script) < 2 * NUM_DECKS
+
+    def test_one_submission_per_deck(self, tmp_path):
+        root_output_path = _writeDecks(str(tmp_path))
+        launch_script = launchScript.createLaunchScript(root_output_path, "/path/lsf.cfg",
+                                                        job_arrays=False)
+        assert _countSubmissions(launch_script) == 2 * NUM_DECKS
@@ -3,9 +3,43 @@ import linecache
 import fnmatch
  
  
-def parseLibraryFile(library_file, parse_type, char_type="", verbose=False):
+def parseLibraryFile(library_file, parse_type, char_type="", verbose=False,
+                     cell_filter=None):
     """
-    A function that parses a library file
+    A function that parses a library file in a single streaming pass
+    (libraryParser.reader). The returned data structure is the same as the one from
+    parseLibraryFileByLine, except the index and timing values of each table are
+    stored as numeric arrays instead of lists of strings.
+ 
+    Args:
+        library_file (str):
+            The full path to the library file to be parsed
+        parse_type (str):
+            A variable that identifies the type of library file to be parsed
+            Can be set to "variation" for sensitivity files or "nominal" for nominal .lib
+        char_type (str):
+            The type of timing data to extract from the library file
+            Default value is set to "" which extracts all timing data
+            Other options include "constraint", "delay", and "slew"
+        verbose (bool):
+            A flag to print debug messages when parsing the library file
+        cell_filter (set, default=None):
+            If given, only the tables of these cells are stored
+ 
+    Returns:
+        lib_data (dict):
+            The data structure that contains the timing data from the library file
+    """
+    import libraryParser.reader as library_reader
+ 
+    return library_reader.readLibraryFile(library_file, parse_type, char_type,
+                                          cell_filter=cell_filter, verbose=verbose)
+ 
+ 
+def parseLibraryFileByLine(library_file, parse_type, char_type="", verbose=False):
+    """
+    A function that parses a library file line by line through linecache.
+    Kept as the reference implementation for libraryParser.reader.
  
     Args:
         library_file (str):
@@ -0,0 +1,237 @@
+"""
+Single-pass streaming reader for library (.lib) and sensitivity (.sens) files.
+
+The file is walked once through a buffered reader. The fnmatch headers from
+loadHeaders() are compiled to regexes once and gated by their longest literal
+substring, so most lines are rejected with a few `in` checks. Table bodies
+(sigma_type, index_1/index_2 and the values rows) are consumed by the same pass
+instead of re-scanning forward, and are emitted as compact numeric arrays.
+
+The matching rules are the same as the line-by-line parser in
+libraryParser.funcs.parseLibraryFileByLine, so both return the same tables.
+"""
+import collections
+import fnmatch
+import re
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import libraryParser.funcs as library_parser
+
+READ_BUFFER_SIZE = 1 << 20
+
+LibraryTable = collections.namedtuple(
+    "LibraryTable", ["cell", "pin", "related_pin", "timing_type", "timing_sense",
+                     "when", "table_type", "sigma_type", "index_1", "index_2", "values"])
+
+# Reader states
+_SCAN = 0
+_SIGMA = 1
+_INDEX_2 = 2
+_VALUES = 3
+
+
+class HeaderPattern(object):
+    """An fnmatch header compiled to a regex and gated by its longest literal."""
+    __slots__ = ("pattern", "literal", "_match")
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.literal = max(re.split(r'[*?\[\]]', pattern), key=len)
+        self._match = re.compile(fnmatch.translate(pattern)).match
+
+    def __call__(self, line):
+        return self.literal in line and self._match(line) is not None
+
+
+def toArray(fields):
+    """
+    Converts the comma-separated fields of a table to a float64 array (NumPy if it
+    is available, array.array otherwise). Non-numeric tables are kept as strings.
+    """
+    try:
+        values = [float(x) for x in fields]
+    except ValueError:
+        return fields
+    if np is not None:
+        return np.array(values, dtype=np.float64)
+    return array('d', values)
+
+
+def _prematureEOF(reason):
+    print("ERROR:\t Prematurely reached end of file.")
+    print("INFO:\t %s" % reason)
+    print("INFO:\t Exiting now.")
+    sys.exit(-1)
+
+
+def iterLibraryTables(library_file, parse_type, char_type="", cell_filter=None,
+                      verbose=False):
+    """
+    A generator that yields one LibraryTable per valid timing table of the library
+    file, in file order.
+
+    Args:
+        library_file (str):
+            The full path to the library file to be parsed
+        parse_type (str):
+            "variation" for sensitivity files or "nominal" for nominal .lib
+        char_type (str):
+            "" for all timing data, or "constraint", "delay", "slew"
+        cell_filter (set or None):
+            If given, only tables of these cells are materialized; the tables of
+            all other cells are skipped without converting their values
+        verbose (bool):
+            A flag to print debug messages when parsing the library file
+    """
+    (cell_header, pin_header, related_pin_header, timing_header,
+     timing_type_header, timing_sense_header, when_condition_header,
+     sigma_type_header, index_header, _, table_header) = \
+        [HeaderPattern(h) if h is not None else None
+         for h in library_parser.loadHeaders(parse_type, char_type)]
+
+    if parse_type == "variation":
+        getTableType = library_parser.getTranTypeFromOCVTableHeader
+    else:
+        getTableType = library_parser.getTableTypeFromNomTableHeader
+
+    cell_name = ""
+    pin_name = ""
+    related_pin_name = ""
+    timing_type = ""
+    timing_sense = "none"
+    when_condition = "NO_CONDITION"
+    transition_type = ""
+
+    state = _SCAN
+    sigma_type = "none"
+    index_1 = None
+    index_2 = None
+    rows = None
+
+    with open(library_file, 'r', buffering=READ_BUFFER_SIZE) as f:
+        for i, current_line in enumerate(f, 1):
+            if state == _VALUES:
+                if '"' in current_line:
+                    rows.append(current_line.split('"')[1])
+                elif '}' in current_line:
+                    values = toArray([x for row in rows for x in row.split(',')])
+                    yield LibraryTable(cell_name, pin_name, related_pin_name,
+                                       timing_type, timing_sense, when_condition,
+                                       transition_type, sigma_type, toArray(index_1),
+                                       toArray(index_2), values)
+                    state = _SCAN
+                continue
+
+            if current_line[-1:] != '\n':
+                current_line += '\n'
+
+            if state == _SIGMA:
+                if sigma_type_header(current_line):
+                    sigma_type = library_parser.getSigmaTypeFromLine(current_line)
+                elif index_header(current_line):
+                    index_1 = current_line.split('"')[1].split(',')
+                    state = _INDEX_2
+                continue
+
+            if state == _INDEX_2:
+                index_2 = current_line.split('"')[1].split(',')
+                rows = list()
+                state = _VALUES
+                continue
+
+            if cell_header(current_line):
+                cell_name = library_parser.getCellNameFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current cell is set to %s (line %s)" % (cell_name, i))
+
+            elif pin_header(current_line):
+                pin_name = library_parser.getPinNameFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current pin is set to %s (line %s)" % (pin_name, i))
+
+            elif related_pin_header(current_line):
+                related_pin_name = library_parser.getRelatedPinNameFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current related pin is set to %s (line %s)" % (
+                        related_pin_name, i))
+
+            elif when_condition_header(current_line):
+                when_condition = library_parser.getWhenConditionFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current when condition is set to %s (line %s)" % (
+                        when_condition, i))
+
+            elif timing_type_header(current_line):
+                timing_type = library_parser.getTimingTypeFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current timing type is set to %s (line %s)" % (
+                        timing_type, i))
+
+            elif timing_sense_header(current_line):
+                timing_sense = library_parser.getTimingSenseFromLine(current_line)
+                if verbose:
+                    print("INFO:\t Current timing sense is set to %s (line %s)" % (
+                        timing_sense, i))
+
+            elif timing_header(current_line):
+                # Hit a timing block before a table, so reset some data
+                timing_sense = "none"
+                when_condition = "NO_CONDITION"
+
+            elif table_header(current_line):
+                transition_type = getTableType(current_line)
+                if not library_parser.checkValidTable(cell_name, pin_name,
+                                                      related_pin_name, timing_type,
+                                                      transition_type):
+                    if verbose:
+                        print("INFO:\t Table on line %s is invalid. Skipping it." % i)
+                    continue
+                if cell_filter is not None and cell_name not in cell_filter:
+                    continue
+                if verbose:
+                    library_parser.printArcData(cell_name, pin_name, related_pin_name,
+                                                timing_type, timing_sense,
+                                                when_condition, transition_type)
+                sigma_type = "none"
+                state = _SIGMA
+
+    if state == _SIGMA:
+        _prematureEOF("Reached EOF before seeing sigma type or index.")
+    elif state == _INDEX_2:
+        _prematureEOF("Could not find index_* headers.")
+    elif state == _VALUES:
+        _prematureEOF("Could not find end of table before EOF.")
+
+
+def readLibraryFile(library_file, parse_type, char_type="", cell_filter=None,
+                    verbose=False):
+    """
+    Parses the library file into the nested lib_data dictionary
+        lib_data[cell][pin][related_pin][timing_type][when][timing_sense][table_type]
+    whose leaves hold 'index_1', 'index_2' and one entry per sigma_type.
+    """
+    lib_data = dict()
+    num_tables_stored = 0
+    for table in iterLibraryTables(library_file, parse_type, char_type,
+                                   cell_filter=cell_filter, verbose=verbose):
+        table_data = lib_data.setdefault(table.cell, dict()) \
+            .setdefault(table.pin, dict()) \
+            .setdefault(table.related_pin, dict()) \
+            .setdefault(table.timing_type, dict()) \
+            .setdefault(table.when, dict()) \
+            .setdefault(table.timing_sense, dict()) \
+            .setdefault(table.table_type, dict())
+        table_data['index_1'] = table.index_1
+        table_data['index_2'] = table.index_2
+        table_data[table.sigma_type] = table.values
+        num_tables_stored += 1
+
+    print("INFO:\t Finished parsing file.")
+    print("INFO:\t Found a total of %s tables." % num_tables_stored)
+    return lib_data
@@ -0,0 +1,85 @@
+import sys
+sys.path.append('./')
+import libraryParser.funcs as library_parser
+
+TABLE_SIZE = 3
+
+
+def _table(name, template, sigma_type, seed):
+    axis = ", ".join("%.4f" % (0.001 * (k + 1) * (seed % 7 + 1)) for k in range(TABLE_SIZE))
+    rows = ["\"%s\"" % ", ".join("%.6f" % (((seed * 31 + row * 7 + col) % 997) * 1e-5)
+                                 for col in range(TABLE_SIZE))
+            for row in range(TABLE_SIZE)]
+    return ["        ocv_sigma_%s (%s_template_%dx%d) {" % (name, template, TABLE_SIZE,
+                                                            TABLE_SIZE),
+            "          sigma_type : %s;" % sigma_type,
+            "          index_1 (\"%s\");" % axis,
+            "          index_2 (\"%s\");" % axis,
+            "          values ( \\",
+            "            %s \\" % ", \\\n            ".join(rows),
+            "          );",
+            "        }"]
+
+
+def _timing(lines, related_pin, timing_type, tables, template, seed, when=None):
+    lines.extend(["      timing () {",
+                  "        related_pin : \"%s\";" % related_pin,
+                  "        timing_type : %s;" % timing_type])
+    if when is not None:
+        lines.append("        when : \"%s\";" % when)
+    for name in tables:
+        for sigma_type in ("early", "late"):
+            seed += 1
+            lines.extend(_table(name, template, sigma_type, seed))
+    lines.append("      }")
+    return seed
+
+
+def _writeLibrary(library_file, num_cells):
+    """A sensitivity file of num_cells flops, with delay and constraint tables."""
+    cells = ["SYNDFF%03dD1" % x for x in range(num_cells)]
+    lines = ["library (synthetic_lvf) {"]
+    for seed, cell in enumerate(cells):
+        lines.extend(["  cell (%s) {" % cell, "    pin (Q) {", "      direction : output;"])
+        for when in ("SE", "!SE"):
+            seed = _timing(lines, "CP", "rising_edge", ("cell_rise", "rise_transition"),
+                           "delay", seed, when)
+        lines.extend(["    }", "    pin (D) {", "      direction : input;"])
+        for timing_type in ("hold_rising", "setup_rising"):
+            seed = _timing(lines, "CP", timing_type, ("rise_constraint", "fall_constraint"),
+                           "constraint", seed)
+        lines.extend(["    }", "  }"])
+    lines.append("}")
+    with open(library_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return cells
+
+
+def _tableValues(lib_data):
+    values = dict()
+    for key in library_parser.flattenLibData(lib_data):
+        cell, pin, rel_pin, t_type, when, t_sense, table_name, table_key = key
+        table = lib_data[cell][pin][rel_pin][t_type][when][t_sense][table_name][table_key]
+        values[key] = [float(x) for x in table]
+    return values
+
+
+class TestLibraryReader:
+    def test_same_tables_as_line_parser(self, tmp_path):
+        library_file = str(tmp_path / "synthetic.sens")
+        _writeLibrary(library_file, 6)
+        by_line = _tableValues(library_parser.parseLibraryFileByLine(library_file,
+                                                                     "variation"))
+        streamed = _tableValues(library_parser.parseLibraryFile(library_file, "variation"))
+        assert by_line
+        assert streamed == by_line
+
+    def test_cell_filter(self, tmp_path):
+        library_file = str(tmp_path / "synthetic.sens")
+        cells = _writeLibrary(library_file, 6)
+        keep = set(cells[::2])
+        all_tables = _tableValues(library_parser.parseLibraryFile(library_file, "variation"))
+        filtered = _tableValues(library_parser.parseLibraryFile(library_file, "variation",
+                                                                cell_filter=keep))
+        assert filtered
+        assert filtered == dict((k, v) for k, v in all_tables.items() if k[0] in keep)
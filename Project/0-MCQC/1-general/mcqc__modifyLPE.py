@@ -2,6 +2,7 @@ import sys
 import getopt
 import glob
 import os
+import time
  
 import modifyLPE.funcs as modifyLPE
  
@@ -15,6 +16,22 @@ def main(argv=None):
     else:
         user_opts = argv
  
+    user_opts.setdefault('NUM_JOBS', 1)
+    user_opts.setdefault('FORCE', False)
+ 
+    # Batch mode: every LPE_* directory of the Netlist directory, modified in place
+    if user_opts.get('NETLIST_PATH'):
+        lpe_paths = sorted(x for x in glob.glob(os.path.join(user_opts['NETLIST_PATH'],
+                                                             "LPE_*")) if os.path.isdir(x))
+        lpe_jobs = list()
+        for lpe_path in lpe_paths:
+            lpe_jobs.extend(modifyLPE.getLPEJobs(lpe_path))
+        description = "%s LPE directories of %s" % (len(lpe_paths),
+                                                     user_opts['NETLIST_PATH'])
+        modifyLPEJobs(lpe_jobs, user_opts, description,
+                      skip_up_to_date=not user_opts['FORCE'])
+        return
+ 
     # Create output
     if not os.path.exists(user_opts['OUTPUT_PATH']):
         print("Output path %s doesn't exist. Creating it now." % user_opts[
@@ -22,16 +39,23 @@ def main(argv=None):
         os.makedirs(user_opts['OUTPUT_PATH'], exist_ok=True)
         print("Done.")
  
+    lpe_jobs = modifyLPE.getLPEJobs(user_opts['INPUT_PATH'], user_opts['OUTPUT_PATH'])
+    modifyLPEJobs(lpe_jobs, user_opts, user_opts['INPUT_PATH'])
+    print("Finished modifying LPE. Find output in %s" % user_opts['OUTPUT_PATH'])
  
-    print("Start modifying all LPE in %s" % user_opts['INPUT_PATH'])
-    for input_lpe in glob.glob(os.path.join(user_opts['INPUT_PATH'], "*.spi")):
-        output_lpe_name = "%s_qa.spi" % os.path.basename(input_lpe).split('.spi')[0]
-        output_lpe = os.path.join(user_opts['OUTPUT_PATH'], output_lpe_name)
  
-        print("Modifying input LPE %s" % input_lpe)
-        modifyLPE.createLPEWithParams(input_lpe, output_lpe, user_opts['PARAMETER_LIST'])
-        print("Wrote data to ouput LPE %s" % output_lpe)
-    print("Finished modifying LPE. Find output in %s" % user_opts['OUTPUT_PATH'])
+def modifyLPEJobs(lpe_jobs, user_opts, description, skip_up_to_date=False):
+    print("Start modifying %s LPE in %s with %s processes" % (len(lpe_jobs), description,
+                                                              user_opts['NUM_JOBS']))
+    start = time.time()
+    num_modified = modifyLPE.modifyLPEFiles(lpe_jobs, user_opts['PARAMETER_LIST'],
+                                            jobs=user_opts['NUM_JOBS'],
+                                            skip_up_to_date=skip_up_to_date)
+    if skip_up_to_date:
+        print("Modified %s LPE, skipped %s that were up to date, in %.1f s" % (
+            num_modified, len(lpe_jobs) - num_modified, time.time() - start))
+    else:
+        print("Modified %s LPE in %.1f s" % (num_modified, time.time() - start))
  
  
 def usage():
@@ -42,7 +66,11 @@ def usage():
         ("--input_path=", ":", "The path containing all the input LPE netlists to be "
                                "modified."),
         ("--output_path=", ":", "The path where all the modified LPE netlists will be "
-                                "stored.")
+                                "stored."),
+        ("", "", "\tOR"),
+        ("--netlist_path=", ":", "The Netlist directory: the netlists of every LPE_* "
+                                 "directory are modified, and written next to the input "
+                                 "as <name>_qa.spi.")
     ]
     print("Arguments:")
     for opt, delm, desc in required_arg_info:
@@ -54,7 +82,12 @@ def usage():
                                    "separated by a whitespace, that you want to insert "
                                    "into the LPE netlist."),
         ("", "", "Default parameters are 'parl1 parl2 plo_tox plo_dxl "
-                 "plo_dhfin plo_dtfin")
+                 "plo_dhfin plo_dtfin"),
+        ("--jobs=", ":", "The number of netlists that are modified at the same time. "
+                         "Default is 1."),
+        ("--force", ":", "With --netlist_path, also modify the netlists whose output "
+                         "is newer than the input and was written with the same "
+                         "parameter list, which are skipped by default.")
     ]
     print("Options:")
     for opt, delm, desc in optional_arg_info:
@@ -65,7 +98,10 @@ def usage():
     print("\t>>> python %s "
           "\n\t\t--input_path /my/input/path"
           "\n\t\t--output_path /my/output/path"
-          "\n\t\t--parameter_list 'parl1 parl2'")
+          "\n\t\t--parameter_list 'parl1 parl2'" % sys.argv[0])
+    print("\t>>> python %s "
+          "\n\t\t--netlist_path /my/root/Netlist"
+          "\n\t\t--jobs 8" % sys.argv[0])
  
  
 def parseArgv(argv):
@@ -73,7 +109,10 @@ def parseArgv(argv):
     long_opts = ["help",
                  "input_path=",
                  "output_path=",
-                 "parameter_list="
+                 "parameter_list=",
+                 "netlist_path=",
+                 "jobs=",
+                 "force"
                  ]
  
     optlst, remainder = getopt.gnu_getopt(argv, short_opts, long_opts)
@@ -98,12 +137,23 @@ def parseArgv(argv):
         elif opt in "--parameter_list":
             user_opts['PARAMETER_LIST'] = arg.split()
  
+        elif opt in "--netlist_path":
+            user_opts['NETLIST_PATH'] = arg
+ 
+        elif opt in "--jobs":
+            user_opts['NUM_JOBS'] = max(1, int(arg))
+ 
+        elif opt in "--force":
+            user_opts['FORCE'] = True
+ 
     return user_opts
  
  
 def validateUserOpts(user_opts):
     req_args = ["input_path", "output_path"]
     errors_exist = False
+    if 'NETLIST_PATH' in user_opts:
+        req_args = list()
  
     for arg in req_args:
         if not arg.upper() in user_opts:
@@ -1,16 +1,129 @@
+"""
+This module inserts the random variables of every transistor into LPE netlists.
+ 
+createLPEWithParams reads an input LPE once: the transistors are identified (into a
+set) while the lines are copied, and the header with the random variables of all of
+them is put in its place after the .subckt line when the netlist has been read.
+The header ends with a comment line holding the parameter list. The output is
+written in one go, to a temporary file that is then renamed.
+modifyLPEFiles runs it for many netlists with a process pool and can skip the ones
+whose output is newer than the input and was written with the same parameter list.
+"""
+ 
 import subprocess
 import fnmatch
+import glob
+import multiprocessing
+import os
  
 import utilities.fileIO as ioutils
  
+# Same as the greps of getXTORsInLPE: non-PODE MOS, not commented out
+XTOR_MODEL_STRS = ("ch_", "_mac")
+ 
+# Suffix of the modified LPE netlists
+OUTPUT_LPE_SUFFIX = "_qa.spi"
+ 
+# The comment line that ends the header of a modified LPE
+PARAMETER_LIST_MARKER = "* mcqc__modifyLPE parameter_list:"
+ 
+# Below this many netlists to modify, a process pool is not worth starting
+MIN_PARALLEL_LPES = 4
+ 
+ 
+def isXTORLine(line):
+    return '*' not in line and all(x in line for x in XTOR_MODEL_STRS)
+ 
+ 
+def getRVLineParts(parameter_list):
+    """
+    Returns the parts of the formRVForXTOR line around the XTOR name, so that the
+    line of an XTOR is xtor.join(parts).
+    """
+    if not parameter_list:
+        return ["+ \n"]
+    parts = ["+ %s=" % parameter_list[0]]
+    for parameter, next_parameter in zip(parameter_list, parameter_list[1:]):
+        parts.append("__%s %s=" % (parameter, next_parameter))
+    parts.append("__%s\n" % parameter_list[-1])
+    return parts
+ 
  
 def createLPEWithParams(input_lpe, output_lpe, parameter_list):
     """
+    A function that will accept an input LPE netlist file and then insert the random
+    variables for each transistor in the LPE.
+    The random variables for each transistor will correspond to the "parameters"
+    argument of this function.
+    The new LPE file will be written to the "output_lpe" argument
+ 
+    The input LPE is read once. A transistor is identified on its own instance line,
+    so its random variables line follows that line as in createLPEWithParamsByGrep.
+ 
+    Returns:
+        num_xtors (int):
+            The number of transistors with random variables
+    """
+    xtor_set = set()
+    output_lpe_buff = list()
+    header_index = None
+    rv_line_parts = getRVLineParts(parameter_list)
+ 
+    # Set some headers and flags (same as fnmatch with ".subckt*")
+    subckt_header = ".subckt"
+    insert_lpe_header = False
+ 
+    with open(input_lpe, 'r') as f:
+        for line in f:
+            # Collect the XTORs as the greps of getXTORsInLPE would
+            if "_mac" in line and isXTORLine(line):
+                xtor_set.add(line.split()[0])
+ 
+            # Check if we saw the subckt, which is where we insert the header
+            if line[:7].lower() == subckt_header:
+                output_lpe_buff.append(line)
+                insert_lpe_header = True
+ 
+            # Keep the place of the header, it is known at the end of the file
+            elif ('+' not in line) and insert_lpe_header:
+                header_index = len(output_lpe_buff)
+                output_lpe_buff.append(None)
+                output_lpe_buff.append(line)
+                insert_lpe_header = False
+ 
+            # Check if the current line has a MOS device
+            elif line[0] == 'X':
+                output_lpe_buff.append(line)
+                xtor_name = line.split()[0]
+                if xtor_name in xtor_set:
+                    output_lpe_buff.append(xtor_name.join(rv_line_parts))
+ 
+            # Just append
+            else:
+                output_lpe_buff.append(line)
+ 
+    if header_index is not None:
+        output_lpe_buff[header_index] = "%s%s" % (
+            createOutputLPEHeader(sorted(xtor_set), parameter_list),
+            formParameterListLine(parameter_list))
+ 
+    # Write file
+    tmp_file = "%s.%s.tmp" % (output_lpe, os.getpid())
+    ioutils.writeBufferToFile(output_lpe_buff, tmp_file)
+    os.replace(tmp_file, output_lpe)
+    return len(xtor_set)
+ 
+ 
+def createLPEWithParamsByGrep(input_lpe, output_lpe, parameter_list):
+    """
     A function that will accept an input LPE netlist file and then isnert the random
     variables for each transistor in the LPE.
     The random variables for each transistor will correspond to the "parameters"
     argument of this function.
     The new LPE file will be written to the "output_lpe" argument
+ 
+    The former createLPEWithParams: three greps for the XTORs, a list lookup for
+    every 'X' line. Kept as the reference of benchmarks/bench_modify_lpe.py.
     """
  
     # Get the list of XTORs in the current LPE
@@ -28,6 +141,90 @@ def createLPEWithParams(input_lpe, output_lpe, parameter_list):
     ioutils.writeBufferToFile(output_lpe_buffer, output_lpe)
  
  
+def getOutputLPEName(input_lpe):
+    return "%s%s" % (os.path.basename(input_lpe).split('.spi')[0], OUTPUT_LPE_SUFFIX)
+ 
+ 
+def getLPEJobs(input_path, output_path=None):
+    """
+    Returns the (input LPE, output LPE) of every netlist of input_path. The output
+    LPEs are written next to the inputs if output_path is None; LPEs that are
+    already modified (*_qa.spi) are not inputs.
+    """
+    if output_path is None:
+        output_path = input_path
+    lpe_jobs = list()
+    for input_lpe in sorted(glob.glob(os.path.join(input_path, "*.spi"))):
+        if input_lpe.endswith(OUTPUT_LPE_SUFFIX):
+            continue
+        lpe_jobs.append((input_lpe, os.path.join(output_path, getOutputLPEName(input_lpe))))
+    return lpe_jobs
+ 
+ 
+def formParameterListLine(parameter_list):
+    return "%s %s\n" % (PARAMETER_LIST_MARKER, ' '.join(parameter_list))
+ 
+ 
+def getLPEParameterList(output_lpe):
+    """
+    Returns the parameter list of the header of a modified LPE, or None if the LPE
+    has no such header. Only the lines up to the end of the header are read.
+    """
+    subckt_seen = False
+    with open(output_lpe, 'r') as f:
+        for line in f:
+            if line[:7].lower() == ".subckt":
+                subckt_seen = True
+            elif line.startswith(PARAMETER_LIST_MARKER):
+                return line[len(PARAMETER_LIST_MARKER):].split()
+            elif subckt_seen and not line.startswith('+'):
+                return None
+    return None
+ 
+ 
+def isLPEUpToDate(input_lpe, output_lpe, parameter_list):
+    try:
+        if os.path.getmtime(output_lpe) <= os.path.getmtime(input_lpe):
+            return False
+        return getLPEParameterList(output_lpe) == list(parameter_list)
+    except OSError:
+        return False
+ 
+ 
+def modifyLPEJob(lpe_job):
+    input_lpe, output_lpe, parameter_list = lpe_job
+    return createLPEWithParams(input_lpe, output_lpe, parameter_list)
+ 
+ 
+def modifyLPEFiles(lpe_jobs, parameter_list, jobs=1, skip_up_to_date=False):
+    """
+    Modifies the LPEs of lpe_jobs (see getLPEJobs) with jobs processes. If
+    skip_up_to_date is True, the LPEs whose output is newer than the input and was
+    written with the same parameter list are skipped.
+ 
+    Returns:
+        num_modified (int):
+            The number of LPEs that were written
+    """
+    if skip_up_to_date:
+        lpe_jobs = [x for x in lpe_jobs if not isLPEUpToDate(x[0], x[1], parameter_list)]
+    if not lpe_jobs:
+        return 0
+    tasks = [(input_lpe, output_lpe, parameter_list) for input_lpe, output_lpe in lpe_jobs]
+ 
+    if jobs > 1 and len(tasks) >= MIN_PARALLEL_LPES:
+        pool = multiprocessing.Pool(processes=jobs)
+        try:
+            pool.map(modifyLPEJob, tasks, chunksize=max(1, len(tasks) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for task in tasks:
+            modifyLPEJob(task)
+    return len(tasks)
+ 
+ 
 def getXTORsInLPE(input_lpe):
     # Grep only non-PODE MOS
     grep_cmd1 = ["bash", "-c", "grep 'ch_' %s" % input_lpe]
@@ -98,28 +295,3 @@ def formRVForXTOR(xtor, parameter_list):
     _ = [line_buff.append("%s=%s__%s" % (p, xtor, p)) for p in parameter_list]
     random_vars_line = "+ %s\n" % ' '.join(line_buff)
     return random_vars_line
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
- 
@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+sys.path.append('./')
+import modifyLPE.funcs as modifyLPE
+
+NUM_NETLISTS = 5
+PARAMETER_LIST = ("parl1", "parl2", "plo_tox", "plo_dxl", "plo_dhfin", "plo_dtfin")
+
+
+def _writeLPEs(tmp_path):
+    """
+    LPE netlists of 5 to 50 transistors, with continuation lines, commented out
+    transistors and parasitic resistors. The inputs are older than the outputs.
+    """
+    rng = random.Random(3)
+    lpe_path = str(tmp_path / "LPE_cworst_T_m25c")
+    os.makedirs(lpe_path)
+    for netlist_num in range(NUM_NETLISTS):
+        lines = ["* LPE netlist",
+                 ".SUBCKT SYNDFF%04dBWP CP D Q" % netlist_num,
+                 "+ VDD VSS"]
+        for device_num in range(rng.randint(5, 50)):
+            model = rng.choice(["nch_svt_mac", "pch_svt_mac", "nch_svt_mac_pode"])
+            lines.append("XM%s n%s n%s n%s VSS %s l=8n nfin=2" % (
+                device_num, device_num, device_num + 1, device_num + 2, model))
+            lines.append("+ sa=1e-07 sb=1e-07")
+            if rng.random() < 0.05:
+                lines.append("*XMC%s n%s n%s n%s VSS %s l=8n" % (
+                    device_num, device_num, device_num + 1, device_num + 2, model))
+            for res_num in range(3):
+                lines.append("R%s_%s n%s n%s_%s 0.1" % (device_num, res_num, device_num,
+                                                        device_num, res_num))
+        lines.append(".ENDS")
+        input_lpe = os.path.join(lpe_path, "SYNDFF%04dBWP_c.spi" % netlist_num)
+        with open(input_lpe, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.utime(input_lpe, (0, 0))
+    return lpe_path
+
+
+def _splitHeader(output_lpe):
+    # The header order of createLPEWithParamsByGrep follows a set
+    with open(output_lpe, 'r') as f:
+        lines = f.read().splitlines()
+    header = sorted(x for x in lines if "=agauss(" in x)
+    return header, [x for x in lines if "=agauss(" not in x and
+                    not x.startswith(modifyLPE.PARAMETER_LIST_MARKER)]
+
+
+def _rewriteLPEs(rewriter, lpe_jobs):
+    for input_lpe, output_lpe in lpe_jobs:
+        rewriter(input_lpe, output_lpe, list(PARAMETER_LIST))
+
+
+class TestModifyLPE:
+    def test_same_netlists_as_grep(self, tmp_path):
+        lpe_path = _writeLPEs(tmp_path)
+        grep_path = tmp_path / "by_grep"
+        grep_path.mkdir()
+        lpe_jobs = modifyLPE.getLPEJobs(lpe_path)
+        grep_jobs = modifyLPE.getLPEJobs(lpe_path, str(grep_path))
+        _rewriteLPEs(modifyLPE.createLPEWithParamsByGrep, grep_jobs)
+        _rewriteLPEs(modifyLPE.createLPEWithParams, lpe_jobs)
+        assert len(lpe_jobs) == NUM_NETLISTS
+        for (_, output_lpe), (_, grep_lpe) in zip(lpe_jobs, grep_jobs):
+            header, lines = _splitHeader(output_lpe)
+            assert header
+            assert (header, lines) == _splitHeader(grep_lpe)
+
+    def test_parameter_list_line(self, tmp_path):
+        lpe_path = _writeLPEs(tmp_path)
+        input_lpe, output_lpe = modifyLPE.getLPEJobs(lpe_path)[0]
+        modifyLPE.createLPEWithParams(input_lpe, output_lpe, list(PARAMETER_LIST))
+        assert modifyLPE.getLPEParameterList(output_lpe) == list(PARAMETER_LIST)
+        # Netlists modified by the grep rewriter have no parameter list line
+        modifyLPE.createLPEWithParamsByGrep(input_lpe, output_lpe, list(PARAMETER_LIST))
+        assert modifyLPE.getLPEParameterList(output_lpe) is None
+
+    def test_skip_up_to_date(self, tmp_path):
+        lpe_path = _writeLPEs(tmp_path)
+        lpe_jobs = modifyLPE.getLPEJobs(lpe_path)
+        parameter_list = list(PARAMETER_LIST)
+        assert modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list,
+                                        skip_up_to_date=True) == NUM_NETLISTS
+        assert modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list,
+                                        skip_up_to_date=True) == 0
+        # Without skip_up_to_date every netlist is written again
+        assert modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list) == NUM_NETLISTS
+        # A newer input
+        os.utime(lpe_jobs[0][0], None)
+        os.utime(lpe_jobs[0][1], (0, 0))
+        assert modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list,
+                                        skip_up_to_date=True) == 1
+
+    def test_rewrite_on_changed_parameter_list(self, tmp_path):
+        lpe_path = _writeLPEs(tmp_path)
+        lpe_jobs = modifyLPE.getLPEJobs(lpe_path)
+        parameter_list = list(PARAMETER_LIST)
+        modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list, jobs=2)
+        assert modifyLPE.modifyLPEFiles(lpe_jobs, parameter_list[:2], jobs=2,
+                                        skip_up_to_date=True) == NUM_NETLISTS
+        for _, output_lpe in lpe_jobs:
+            assert modifyLPE.getLPEParameterList(output_lpe) == parameter_list[:2]
@@ -0,0 +1,210 @@
+"""
+This module contains the LPE netlist metadata index.
+
+For every netlist of an LPE directory (e.g. Netlist/LPE_cworst_T_m25c) the index
+stores the subckt pin list and the transistor/pode counts, together with the file
+mtime and size. The netlists are scanned once, in parallel, and the index is kept
+in a cache file in NETLIST_INDEX_CACHE_DIR (the LPE directories of the kit are
+read-only inputs), so later corners and runs only re-scan netlists that have
+changed. SPICE info creation and CPU estimation then do in-memory lookups instead
+of re-reading the netlists (or forking grep) for every arc and table point.
+"""
+
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+
+NETLIST_INDEX_VERSION = 1
+# Kept outside of the kit, which is shared by the users and runs
+NETLIST_INDEX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".mcqc_cache")
+
+# Netlist variants, in order of preference
+NETLIST_VARIANTS = ("%s_c_qa.spi", "%s_c.spi", "%s.spi")
+
+# Below this many netlists to scan, a process pool is not worth starting
+MIN_PARALLEL_SCANS = 16
+
+_netlist_indexes = dict()
+
+
+def scanNetlistFile(netlist_path):
+    """
+    A function that reads a netlist once and extracts its metadata
+
+    Args:
+        netlist_path (str):
+            The path to the LPE netlist
+
+    Returns:
+        netlist_info (dict):
+            'pins' is the pin list of the first .subckt line (same as
+            timingArcInfo.funcs.getNetlistPinsStr), 'nxtor'/'npode' are the device
+            counts (same as runtime.funcs.getXTORandPODECounts)
+    """
+    # runtime.funcs.getXTORandPODECounts greps for the vtll devices in vtll netlists
+    mac_str = "vtll_mac" if "vtll" in netlist_path else "vt_mac"
+    subckt_header = ".subckt*"
+    netlist_pins_str = None
+    npode = 0
+    nxtor = 0
+    with open(netlist_path) as f:
+        for line in f:
+            if netlist_pins_str is None and fnmatch.fnmatch(line.lower(), subckt_header):
+                netlist_pins_str = ' '.join(line.strip().split()[2:])
+            if mac_str in line:
+                if "pode" in line:
+                    npode += 1
+                else:
+                    nxtor += 1
+
+    # An empty grep output is counted as one transistor
+    if not nxtor and not npode:
+        nxtor = 1
+
+    stat = os.stat(netlist_path)
+    return {'mtime': stat.st_mtime, 'size': stat.st_size,
+            'pins': netlist_pins_str or '', 'nxtor': nxtor, 'npode': npode}
+
+
+def getNetlistIndexFile(root_netlist_path):
+    """
+    Returns the index file of the LPE directory in NETLIST_INDEX_CACHE_DIR.
+    """
+    root_netlist_path = os.path.abspath(root_netlist_path)
+    path_hash = hashlib.sha1(root_netlist_path.encode()).hexdigest()[:16]
+    return os.path.join(NETLIST_INDEX_CACHE_DIR, "netlist_index_%s.json" % path_hash)
+
+
+class NetlistIndex(object):
+    """
+    The metadata index of one LPE netlist directory.
+    """
+
+    def __init__(self, root_netlist_path, index_file=None):
+        self.root_netlist_path = root_netlist_path
+        self.index_file = index_file or getNetlistIndexFile(root_netlist_path)
+        self._names = None
+        self._entries = dict()
+        self._checked = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                index_data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        # The index of another LPE directory with the same path hash
+        root_netlist_path = os.path.abspath(self.root_netlist_path)
+        if index_data.get('version') != NETLIST_INDEX_VERSION or \
+                index_data.get('root_netlist_path') != root_netlist_path:
+            return
+        self._entries = index_data.get('netlists', dict())
+
+    def save(self):
+        index_data = {'version': NETLIST_INDEX_VERSION,
+                      'root_netlist_path': os.path.abspath(self.root_netlist_path),
+                      'netlists': self._entries}
+        tmp_file = "%s.%s.tmp" % (self.index_file, os.getpid())
+        try:
+            index_dir = os.path.dirname(self.index_file)
+            if not os.path.isdir(index_dir):
+                os.makedirs(index_dir, exist_ok=True)
+            with open(tmp_file, 'w') as f:
+                json.dump(index_data, f)
+            os.replace(tmp_file, self.index_file)
+        except (IOError, OSError) as e:
+            print("WARNING:\t Could not write netlist index %s (%s)" % (self.index_file, e))
+
+    def names(self):
+        if self._names is None:
+            try:
+                self._names = frozenset(os.listdir(self.root_netlist_path))
+            except OSError:
+                self._names = frozenset()
+        return self._names
+
+    def resolvePath(self, cell_name):
+        """
+        Same as timingArcInfo.funcs.getNetlistPath, from a single directory listing.
+        """
+        names = self.names()
+        for variant in NETLIST_VARIANTS:
+            if variant % cell_name in names:
+                return os.path.join(self.root_netlist_path, variant % cell_name)
+        return os.path.join(self.root_netlist_path, NETLIST_VARIANTS[-1] % cell_name)
+
+    def update(self, netlist_paths, jobs=None):
+        """
+        Makes sure the given netlists are indexed, re-scanning (in parallel) the ones
+        that are new or whose mtime/size changed, and saves the index if needed.
+        Netlists are only checked once per process.
+        """
+        to_scan = list()
+        for netlist_path in netlist_paths:
+            name = os.path.basename(netlist_path)
+            if name in self._checked:
+                continue
+            self._checked.add(name)
+            try:
+                stat = os.stat(netlist_path)
+            except OSError:
+                # Missing netlists fail when they are looked up, like before
+                self._entries.pop(name, None)
+                continue
+            entry = self._entries.get(name)
+            if entry is None or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                to_scan.append(netlist_path)
+
+        if not to_scan:
+            return
+
+        if jobs is None:
+            # Workers of a pool (e.g. batchRunMonteCarlo --jobs) cannot start a pool
+            jobs = 1 if multiprocessing.current_process().daemon else \
+                min(8, multiprocessing.cpu_count())
+        if jobs > 1 and len(to_scan) >= MIN_PARALLEL_SCANS:
+            print("INFO:\t Indexing %s netlists in %s with %s processes." % (
+                len(to_scan), self.root_netlist_path, jobs))
+            pool = multiprocessing.Pool(processes=jobs)
+            try:
+                results = pool.map(scanNetlistFile, to_scan,
+                                   chunksize=max(1, len(to_scan) // (jobs * 4)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [scanNetlistFile(netlist_path) for netlist_path in to_scan]
+
+        for netlist_path, netlist_info in zip(to_scan, results):
+            self._entries[os.path.basename(netlist_path)] = netlist_info
+        self.save()
+
+    def getInfo(self, netlist_path):
+        name = os.path.basename(netlist_path)
+        if name not in self._entries or name not in self._checked:
+            self.update([netlist_path], jobs=1)
+        try:
+            return self._entries[name]
+        except KeyError:
+            # Not there: scanning raises the same error as reading the netlist did
+            return scanNetlistFile(netlist_path)
+
+    def getPinsStr(self, netlist_path):
+        return self.getInfo(netlist_path)['pins']
+
+    def getDeviceCounts(self, netlist_path):
+        netlist_info = self.getInfo(netlist_path)
+        return netlist_info['nxtor'], netlist_info['npode']
+
+
+def getNetlistIndex(root_netlist_path):
+    """
+    Returns the (per process) NetlistIndex of an LPE netlist directory.
+    """
+    key = os.path.abspath(root_netlist_path)
+    if key not in _netlist_indexes:
+        _netlist_indexes[key] = NetlistIndex(root_netlist_path)
+    return _netlist_indexes[key]
@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+sys.path.append('./')
+import netlistIndex.funcs as netlistIndex
+import runtime.funcs as runtimeEstimate
+import timingArcInfo.funcs as timingArcInfo
+
+# The netlist variants of every cell
+CELL_VARIANTS = {
+    "SYNDFF0BWP": ("%s_c_qa.spi", "%s_c.spi", "%s.spi"),
+    "SYNDFF1BWP": ("%s_c.spi", "%s.spi"),
+    "SYNDFF2BWP": ("%s.spi",),
+    "SYNDFF3BWP": ("%s_c_qa.spi", "%s.spi"),
+    "SYNDFF4BWP": (),
+}
+
+
+def _writeNetlists(tmp_path):
+    rng = random.Random(5)
+    root_netlist_path = tmp_path / "LPE_cworst_T_m25c"
+    root_netlist_path.mkdir()
+    for cell_name, variants in CELL_VARIANTS.items():
+        for variant in variants:
+            lines = ["* LPE netlist", ".SUBCKT %s CP D Q VDD VSS" % cell_name]
+            for device_num in range(rng.randint(1, 30)):
+                model = rng.choice(["nch_svt_mac", "pch_ulvt_mac", "nch_svt_mac_pode"])
+                lines.append("XM%s n%s n%s VSS VSS %s l=8n" % (device_num, device_num,
+                                                               device_num + 1, model))
+            lines.append(".ENDS")
+            (root_netlist_path / (variant % cell_name)).write_text('\n'.join(lines) + '\n')
+    return str(root_netlist_path)
+
+
+class TestNetlistIndex:
+    def test_same_netlists_as_the_lookup(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(netlistIndex, "NETLIST_INDEX_CACHE_DIR",
+                            str(tmp_path / "cache"))
+        root_netlist_path = _writeNetlists(tmp_path)
+        netlist_index = netlistIndex.NetlistIndex(root_netlist_path)
+        for cell_name, variants in CELL_VARIANTS.items():
+            netlist_path = netlist_index.resolvePath(cell_name)
+            assert netlist_path == timingArcInfo.getNetlistPath(root_netlist_path, cell_name)
+            if not variants:
+                continue
+            assert netlist_index.getPinsStr(netlist_path) == \
+                timingArcInfo.getNetlistPinsStr(netlist_path)
+            assert netlist_index.getDeviceCounts(netlist_path) == \
+                runtimeEstimate.getXTORandPODECounts(netlist_path)
+
+    def test_index_file_outside_of_the_netlists(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(netlistIndex, "NETLIST_INDEX_CACHE_DIR",
+                            str(tmp_path / "cache"))
+        root_netlist_path = _writeNetlists(tmp_path)
+        netlist_names = sorted(os.listdir(root_netlist_path))
+        netlist_index = netlistIndex.NetlistIndex(root_netlist_path)
+        netlist_index.update([netlist_index.resolvePath(x) for x in CELL_VARIANTS])
+        assert sorted(os.listdir(root_netlist_path)) == netlist_names
+        assert os.path.exists(netlist_index.index_file)
+        assert os.path.dirname(netlist_index.index_file) == str(tmp_path / "cache")
+
+        # A new index reads the index file, and scans the netlists that changed
+        netlist_path = netlist_index.resolvePath("SYNDFF0BWP")
+        with open(netlist_path, 'a') as f:
+            f.write("XM99 n1 n2 VSS VSS nch_svt_mac l=8n\n")
+        netlist_index = netlistIndex.NetlistIndex(root_netlist_path)
+        assert netlist_index.getDeviceCounts(netlist_path) == \
+            runtimeEstimate.getXTORandPODECounts(netlist_path)
@@ -3,6 +3,7 @@ import re
  
 from qaTemplateMaker.classes import ArcInfo
 from qaTemplateMaker.chartcl_condition import generate_char_path, parse_condition_load, read_chartcl
+from chartcl_helper.model import get_chartcl_model
 import templateFileMap.funcs as templateFileMap
  
  
@@ -215,7 +216,8 @@ def getProbePinsStr(probe_list):
  
  
 def getQAArcCharacteristics(template_info, valid_arc_types, cell_pattern_list,
-                            template_type, chartcl_file, max_num_when=1):
+                            template_type, chartcl_file, max_num_when=1,
+                            chartcl_model=None):
     """
     A function that extracts the arc characteristics from the template information
     dictionary.
@@ -229,11 +231,15 @@ def getQAArcCharacteristics(template_info, valid_arc_types, cell_pattern_list,
         QA for.
         max_num_when (int, default=1): An integer representing the maximum number of
         when conditions to store for different types of arcs
+        chartcl_model (chartcl_helper.model.ChartclModel, default=None): The parsed
+        chartcl shared by the run; parsed from chartcl_file if not given
     Returns:
         arc_characteristics (dict): The dictionary which stores all of the
         characteristics for the arcs we want to do MC QA for
         num_arcs_identified (int): The number of arcs we were able to identify/understand
     """
+    if chartcl_model is None:
+        chartcl_model = get_chartcl_model(chartcl_file)
     num_arcs_identified = 0
     arc_list = list()
     for cell_obj in template_info.getAllCells():
@@ -265,7 +271,8 @@ def getQAArcCharacteristics(template_info, valid_arc_types, cell_pattern_list,
  
             # Get load
             output_load = getCellOutputLoad(
-                template_info, cell_obj, arc_obj, chartcl_file)
+                template_info, cell_obj, arc_obj, chartcl_file,
+                chartcl_model=chartcl_model)
  
             # Get the attributes/conditions
             pin, rel_pin, log_when, probe_list, vector = getArcAttributes(
@@ -486,7 +493,8 @@ def getCellOutputPinlist(cell_obj):
     return cell_obj.output().split()
  
  
-def getCellOutputLoad(template_info, cell_obj, arc_obj, chartcl_file, load_index=2):
+def getCellOutputLoad(template_info, cell_obj, arc_obj, chartcl_file, load_index=2,
+                      chartcl_model=None):
     """
     A function that queries the TemplateInfo data structure to get the input
     cell's output load, defaulting to the 3rd entry in the list, as it is defined in
@@ -503,6 +511,8 @@ def getCellOutputLoad(template_info, cell_obj, arc_obj, chartcl_file, load_index
         arc_obj (charTemplateParser.classes.Arc): The data structure storing the
         define_arc data
         load_index (int): The Python list entry of the output load to use (default = 2)
+        chartcl_model (chartcl_helper.model.ChartclModel): The parsed chartcl; its
+        per-cell output load overrides replace load_index
     Returns:
         output_load (str): The output load of cell_name
     Examples:
@@ -518,17 +528,13 @@ def getCellOutputLoad(template_info, cell_obj, arc_obj, chartcl_file, load_index
         _, index_2, index_3 = getIndexEntriesForArc(
             arc_obj, cell_obj, template_info, arc_type="delay")
 #    _, index_2 = getIndexEntriesForArc(arc_obj, cell_obj, template_info,arc_type="delay")
-    chartcl_content = read_chartcl(chartcl_file)
+    if chartcl_model is None:
+        chartcl_model = get_chartcl_model(chartcl_file)
  
     # latch cell need change output load
 #    print("Cell OBJ %s" % cell_obj.name())
 #    print("ARC %s" %  arc_obj.type())
-    output_load_change = parse_condition_load(chartcl_content)
- 
-    for bpat in output_load_change:
-        if cell_obj.name() == bpat[0]:
-            load_index = int(bpat[1])
-            break
+    load_index = chartcl_model.get_output_load_index(cell_obj.name(), load_index)
  
     # Get the load; default output load is 'index_2'. if constraint table is 3D table, output load is index_3
     output_load = []
@@ -1,6 +1,12 @@
+import collections
 import datetime
 import fnmatch
+import functools
+import hashlib
+import math
+import multiprocessing
 import os
+import shutil
 import sys
 sys.path.insert(0, os.path.split(__file__)[0])  # noqa
 import json
@@ -12,9 +18,20 @@ import spiceDeckMaker.funcs as spiceDeckMaker
 import timingArcInfo.funcs as timingArcInfo
 import charTemplateParser.funcs as templateParser
 import runtime.funcs as runtimeEstimate
-import hybrid_char_helper
+import netlistIndex.funcs as netlistIndex
  
-from chartcl_helper.parser import ChartclParser
+from chartcl_helper.model import get_chartcl_model
+ 
+# Chunks handed out per process in --jobs mode (keeps the pool balanced)
+CHUNKS_PER_JOB = 4
+ 
+# Manifest of the deck directories of a DECKS directory. It is hidden so that the
+# DECKS/* globs of the postprocessing only see deck directories.
+DECKS_MANIFEST_FILE = ".decks_manifest.json"
+DECKS_MANIFEST_VERSION = 1
+# arc_info fields that are filled in while (or after) rendering, not rendered from
+DECK_HASH_SKIP_FIELDS = ('DONT_TOUCH_PINS', 'APPROXIMATE_EFFORT', 'LB_REQ_CPUS',
+                         'UB_REQ_CPUS')
  
  
 def dump_ref(dic, name):
@@ -40,26 +57,21 @@ def templateParsing(user_options):
     # Template parsing
     print("Parsing template file")
     template_file = user_options['TEMPLATE_FILE']
-    template_info = templateParser.parseTemplateFile(template_file)
+    # No parse cache unless the flow sets one up (see scld__mcqc --no_template_cache)
+    template_info = templateParser.parseTemplateFile(
+        template_file, cache_dir=user_options.get('TEMPLATE_CACHE_DIR'))
     return template_info
  
  
 def chartcl_parsing(user_options):
     print("Parsing chartcl file")
     chartcl_file = user_options['CHARTCL_FILE']
-    chartcl_parser = ChartclParser(chartcl_file)
-    chartcl_parser.parse_set_var()
-    chartcl_parser.parse_condition_glitch()
-    chartcl_parser.parse_condition_load()
-    chartcl_parser.parse_condition_delay_degrade()
-    chartcl_parser.parse_amd_smc_degrade()
-    chartcl_parser.parse_amd_glitch_high_threshold()
-    chartcl_parser.set_cells = hybrid_char_helper.parse_chartcl_for_cells(
-        chartcl_file)
-    return chartcl_parser
- 
- 
-def arcExtraction(user_options, template_info):
+    # Parsed once and shared (read-only) by arc extraction and SPICE info creation
+    chartcl_model = get_chartcl_model(chartcl_file)
+    return chartcl_model
+ 
+ 
+def arcExtraction(user_options, template_info, chartcl_model=None):
     # Arc extraction and QA Template creation
     print("Extracting arcs")
     valid_arc_types = user_options['VALID_ARC_TYPES_LIST']
@@ -69,7 +81,8 @@ def arcExtraction(user_options, template_info):
     chartcl_file = user_options['CHARTCL_FILE']
     qa_arcs, num_arcs_identified = createQATemplate.getQAArcCharacteristics(
         template_info, valid_arc_types, cell_pattern_list,
-        template_deck_type, max_num_when=max_num_when, chartcl_file=chartcl_file)
+        template_deck_type, max_num_when=max_num_when, chartcl_file=chartcl_file,
+        chartcl_model=chartcl_model)
     return qa_arcs
  
  
@@ -140,7 +153,11 @@ def getOutputPathName(arc_info, table_point):
     return output_deck_name
  
  
-def createNominalSpiceDeck(arc_info, table_point, template_deck_path, root_output_path, name='nominal_sim.sp'):
+def renderNominalSpiceDeck(arc_info, template_deck_path, name='nominal_sim.sp'):
+    """
+    Returns the buffer of the nominal (or VDD/VSS nominal) deck of an arc, without
+    writing it. DONT_TOUCH_PINS is stored in arc_info.
+    """
     template_deck_name = arc_info['TEMPLATE_DECK']
     template_deck = os.path.join(template_deck_path, template_deck_name)
     dt_pin_list = spiceDeckMaker.getDontTouchPins(template_deck)
@@ -171,6 +188,12 @@ def createNominalSpiceDeck(arc_info, table_point, template_deck_path, root_outpu
             nominal_buffer = vcp_helper.replace_template_deck_name(
                 nominal_buffer, template_deck_name, '_Vdd.sp')
  
+    return nominal_buffer
+ 
+ 
+def createNominalSpiceDeck(arc_info, table_point, template_deck_path, root_output_path, name='nominal_sim.sp'):
+    nominal_buffer = renderNominalSpiceDeck(arc_info, template_deck_path, name)
+ 
     output_pathname = getOutputPathName(arc_info, table_point)
     output_path = os.path.join(root_output_path, output_pathname)
     createPath(output_path)
@@ -180,7 +203,7 @@ def createNominalSpiceDeck(arc_info, table_point, template_deck_path, root_outpu
     return nominal_buffer, output_path
  
  
-def createMCSpiceDeckFromNominalBuffer(nominal_buffer, output_path, num_samples):
+def getMCSpiceDeckBuffer(nominal_buffer, num_samples):
     mc_buffer = list()
     for line in nominal_buffer:
         if fnmatch.fnmatch(line, ".tran *"):
@@ -191,7 +214,11 @@ def createMCSpiceDeckFromNominalBuffer(nominal_buffer, output_path, num_samples)
             mc_buffer.append(newline)
         else:
             mc_buffer.append(line)
+    return mc_buffer
  
+ 
+def createMCSpiceDeckFromNominalBuffer(nominal_buffer, output_path, num_samples):
+    mc_buffer = getMCSpiceDeckBuffer(nominal_buffer, num_samples)
     mc_deck = os.path.join(output_path, "mc_sim.sp")
     spiceDeckMaker.writeFile(mc_buffer, mc_deck)
     #print("Wrote MC spice deck to %s" % mc_deck)
@@ -199,7 +226,8 @@ def createMCSpiceDeckFromNominalBuffer(nominal_buffer, output_path, num_samples)
  
 def createPath(mypath):
     if not os.path.exists(mypath):
-        os.makedirs(mypath)
+        # Directories may be created concurrently in --jobs mode
+        os.makedirs(mypath, exist_ok=True)
         #print("Created path at %s" % mypath)
  
  
@@ -227,6 +255,19 @@ def applyArcFilter(spice_info, arc_filter):
 def getCPUEstimate(spice_info):
     min_effort = 1e99
     deck_counter = 0
+ 
+    # Device counts come from the netlist index, scanned once per netlist directory
+    netlist_paths = dict()
+    for table_point in spice_info:
+        for arc_num in spice_info[table_point]:
+            arc_info = spice_info[table_point][arc_num]
+            if arc_info['VALID_ARC'] is not False:
+                netlist_path = arc_info['NETLIST_PATH']
+                netlist_paths.setdefault(os.path.dirname(netlist_path), set()).add(netlist_path)
+    for root_netlist_path in netlist_paths:
+        netlistIndex.getNetlistIndex(root_netlist_path).update(
+            sorted(netlist_paths[root_netlist_path]))
+ 
     for table_point in spice_info:
         for arc_num in spice_info[table_point]:
             arc_info = spice_info[table_point][arc_num]
@@ -234,8 +275,9 @@ def getCPUEstimate(spice_info):
                 print("Filtered arc")
                 continue
  
-            nxtor, _ = runtimeEstimate.getXTORandPODECounts(
-                arc_info['NETLIST_PATH'])
+            netlist_path = arc_info['NETLIST_PATH']
+            nxtor, _ = netlistIndex.getNetlistIndex(
+                os.path.dirname(netlist_path)).getDeviceCounts(netlist_path)
             current_effort = runtimeEstimate.getApproxEffort(nxtor)
  
             arc_info['APPROXIMATE_EFFORT'] = current_effort
@@ -249,34 +291,359 @@ def getCPUEstimate(spice_info):
     return lb_req_cpus, ub_req_cpus, min_effort
  
  
+def renderArcSpiceDecks(arc_info, template_deck_path, num_samples, template_deck_type):
+    """
+    Renders the decks of one arc without writing them.
+ 
+    Returns:
+        deck_buffers (OrderedDict):
+            The buffer of every deck file name, in write order
+    """
+    deck_buffers = collections.OrderedDict()
+    nominal_buffer = renderNominalSpiceDeck(arc_info, template_deck_path)
+    deck_buffers['nominal_sim.sp'] = nominal_buffer
+    template_deck_name = arc_info['TEMPLATE_DECK']
+    pmc_template_deck_path = vcp_helper.decide_pmc_template_deck_path(
+        template_deck_path)
+    if template_deck_name in vcp_helper.VCP_DECK:
+        for name in ('VDD_nominal_sim.sp', 'VSS_nominal_sim.sp'):
+            deck_buffers[name] = renderNominalSpiceDeck(arc_info, pmc_template_deck_path,
+                                                        name)
+    if template_deck_type.upper() != "THANOS":
+        deck_buffers['mc_sim.sp'] = getMCSpiceDeckBuffer(nominal_buffer, num_samples)
+    return deck_buffers
+ 
+ 
+def writeDeckBuffers(deck_buffers, output_path):
+    createPath(output_path)
+    for name, deck_buffer in deck_buffers.items():
+        spiceDeckMaker.writeFile(deck_buffer, os.path.join(output_path, name))
+ 
+ 
+def createArcSpiceDecks(arc_info, table_point, template_deck_path, root_output_path,
+                        num_samples, template_deck_type):
+    deck_buffers = renderArcSpiceDecks(arc_info, template_deck_path, num_samples,
+                                       template_deck_type)
+    output_path = os.path.join(root_output_path, getOutputPathName(arc_info, table_point))
+    writeDeckBuffers(deck_buffers, output_path)
+ 
+ 
+@functools.lru_cache(maxsize=None)
+def getTemplateDeckSignature(template_deck_path, template_deck_name):
+    """
+    Returns the (path, mtime, size) of the template decks an arc can be rendered from
+    (including the VDD/VSS decks of the PMC template path); missing files are left
+    out.
+    """
+    template_decks = [os.path.join(template_deck_path, template_deck_name)]
+    if template_deck_name in vcp_helper.VCP_DECK:
+        pmc_template_deck = os.path.join(
+            vcp_helper.decide_pmc_template_deck_path(template_deck_path),
+            template_deck_name)
+        template_decks.extend([pmc_template_deck,
+                               pmc_template_deck.replace('.sp', '_Vdd.sp'),
+                               pmc_template_deck.replace('.sp', '_Vss.sp')])
+    signature = list()
+    for template_deck in template_decks:
+        try:
+            stat = os.stat(template_deck)
+        except OSError:
+            continue
+        signature.append((template_deck, stat.st_mtime, stat.st_size))
+    return tuple(signature)
+ 
+ 
+def getDeckInputHash(deck_arcs, template_deck_path, num_samples, template_deck_type):
+    """
+    Returns the hash of everything the decks of a deck directory are rendered from:
+    the arc_info fields of its arcs, in write order (these include the include and
+    waveform file paths), their template decks and the deck settings.
+    """
+    input_hash = hashlib.sha1()
+    input_hash.update(json.dumps([DECKS_MANIFEST_VERSION, os.path.abspath(template_deck_path),
+                                  str(num_samples), template_deck_type.upper()]).encode())
+    for table_point, arc_info in deck_arcs:
+        arc_fields = dict((key, value) for key, value in arc_info.items()
+                          if key not in DECK_HASH_SKIP_FIELDS)
+        input_hash.update(json.dumps(
+            [table_point, arc_fields,
+             getTemplateDeckSignature(template_deck_path, arc_info['TEMPLATE_DECK'])],
+            sort_keys=True, default=str).encode())
+    return input_hash.hexdigest()
+ 
+ 
+def getDeckContentHash(deck_buffers):
+    content_hash = hashlib.sha1()
+    for name in sorted(deck_buffers):
+        content_hash.update(name.encode())
+        content_hash.update(''.join(deck_buffers[name]).encode())
+    return content_hash.hexdigest()
+ 
+ 
+def deckFilesExist(output_path, deck_files):
+    return all(os.path.isfile(os.path.join(output_path, name)) for name in deck_files)
+ 
+ 
+def createDeckDirectory(output_pathname, deck_arcs, template_deck_path, root_output_path,
+                        num_samples, template_deck_type, manifest_entry=None,
+                        incremental=False):
+    """
+    Writes the decks of one deck directory. deck_arcs are the (table_point, arc_info)
+    pairs writing to it, in their original order, so the last writer wins like in
+    the serial loop.
+ 
+    With the manifest_entry of the previous run and incremental set, the decks are
+    only rendered if their input hash changed, and only written if their content
+    hash changed, so unchanged decks (and the results next to them) keep their mtime.
+ 
+    Returns:
+        status (str):
+            'added', 'changed' or 'unchanged' compared to manifest_entry
+        entry (dict):
+            The new manifest entry: 'input_hash', 'content_hash', 'files' and the
+            'dont_touch_pins' of every arc
+    """
+    output_path = os.path.join(root_output_path, output_pathname)
+    input_hash = getDeckInputHash(deck_arcs, template_deck_path, num_samples,
+                                  template_deck_type)
+    if incremental and manifest_entry is not None and \
+            manifest_entry['input_hash'] == input_hash and \
+            len(manifest_entry['dont_touch_pins']) == len(deck_arcs) and \
+            deckFilesExist(output_path, manifest_entry['files']):
+        for (_, arc_info), dt_pin_list in zip(deck_arcs, manifest_entry['dont_touch_pins']):
+            arc_info['DONT_TOUCH_PINS'] = dt_pin_list
+        return 'unchanged', manifest_entry
+ 
+    deck_buffers = collections.OrderedDict()
+    dont_touch_pins = list()
+    for _, arc_info in deck_arcs:
+        deck_buffers.update(renderArcSpiceDecks(arc_info, template_deck_path, num_samples,
+                                                template_deck_type))
+        dont_touch_pins.append(arc_info['DONT_TOUCH_PINS'])
+    entry = {'input_hash': input_hash,
+             'content_hash': getDeckContentHash(deck_buffers),
+             'files': sorted(deck_buffers),
+             'dont_touch_pins': dont_touch_pins}
+ 
+    if manifest_entry is None:
+        status = 'added'
+    elif manifest_entry['content_hash'] == entry['content_hash']:
+        status = 'unchanged'
+        if incremental and deckFilesExist(output_path, entry['files']):
+            return status, entry
+    else:
+        status = 'changed'
+    writeDeckBuffers(deck_buffers, output_path)
+    return status, entry
+ 
+ 
+def createDeckDirectoryChunk(chunk, template_deck_path, root_output_path, num_samples,
+                             template_deck_type, incremental=False):
+    """
+    Worker of the --jobs mode: writes the deck directories of a chunk of
+    (output_pathname, deck_arcs, manifest_entry) items and returns their
+    (status, entry), in chunk order.
+    """
+    results = list()
+    for output_pathname, deck_arcs, manifest_entry in chunk:
+        results.append(createDeckDirectory(output_pathname, deck_arcs, template_deck_path,
+                                           root_output_path, num_samples,
+                                           template_deck_type, manifest_entry=manifest_entry,
+                                           incremental=incremental))
+    return results
+ 
+ 
+def getDeckDirectories(deck_jobs):
+    """
+    Groups the (table_point, arc_info) pairs by the deck directory they write to, in
+    their original order.
+    """
+    deck_dirs = collections.OrderedDict()
+    for table_point, arc_info in deck_jobs:
+        output_pathname = getOutputPathName(arc_info, table_point)
+        deck_dirs.setdefault(output_pathname, list()).append((table_point, arc_info))
+    return deck_dirs
+ 
+ 
+def getDeckChunks(deck_items, num_chunks):
+    """
+    Splits the deck directory items into about num_chunks chunks of about the same
+    number of arcs. The arcs of a deck directory always stay in the same chunk.
+    """
+    num_arcs = sum(len(deck_arcs) for _, deck_arcs, _ in deck_items)
+    chunk_size = max(1, int(math.ceil(num_arcs / float(max(1, num_chunks)))))
+    chunks = list()
+    current_chunk = list()
+    current_size = 0
+    for deck_item in deck_items:
+        current_chunk.append(deck_item)
+        current_size += len(deck_item[1])
+        if current_size >= chunk_size:
+            chunks.append(current_chunk)
+            current_chunk = list()
+            current_size = 0
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+ 
+ 
+def createDeckDirectoriesParallel(deck_items, template_deck_path, root_output_path,
+                                  num_samples, template_deck_type, jobs, incremental=False):
+    """
+    Shards the deck directories over a pool of jobs processes. Each worker receives
+    its chunk of arc_info dicts in one pickle and writes its output directories
+    independently; the decks are identical to the ones of the serial loop.
+    """
+    chunks = getDeckChunks(deck_items, jobs * CHUNKS_PER_JOB)
+    worker = functools.partial(createDeckDirectoryChunk,
+                               template_deck_path=template_deck_path,
+                               root_output_path=root_output_path,
+                               num_samples=num_samples,
+                               template_deck_type=template_deck_type,
+                               incremental=incremental)
+    pool = multiprocessing.Pool(processes=jobs)
+    try:
+        chunk_results = pool.map(worker, chunks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+ 
+    # The workers only filled in copies of the arc_info dicts
+    results = list()
+    for chunk_result in chunk_results:
+        for status, entry in chunk_result:
+            results.append((status, entry))
+    for (_, deck_arcs, _), (_, entry) in zip(deck_items, results):
+        for (_, arc_info), dt_pin_list in zip(deck_arcs, entry['dont_touch_pins']):
+            arc_info['DONT_TOUCH_PINS'] = dt_pin_list
+    return results
+ 
+ 
+def getDecksManifestFile(root_output_path):
+    return os.path.join(root_output_path, DECKS_MANIFEST_FILE)
+ 
+ 
+def loadDecksManifest(root_output_path):
+    """
+    Returns the deck directory entries of the manifest of the previous run (empty
+    if there is none or it is from another manifest version).
+    """
+    try:
+        with open(getDecksManifestFile(root_output_path), 'r') as f:
+            manifest_data = json.load(f)
+    except (IOError, OSError, ValueError):
+        return dict()
+    if manifest_data.get('version') != DECKS_MANIFEST_VERSION:
+        return dict()
+    return manifest_data.get('decks', dict())
+ 
+ 
+def writeDecksManifest(root_output_path, decks):
+    manifest_file = getDecksManifestFile(root_output_path)
+    tmp_file = "%s.%s.tmp" % (manifest_file, os.getpid())
+    try:
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': DECKS_MANIFEST_VERSION, 'decks': decks}, f,
+                      sort_keys=True)
+        os.replace(tmp_file, manifest_file)
+    except (IOError, OSError) as e:
+        print("WARNING:\t Could not write the deck manifest %s (%s)" % (manifest_file, e))
+ 
+ 
+def getOrphanedDeckDirectories(root_output_path, old_decks, deck_dirs):
+    """
+    Returns the deck directories of the manifest of the previous run (old_decks)
+    that are not generated anymore. Only these are removed by remove_orphans.
+    """
+    return sorted(name for name in old_decks if name not in deck_dirs and
+                  os.path.isdir(os.path.join(root_output_path, name)))
+ 
+ 
+def getUnlistedDeckDirectories(root_output_path, old_decks, deck_dirs):
+    """
+    Returns the other directories of root_output_path with a nominal_sim.sp that are
+    neither generated nor in the manifest of the previous run. They are only reported.
+    """
+    try:
+        names = os.listdir(root_output_path)
+    except OSError:
+        names = list()
+    return sorted(name for name in names
+                  if not name.startswith('.') and name not in deck_dirs and
+                  name not in old_decks and
+                  os.path.isfile(os.path.join(root_output_path, name, 'nominal_sim.sp')))
+ 
+ 
 def createSPICEdecks(spice_info, template_deck_path, root_output_path, num_samples,
-                     template_deck_type):
-    count = 0
+                     template_deck_type, jobs=1, incremental=False, remove_orphans=False):
+    """
+    Writes the nominal (and VDD/VSS, MC) SPICE decks of every valid arc in spice_info
+    and the deck manifest of root_output_path (DECKS_MANIFEST_FILE), which holds the
+    input and content hash of every deck directory.
+ 
+    Args:
+        jobs (int):
+            Number of processes writing decks. Default is 1 (serial)
+        incremental (bool):
+            Only render the deck directories whose inputs changed since the run of
+            the manifest, and only write the ones whose content changed.
+            Default is False (render and write all decks)
+        remove_orphans (bool):
+            Delete the deck directories of the manifest that are not generated
+            anymore. Default is False (only report them). Deck directories that are
+            not in the manifest are never deleted.
+ 
+    Returns:
+        count (int):
+            The number of arcs SPICE decks were created for
+    """
+    deck_jobs = list()
     for table_point in spice_info:
         for arc_num in spice_info[table_point]:
             arc_info = spice_info[table_point][arc_num]
             if arc_info['VALID_ARC'] is False:
                 print("Filtered arc")
                 continue
-            nominal_buffer, output_path = createNominalSpiceDeck(arc_info,
-                                                                 table_point,
-                                                                 template_deck_path,
-                                                                 root_output_path)
-            template_deck_name = arc_info['TEMPLATE_DECK']
-            pmc_template_deck_path = vcp_helper.decide_pmc_template_deck_path(
-                template_deck_path)
-            if template_deck_name in vcp_helper.VCP_DECK:
-                createNominalSpiceDeck(
-                    arc_info, table_point, pmc_template_deck_path, root_output_path, 'VDD_nominal_sim.sp')
-                createNominalSpiceDeck(
-                    arc_info, table_point, pmc_template_deck_path, root_output_path, 'VSS_nominal_sim.sp')
-            count += 1
-            if template_deck_type.upper() == "THANOS":
-                continue
- 
-            createMCSpiceDeckFromNominalBuffer(
-                nominal_buffer, output_path, num_samples)
-    return count
+            deck_jobs.append((table_point, arc_info))
+ 
+    old_decks = loadDecksManifest(root_output_path)
+    deck_dirs = getDeckDirectories(deck_jobs)
+    deck_items = [(output_pathname, deck_arcs, old_decks.get(output_pathname))
+                  for output_pathname, deck_arcs in deck_dirs.items()]
+ 
+    if jobs > 1 and len(deck_items) > 1:
+        print("INFO:\t Writing SPICE decks for %s arcs with %s processes." % (
+            len(deck_jobs), jobs))
+        results = createDeckDirectoriesParallel(deck_items, template_deck_path,
+                                                root_output_path, num_samples,
+                                                template_deck_type, jobs,
+                                                incremental=incremental)
+    else:
+        results = [createDeckDirectory(output_pathname, deck_arcs, template_deck_path,
+                                       root_output_path, num_samples, template_deck_type,
+                                       manifest_entry=manifest_entry,
+                                       incremental=incremental)
+                   for output_pathname, deck_arcs, manifest_entry in deck_items]
+ 
+    status_counts = collections.Counter(status for status, _ in results)
+    orphans = getOrphanedDeckDirectories(root_output_path, old_decks, deck_dirs)
+    unlisted = getUnlistedDeckDirectories(root_output_path, old_decks, deck_dirs)
+    if remove_orphans:
+        for name in orphans:
+            shutil.rmtree(os.path.join(root_output_path, name))
+ 
+    createPath(root_output_path)
+    writeDecksManifest(root_output_path, dict(
+        (output_pathname, entry) for (output_pathname, _, _), (_, entry)
+        in zip(deck_items, results)))
+ 
+    print("INFO:\t Deck directories: %s added, %s changed, %s unchanged, %s %s." % (
+        status_counts['added'], status_counts['changed'], status_counts['unchanged'],
+        len(orphans), "removed" if remove_orphans else "orphaned (not removed)"))
+    if unlisted:
+        print("WARNING:\t %s deck directories not in the manifest (not removed): %s" % (
+            len(unlisted), ", ".join(unlisted)))
+    return len(deck_jobs)
  
  
 def main(user_options):
@@ -292,8 +659,8 @@ def main(user_options):
     start = datetime.datetime.now()
     chartcl_cells = chartcl_parser.set_cells
     if len(chartcl_cells) != 0:
-        template_info._tcl_vars['cells'] = chartcl_cells
-    qa_arcs = arcExtraction(user_options, template_info)
+        template_info._tcl_vars['cells'] = list(chartcl_cells)
+    qa_arcs = arcExtraction(user_options, template_info, chartcl_parser)
     print("takes {time} s".format(time=datetime.datetime.now() - start))
     spice_info = spiceInfoCreation(user_options, qa_arcs, chartcl_parser, template_info)
     arc_filter = arcFilters.createFilterFromCSVFile(arc_csv_filter_file)
@@ -313,11 +680,14 @@ def main(user_options):
         num_samples = user_options['NUM_SAMPLES']
         template_deck_path = user_options['TEMPLATE_DECK_PATH']
         template_deck_type = user_options['SPICE_DECK_FORMAT']
+        num_jobs = int(user_options.get('NUM_JOBS', 1))
+        incremental = user_options.get('INCREMENTAL', False)
+        remove_orphans = user_options.get('REMOVE_ORPHANS', False)
         print("Creating SPICE decks")
  
         count = createSPICEdecks(spice_info, template_deck_path, root_output_path,
-                                 num_samples, template_deck_type)
+                                 num_samples, template_deck_type, jobs=num_jobs,
+                                 incremental=incremental, remove_orphans=remove_orphans)
         print("Created %s paths with SPICE decks." % count)
  
     return spice_info
- 
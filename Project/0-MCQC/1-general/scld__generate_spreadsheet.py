@@ -13,7 +13,7 @@ from timingArcInfo.funcs import convertLitWhenToLogWhen
  
 class MCData(object):
     def __init__(self, stat_file, arc_type, cell, pin, pin_dir, rel_pin, rel_pin_dir,
-                 literal_when, logical_when, table_point, arc_id):
+                 literal_when, logical_when, table_point, arc_id, measurement=None):
         # Path info
         self.stat_file = stat_file
         self.arc_type = arc_type
@@ -26,6 +26,7 @@ class MCData(object):
         self.logical_when = logical_when
         self.table_point = table_point
         self.arc_id = arc_id
+        self.measurement = measurement
  
         # Char data
         self.variety_sigma = None
@@ -74,7 +75,11 @@ def usage():
     optional_arg_info = [
         ("--bundle_mode", ":", "A flag that will allow the script to handle bundled "
                                "sensitivity files."),
-        ("", "", "\tThis flag is required for libraries like MB, MBRFF, etc.")
+        ("", "", "\tThis flag is required for libraries like MB, MBRFF, etc."),
+        ("--measurement=", ":", "The measurement of the statistics files to compare, or "
+                                "'all' for one row per measurement."),
+        ("", "", "\tDefault is the first row, the first of the scld__postprocess "
+                 "--measurements.")
     ]
     print("Options:")
     for opt, delm, desc in optional_arg_info:
@@ -109,6 +114,7 @@ def loadDefaultOptions(user_options=None):
         user_options = dict()
  
     user_options['BUNDLE_MODE'] = False
+    user_options['MEASUREMENT'] = None
  
     return user_options
  
@@ -122,7 +128,8 @@ def parseInputArgs(input_args, user_options=None):
                  "qa_directory=",
                  "sensitivity_file=",
                  "output_file=",
-                 "bundle_mode"]
+                 "bundle_mode",
+                 "measurement="]
  
     optlst, remainder = getopt.gnu_getopt(input_args, short_opts, long_opts)
  
@@ -147,10 +154,13 @@ def parseInputArgs(input_args, user_options=None):
         elif opt in "--bundle_mode":
             user_options['BUNDLE_MODE'] = True
  
+        elif opt in "--measurement":
+            user_options['MEASUREMENT'] = arg
+ 
     return user_options
  
  
-def createMCDataObj(stat_file, arc_id):
+def createMCDataObj(stat_file, arc_id, measurement=None):
     deck_subdir_name = os.path.basename(os.path.dirname(stat_file))
     subdir_info = deck_subdir_name.split('_')
     arc_type_raw = subdir_info[0]
@@ -165,7 +175,7 @@ def createMCDataObj(stat_file, arc_id):
     arc_type = formFullArcType(arc_type_raw, rel_pin_dir)
  
     mc_obj = MCData(stat_file, arc_type, cell, pin, pin_dir, rel_pin, rel_pin_dir,
-                    literal_when, logical_when, table_point, arc_id)
+                    literal_when, logical_when, table_point, arc_id, measurement)
  
     return mc_obj
  
@@ -179,7 +189,11 @@ def formFullArcType(arc_type_raw, rel_pin_dir):
     return arc_type
  
  
-def createAllMCDataObjects(qa_directory):
+def createAllMCDataObjects(qa_directory, measurement=None):
+    """
+    Creates the MC object of every deck with a statistics file. With measurement
+    'all', there is one MC object per measurement row of the statistics file.
+    """
     mc_objs_list = list()
     arc_id = 0
     for deck_path in sorted(glob.glob(os.path.join(qa_directory, "*"))):
@@ -187,16 +201,42 @@ def createAllMCDataObjects(qa_directory):
         stat_file = os.path.join(deck_path, "statistics.csv")
         if not os.path.exists(stat_file):
             continue
-        mc_obj = createMCDataObj(stat_file, arc_id)
-        mc_objs_list.append(mc_obj)
+        if isAllMeasurements(measurement):
+            for stat_row in readStatisticsRows(stat_file):
+                mc_objs_list.append(createMCDataObj(stat_file, arc_id,
+                                                    stat_row.get("Measurement")))
+        else:
+            mc_objs_list.append(createMCDataObj(stat_file, arc_id, measurement))
     return mc_objs_list
  
  
+def isAllMeasurements(measurement):
+    return measurement is not None and measurement.lower() == "all"
+ 
+ 
 def populateAllMCData(mc_objs_list):
+    """
+    Stores the statistics of every MC object: the row of its measurement, or the
+    first row if it has none. The MC objects whose measurement is not in their
+    statistics file are dropped.
+ 
+    Returns:
+        mc_objs_list (list):
+            The MC objects with statistics
+    """
+    populated_mc_objs = list()
+    num_multiple_rows = 0
     for mc_obj in mc_objs_list:
-        # Parse file
+        stat_rows = readStatisticsRows(mc_obj.stat_file)
+        if mc_obj.measurement is None and len(stat_rows) > 1:
+            num_multiple_rows += 1
+        stat_row = selectStatisticsRow(stat_rows, mc_obj.measurement)
+        if stat_row is None:
+            print("WARNING:\t No %s row in %s, skipping the deck." % (mc_obj.measurement,
+                                                                   mc_obj.stat_file))
+            continue
         sigma, samples, nominal, percentile, stdev, skewness, kurtosis, effort, \
-        percentile_ub, percentile_lb = parseStatisticsFile(mc_obj.stat_file)
+        percentile_ub, percentile_lb = parseStatisticsRow(stat_row)
  
         # Populate
         mc_obj.num_samples = samples
@@ -209,25 +249,53 @@ def populateAllMCData(mc_objs_list):
         mc_obj.mc_skewness = skewness
         mc_obj.mc_kurtosis = kurtosis
         mc_obj.effort = effort
- 
- 
-def parseStatisticsFile(stat_file):
+        mc_obj.measurement = stat_row.get("Measurement")
+        populated_mc_objs.append(mc_obj)
+ 
+    if num_multiple_rows:
+        print("WARNING:\t %s statistics files have more than one measurement, only the "
+              "first one is compared (see --measurement)." % num_multiple_rows)
+    return populated_mc_objs
+ 
+ 
+def readStatisticsRows(stat_file):
+    """
+    Returns the rows of a statistics file, as dicts of its header columns. The files
+    of scld__postprocess have one row per measurement (the first row is the first
+    measurement) and a Measurement column; older files have one row and no
+    Measurement column.
+    """
     stat_lines = fileIO.readFile(stat_file)
     header_info = stat_lines[0].strip().split(',')
-    stat_info = stat_lines[1].strip().split(',')
-    sigma = stat_info[header_info.index("Sigma")]
-    samples = stat_info[header_info.index("Samples")]
-    nominal = stat_info[header_info.index("Nominal")]
-    percentile = stat_info[header_info.index("Percentile")]
-    stdev = stat_info[header_info.index("StDev")]
-    skewness = stat_info[header_info.index("Skewness")]
-    kurtosis = stat_info[header_info.index("Kurtosis")]
-    effort = stat_info[header_info.index("Effort [CPU-h]")]
+    return [dict(zip(header_info, line.strip().split(','))) for line in stat_lines[1:]
+            if line.strip()]
+ 
+ 
+def selectStatisticsRow(stat_rows, measurement=None):
+    """
+    Returns the row of measurement, the first row if measurement is None, or None if
+    there is no such row.
+    """
+    for stat_row in stat_rows:
+        if measurement is None or stat_row.get("Measurement") == measurement:
+            return stat_row
+    return None
+ 
+ 
+def parseStatisticsRow(stat_row):
+    sigma = stat_row["Sigma"]
+    samples = stat_row["Samples"]
+    nominal = stat_row["Nominal"]
+    percentile = stat_row["Percentile"]
+    stdev = stat_row["StDev"]
+    skewness = stat_row["Skewness"]
+    kurtosis = stat_row["Kurtosis"]
+    effort = stat_row["Effort [CPU-h]"]
  
     try:
-        percentile_ub = stat_info[header_info.index("Percentile UB")]
-        percentile_lb = stat_info[header_info.index("Percentile LB")]
-    except ValueError as _:
+        percentile_ub = stat_row["Percentile UB"]
+        percentile_lb = stat_row["Percentile LB"]
+    except KeyError as _:
         percentile_ub = None
         percentile_lb = None
  
@@ -235,30 +303,109 @@ def parseStatisticsFile(stat_file):
            effort, percentile_ub, percentile_lb
  
  
+def parseStatisticsFile(stat_file, measurement=None):
+    """
+    Returns the statistics of the row of measurement (see selectStatisticsRow) of a
+    statistics file.
+    """
+    stat_row = selectStatisticsRow(readStatisticsRows(stat_file), measurement)
+    if stat_row is None:
+        raise ValueError("No %s row in %s" % (measurement, stat_file))
+    return parseStatisticsRow(stat_row)
+ 
+ 
 def storeAllVarietyDataInMCObjs(mc_objs_list, lib_data, bundle_mode):
+    mc_obj_index = indexMCObjs(mc_objs_list)
     flat_lib_data = library_parser.flattenLibData(lib_data)
     for cell, pin, rel_pin, t_type, when, t_sense, table_name, sigma in flat_lib_data:
-        matching_obj_list = findMatchingMCObjs(cell, pin, rel_pin, t_type, when,
-                                               table_name, sigma, mc_objs_list,
-                                               bundle_mode)
-        if matching_obj_list is None:
+        matching_obj_list = findMatchingMCObjsInIndex(cell, pin, rel_pin, t_type, when,
+                                                      table_name, sigma, mc_obj_index,
+                                                      bundle_mode)
+        if not matching_obj_list:
             continue
  
+        table_data = lib_data[cell][pin][rel_pin][t_type][when][t_sense][table_name]
+        num_columns = getTableNumColumns(table_data)
         for mc_obj in matching_obj_list:
-            vec_point = convertTablePointToVectorPoint(mc_obj.table_point)
-            variety_sigma = float(lib_data[cell][pin][rel_pin][t_type][when][t_sense][
-                table_name][sigma][vec_point])*1e3
+            vec_point = convertTablePointToVectorPoint(mc_obj.table_point, num_columns)
+            variety_sigma = float(table_data[sigma][vec_point])*1e3
  
             mc_obj.variety_sigma = variety_sigma
  
  
-def convertTablePointToVectorPoint(table_point):
+def getTableNumColumns(table_data, default=5):
+    """
+    Returns the number of columns of a library table (the length of its index_2);
+    default for tables parsed without an index_2.
+    """
+    index_2 = table_data.get('index_2')
+    if index_2 is None or not len(index_2):
+        return default
+    return len(index_2)
+ 
+ 
+def convertTablePointToVectorPoint(table_point, num_columns=5):
     row,col = table_point.split('-')
-    return (int(row)-1)*5 + int(col) - 1
+    return (int(row)-1)*num_columns + int(col) - 1
+ 
+ 
+def getMCObjKey(cell, pin_dir, rel_pin, rel_pin_dir, arc_type, logical_when):
+    return cell, pin_dir, rel_pin, rel_pin_dir, arc_type, logical_when
+ 
+ 
+def indexMCObjs(mc_objs_list):
+    """
+    Indexes the MC objects on (cell, pin_dir, rel_pin, rel_pin_dir, arc_type,
+    logical_when), then on pin, so every library table finds its matching objects
+    with dict lookups instead of scanning all the MC objects.
+ 
+    Returns:
+        mc_obj_index (dict):
+            mc_obj_index[key][pin] is the list of MC objects of that arc and pin
+    """
+    mc_obj_index = dict()
+    for mc_obj in mc_objs_list:
+        key = getMCObjKey(mc_obj.cell, mc_obj.pin_dir, mc_obj.rel_pin, mc_obj.rel_pin_dir,
+                          mc_obj.arc_type, mc_obj.logical_when)
+        mc_obj_index.setdefault(key, dict()).setdefault(mc_obj.pin, list()).append(mc_obj)
+    return mc_obj_index
+ 
+ 
+def findMatchingMCObjsInIndex(cell, pin, rel_pin, timing_type, when, table_name, sigma,
+                              mc_obj_index, bundle_mode):
+    """
+    Same matching rules as findMatchingMCObjs, on the index from indexMCObjs.
+    """
+    if not sigma in ["early", "late", "none"]:
+        return list()
+ 
+    key = getMCObjKey(cell, getPinDirFromFlatLibData(table_name), rel_pin,
+                      getRelPinDirFromFlatLibData(timing_type), timing_type, when)
+    pin_index = mc_obj_index.get(key)
+    if pin_index is None:
+        return list()
+ 
+    # Non-MB
+    if not bundle_mode:
+        return pin_index.get(pin, list())
+ 
+    # Bundle mode check for MB
+    bundle_pin = adjustPinForBundle(pin)
+    if bundle_pin is None:
+        return list()
+    matching_mc_obj_list = list()
+    for mc_pin, mc_objs in pin_index.items():
+        if fnmatch.fnmatch(mc_pin, bundle_pin):
+            matching_mc_obj_list.extend(mc_objs)
+    return matching_mc_obj_list
  
  
 def findMatchingMCObjs(cell, pin, rel_pin, timing_type, when, table_name, sigma,
                        mc_objs_list, bundle_mode):
+    """
+    Scans all the MC objects for the ones matching a library table. Kept as the
+    reference for findMatchingMCObjsInIndex.
+    """
  
     matching_mc_obj_list = list()
     if not sigma in ["early", "late", "none"]:
@@ -335,7 +482,9 @@ def computeAllErrorsInMCObjs(mc_objs_list):
 def getOutputFileWriteBuffer(mc_objs_list):
     write_buffer = list()
     header = getOutputFileHeader(mc_objs_list[0])
-    write_buffer.append(header)
+    # The Measurement column is the last one, like in the statistics files
+    with_measurement = mc_objs_list[0].measurement is not None
+    write_buffer.append(header + (",Measurement" if with_measurement else ""))
  
     for mc_obj in mc_objs_list:
         # Use ';' delimeter so excel doesn't convert to date
@@ -362,6 +511,8 @@ def getOutputFileWriteBuffer(mc_objs_list):
                 mc_obj.mc_skewness,
                 mc_obj.mc_kurtosis,
                 mc_obj.effort)
+            if with_measurement:
+                write_line += ",%s" % mc_obj.measurement
             write_buffer.append(write_line)
         except TypeError as _:
             write_line = ','.join(["%s" for _ in range(len(header.split(',')))]) % (
@@ -386,6 +537,8 @@ def getOutputFileWriteBuffer(mc_objs_list):
                 mc_obj.mc_skewness,
                 mc_obj.mc_kurtosis,
                 mc_obj.effort)
+            if with_measurement:
+                write_line += ",%s" % mc_obj.measurement
             write_buffer.append(write_line)
         except Exception as _:
             continue
@@ -417,18 +570,20 @@ def main(input_args=None):
     # Print
     printUserOptions(user_options)
  
-    # Parse library file
-    print("Parsing library file.")
-    lib_data = library_parser.parseLibraryFile(user_options['SENSITIVITY_FILE'],
-                                               "variation")
- 
     # Create the MC Data objects
     print("Creating MC timing objects.")
-    mc_objs_list = createAllMCDataObjects(user_options['QA_DIRECTORY'])
+    mc_objs_list = createAllMCDataObjects(user_options['QA_DIRECTORY'],
+                                          user_options.get('MEASUREMENT'))
+ 
+    # Parse library file, only keeping the tables of the cells we have MC data for
+    print("Parsing library file.")
+    qa_cells = set(mc_obj.cell for mc_obj in mc_objs_list)
+    lib_data = library_parser.parseLibraryFile(user_options['SENSITIVITY_FILE'],
+                                               "variation", cell_filter=qa_cells)
  
     # Store the actual MC data from them
     print("Populating MC Data.")
-    populateAllMCData(mc_objs_list)
+    mc_objs_list = populateAllMCData(mc_objs_list)
  
     # Store the variety sigma
     print("Storing Variety data.")
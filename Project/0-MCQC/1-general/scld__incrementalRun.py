@@ -13,15 +13,36 @@ def main(user_opts=None):
     # Check options
     checkValidOpts(user_opts)
  
+    # Only report the missing samples of every deck of a DECKS tree
+    if user_opts.get('DECKS_PATH') is not None:
+        printDecksCoverage(user_opts['DECKS_PATH'], user_opts['NSAMPLES'],
+                           user_opts.get('NUM_JOBS'))
+        return
+ 
     # Run Incremental SPICE Deck Generation (ISDG)
-    isdg.main(user_opts['SIM_PATH'], user_opts['NSAMPLES'])
+    isdg.main(user_opts['SIM_PATH'], user_opts['NSAMPLES'], jobs=user_opts.get('NUM_JOBS'))
+ 
+ 
+def printDecksCoverage(decks_path, nsamples, jobs=None):
+    missing_sample_ranges = isdg.getDecksSampleCoverage(decks_path, nsamples, jobs=jobs)
+    num_incomplete = 0
+    for deck_name, sample_ranges in missing_sample_ranges.items():
+        num_missing = isdg.countSamplesInRanges(sample_ranges)
+        if not num_missing:
+            continue
+        num_incomplete += 1
+        print('\t{0:<80} {1:>8} missing: {2}'.format(
+            deck_name, num_missing, isdg.formatSampleRanges(sample_ranges[:10]) +
+            (",..." if len(sample_ranges) > 10 else "")))
+    print("%s of %s decks are missing samples." % (num_incomplete,
+                                                   len(missing_sample_ranges)))
  
  
 def checkValidOpts(user_opts):
     errors_exist = False
-    req_opts = ["SIM_PATH",
-                "NSAMPLES"
-                ]
+    req_opts = ["NSAMPLES"]
+    if user_opts.get('DECKS_PATH') is None:
+        req_opts.append("SIM_PATH")
     for opt in req_opts:
         if user_opts[opt] is None:
             print("ERROR: The option %s is required but missing." % opt.lower())
@@ -35,13 +56,17 @@ def parseArgv(argv):
     short_opts = "h"
     long_opts = ["help",
                  "sim_path=",
-                 "nsamples="
+                 "nsamples=",
+                 "decks_path=",
+                 "jobs="
                  ]
     (optlst, remainder) = getopt.gnu_getopt(argv, short_opts, long_opts)
  
     user_opts = dict()
     user_opts['SIM_PATH'] = None
     user_opts['NSAMPLES'] = None
+    user_opts['DECKS_PATH'] = None
+    user_opts['NUM_JOBS'] = None
     if not len(argv)-1:
         sys.exit(usage())
     for opt, arg in optlst:
@@ -54,6 +79,12 @@ def parseArgv(argv):
         elif opt in "--nsamples":
             user_opts['NSAMPLES'] = int(arg)
  
+        elif opt in "--decks_path":
+            user_opts['DECKS_PATH'] = arg
+ 
+        elif opt in "--jobs":
+            user_opts['NUM_JOBS'] = max(1, int(arg))
+ 
     return user_opts
  
  
@@ -67,9 +98,20 @@ def usage():
         ("--nsamples", ":", "The total number of samples that is supposed to be "
                             "simulated.")
     ]
+ 
+    # Optional arguments
+    optional_arg_info = [
+        ("--decks_path", ":", "Instead of --sim_path: only report the missing samples "
+                              "of every deck of a DECKS directory."),
+        ("--jobs", ":", "The number of processes scanning the mt0 files. Default is "
+                        "up to 8")
+    ]
     print("Arguments:")
     for opt, delm, desc in required_arg_info:
         print('\t{0:<25} {1:<5} {2:<100}'.format(opt, delm, desc))
+    print("Options:")
+    for opt, delm, desc in optional_arg_info:
+        print('\t{0:<25} {1:<5} {2:<100}'.format(opt, delm, desc))
  
     # Usage
     print("\nUsage examples:")
@@ -78,8 +120,11 @@ def usage():
     print("\t>>> python %s "
           "\n\t\t--sim_path '/tmp1/rahulk/DECKS/partial_run'"
           "\n\t\t--nsamples '5000'" % sys.argv[0])
+    print("\n\tReport the missing samples of all decks of a DECKS directory.")
+    print("\t>>> python %s "
+          "\n\t\t--decks_path '/tmp1/rahulk/DECKS'"
+          "\n\t\t--nsamples '5000'" % sys.argv[0])
  
  
 if __name__ == "__main__":
     sys.exit(main())
- 
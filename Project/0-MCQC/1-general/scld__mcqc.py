@@ -6,10 +6,11 @@ import glob
 import getopt
 import fnmatch
 import shutil
-import hybrid_char_helper
 import globalsFileReader.funcs as globalsFileReader
 from pathlib import Path
 from batchMode.funcs import pygrep
+from batchMode.manifest import getKitManifest
+from chartcl_helper.model import get_chartcl_model
  
  
 def usage():
@@ -34,7 +35,28 @@ def usage():
         ("--spice_deck_format=", ":", "Determines the SPICE deck format that will be "
                                       "used. Default is [hspice]"),
         ("", "", "\tThe other valid option is 'thanos' which creates FMC formatted "
-                 "SPICE decks.")
+                 "SPICE decks."),
+        ("--jobs=", ":", "The number of processes used to write the SPICE decks. "
+                         "Default is [1]"),
+        ("--incremental", ":", "Only regenerate the deck directories whose inputs "
+                               "changed since the last run."),
+        ("", "", "\tThe deck hashes of a run are kept in "
+                 "DECKS/.decks_manifest.json."),
+        ("", "", "\tDecks with unchanged content are not rewritten and keep their "
+                 "mtime."),
+        ("--remove_orphans", ":", "Delete the deck directories of the manifest that "
+                                  "are not generated anymore."),
+        ("--launch_script", ":", "Write launch_all.csh next to the DECKS directory. "
+                                 "Nominal simulations are batched and the jobs are "
+                                 "submitted as LSF job arrays."),
+        ("", "", "\tThe job scripts and job array index files are written to the "
+                 "'launch' directory."),
+        ("--max_dp_workers=", ":", "The largest number of DP workers of an MC job. "
+                                   "Default is no limit."),
+        ("--max_running_jobs=", ":", "The number of jobs of a job array that run at "
+                                     "the same time. Default is no limit."),
+        ("--no_template_cache", ":", "Don't keep the parsed template file in the parse "
+                                     "cache <output_path>/.template_cache.")
     ]
  
     # Print
@@ -162,6 +184,13 @@ def parseInputArgs(input_args, input_options=None):
         "char_type=",
         "holdtax",
         "ht",
+        "jobs=",
+        "incremental",
+        "remove_orphans",
+        "launch_script",
+        "max_dp_workers=",
+        "max_running_jobs=",
+        "no_template_cache",
     ]
  
     optlst, remainder = getopt.gnu_getopt(input_args, short_opts, long_opts)
@@ -177,6 +206,12 @@ def parseInputArgs(input_args, input_options=None):
     input_options['HOLD_TAX'] = False
     input_options['HT'] = False
     input_options['SPICE_DECK_FORMAT'] = "HSPICE"
+    input_options['INCREMENTAL'] = False
+    input_options['REMOVE_ORPHANS'] = False
+    input_options['LAUNCH_SCRIPT'] = False
+    input_options['MAX_DP_WORKERS'] = None
+    input_options['MAX_RUNNING_JOBS'] = None
+    input_options['TEMPLATE_CACHE'] = True
     for opt, arg in optlst:
         if opt in ("-h", "--help"):
             usage()
@@ -217,6 +252,20 @@ def parseInputArgs(input_args, input_options=None):
             input_options['HOLD_TAX'] = True
         elif opt in "--ht":
             input_options['HT'] = True
+        elif opt in "--jobs":
+            input_options['NUM_JOBS'] = max(1, int(arg))
+        elif opt in "--incremental":
+            input_options['INCREMENTAL'] = True
+        elif opt in "--remove_orphans":
+            input_options['REMOVE_ORPHANS'] = True
+        elif opt in "--launch_script":
+            input_options['LAUNCH_SCRIPT'] = True
+        elif opt in "--max_dp_workers":
+            input_options['MAX_DP_WORKERS'] = max(1, int(arg))
+        elif opt in "--max_running_jobs":
+            input_options['MAX_RUNNING_JOBS'] = max(1, int(arg))
+        elif opt in "--no_template_cache":
+            input_options['TEMPLATE_CACHE'] = False
  
     return input_options
  
@@ -293,7 +342,7 @@ def getLibCharFile(user_options):
  
 def getLibIncFile(user_options):
     char_file = user_options['CHARTCL_FILE']
-    inc_file_lookup = hybrid_char_helper.parse_chartcl_for_inc(char_file)
+    inc_file_lookup = get_chartcl_model(char_file).inc_file_lookup()
     return inc_file_lookup
  
  
@@ -324,6 +373,23 @@ def extractNetlistPath(user_options, char_file):
     return netlist_path
  
  
+def getManifestNetlistPath(user_options, char_info):
+    # Same as extractNetlistPath, from the kit manifest
+    netlist_subdir = char_info['spi_netlist_subdir']
+    if netlist_subdir is None or char_info['vdd_value'] is None or \
+            char_info['temper'] is None:
+        print("Couldn't find the VDD, temperature or netlist path in the char file %s" %
+              user_options['CHARTCL_FILE'])
+        print("This is a fatal error. Exiting now.")
+        sys.exit(-1)
+    netlist_path = os.path.join(user_options['KIT_PATH'],
+                                user_options['lib_type'],
+                                user_options['lgvt'],
+                                "Netlist",
+                                netlist_subdir)
+    return netlist_path
+ 
+ 
 def formRootOutputPath(user_options):
     root_output_path = os.path.join(user_options['output_path'], "DECKS")
     return root_output_path
@@ -428,6 +494,8 @@ def main():
     fixCustomModulePaths(user_options)
     # Import
     import runMonteCarlo
+    import launchscript.funcs as launchScript
+    import charTemplateParser.funcs as templateParser
  
     # Extract data from the input
     print("Extracting file data from kit path.")
@@ -438,16 +506,20 @@ def main():
     print("Extracting MC QC data from library files.")
     user_options['CHARTCL_FILE'] = char_file
     user_options['TEMPLATE_FILE'] = template_file
-    vdd_value = extractVDDValue(char_file)
+    char_info = getKitManifest(user_options['KIT_PATH']).getCharInfo(char_file)
+    vdd_value = char_info['vdd_value']
     user_options['VDD_VALUE'] = vdd_value
-    temperature = extractTemperatureValue(char_file)
+    temperature = char_info['temper']
     user_options['TEMPERATURE'] = temperature
-    netlist_path = extractNetlistPath(user_options, char_file)
+    netlist_path = getManifestNetlistPath(user_options, char_info)
     user_options['ROOT_NETLIST_PATH'] = netlist_path
  
     # Form some variables/files
     root_output_path = formRootOutputPath(user_options)
     user_options['ROOT_OUTPUT_PATH'] = root_output_path
+    if user_options.get('TEMPLATE_CACHE', True):
+        user_options['TEMPLATE_CACHE_DIR'] = os.path.join(
+            user_options['output_path'], templateParser.TEMPLATE_CACHE_DIRNAME)
     qa_template_file = formQATemplateFile(user_options)
     user_options['QA_TEMPLATE_FILE'] = qa_template_file
  
@@ -470,19 +542,19 @@ def main():
     print("Running SPICE deck generation.")
     spice_info = runMonteCarlo.main(user_options)
  
-    print("Skip CPU Estimate")
-    # if not user_options['ESTIMATE_CPUS']:
-    # Get CPU estimate for launch purposes
-    #_, _, min_effort = runMonteCarlo.getCPUEstimate(spice_info)
-    # Create the launch script
-    #print("Skip creating launch script.")
-    # launch_script = launchScript.createLaunchScript(user_options['ROOT_OUTPUT_PATH'],
-    #                                                 user_options['LSF_CFG_FILE'],
-    #                                                 min_effort)
+    if not user_options['LAUNCH_SCRIPT'] or user_options['ESTIMATE_CPUS']:
+        print("Skip creating launch script.")
+        return
+ 
+    # Create the launch script, the DP workers are sized from the deck efforts
+    print("Creating launch script.")
+    launch_script = launchScript.createLaunchScript(
+        user_options['ROOT_OUTPUT_PATH'], user_options['LSF_CFG_FILE'],
+        max_cpus=user_options['MAX_DP_WORKERS'],
+        max_running=user_options['MAX_RUNNING_JOBS'])
  
-    # print("Find launch script at %s" % launch_script)
+    print("Find launch script at %s" % launch_script)
  
  
 if __name__ == "__main__":
     sys.exit(main())
- 
@@ -2,9 +2,26 @@ import getopt
 import os
 import glob
 import sys
+import csv
+import collections
+import functools
+import multiprocessing
  
 import utilities.hspiceUtilities as hspiceUtilities
  
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+ 
+# Columns of the consolidated results file of the QA directory, one row per deck and
+# measurement
+SUMMARY_COLUMNS = ["Deck", "Measurement", "Sigma", "Samples", "Nominal", "Percentile",
+                   "Percentile LB", "Percentile UB", "StDev", "Skewness", "Kurtosis",
+                   "Effort [CPU-h]", "Signature"]
+SUMMARY_NUMERIC_COLUMNS = SUMMARY_COLUMNS[2:-1]
+ 
+ 
 def main(input_args=None):
     if input_args is None:
         input_args = sys.argv
@@ -13,159 +30,323 @@ def main(input_args=None):
     else:
         user_options = input_args
  
-    # Loop
-    for deck_path in glob.glob(os.path.join(user_options['ROOT_DIRECTORY'], "DECKS/*")):
-        print("Analyzing %s" % deck_path)
- 
-        # Check nominal
-        nominal_file = os.path.join(deck_path, user_options['NOMINAL_MT0_FILENAME'])
-        print("Parsing nominal file at %s" % nominal_file)
-        nominal_file_exists = checkNominalFileExists(nominal_file)
-        if not nominal_file_exists:
-            print("Nominal file doesn't exist.")
-            print("Skipping this path.")
-            continue
-        else:
-            try:
-                nominal_value = hspiceUtilities.getNominalFromMT0File(
-                    nominal_file, user_options['MEASUREMENT_NAME'])
-            except Exception as err:
-                print("ERROR: %s" % err)
-                print("Skipping this path.")
-                continue
- 
-        # Check MC
-        if user_options['FORMAT'] == "mpp0":
-            mpp0_file = os.path.join(deck_path, user_options['MC_MPP0_FILENAME'])
-            print("Parsing mpp0 file at %s" % mpp0_file)
-            mpp0_exists = checkMPP0FileExists(mpp0_file)
-            if not mpp0_exists:
-                print("mpp0 file doesn't exist.")
-                print("Skipping this path.")
-                continue
- 
-            # Get timing data
-            try:
-                mpp0_obj, _ = hspiceUtilities.parseMPP0File(mpp0_file, user_options[
-                    'MEASUREMENT_NAME'], "*Q%s*" % user_options['PERCENTILE'])
-            except Exception as err:
-                print("ERROR: %s" % err)
-                print("Skipping this path.")
-                continue
-            mpp0_obj.nominal_value = nominal_value
-            mpp0_obj.nominal_file = nominal_file
-            mpp0_obj.sigma_value = mpp0_obj.computeSigmaValue(3)
- 
-            # Get the runtime data
-            if user_options['GET_RUNTIME']:
-                progress_file = os.path.join(deck_path, user_options['PROGRESS_FILENAME'])
-                runtime = hspiceUtilities.getRuntimeFromProgressFile(progress_file)
-                cpus = hspiceUtilities.getCPUSRequestedFromProgressFile(progress_file)
-                if (runtime is None) or (cpus is None):
-                    mpp0_obj.runtime = 1e+39
-                    mpp0_obj.cpus = 1
-                else:
-                    mpp0_obj.runtime = runtime
-                    mpp0_obj.cpus = cpus
- 
-                mpp0_obj.effort = mpp0_obj.computeEffort()
- 
-        elif user_options['FORMAT'] == "mt0":
-            mc_mt0_file = os.path.join(deck_path, user_options['MC_MT0_FILENAME'])
-            print("Parsing mt0 file at %s" % mc_mt0_file)
-            mc_mt0_exists = checkMCMt0FileExists(mc_mt0_file)
-            if not mc_mt0_exists:
-                print("mt0 file doesn't exist.")
-                print("Skipping this path.")
-                continue
- 
-            # Get the timing data
-            try:
-                mt0_obj = hspiceUtilities.parseMCMt0File(mc_mt0_file, user_options[
-                    'MEASUREMENT_NAME'], user_options['PERCENTILE'])
-            except Exception as err:
-                print("ERROR: %s" % err)
-                print("Skipping this path.")
-                continue
-            mt0_obj.nominal_value = nominal_value
-            mt0_obj.nominal_file = nominal_file
-            mt0_obj.sigma_value = mt0_obj.computeSigmaValue(3)
- 
-            # Get the runtime data
-            if user_options['GET_RUNTIME']:
-                lis_file = os.path.join(deck_path, user_options['LIS_FILENAME'])
-                runtime = hspiceUtilities.getRuntimeFromLisFile(lis_file)
-                cpus = hspiceUtilities.getThreadsRequestedLisFile(lis_file)
-                if (runtime is None) or (cpus is None):
-                    mt0_obj.runtime = 1e+39
-                    mt0_obj.cpus = 1
-                else:
-                    mt0_obj.runtime = runtime
-                    mt0_obj.cpus = cpus
- 
-                mt0_obj.effort = mt0_obj.computeEffort()
+    deck_paths = sorted(glob.glob(os.path.join(user_options['ROOT_DIRECTORY'], "DECKS/*")))
+    summary_file = os.path.join(user_options['ROOT_DIRECTORY'], user_options.get(
+        'SUMMARY_FILENAME', "statistics_summary.csv"))
+ 
+    # Decks whose results did not change since the last run are not parsed again
+    previous_results = dict()
+    if not user_options.get('FORCE', False):
+        previous_results = loadSummaryFile(summary_file)
+ 
+    results = dict()
+    pending_deck_paths = list()
+    for deck_path in deck_paths:
+        deck_name = os.path.basename(deck_path)
+        previous_rows = previous_results.get(deck_name)
+        if isDeckUpToDate(deck_path, previous_rows, user_options):
+            results[deck_name] = previous_rows
         else:
-            print("Unknown MC format '%s' specified by user. " % user_options['FORMAT'])
-            print("Skipping this path")
-            continue
- 
-        # Write statistics file
-        output_file = os.path.join(deck_path, user_options['OUTPUT_FILENAME'])
+            pending_deck_paths.append(deck_path)
+    print("INFO:\t %s decks are up to date, %s decks to postprocess." % (
+        len(results), len(pending_deck_paths)))
+ 
+    deck_results = postprocessDecks(pending_deck_paths, user_options)
+    for deck_path, deck_rows in zip(pending_deck_paths, deck_results):
+        if deck_rows is not None:
+            results[os.path.basename(deck_path)] = deck_rows
+ 
+    summary_rows = [row for x in sorted(results) for row in results[x]]
+    writeSummaryFile(summary_file, summary_rows)
+    if user_options.get('PARQUET', False):
+        writeSummaryParquet(os.path.splitext(summary_file)[0] + ".parquet", summary_rows)
+ 
+ 
+def postprocessDecks(deck_paths, user_options):
+    """
+    Postprocesses the deck directories, in a pool of NUM_JOBS processes if more
+    than one job is requested.
+ 
+    Returns:
+        deck_results (list):
+            The summary rows of every deck (None for skipped decks), in order
+    """
+    jobs = int(user_options.get('NUM_JOBS', 1))
+    if jobs > 1 and len(deck_paths) > 1:
+        print("INFO:\t Postprocessing %s decks with %s processes." % (len(deck_paths),
+                                                                    jobs))
+        worker = functools.partial(postprocessDeck, user_options=user_options)
+        pool = multiprocessing.Pool(processes=jobs)
+        try:
+            deck_results = pool.map(worker, deck_paths,
+                                    chunksize=max(1, len(deck_paths) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+        return deck_results
+ 
+    return [postprocessDeck(deck_path, user_options) for deck_path in deck_paths]
+ 
+ 
+def postprocessDeck(deck_path, user_options):
+    """
+    Computes the statistics of every requested measurement of one deck directory
+    and writes its statistics file. The nominal and MC result files are read once
+    for all of the measurements.
+ 
+    Returns:
+        deck_rows (list):
+            The summary rows of the deck, one per measurement, None if the deck was
+            skipped
+    """
+    print("Analyzing %s" % deck_path)
+    signature = getDeckSignature(deck_path, user_options)
+    measurement_names = getMeasurementNames(user_options)
+ 
+    # Check nominal
+    nominal_file = os.path.join(deck_path, user_options['NOMINAL_MT0_FILENAME'])
+    print("Parsing nominal file at %s" % nominal_file)
+    nominal_file_exists = checkNominalFileExists(nominal_file)
+    if not nominal_file_exists:
+        print("Nominal file doesn't exist.")
+        print("Skipping this path.")
+        return None
+ 
+    # Check MC
+    if user_options['FORMAT'] == "mpp0":
+        mpp0_file = os.path.join(deck_path, user_options['MC_MPP0_FILENAME'])
+        print("Parsing mpp0 file at %s" % mpp0_file)
+        mpp0_exists = checkMPP0FileExists(mpp0_file)
+        if not mpp0_exists:
+            print("mpp0 file doesn't exist.")
+            print("Skipping this path.")
+            return None
+ 
+        # Get timing data, the mpp0 file is indexed once for all of the measurements
+        try:
+            mpp0_info = hspiceUtilities.getMPP0Info(mpp0_file)
+            if measurement_names is None:
+                measurement_names = mpp0_info.measurement_names
+            mc_objs = collections.OrderedDict()
+            for measurement_name in measurement_names:
+                mc_objs[measurement_name], _ = mpp0_info.getMPP0Data(
+                    measurement_name, "*Q%s*" % user_options['PERCENTILE'])
+        except Exception as err:
+            print("ERROR: %s" % err)
+            print("Skipping this path.")
+            return None
+ 
+    elif user_options['FORMAT'] == "mt0":
+        mc_mt0_file = os.path.join(deck_path, user_options['MC_MT0_FILENAME'])
+        print("Parsing mt0 file at %s" % mc_mt0_file)
+        mc_mt0_exists = checkMCMt0FileExists(mc_mt0_file)
+        if not mc_mt0_exists:
+            print("mt0 file doesn't exist.")
+            print("Skipping this path.")
+            return None
+ 
+        # Get the timing data of all of the measurements from one read
+        try:
+            mc_objs = hspiceUtilities.parseMCMt0FileMeasurements(
+                mc_mt0_file, measurement_names, user_options['PERCENTILE'])
+        except Exception as err:
+            print("ERROR: %s" % err)
+            print("Skipping this path.")
+            return None
+    else:
+        print("Unknown MC format '%s' specified by user. " % user_options['FORMAT'])
+        print("Skipping this path")
+        return None
+ 
+    if not mc_objs:
+        print("No measurements found.")
+        print("Skipping this path.")
+        return None
+ 
+    # Get the nominals of the same measurements
+    try:
+        nominal_values = hspiceUtilities.getNominalValuesFromMT0File(nominal_file,
+                                                                     list(mc_objs))
+    except Exception as err:
+        print("ERROR: %s" % err)
+        print("Skipping this path.")
+        return None
+ 
+    # Get the runtime data, it is the same for every measurement
+    runtime = None
+    cpus = None
+    if user_options['GET_RUNTIME']:
         if user_options['FORMAT'] == "mpp0":
-            sigma = mpp0_obj.sigma_value
-            num_samples = mpp0_obj.num_samples
-            nominal = mpp0_obj.nominal_value
-            percentile = float(mpp0_obj.perc_pred)*1e12
-            percentile_ub = float(mpp0_obj.perc_ub)*1e12
-            percentile_lb = float(mpp0_obj.perc_lb)*1e12
-            stdev = float(mpp0_obj.stdDev_pred)*1e12
-            skewness = mpp0_obj.skewness_pred
-            kurtosis = mpp0_obj.kurtosis_pred
-            effort = mpp0_obj.effort
-        elif user_options['FORMAT'] == "mt0":
-            sigma = mt0_obj.sigma_value
-            num_samples = mt0_obj.num_samples
-            nominal = mt0_obj.nominal_value
-            percentile = mt0_obj.perc_value
-            percentile_ub = None
-            percentile_lb = None
-            stdev = mt0_obj.stddev
-            skewness = mt0_obj.skewness
-            kurtosis = mt0_obj.kurtosis
-            effort = mt0_obj.effort
+            progress_file = os.path.join(deck_path, user_options['PROGRESS_FILENAME'])
+            runtime, cpus = hspiceUtilities.getRuntimeInfoFromProgressFile(progress_file)
         else:
-            print("Unknown MC format '%s' specified by user. " % user_options['FORMAT'])
-            print("Skipping this path")
-            continue
- 
-        writeStatisticsFile(output_file, sigma, num_samples, nominal, percentile,
-                            percentile_ub, percentile_lb, stdev, skewness, kurtosis,
-                            effort)
- 
- 
- 
-def writeStatisticsFile(output_file, sigma_value, num_samples, nominal, percentile,
-                        percentile_ub, percentile_lb, stdev, skewness, kurtosis, effort):
+            lis_file = os.path.join(deck_path, user_options['LIS_FILENAME'])
+            runtime, cpus = hspiceUtilities.getRuntimeInfoFromLisFile(lis_file)
+        if (runtime is None) or (cpus is None):
+            runtime = 1e+39
+            cpus = 1
+ 
+    deck_rows = list()
+    for measurement_name, mc_obj in mc_objs.items():
+        mc_obj.nominal_value = nominal_values[measurement_name]
+        mc_obj.nominal_file = nominal_file
+        mc_obj.sigma_value = mc_obj.computeSigmaValue(3)
+        if user_options['GET_RUNTIME']:
+            mc_obj.runtime = runtime
+            mc_obj.cpus = cpus
+            mc_obj.effort = mc_obj.computeEffort()
+ 
+        row = getStatisticsRow(mc_obj, user_options['FORMAT'])
+        row["Deck"] = os.path.basename(deck_path)
+        row["Measurement"] = measurement_name
+        row["Signature"] = signature
+        deck_rows.append(row)
+ 
+    # Write statistics file
+    output_file = os.path.join(deck_path, user_options['OUTPUT_FILENAME'])
+    writeStatisticsFile(output_file, deck_rows)
+ 
+    return deck_rows
+ 
+ 
+def getStatisticsRow(mc_obj, mc_format):
+    """
+    Returns the statistics of one measurement (an MPP0Data or MCMT0Data object) as
+    a summary row without the deck, measurement and signature.
+    """
+    if mc_format == "mpp0":
+        row = {"Sigma": mc_obj.sigma_value,
+               "Samples": mc_obj.num_samples,
+               "Nominal": mc_obj.nominal_value,
+               "Percentile": float(mc_obj.perc_pred)*1e12,
+               "Percentile LB": float(mc_obj.perc_lb)*1e12,
+               "Percentile UB": float(mc_obj.perc_ub)*1e12,
+               "StDev": float(mc_obj.stdDev_pred)*1e12,
+               "Skewness": mc_obj.skewness_pred,
+               "Kurtosis": mc_obj.kurtosis_pred}
+    else:
+        row = {"Sigma": mc_obj.sigma_value,
+               "Samples": mc_obj.num_samples,
+               "Nominal": mc_obj.nominal_value,
+               "Percentile": mc_obj.perc_value,
+               "Percentile LB": None,
+               "Percentile UB": None,
+               "StDev": mc_obj.stddev,
+               "Skewness": mc_obj.skewness,
+               "Kurtosis": mc_obj.kurtosis}
+ 
+    effort = mc_obj.effort
     if effort is None:
         effort = "1e+39"
- 
-    if (percentile_ub is None) or (percentile_lb is None):
-        header = "Sigma,Samples,Nominal,Percentile,StDev,Skewness,Kurtosis," \
-                 "Effort [CPU-h]\n"
-        line = "%s,%s,%s,%s,%s,%s,%s,%s\n" % (sigma_value, num_samples, nominal,
-                                              percentile, stdev, skewness, kurtosis,
-                                              effort)
+    row["Effort [CPU-h]"] = effort
+    return row
+ 
+ 
+def getMeasurementNames(user_options):
+    """
+    Returns the measurements to postprocess: the comma separated MEASUREMENT_NAME
+    option, None if it is 'all' (every measurement of the results).
+    """
+    measurement_names = [x.strip() for x in user_options['MEASUREMENT_NAME'].split(',')
+                         if x.strip()]
+    if [x.lower() for x in measurement_names] == ["all"]:
+        return None
+    return measurement_names
+ 
+ 
+def getDeckSignature(deck_path, user_options):
+    """
+    Returns the settings and the mtimes of the simulation result files of a deck.
+    A deck is postprocessed again when its signature changes.
+    """
+    if user_options['FORMAT'] == "mpp0":
+        result_filenames = [user_options['MC_MPP0_FILENAME'],
+                            user_options['PROGRESS_FILENAME']]
+    else:
+        result_filenames = [user_options['MC_MT0_FILENAME'],
+                            user_options['LIS_FILENAME']]
+    if not user_options['GET_RUNTIME']:
+        result_filenames = result_filenames[:1]
+ 
+    signature = [user_options['FORMAT'], user_options['MEASUREMENT_NAME'],
+                 user_options['PERCENTILE'], user_options['OUTPUT_FILENAME']]
+    for filename in [user_options['NOMINAL_MT0_FILENAME']] + result_filenames:
+        try:
+            signature.append("%.6f" % os.path.getmtime(os.path.join(deck_path, filename)))
+        except OSError as _:
+            signature.append("-")
+    return ';'.join(signature)
+ 
+ 
+def isDeckUpToDate(deck_path, previous_rows, user_options):
+    if not previous_rows:
+        return False
+    if not os.path.exists(os.path.join(deck_path, user_options['OUTPUT_FILENAME'])):
+        return False
+    return previous_rows[0].get("Signature") == getDeckSignature(deck_path, user_options)
+ 
+ 
+def loadSummaryFile(summary_file):
+    """
+    Returns the rows of a consolidated results file grouped by deck name (an empty
+    dict if there is none or it can't be read).
+    """
+    deck_rows = dict()
+    try:
+        with open(summary_file, 'r') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != SUMMARY_COLUMNS:
+                return dict()
+            for row in reader:
+                deck_rows.setdefault(row["Deck"], list()).append(row)
+    except (IOError, OSError, csv.Error) as _:
+        return dict()
+    return deck_rows
+ 
+ 
+def writeSummaryFile(summary_file, summary_rows):
+    tmp_file = "%s.%s.tmp" % (summary_file, os.getpid())
+    with open(tmp_file, 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(summary_rows)
+    os.replace(tmp_file, summary_file)
+    print("INFO:\t Wrote %s statistics rows to %s" % (len(summary_rows), summary_file))
+ 
+ 
+def writeSummaryParquet(parquet_file, summary_rows):
+    if pd is None:
+        print("WARNING:\t pandas is not installed, not writing %s" % parquet_file)
+        return
+    data_frame = pd.DataFrame(summary_rows, columns=SUMMARY_COLUMNS)
+    for column in SUMMARY_NUMERIC_COLUMNS:
+        data_frame[column] = pd.to_numeric(data_frame[column], errors='coerce')
+    try:
+        data_frame.to_parquet(parquet_file, index=False)
+    except (ImportError, ValueError) as e:
+        print("WARNING:\t Could not write %s (%s)" % (parquet_file, e))
+        return
+    print("INFO:\t Wrote %s" % parquet_file)
+ 
+ 
+def writeStatisticsFile(output_file, deck_rows):
+    """
+    Writes the statistics file of a deck, one line per measurement in the requested
+    order (the first line is the first measurement). The Measurement column is the
+    last one, so readers that look up the columns by header are not affected.
+    """
+    if (deck_rows[0]["Percentile UB"] is None) or (deck_rows[0]["Percentile LB"] is None):
+        columns = ["Sigma", "Samples", "Nominal", "Percentile", "StDev", "Skewness",
+                   "Kurtosis", "Effort [CPU-h]", "Measurement"]
     else:
-        header = "Sigma,Samples,Nominal,Percentile,Percentile LB,Percentile UB," \
-                 "StDev,Skewness,Kurtosis,Effort [CPU-h]\n"
-        line = "%s,%s,%s,%s,%s,%s,%s,%s,%s,%s\n" % (sigma_value, num_samples, nominal,
-                                                    percentile, percentile_lb,
-                                                    percentile_ub, stdev, skewness,
-                                                    kurtosis, effort)
+        columns = ["Sigma", "Samples", "Nominal", "Percentile", "Percentile LB",
+                   "Percentile UB", "StDev", "Skewness", "Kurtosis", "Effort [CPU-h]",
+                   "Measurement"]
  
     with open(output_file, 'w') as f:
-        f.write(header)
-        f.write(line)
+        f.write("%s\n" % ','.join(columns))
+        for row in deck_rows:
+            f.write("%s\n" % ','.join("%s" % row[x] for x in columns))
  
  
 def checkNominalFileExists(nominal_file):
@@ -212,9 +393,20 @@ def usage():
                            "mc_sim.mt0 file. If set to 'mpp0' it is based off the "
                            "'mc_sim.mpp0' file."),
         ("", "", "\tThe default format is 'mpp0'"),
+        ("--measurements=", ":", "Comma separated list of the measurements to "
+                                 "postprocess, or 'all' for every measurement of the "
+                                 "results. The MC results of a deck are read once for "
+                                 "all of them."),
+        ("", "", "\tThe default measurement is 'cp2d'"),
         ("--runtime_off", ":", "This flag will turn off runtime/effort computation for "
                                "a completed simulation."),
-        ("", "", "\tThe default method is to compute runtimes.")
+        ("", "", "\tThe default method is to compute runtimes."),
+        ("--jobs=", ":", "The number of processes used to postprocess the decks. "
+                         "Default is 1."),
+        ("--force", ":", "Postprocess every deck, also the ones whose results did "
+                         "not change since the last run."),
+        ("--parquet", ":", "Also write the consolidated results as a Parquet file "
+                           "(needs pandas and pyarrow)."),
     ]
     print("Options:")
     for opt, delm, desc in optional_arg_info:
@@ -253,7 +445,11 @@ def parseInputArgs(input_args, user_options=None):
     long_opts = ["help",
                  "root_directory=",
                  "format=",
-                 "runtime_off"
+                 "measurements=",
+                 "runtime_off",
+                 "jobs=",
+                 "force",
+                 "parquet"
                  ]
  
     optlst, remainder = getopt.gnu_getopt(input_args, short_opts, long_opts)
@@ -273,9 +469,21 @@ def parseInputArgs(input_args, user_options=None):
         elif opt in "--format":
             user_options['FORMAT'] = arg.lower()
  
+        elif opt in "--measurements":
+            user_options['MEASUREMENT_NAME'] = arg
+ 
         elif opt in "--runtime_off":
             user_options['GET_RUNTIME'] = False
  
+        elif opt in "--jobs":
+            user_options['NUM_JOBS'] = max(1, int(arg))
+ 
+        elif opt in "--force":
+            user_options['FORCE'] = True
+ 
+        elif opt in "--parquet":
+            user_options['PARQUET'] = True
+ 
     return user_options
  
  
@@ -293,10 +501,13 @@ def loadDefaultOptions(user_options=None):
     user_options['MC_MT0_FILENAME'] = "mc_sim.mt0"
     user_options['MC_MPP0_FILENAME'] = "mc_sim.mpp0"
     user_options['GET_RUNTIME'] = True
+    user_options['SUMMARY_FILENAME'] = "statistics_summary.csv"
+    user_options['NUM_JOBS'] = 1
+    user_options['FORCE'] = False
+    user_options['PARQUET'] = False
  
     return user_options
  
  
 if __name__ == "__main__":
     sys.exit(main())
- 
@@ -1,7 +1,7 @@
 import sys
 import os
-import glob
 import getopt
+import json
  
 import utilities.fileIO as fileIO
 from runMonteCarlo import printUserOptions
@@ -24,7 +24,10 @@ def usage():
         ("--output_file=", ":", "If this option is specified, a verbose output of the "
                                 "paths that are DONE and INCOMPLETE will be written to "
                                 "this file."),
-        ("", "", "\tThe default behavior is to suppress writing out any data.")
+        ("", "", "\tThe default behavior is to suppress writing out any data."),
+        ("--output_format=", ":", "[csv | json] The format of the output file. 'json' "
+                                  "also holds the DONE/INCOMPLETE/TOTAL counts."),
+        ("", "", "\tThe default format is 'csv'.")
     ]
     print("Options:")
     for opt, delm, desc in optional_arg_info:
@@ -59,6 +62,7 @@ def loadDefaultArgs(user_options=None):
  
     user_options['MPP0_FILENAME'] = "mc_sim.mpp0"
     user_options['OUTPUT_FILE'] = None
+    user_options['OUTPUT_FORMAT'] = "csv"
  
     return user_options
  
@@ -70,7 +74,8 @@ def parseInputArgs(input_args, user_options=None):
     short_opts = "h"
     long_opts = ["help",
                  "qa_directory=",
-                 "output_file="]
+                 "output_file=",
+                 "output_format="]
  
     optlst, remainder = getopt.gnu_getopt(input_args, short_opts, long_opts)
  
@@ -89,32 +94,54 @@ def parseInputArgs(input_args, user_options=None):
         elif opt in "--output_file":
             user_options['OUTPUT_FILE'] = arg
  
-    return user_options
+        elif opt in "--output_format":
+            user_options['OUTPUT_FORMAT'] = arg.lower()
  
+    return user_options
  
-def queryStatus(qa_directory, mpp0_filename):
-    # Init
-    count_done = 0
-    count_incomplete = 0
-    count_total = 0
-    write_buffer = list()
  
+def getDeckStatuses(qa_directory, mpp0_filename):
+    """
+    Returns the (deck_path, status) of every deck of the DECKS directory, DONE if
+    the deck has its mpp0 file. The DECKS directory is listed once with os.scandir
+    and each deck costs a single stat.
+    """
     # Assume path has a /DECKS subdirectory
-    for deck_path in glob.glob(os.path.join(qa_directory, "DECKS", "*")):
-        count_total += 1
-        mpp0_file = os.path.join(deck_path, mpp0_filename)
-        if not os.path.exists(mpp0_file):
-            count_incomplete += 1
-            status = "INCOMPLETE"
+    decks_path = os.path.join(qa_directory, "DECKS")
+    try:
+        deck_names = sorted(entry.name for entry in os.scandir(decks_path)
+                            if not entry.name.startswith('.'))
+    except OSError as _:
+        deck_names = list()
+ 
+    deck_statuses = list()
+    for deck_name in deck_names:
+        deck_path = os.path.join(decks_path, deck_name)
+        if os.path.exists(os.path.join(deck_path, mpp0_filename)):
+            deck_statuses.append((deck_path, "DONE"))
         else:
-            count_done += 1
-            status = "DONE"
-        line = "%s,%s" % (deck_path, status)
-        write_buffer.append(line)
+            deck_statuses.append((deck_path, "INCOMPLETE"))
+    return deck_statuses
+ 
+ 
+def queryStatus(qa_directory, mpp0_filename):
+    deck_statuses = getDeckStatuses(qa_directory, mpp0_filename)
+    write_buffer = ["%s,%s" % (deck_path, status) for deck_path, status in deck_statuses]
+    count_done = len([x for x in deck_statuses if x[1] == "DONE"])
+    count_total = len(deck_statuses)
+    count_incomplete = count_total - count_done
  
     return write_buffer, count_done, count_incomplete, count_total
  
  
+def formJSONStatusBuffer(qa_directory, write_buffer, ndone, nincomplete, ntotal):
+    status_data = {"qa_directory": qa_directory,
+                   "counts": {"DONE": ndone, "INCOMPLETE": nincomplete, "TOTAL": ntotal},
+                   "decks": [dict(zip(("deck", "status"), line.rsplit(',', 1)))
+                             for line in write_buffer]}
+    return [json.dumps(status_data, indent=2)]
+ 
+ 
 def printStatus(ndone, nincomplete, ntotal):
     info_list = [("DONE", "::", "%s" % ndone),
                  ("INCOMPLETE", "::", "%s" % nincomplete),
@@ -145,11 +172,11 @@ def main(input_args=None):
  
     # Write file
     if user_options['OUTPUT_FILE'] is not None:
+        if user_options.get('OUTPUT_FORMAT', "csv") == "json":
+            write_buffer = formJSONStatusBuffer(user_options['QA_DIRECTORY'],
+                                                write_buffer, ndone, nincomplete, ntotal)
         fileIO.writeBufferToFile(write_buffer, user_options['OUTPUT_FILE'],
                                  delimeter='\n')
  
 if __name__ == "__main__":
     sys.exit(main())
- 
- 
- 
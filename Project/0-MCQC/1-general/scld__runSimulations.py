@@ -0,0 +1,168 @@
+import getopt
+import os
+import sys
+
+import executor.funcs as executor
+
+
+def main(input_args=None):
+    if input_args is None:
+        input_args = sys.argv
+        user_options = loadDefaultOptions()
+        user_options = parseInputArgs(input_args, user_options)
+    else:
+        user_options = input_args
+
+    root_output_path = os.path.join(user_options['ROOT_DIRECTORY'], "DECKS")
+    sim_executor = executor.getExecutor(user_options)
+    sim_executor.run(root_output_path)
+
+
+def usage():
+    print("usage: %s [arguments] [options] [-h]" % sys.argv[0])
+
+    # Required arguments
+    required_arg_info = [
+        ("--root_directory=", ":", "The path to the QC directory, NOT including the "
+                                  "'DECKS' subdirectory"),
+    ]
+    print("Arguments:")
+    for opt, delm, desc in required_arg_info:
+        print('\t{0:<25} {1:<5} {2:<100}'.format(opt, delm, desc))
+
+    # Optional arguments
+    optional_arg_info = [
+        ("--executor=", ":", "[lsf | local] 'lsf' writes the job array launch script "
+                             "next to the DECKS directory, 'local' runs the "
+                             "simulations on this machine."),
+        ("", "", "\tThe default executor is 'local'"),
+        ("--jobs=", ":", "local: the number of simulations that run at the same time. "
+                         "Default is 1."),
+        ("--retries=", ":", "local: how many times a failed simulation is run again. "
+                            "Default is 1."),
+        ("--nominal_command=", ":", "local: the nominal simulator command, "
+                                    "{deck_path} is the deck directory. Default is "
+                                    "'%s'" % executor.NOMINAL_COMMAND),
+        ("--mc_command=", ":", "local: the MC simulator command, {cpus} is the "
+                               "--mc_cpus value. Default is "
+                               "'%s'" % executor.MC_COMMAND),
+        ("--mc_cpus=", ":", "local: the threads of an MC simulation. Default is 1."),
+        ("--timeout=", ":", "local: seconds after which a simulation is killed. "
+                            "Default is no limit."),
+        ("--skip_done", ":", "local: don't run the simulations that have their mt0 "
+                             "file."),
+        ("--lsf_cfg_file=", ":", "lsf: the DP config file of the MC jobs."),
+        ("--submit", ":", "lsf: run the launch script after writing it."),
+        ("--max_dp_workers=", ":", "lsf: the largest number of DP workers of an MC "
+                                   "job."),
+        ("--max_running_jobs=", ":", "lsf: the number of jobs of a job array that run "
+                                     "at the same time."),
+    ]
+    print("Options:")
+    for opt, delm, desc in optional_arg_info:
+        print('\t{0:<25} {1:<5} {2:<100}'.format(opt, delm, desc))
+
+    # Functionality
+    print("""\nFunctionality:
+    Runs the nominal and MC simulations of every deck of ROOT/DECKS. The local
+    executor writes the status, attempts and runtime of every simulation to
+    ROOT/%s; the results can then be postprocessed with scld__postprocess.py.
+    """ % executor.EXECUTOR_REPORT_FILE)
+
+
+def parseInputArgs(input_args, user_options=None):
+    if user_options is None:
+        user_options = dict()
+
+    short_opts = "h"
+    long_opts = ["help",
+                 "root_directory=",
+                 "executor=",
+                 "jobs=",
+                 "retries=",
+                 "nominal_command=",
+                 "mc_command=",
+                 "mc_cpus=",
+                 "timeout=",
+                 "skip_done",
+                 "lsf_cfg_file=",
+                 "submit",
+                 "max_dp_workers=",
+                 "max_running_jobs="
+                 ]
+
+    optlst, remainder = getopt.gnu_getopt(input_args, short_opts, long_opts)
+
+    if not optlst:
+        usage()
+        sys.exit(0)
+
+    for opt, arg in optlst:
+        if opt in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+
+        elif opt == "--root_directory":
+            user_options['ROOT_DIRECTORY'] = arg
+
+        elif opt == "--executor":
+            user_options['EXECUTOR'] = arg.lower()
+
+        elif opt == "--jobs":
+            user_options['NUM_JOBS'] = max(1, int(arg))
+
+        elif opt == "--retries":
+            user_options['RETRIES'] = max(0, int(arg))
+
+        elif opt == "--nominal_command":
+            user_options['NOMINAL_COMMAND'] = arg
+
+        elif opt == "--mc_command":
+            user_options['MC_COMMAND'] = arg
+
+        elif opt == "--mc_cpus":
+            user_options['MC_CPUS'] = max(1, int(arg))
+
+        elif opt == "--timeout":
+            user_options['TIMEOUT'] = float(arg)
+
+        elif opt == "--skip_done":
+            user_options['SKIP_DONE'] = True
+
+        elif opt == "--lsf_cfg_file":
+            user_options['LSF_CFG_FILE'] = arg
+
+        elif opt == "--submit":
+            user_options['SUBMIT'] = True
+
+        elif opt == "--max_dp_workers":
+            user_options['MAX_DP_WORKERS'] = max(1, int(arg))
+
+        elif opt == "--max_running_jobs":
+            user_options['MAX_RUNNING_JOBS'] = max(1, int(arg))
+
+    return user_options
+
+
+def loadDefaultOptions(user_options=None):
+    if user_options is None:
+        user_options = dict()
+
+    user_options['EXECUTOR'] = "local"
+    user_options['NUM_JOBS'] = 1
+    user_options['RETRIES'] = 1
+    user_options['NOMINAL_COMMAND'] = executor.NOMINAL_COMMAND
+    user_options['MC_COMMAND'] = executor.MC_COMMAND
+    user_options['MC_CPUS'] = 1
+    user_options['TIMEOUT'] = None
+    user_options['SKIP_DONE'] = False
+    user_options['LSF_CFG_FILE'] = None
+    user_options['SUBMIT'] = False
+    user_options['MAX_DP_WORKERS'] = None
+    user_options['MAX_RUNNING_JOBS'] = None
+
+    return user_options
+
+
+if __name__ == "__main__":
+    sys.exit(main())
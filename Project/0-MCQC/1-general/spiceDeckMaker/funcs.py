@@ -1,5 +1,16 @@
+import functools
+import os
 import sys
 import re
+ 
+# Number of compiled template decks kept in memory
+TEMPLATE_CACHE_SIZE = 512
+ 
+OUTPUT_LOAD_HEADER = '* Output Load'
+WHEN_CONDITION_HEADER = '* Pin definitions'
+VOLTAGES_HEADER = '* Voltage'
+ 
+ 
 def getFileLines(input_file):
     with open(input_file, 'r') as f:
         file_lines = f.readlines()
@@ -12,7 +23,7 @@ def writeFile(file_buffer, output_file):
  
  
 def getDontTouchPins(template_deck):
-    template_deck_lines = getFileLines(template_deck)
+    template_deck_lines = getCompiledTemplateDeck(template_deck).template_lines
     dt_line_index = 1
     dt_line = template_deck_lines[dt_line_index]
  
@@ -81,6 +92,125 @@ def getNominalSpiceDeckBuffer(template_deck, arc_info):
         write_list (list): The SPICE deck buffer that can be written
  
     """
+    compiled_deck = getCompiledTemplateDeck(template_deck)
+    return compiled_deck.render(arc_info)
+ 
+ 
+class CompiledTemplateDeck(object):
+    """
+    A template deck compiled once into its lines and the slots that depend on the
+    arc: the '$' lines, the output load / voltage / pin definition insertion hooks
+    and the glitch and pushout lines. render() copies the lines and only fills in
+    the slots (in template order), which gives the same buffer as
+    getNominalSpiceDeckBufferByLine.
+    """
+    # Slot types
+    DOLLAR = 0
+    OUTPUT_LOAD = 1
+    VOLTAGES = 2
+    PIN_DEFINITIONS = 3
+    GLITCH_MINQ = 4
+    GLITCH_MAXQ = 5
+    PUSHOUT = 6
+ 
+    def __init__(self, template_deck_lines):
+        self.template_lines = tuple(template_deck_lines)
+        self.lines = list()
+        self.slots = list()
+        for template_line in self.template_lines:
+            if '$' in template_line:
+                self.slots.append((len(self.lines), self.DOLLAR,
+                                   (template_line, splitDollarNames(template_line))))
+                self.lines.append(template_line)
+ 
+            elif OUTPUT_LOAD_HEADER in template_line:
+                self.lines.append(template_line)
+                self.slots.append((len(self.lines), self.OUTPUT_LOAD, None))
+                self.lines.append(None)
+ 
+            elif VOLTAGES_HEADER in template_line:
+                self.lines.append(template_line)
+                self.slots.append((len(self.lines), self.VOLTAGES, None))
+                self.lines.append(None)
+ 
+            elif WHEN_CONDITION_HEADER in template_line:
+                self.lines.append(template_line)
+                self.slots.append((len(self.lines), self.PIN_DEFINITIONS, None))
+                self.lines.extend([None, None, None])
+ 
+            else:
+                # The glitch and pushout rewrites only change lines with these keywords
+                if 'minq' in template_line:
+                    self.slots.append((len(self.lines), self.GLITCH_MINQ, template_line))
+                if 'maxq' in template_line:
+                    self.slots.append((len(self.lines), self.GLITCH_MAXQ, template_line))
+                if 'pushout_per' in template_line:
+                    self.slots.append((len(self.lines), self.PUSHOUT, template_line))
+                self.lines.append(template_line)
+ 
+    def render(self, arc_info):
+        write_list = list(self.lines)
+        rewrite_type = None
+        for pos, slot_type, slot_data in self.slots:
+            if slot_type == self.DOLLAR:
+                template_line, var_names = slot_data
+                write_list[pos] = fillTemplateLine(template_line, arc_info, var_names)
+ 
+            elif slot_type == self.OUTPUT_LOAD:
+                write_list[pos] = getOutputLoadLines(arc_info)
+ 
+            elif slot_type == self.VOLTAGES:
+                write_list[pos] = getExtraPowerPinsLines(arc_info)
+ 
+            elif slot_type == self.PIN_DEFINITIONS:
+                when_cond_line, when_pins = getWhenConditionLines(arc_info)
+                write_list[pos] = when_cond_line
+                write_list[pos + 1] = getUnspecifiedPinsLines(when_pins, arc_info)
+                write_list[pos + 2] = getUserFixedStatePinsLines(arc_info)
+ 
+            else:
+                # Only one of the glitch minq / glitch maxq / pushout rewrites applies
+                if rewrite_type is None:
+                    rewrite_type = getLineRewriteType(arc_info)
+                if slot_type != rewrite_type:
+                    continue
+                if slot_type == self.GLITCH_MINQ:
+                    write_list[pos] = get_glitch_minq_line(slot_data, arc_info)
+                elif slot_type == self.GLITCH_MAXQ:
+                    write_list[pos] = get_glitch_maxq_line(slot_data, arc_info)
+                else:
+                    write_list[pos] = getPushoutPerLine(slot_data, arc_info)
+ 
+        return write_list
+ 
+ 
+def getLineRewriteType(arc_info):
+    if 'glitch__minq' in arc_info['HEADER_INFO']:
+        return CompiledTemplateDeck.GLITCH_MINQ
+    elif 'glitch__maxq' in arc_info['HEADER_INFO'] or 'glitch__1' in arc_info['HEADER_INFO']:
+        return CompiledTemplateDeck.GLITCH_MAXQ
+    return CompiledTemplateDeck.PUSHOUT
+ 
+ 
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compileTemplateDeck(template_deck, mtime, size):
+    return CompiledTemplateDeck(getFileLines(template_deck))
+ 
+ 
+def getCompiledTemplateDeck(template_deck):
+    """
+    Returns the compiled template deck from the LRU cache; a template deck is
+    read and compiled again only if it was modified.
+    """
+    stat = os.stat(template_deck)
+    return compileTemplateDeck(template_deck, stat.st_mtime, stat.st_size)
+ 
+ 
+def getNominalSpiceDeckBufferByLine(template_deck, arc_info):
+    """
+    The line-by-line renderer, which reads and scans the template deck for every
+    deck. Kept as the reference for getNominalSpiceDeckBuffer.
+    """
     template_deck_lines = getFileLines(template_deck)
     output_load_header = '* Output Load'
     when_condition_header = '* Pin definitions'
@@ -119,10 +249,7 @@ def getNominalSpiceDeckBuffer(template_deck, arc_info):
             write_list.append(glitch_maxq_line)
  
         elif 'pushout_per' in template_line:
-            equals_idx = template_line.index('=')
-            pushout_idx = template_line.index('pushout=')
-            metric_thresh = str(arc_info['PUSHOUT_PER'])
-            pushout_per_line = template_line[:equals_idx+1]+' '+ metric_thresh+' '+template_line[pushout_idx:]
+            pushout_per_line = getPushoutPerLine(template_line, arc_info)
             write_list.append(pushout_per_line)
         else:
             write_list.append(template_line)
@@ -130,6 +257,14 @@ def getNominalSpiceDeckBuffer(template_deck, arc_info):
     return write_list
  
  
+def getPushoutPerLine(template_line, arc_info):
+    equals_idx = template_line.index('=')
+    pushout_idx = template_line.index('pushout=')
+    metric_thresh = str(arc_info['PUSHOUT_PER'])
+    pushout_per_line = template_line[:equals_idx+1]+' '+ metric_thresh+' '+template_line[pushout_idx:]
+    return pushout_per_line
+ 
+ 
 def getExtraPowerPinsLines(input_options):
     template_deck_powerpins = ["VDD", "VSS", "VPP", "VBB"]
     new_power_pin_list = list()
@@ -288,8 +423,9 @@ def splitDollarNames(template_line):
     return var_name_list
  
  
-def fillTemplateLine(template_line, input_options):
-    var_names = splitDollarNames(template_line)
+def fillTemplateLine(template_line, input_options, var_names=None):
+    if var_names is None:
+        var_names = splitDollarNames(template_line)
     var_values = getDollarValues(var_names, input_options)
     is_negative = False
     if 'MEAS_DEGRADE_PER' in template_line and 'PUSHOUT_PER' in var_names:
@@ -0,0 +1,63 @@
+import glob
+import os
+import sys
+sys.path.append('./')
+import spiceDeckMaker.funcs as spiceDeckMaker
+
+# The template decks of the flow
+TEMPLATE_DECK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                 os.pardir, os.pardir, "2-flow")
+
+# Plain, glitch minq and glitch maxq headers
+HEADER_INFOS = ("hold__template__CP__rise__D__fall__1",
+                "hold__template__CP__rise__D__fall__glitch__minq__1",
+                "hold__template__CP__rise__D__fall__glitch__maxq__1")
+
+# Covers every header, pushout sign, when condition and side pin state combination
+NUM_ARCS = 12
+
+
+def _getTemplateDecks():
+    template_decks = list()
+    for template_deck in sorted(glob.glob(os.path.join(TEMPLATE_DECK_DIR, "**", "*.sp"),
+                                          recursive=True)):
+        lines = spiceDeckMaker.getFileLines(template_deck)
+        if len(lines) > 1 and 'DONT_TOUCH_PINS' in lines[1]:
+            template_decks.append(template_deck)
+    return template_decks
+
+
+def _getArcInfo(template_deck, arc_num):
+    var_names = set()
+    for line in spiceDeckMaker.getFileLines(template_deck):
+        if '$' in line:
+            var_names.update(spiceDeckMaker.splitDollarNames(line))
+    arc_info = dict((name, "%s_%s" % (name.lower(), arc_num)) for name in var_names)
+    arc_info.update({
+        'TEMPLATE_DECK': os.path.basename(template_deck),
+        'HEADER_INFO': HEADER_INFOS[arc_num % len(HEADER_INFOS)],
+        'PUSHOUT_PER': "-0.4" if arc_num % 2 else "0.4",
+        'GLITCH': "0.1",
+        'CONSTR_PIN': "D",
+        'REL_PIN': "CP",
+        'OUTPUT_PINS': ["Q"],
+        'WHEN': "NO_CONDITION" if arc_num % 4 else "!SE&SI",
+        'TEMPLATE_PINLIST': "D CP SE SI Q VDD VSS",
+        'NETLIST_PINS': "D CP SE SI Q VDD VSS VPP VBB VDDR",
+        'SIDE_PIN_STATES': [('SE', 'low')] if arc_num % 3 else [],
+        'VECTOR': "",
+        'DONT_TOUCH_PINS': spiceDeckMaker.getDontTouchPins(template_deck),
+    })
+    return arc_info
+
+
+class TestTemplateDecks:
+    def test_compiled_renderer(self):
+        template_decks = _getTemplateDecks()
+        assert template_decks
+        for template_deck in template_decks:
+            for arc_num in range(NUM_ARCS):
+                arc_info = _getArcInfo(template_deck, arc_num)
+                assert spiceDeckMaker.getNominalSpiceDeckBuffer(template_deck, arc_info) == \
+                    spiceDeckMaker.getNominalSpiceDeckBufferByLine(template_deck, arc_info), \
+                    (template_deck, arc_num)
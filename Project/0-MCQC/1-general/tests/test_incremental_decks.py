@@ -0,0 +1,193 @@
+import glob
+import os
+import shutil
+import sys
+sys.path.append('./')
+import runMonteCarlo
+import spiceDeckMaker.funcs as spiceDeckMaker
+
+# The min_pulse_width template decks of the flow
+TEMPLATE_DECK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                                 os.pardir, "2-flow", "min_pulse_width")
+
+NUM_ARCS = 4
+NUM_SAMPLES = 100
+TABLE_POINT = "(1,1)"
+
+
+def _getTemplateDeck():
+    for template_deck in sorted(glob.glob(os.path.join(TEMPLATE_DECK_DIR, "*.sp"))):
+        lines = spiceDeckMaker.getFileLines(template_deck)
+        if len(lines) > 1 and 'DONT_TOUCH_PINS' in lines[1]:
+            return template_deck
+
+
+def _createSpiceInfo():
+    template_deck = _getTemplateDeck()
+    var_names = set()
+    for line in spiceDeckMaker.getFileLines(template_deck):
+        if '$' in line:
+            var_names.update(spiceDeckMaker.splitDollarNames(line))
+    spice_info = {TABLE_POINT: dict()}
+    for arc_num in range(NUM_ARCS):
+        arc_info = dict((name, "%s_%s" % (name.lower(), arc_num)) for name in var_names)
+        arc_info.update({
+            'TEMPLATE_DECK': os.path.basename(template_deck),
+            'HEADER_INFO': "min_pulse_width__template__CP__rise__CP__fall__1",
+            'PUSHOUT_PER': "0.4", 'GLITCH': "0.1", 'CONSTR_PIN': "CP", 'REL_PIN': "CP",
+            'OUTPUT_PINS': ["Q"], 'WHEN': "NO_CONDITION",
+            'TEMPLATE_PINLIST': "D CP SE SI Q VDD VSS",
+            'NETLIST_PINS': "D CP SE SI Q VDD VSS VPP VBB VDDR",
+            'SIDE_PIN_STATES': [], 'VECTOR': "",
+            'DONT_TOUCH_PINS': spiceDeckMaker.getDontTouchPins(template_deck),
+            'ARC_TYPE': "min_pulse_width", 'CELL_NAME': "SYNDFF%sD1" % arc_num,
+            'CONSTR_PIN_DIR': "rise", 'REL_PIN_DIR': "fall", 'LIT_WHEN': "notSE",
+            'INDEX_3_INDEX': None, 'VALID_ARC': True})
+        spice_info[TABLE_POINT][arc_num] = arc_info
+    return spice_info, os.path.dirname(template_deck)
+
+
+def _createDecks(spice_info, template_deck_path, root_output_path, **kwargs):
+    return runMonteCarlo.createSPICEdecks(spice_info, template_deck_path, root_output_path,
+                                          NUM_SAMPLES, "hspice", **kwargs)
+
+
+def _getDeckName(spice_info, arc_num):
+    return runMonteCarlo.getOutputPathName(spice_info[TABLE_POINT][arc_num], TABLE_POINT)
+
+
+def _touchDecks(root_output_path):
+    # Old mtimes show which decks are written again
+    for deck_name in os.listdir(root_output_path):
+        deck_path = os.path.join(root_output_path, deck_name)
+        if os.path.isdir(deck_path):
+            for name in os.listdir(deck_path):
+                os.utime(os.path.join(deck_path, name), (0, 0))
+
+
+def _getWrittenDecks(root_output_path):
+    return sorted(deck_name for deck_name in os.listdir(root_output_path)
+                  if os.path.isdir(os.path.join(root_output_path, deck_name)) and
+                  os.path.getmtime(os.path.join(root_output_path, deck_name,
+                                                "nominal_sim.sp")) != 0)
+
+
+class TestIncrementalDecks:
+    def test_unchanged_decks_are_skipped(self, tmp_path, capsys):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        assert _createDecks(spice_info, template_deck_path, root_output_path) == NUM_ARCS
+        assert len(runMonteCarlo.loadDecksManifest(root_output_path)) == NUM_ARCS
+        _touchDecks(root_output_path)
+
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True)
+        assert "0 added, 0 changed, %s unchanged" % NUM_ARCS in capsys.readouterr().out
+        assert _getWrittenDecks(root_output_path) == []
+
+    def test_changed_decks_are_regenerated(self, tmp_path, capsys):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        _createDecks(spice_info, template_deck_path, root_output_path)
+        _touchDecks(root_output_path)
+
+        spice_info[TABLE_POINT][1]['PUSHOUT_PER'] = "0.2"
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True)
+        assert "0 added, 1 changed, %s unchanged" % (NUM_ARCS - 1) in \
+            capsys.readouterr().out
+        assert _getWrittenDecks(root_output_path) == [_getDeckName(spice_info, 1)]
+
+        # The deck settings are inputs of every deck
+        input_hash = runMonteCarlo.getDeckInputHash(
+            [(TABLE_POINT, spice_info[TABLE_POINT][0])], template_deck_path, NUM_SAMPLES,
+            "hspice")
+        assert input_hash != runMonteCarlo.getDeckInputHash(
+            [(TABLE_POINT, spice_info[TABLE_POINT][0])], template_deck_path,
+            NUM_SAMPLES + 1, "hspice")
+
+    def test_orphaned_decks(self, tmp_path):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        _createDecks(spice_info, template_deck_path, root_output_path)
+        old_decks = runMonteCarlo.loadDecksManifest(root_output_path)
+        orphan = _getDeckName(spice_info, 2)
+        del spice_info[TABLE_POINT][2]
+
+        deck_jobs = [(TABLE_POINT, x) for x in spice_info[TABLE_POINT].values()]
+        deck_dirs = runMonteCarlo.getDeckDirectories(deck_jobs)
+        assert runMonteCarlo.getOrphanedDeckDirectories(root_output_path, old_decks,
+                                                        deck_dirs) == [orphan]
+
+        # Only reported
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True)
+        assert os.path.isdir(os.path.join(root_output_path, orphan))
+        assert orphan not in runMonteCarlo.loadDecksManifest(root_output_path)
+
+        # Not in the manifest anymore, so kept by remove_orphans too
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True,
+                     remove_orphans=True)
+        assert os.path.isdir(os.path.join(root_output_path, orphan))
+
+    def test_orphaned_decks_are_removed(self, tmp_path):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        _createDecks(spice_info, template_deck_path, root_output_path)
+        orphan = _getDeckName(spice_info, 2)
+        del spice_info[TABLE_POINT][2]
+
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True,
+                     remove_orphans=True)
+        assert not os.path.exists(os.path.join(root_output_path, orphan))
+        assert sorted(x for x in os.listdir(root_output_path) if not x.startswith('.')) == \
+            sorted(_getDeckName(spice_info, x) for x in spice_info[TABLE_POINT])
+
+    def test_unlisted_decks_are_kept(self, tmp_path, capsys):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        _createDecks(spice_info, template_deck_path, root_output_path)
+        unlisted = _getDeckName(spice_info, 2)
+        del spice_info[TABLE_POINT][2]
+        # A deck directory that the manifest does not know about
+        os.remove(runMonteCarlo.getDecksManifestFile(root_output_path))
+        capsys.readouterr()
+
+        _createDecks(spice_info, template_deck_path, root_output_path, remove_orphans=True)
+        assert os.path.isdir(os.path.join(root_output_path, unlisted))
+        assert "not in the manifest (not removed): %s" % unlisted in capsys.readouterr().out
+        deck_dirs = runMonteCarlo.getDeckDirectories(
+            [(TABLE_POINT, x) for x in spice_info[TABLE_POINT].values()])
+        old_decks = runMonteCarlo.loadDecksManifest(root_output_path)
+        assert runMonteCarlo.getOrphanedDeckDirectories(root_output_path, old_decks,
+                                                        deck_dirs) == []
+        assert runMonteCarlo.getUnlistedDeckDirectories(root_output_path, old_decks,
+                                                        deck_dirs) == [unlisted]
+
+    def test_corrupt_or_missing_manifest(self, tmp_path, capsys):
+        spice_info, template_deck_path = _createSpiceInfo()
+        root_output_path = str(tmp_path / "DECKS")
+        _createDecks(spice_info, template_deck_path, root_output_path)
+        manifest_file = runMonteCarlo.getDecksManifestFile(root_output_path)
+        shutil.copy(manifest_file, str(tmp_path / "manifest.json"))
+        capsys.readouterr()
+
+        with open(manifest_file, 'w') as f:
+            f.write('{"version": 1, "decks": {')
+        assert runMonteCarlo.loadDecksManifest(root_output_path) == dict()
+        _touchDecks(root_output_path)
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True)
+        assert "%s added, 0 changed, 0 unchanged" % NUM_ARCS in capsys.readouterr().out
+        assert len(_getWrittenDecks(root_output_path)) == NUM_ARCS
+
+        os.remove(manifest_file)
+        _touchDecks(root_output_path)
+        _createDecks(spice_info, template_deck_path, root_output_path, incremental=True)
+        assert "%s added, 0 changed, 0 unchanged" % NUM_ARCS in capsys.readouterr().out
+        assert len(_getWrittenDecks(root_output_path)) == NUM_ARCS
+
+        # A manifest of another version
+        shutil.copy(str(tmp_path / "manifest.json"), manifest_file)
+        with open(manifest_file, 'r') as f:
+            manifest_text = f.read()
+        with open(manifest_file, 'w') as f:
+            f.write(manifest_text.replace('"version": %s' % runMonteCarlo.DECKS_MANIFEST_VERSION,
+                                          '"version": 0'))
+        assert runMonteCarlo.loadDecksManifest(root_output_path) == dict()
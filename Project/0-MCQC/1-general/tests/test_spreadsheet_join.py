@@ -0,0 +1,68 @@
+import random
+import sys
+
+import pytest
+sys.path.append('./')
+import libraryParser.funcs as library_parser
+import scld__generate_spreadsheet as spreadsheet
+
+PINS = ("D", "SE", "SI", "D1", "D2")
+# findMatchingMCObjs fails in bundle mode for library pins without a "D"
+BUNDLE_PINS = ("D", "D1", "D2", "D3")
+TIMING_TYPES = ("hold_rising", "setup_rising", "hold_falling")
+TABLE_POINTS = ("1-1", "2-3", "5-5")
+
+
+def _createJoinData(num_cells, pins):
+    """Sensitivity data of num_cells cells and one MC object per arc and table point."""
+    rng = random.Random(3)
+    lib_data = dict()
+    mc_objs_list = list()
+    for cell_num in range(num_cells):
+        cell = "SYNDFF%04dD1" % cell_num
+        for pin in pins:
+            for t_type in TIMING_TYPES:
+                tables = lib_data.setdefault(cell, dict()).setdefault(pin, dict()) \
+                    .setdefault("CP", dict()).setdefault(t_type, dict()) \
+                    .setdefault("!SE", dict()).setdefault("none", dict())
+                for table_name in ("rise_constraint", "fall_constraint"):
+                    tables[table_name] = {
+                        'index_1': ["0.1"] * 5, 'index_2': ["0.1"] * 5,
+                        'early': ["%.5f" % rng.random() for _ in range(25)],
+                        'late': ["%.5f" % rng.random() for _ in range(25)]}
+                    pin_dir = table_name.split('_')[0]
+                    rel_pin_dir = "rise" if "rising" in t_type else "fall"
+                    for table_point in TABLE_POINTS:
+                        mc_objs_list.append(spreadsheet.MCData(
+                            "", t_type, cell, pin, pin_dir, "CP", rel_pin_dir, "notSE",
+                            "!SE", table_point, len(mc_objs_list) + 1))
+    return lib_data, mc_objs_list
+
+
+def _storeVarietyDataByScan(mc_objs_list, lib_data, bundle_mode):
+    # The join of storeAllVarietyDataInMCObjs as a scan of all MC objects per table
+    for cell, pin, rel_pin, t_type, when, t_sense, table_name, sigma in \
+            library_parser.flattenLibData(lib_data):
+        for mc_obj in spreadsheet.findMatchingMCObjs(cell, pin, rel_pin, t_type, when,
+                                                     table_name, sigma, mc_objs_list,
+                                                     bundle_mode):
+            vec_point = spreadsheet.convertTablePointToVectorPoint(mc_obj.table_point)
+            mc_obj.variety_sigma = float(lib_data[cell][pin][rel_pin][t_type][when][
+                t_sense][table_name][sigma][vec_point])*1e3
+
+
+def _join(join, lib_data, mc_objs_list, bundle_mode):
+    for mc_obj in mc_objs_list:
+        mc_obj.variety_sigma = None
+    join(mc_objs_list, lib_data, bundle_mode)
+    return [mc_obj.variety_sigma for mc_obj in mc_objs_list]
+
+
+@pytest.mark.parametrize("bundle_mode", [False, True])
+def test_indexed_join(bundle_mode):
+    lib_data, mc_objs_list = _createJoinData(4, BUNDLE_PINS if bundle_mode else PINS)
+    by_scan = _join(_storeVarietyDataByScan, lib_data, mc_objs_list, bundle_mode)
+    indexed = _join(spreadsheet.storeAllVarietyDataInMCObjs, lib_data, mc_objs_list,
+                    bundle_mode)
+    assert all(x is not None for x in by_scan)
+    assert indexed == by_scan
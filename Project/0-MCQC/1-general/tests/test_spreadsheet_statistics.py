@@ -0,0 +1,64 @@
+import sys
+sys.path.append('./')
+import scld__generate_spreadsheet as spreadsheet
+import scld__postprocess as postprocess
+
+DECK_NAME = "hold_SYNDFF0D1_D_rise_CP_rise_notSE_1-1"
+MEASUREMENTS = ("cp2d", "d2q")
+
+
+def _getRow(measurement, sigma):
+    return {"Measurement": measurement, "Sigma": sigma, "Samples": "1000",
+            "Nominal": "20.0", "Percentile": "1.5", "Percentile LB": None,
+            "Percentile UB": None, "StDev": "0.5", "Skewness": "0.1", "Kurtosis": "3.0",
+            "Effort [CPU-h]": "0.2"}
+
+
+def _writeQADirectory(tmp_path, measurements=MEASUREMENTS):
+    deck_path = tmp_path / "DECKS" / DECK_NAME
+    deck_path.mkdir(parents=True)
+    postprocess.writeStatisticsFile(
+        str(deck_path / "statistics.csv"),
+        [_getRow(measurement, "%s.0" % (num + 1)) for num, measurement
+         in enumerate(measurements)])
+    return str(tmp_path / "DECKS")
+
+
+def _populate(qa_directory, measurement=None):
+    return spreadsheet.populateAllMCData(
+        spreadsheet.createAllMCDataObjects(qa_directory, measurement))
+
+
+class TestStatisticsRows:
+    def test_first_measurement_by_default(self, tmp_path, capsys):
+        mc_objs_list = _populate(_writeQADirectory(tmp_path))
+        assert [(x.measurement, x.mc_sigma) for x in mc_objs_list] == [("cp2d", "1.0")]
+        assert "1 statistics files have more than one measurement" in \
+            capsys.readouterr().out
+
+    def test_selected_measurement(self, tmp_path, capsys):
+        mc_objs_list = _populate(_writeQADirectory(tmp_path), "d2q")
+        assert [(x.measurement, x.mc_sigma) for x in mc_objs_list] == [("d2q", "2.0")]
+        assert "WARNING" not in capsys.readouterr().out
+        assert _populate(_writeQADirectory(tmp_path / "other"), "temper") == []
+
+    def test_all_measurements(self, tmp_path):
+        mc_objs_list = _populate(_writeQADirectory(tmp_path), "all")
+        assert [(x.measurement, x.mc_sigma) for x in mc_objs_list] == [("cp2d", "1.0"),
+                                                                      ("d2q", "2.0")]
+        for mc_obj in mc_objs_list:
+            mc_obj.variety_sigma = 1.5
+        spreadsheet.computeAllErrorsInMCObjs(mc_objs_list)
+        write_buffer = spreadsheet.getOutputFileWriteBuffer(mc_objs_list)
+        assert write_buffer[0].endswith(",Effort [CPU-h],Measurement")
+        assert [x.split(',')[-1] for x in write_buffer[1:]] == list(MEASUREMENTS)
+
+    def test_statistics_file_without_measurement_column(self, tmp_path):
+        deck_path = tmp_path / "DECKS" / DECK_NAME
+        deck_path.mkdir(parents=True)
+        (deck_path / "statistics.csv").write_text(
+            "Sigma,Samples,Nominal,Percentile,StDev,Skewness,Kurtosis,Effort [CPU-h]\n"
+            "1.0,1000,20.0,1.5,0.5,0.1,3.0,0.2\n")
+        mc_objs_list = _populate(str(tmp_path / "DECKS"))
+        assert [(x.measurement, x.mc_sigma) for x in mc_objs_list] == [(None, "1.0")]
+        assert spreadsheet.parseStatisticsFile(str(deck_path / "statistics.csv"))[0] == "1.0"
@@ -10,6 +10,7 @@ specific arcs, random cell, etc.) for use down the flow.
 import fnmatch
 import os
 import qaTemplateMaker.funcs as createQATemplate
+import netlistIndex.funcs as netlistIndex
  
  
 def parseQACharacteristicsInfo(arc_list, root_netlist_path,
@@ -19,6 +20,11 @@ def parseQACharacteristicsInfo(arc_list, root_netlist_path,
  
     spice_deck_info = dict()
     arc_count = 0
+ 
+    # Index the netlists of all cells up front (cached across table points and runs)
+    netlist_index = netlistIndex.getNetlistIndex(root_netlist_path)
+    netlist_index.update([netlist_index.resolvePath(arcCharacteristics__getCellName(arc))
+                          for arc in arc_list if arc.templateDeck() is not None])
     for arc in arc_list:
         if arc.templateDeck() is None:
             continue
@@ -53,7 +59,7 @@ def parseQACharacteristicsInfo(arc_list, root_netlist_path,
         cell_name = arcCharacteristics__getCellName(arc)
         spice_deck_info[arc_count]['CELL_NAME'] = cell_name
  
-        netlist_path = getNetlistPath(root_netlist_path, cell_name)
+        netlist_path = netlist_index.resolvePath(cell_name)
         spice_deck_info[arc_count]['NETLIST_PATH'] = netlist_path
  
         rel_pin = arcCharacteristics__getRelPin(arc)
@@ -91,7 +97,7 @@ def parseQACharacteristicsInfo(arc_list, root_netlist_path,
         max_slew = arcCharacteristics__getMaxSlew(arc)
         spice_deck_info[arc_count]['MAX_SLEW'] = max_slew
  
-        netlist_pins_str = getNetlistPinsStr(netlist_path)
+        netlist_pins_str = netlist_index.getPinsStr(netlist_path)
         spice_deck_info[arc_count]['NETLIST_PINS'] = netlist_pins_str
  
         # Constr pin slew for constraints
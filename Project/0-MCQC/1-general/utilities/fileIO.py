@@ -6,6 +6,7 @@ __email__ = rahulk@tsmc.com
 __name__ = "fileIO"
  
 import fnmatch
+import os
  
 def findMatchesInBuffer(input_buffer, pattern, starting_idx=0):
     """
@@ -47,3 +48,16 @@ def readFile(input_file):
 def writeBufferToFile(write_buffer, output_file, delimeter='', mode='w'):
     with open(output_file, mode) as f:
         f.write(delimeter.join(write_buffer))
+ 
+ 
+def listDir(path):
+    """
+    Returns the sorted (name, is_dir) entries of a directory, skipping hidden
+    entries like glob does. A missing directory has no entries.
+    """
+    try:
+        entries = [(entry.name, entry.is_dir()) for entry in os.scandir(path)
+                   if not entry.name.startswith('.')]
+    except OSError as _:
+        return list()
+    return sorted(entries)
@@ -9,7 +9,15 @@ import sys
 import getopt
 import os
 import math
-import subprocess
+import bisect
+import collections
+import functools
+import re
+ 
+try:
+    import numpy as np
+except ImportError:
+    np = None
  
 import utilities.fileIO as fileIO
  
@@ -107,13 +115,218 @@ class MPP0Data(object):
         return float(self.runtime) * float(self.cpus)
  
  
+class MPP0Measurement(object):
+ 
+    def __init__(self, name):
+        self.name = name
+ 
+        # CI bounds
+        self.ci_lb = None
+        self.ci_ub = None
+ 
+        # (lb, pred, ub) of every sample moment, e.g. 'mean' or 'stdDev'
+        self.moments = collections.OrderedDict()
+ 
+        # (lb, pred, ub) of every percentile, by column header, e.g. 'Q99.865'
+        self.percentiles = collections.OrderedDict()
+ 
+ 
+class MPP0Info(object):
+    """
+    The section index of an mpp0 file, built in one forward pass (see indexMPP0Lines).
+    """
+ 
+    def __init__(self, mpp0_file, mpp0_lines):
+        self.mpp0_file = mpp0_file
+        self.lines = mpp0_lines
+ 
+        # The first 'Number of Samples:' value (0 if there is none)
+        self.num_samples = 0
+        # Line of the sample moments header
+        self.moments_line_idx = None
+        # Lines that can hold a percentile column header
+        self.percentile_line_idxs = list()
+        # Line indices of the rows of every name (the text before the first space)
+        self.row_line_idxs = dict()
+        # Names of the rows of the sample moments section, in file order
+        self.measurement_names = list()
+ 
+    def findRow(self, name, starting_idx):
+        """
+        Returns the index of the first row of name from line starting_idx on, like
+        fileIO.findMatchesInBuffer(lines, "<name> *", starting_idx)[0].
+        """
+        row_line_idxs = self.row_line_idxs.get(name, ())
+        pos = bisect.bisect_left(row_line_idxs, starting_idx)
+        if pos == len(row_line_idxs):
+            raise IndexError("Couldn't find the row of %s in mpp0 file %s" % (
+                name, self.mpp0_file))
+        return row_line_idxs[pos]
+ 
+    def getMomentsIndices(self):
+        """
+        Same as getSampleMomentsIndicesFromMPP0File, from the index.
+        """
+        if self.moments_line_idx is None:
+            errmsg = "Couldn't find the header for the Sample_Moments section in mpp0 " \
+                     "file."
+            raise IndexError(errmsg)
+        header_lines = self.lines[self.moments_line_idx:self.moments_line_idx + 1]
+        idx_dict, _ = getSampleMomentsIndicesFromMPP0File(header_lines)
+        return idx_dict, self.moments_line_idx
+ 
+    def getPercentileIndices(self, percentile_header):
+        """
+        Same as getPercentileIndicesMPP0File: the last line matching the
+        percentile_header pattern and the first of its columns that matches it.
+        """
+        if MPP0_PERCENTILE_RE.search(percentile_header):
+            candidate_idxs = self.percentile_line_idxs
+        else:
+            candidate_idxs = range(len(self.lines))
+        header_line_idx = None
+        for line_idx in reversed(candidate_idxs):
+            if fnmatch.fnmatch(self.lines[line_idx], percentile_header):
+                header_line_idx = line_idx
+                break
+        if header_line_idx is None:
+            errmsg = "Couldn't find the percentile header for percentile %s in the mpp0 " \
+                     "file" % percentile_header
+            raise IndexError(errmsg)
+        percentile_idx, percentile_column_header, _ = getPercentileIndicesMPP0File(
+            self.lines[header_line_idx:header_line_idx + 1], percentile_header)
+        return percentile_idx, percentile_column_header, header_line_idx
+ 
+    def getMPP0Data(self, param_name, percentile_header="*Q99.865*"):
+        """
+        Returns the MPP0Data and the percentile column header of one measurement,
+        the same as parseMPP0FileByLine.
+        """
+        mpp0_data = MPP0Data(self.mpp0_file)
+        mpp0_data.num_samples = self.num_samples
+ 
+        idx_dict, moments_line_idx = self.getMomentsIndices()
+        row_idx = self.findRow(param_name, moments_line_idx)
+        storeLBSampleMomentsMPP0(mpp0_data, self.lines[row_idx - 1], idx_dict)
+        storePredSampleMomentsMPP0(mpp0_data, self.lines[row_idx], idx_dict)
+        storeUBSampleMomentsMPP0(mpp0_data, self.lines[row_idx + 1], idx_dict)
+ 
+        percentile_idx, percentile_column_header, header_line_idx = \
+            self.getPercentileIndices(percentile_header)
+        header_line = self.lines[header_line_idx]
+        row_idx = self.findRow(param_name, header_line_idx)
+        storeLBPercentileMPP0(mpp0_data, self.lines[row_idx - 1], percentile_idx, header_line)
+        storeUBPercentileMPP0(mpp0_data, self.lines[row_idx + 1], percentile_idx, header_line)
+        storePredPercentileMPP0(mpp0_data, self.lines[row_idx], percentile_idx, header_line)
+ 
+        return mpp0_data, percentile_column_header
+ 
+    def getPercentileColumns(self):
+        """
+        Returns the (column header, column index, header line index) of every
+        percentile column. A column that is in several header lines is taken from the
+        last one, like getPercentileIndicesMPP0File.
+        """
+        columns = collections.OrderedDict()
+        for line_idx in self.percentile_line_idxs:
+            header_info = self.lines[line_idx].strip().split()
+            for column_header in header_info:
+                if MPP0_PERCENTILE_COLUMN_RE.match(column_header):
+                    columns[column_header] = (header_info.index(column_header), line_idx)
+        return [(column_header, column_idx, line_idx)
+                for column_header, (column_idx, line_idx) in columns.items()]
+ 
+    def getMeasurement(self, name):
+        """
+        Returns the MPP0Measurement of a measurement with its CI bounds, sample
+        moments and every available percentile.
+        """
+        measurement = MPP0Measurement(name)
+        idx_dict, moments_line_idx = self.getMomentsIndices()
+        row_idx = self.findRow(name, moments_line_idx)
+        lb_info = self.lines[row_idx - 1].strip().split()
+        pred_info = self.lines[row_idx].strip().split()
+        ub_info = self.lines[row_idx + 1].strip().split()
+        measurement.ci_lb = lb_info[idx_dict['ci_idx']]
+        measurement.ci_ub = ub_info[idx_dict['ci_idx']]
+        for moment in MPP0_MOMENTS:
+            moment_idx = idx_dict['%s_idx' % moment]
+            measurement.moments[moment] = (lb_info[moment_idx], pred_info[moment_idx],
+                                           ub_info[moment_idx])
+ 
+        for column_header, column_idx, line_idx in self.getPercentileColumns():
+            try:
+                row_idx = self.findRow(name, line_idx)
+            except IndexError:
+                continue
+            if "CI" not in self.lines[line_idx]:
+                column_idx += 1
+            try:
+                measurement.percentiles[column_header] = tuple(
+                    self.lines[x].strip().split()[column_idx]
+                    for x in (row_idx - 1, row_idx, row_idx + 1))
+            except IndexError:
+                continue
+        return measurement
+ 
+    def getAllMeasurements(self):
+        """
+        Returns the MPP0Measurement of every measurement of the sample moments
+        section, by name.
+        """
+        return collections.OrderedDict((name, self.getMeasurement(name))
+                                       for name in self.measurement_names)
+ 
+ 
 # Progress file functions
+PROGRESS_RUNTIME_PATTERN = "Elapsed Time"
+PROGRESS_CPUS_PATTERN = "Number of workers requested"
+LIS_RUNTIME_PATTERN = "total elapsed time"
+LIS_THREADS_PATTERN = "Command line options"
+ 
+ 
+def grepFile(file_path, patterns):
+    """
+    Reads a file once and returns, for every (literal) pattern, the matching lines
+    joined like the output of `grep pattern file`. A missing or unreadable file
+    gives empty outputs, like grep.
+    """
+    matches = dict((pattern, list()) for pattern in patterns)
+    try:
+        with open(file_path, 'r', errors='replace') as f:
+            for line in f:
+                for pattern in patterns:
+                    if pattern in line:
+                        matches[pattern].append(line)
+    except (IOError, OSError) as _:
+        pass
+    return dict((pattern, ''.join(lines)) for pattern, lines in matches.items())
+ 
+ 
 def getRuntimeFromProgressFile(progress_file):
-    grep_cmd = ["bash", "-c", "grep 'Elapsed Time' %s" % progress_file]
-    proc = subprocess.Popen(grep_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = proc.communicate()
+    grep_output = grepFile(progress_file, [PROGRESS_RUNTIME_PATTERN])
+    return parseProgressRuntime(grep_output[PROGRESS_RUNTIME_PATTERN])
+ 
+ 
+def getCPUSRequestedFromProgressFile(progress_file):
+    grep_output = grepFile(progress_file, [PROGRESS_CPUS_PATTERN])
+    return parseProgressCPUs(grep_output[PROGRESS_CPUS_PATTERN])
+ 
+ 
+def getRuntimeInfoFromProgressFile(progress_file):
+    """
+    Returns the runtime [h] and the number of CPUs requested from one read of the
+    progress file.
+    """
+    grep_output = grepFile(progress_file, [PROGRESS_RUNTIME_PATTERN,
+                                           PROGRESS_CPUS_PATTERN])
+    return parseProgressRuntime(grep_output[PROGRESS_RUNTIME_PATTERN]), \
+        parseProgressCPUs(grep_output[PROGRESS_CPUS_PATTERN])
+ 
+ 
+def parseProgressRuntime(grep_output):
     try:
-        timestamp_info = ' '.join([x.strip() for x in stdout.decode().strip().split(
+        timestamp_info = ' '.join([x.strip() for x in grep_output.strip().split(
             'Time:')[1].split()])
  
         # Compute
@@ -137,12 +350,9 @@ def getRuntimeFromProgressFile(progress_file):
     return runtime_hrs_f
  
  
-def getCPUSRequestedFromProgressFile(progress_file):
-    grep_cmd = ["bash", "-c", "grep 'Number of workers requested' %s" % progress_file]
-    proc = subprocess.Popen(grep_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = proc.communicate()
+def parseProgressCPUs(grep_output):
     try:
-        num_cpus_requested_f = float(stdout.decode().strip().split()[-1])
+        num_cpus_requested_f = float(grep_output.strip().split()[-1])
     except IndexError as _:
         num_cpus_requested_f = None
     except ValueError as _:
@@ -153,11 +363,28 @@ def getCPUSRequestedFromProgressFile(progress_file):
  
 # LIS file functions
 def getRuntimeFromLisFile(lis_file):
-    grep_cmd = ["bash", "-c", "grep 'total elapsed time' %s" % lis_file]
-    proc = subprocess.Popen(grep_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = proc.communicate()
+    grep_output = grepFile(lis_file, [LIS_RUNTIME_PATTERN])
+    return parseLisRuntime(grep_output[LIS_RUNTIME_PATTERN])
+ 
+ 
+def getThreadsRequestedLisFile(lis_file):
+    grep_output = grepFile(lis_file, [LIS_THREADS_PATTERN])
+    return parseLisThreads(grep_output[LIS_THREADS_PATTERN])
+ 
+ 
+def getRuntimeInfoFromLisFile(lis_file):
+    """
+    Returns the runtime [h] and the number of threads requested from one read of
+    the lis file.
+    """
+    grep_output = grepFile(lis_file, [LIS_RUNTIME_PATTERN, LIS_THREADS_PATTERN])
+    return parseLisRuntime(grep_output[LIS_RUNTIME_PATTERN]), \
+        parseLisThreads(grep_output[LIS_THREADS_PATTERN])
+ 
+ 
+def parseLisRuntime(grep_output):
     try:
-        runtime_sec_f = float(stdout.decode().strip().split(' seconds')[0].split()[-1])
+        runtime_sec_f = float(grep_output.strip().split(' seconds')[0].split()[-1])
         runtime_hrs_f = runtime_sec_f / 3600
     except IndexError as _:
         runtime_sec_f = None
@@ -166,12 +393,9 @@ def getRuntimeFromLisFile(lis_file):
     return runtime_hrs_f
  
  
-def getThreadsRequestedLisFile(lis_file):
-    grep_cmd = ["bash", "-c", "grep 'Command line options' %s" % lis_file]
-    proc = subprocess.Popen(grep_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    stdout, stderr = proc.communicate()
+def parseLisThreads(grep_output):
     try:
-        threads_reqstd_f = float(stdout.decode().strip().split('-mt ')[1].split()[0])
+        threads_reqstd_f = float(grep_output.strip().split('-mt ')[1].split()[0])
     except IndexError as _:
         threads_reqstd_f = float(1)
  
@@ -180,34 +404,47 @@ def getThreadsRequestedLisFile(lis_file):
  
 # MT0 functions
 def parseMCMt0File(mc_mt0_file, measurement_name, percentile):
-    # Initialize object
-    mt0_obj = MCMT0Data(mc_mt0_file)
-    mt0_obj.percentile = percentile
+    return parseMCMt0FileMeasurements(mc_mt0_file, [measurement_name],
+                                      percentile)[measurement_name]
  
-    # Get MC Data and store
-    mc_data = getMonteCarloDataFromMT0File(mc_mt0_file, measurement_name)
-    mt0_obj.mc_data = mc_data
-    data_values = mt0_obj.getDataValues()
-    mt0_obj.data_values = data_values
-    mt0_obj.num_samples = len(mt0_obj.data_values)
  
+def parseMCMt0FileMeasurements(mc_mt0_file, measurement_names, percentile):
+    """
+    A function that computes the statistics of several measurements of an MC MT0
+    file from a single read of the file.
  
-    # Get percentile
-    percentile_value = getPercentileValueFromMeasurements(mt0_obj.data_values,
-                                                          mt0_obj.percentile)
-    mt0_obj.perc_value = percentile_value
+    Args:
+        measurement_names (list):
+            The measurement columns, None for all of them (see
+            getMT0MeasurementNames)
  
-    # Get StdDev
-    stddev_value = computeStdDevFromMeasurements(mt0_obj.data_values)
-    mt0_obj.stddev = stddev_value
+    Returns:
+        mt0_objs (OrderedDict):
+            The MCMT0Data of every measurement, by name, in the requested order
+    """
+    mc_values = getMonteCarloValuesFromMT0File(mc_mt0_file, measurement_names)
  
-    # Get skewness and kurtosis
-    skewness = getSkewnessValueFromMeasurements(mt0_obj.data_values)
-    kurtosis = getKurtosisValueFromMeasurements(mt0_obj.data_values)
-    mt0_obj.skewness = skewness
-    mt0_obj.kurtosis = kurtosis
+    mt0_objs = collections.OrderedDict()
+    for measurement_name, (sample_numbers, data_values) in mc_values.items():
+        # Initialize object
+        mt0_obj = MCMT0Data(mc_mt0_file)
+        mt0_obj.percentile = percentile
  
-    return mt0_obj
+        # Store MC Data
+        mt0_obj.mc_data = dict(zip(sample_numbers, data_values))
+        mt0_obj.data_values = data_values
+        mt0_obj.num_samples = len(mt0_obj.data_values)
+ 
+        # Get percentile, StdDev, skewness and kurtosis together
+        moments = computeSampleMoments(mt0_obj.data_values, [mt0_obj.percentile])
+        mt0_obj.perc_value = moments.percentiles[0]
+        mt0_obj.stddev = moments.stddev
+        mt0_obj.skewness = moments.skewness
+        mt0_obj.kurtosis = moments.kurtosis
+ 
+        mt0_objs[measurement_name] = mt0_obj
+ 
+    return mt0_objs
  
  
 def getMeasurementColumnIndexMT0File(meas_file, meas_name):
@@ -239,9 +476,183 @@ def getNominalFromMT0File(nominal_file, param_name):
     return nom_value
  
  
+def getNominalValuesFromMT0File(nominal_file, param_names):
+    """
+    Same as getNominalFromMT0File for several measurements, from a single read of
+    the nominal MT0 file (the values of its last record).
+ 
+    Returns:
+        nom_values (OrderedDict):
+            The nominal value of every measurement, by name, None for all of the
+            measurement columns; values are scaled by 1e12
+    """
+    if not os.path.exists(nominal_file):
+        return None
+ 
+    columns, records = readMT0File(nominal_file)
+    if param_names is None:
+        param_names = getMT0MeasurementNames(columns)
+ 
+    nom_values = collections.OrderedDict()
+    for param_name in param_names:
+        if param_name not in columns:
+            errmsg = "Couldn't find the measurement %s in file %s" % (param_name,
+                                                                      nominal_file)
+            raise Exception(errmsg)
+        if len(records) == 0:
+            errmsg = "No records in file %s" % nominal_file
+            raise Exception(errmsg)
+        nom_values[param_name] = float(records[-1][columns.index(param_name)]) * \
+            float(1e12)
+ 
+    return nom_values
+ 
+ 
+# Columns of an MT0 file that are not measurements
+MT0_NON_MEASUREMENT_COLUMNS = ("index", "temper", "alter#")
+ 
+ 
+def getMT0MeasurementNames(columns):
+    """
+    Returns the measurement columns of an MT0 file, in file order.
+    """
+    return [x for x in columns if x not in MT0_NON_MEASUREMENT_COLUMNS]
+ 
+ 
+def getMT0Header(mt0_lines, mt0_file):
+    """
+    Returns the column names of an MT0 file and the index of the first data line.
+    HSPICE wraps the header (and every record) over several lines when there are
+    many measurements; the wrapped header ends with the 'alter#' column.
+    """
+    for line_idx, line in enumerate(mt0_lines):
+        if line.startswith("index "):
+            break
+    else:
+        errmsg = "Couldn't find the measurement column in file %s" % mt0_file
+        raise Exception(errmsg)
+ 
+    columns = mt0_lines[line_idx].strip().split()
+    header_end = line_idx + 1
+    if "alter#" not in columns:
+        for next_idx in range(line_idx + 1, len(mt0_lines)):
+            if "alter#" in mt0_lines[next_idx].split():
+                columns = ' '.join(mt0_lines[line_idx:next_idx + 1]).split()
+                header_end = next_idx + 1
+                break
+ 
+    return columns, header_end
+ 
+ 
+def toFloat(value):
+    try:
+        return float(value)
+    except ValueError:
+        # e.g. 'failed' measurements
+        return float('nan')
+ 
+ 
+def readMT0File(mt0_file):
+    """
+    Reads the records of an MT0 file in one go. The data block is split into
+    tokens and cut into records of one value per column, so records wrapped over
+    several lines are read like single line ones.
+ 
+    Returns:
+        columns (list):
+            The column names
+        records (numpy.ndarray or list):
+            One row of floats per record (a 2D array if NumPy is available); values
+            that are not numbers (e.g. 'failed') are NaN
+    """
+    with open(mt0_file, 'r') as f:
+        mt0_lines = f.readlines()
+    columns, header_end = getMT0Header(mt0_lines, mt0_file)
+ 
+    tokens = ' '.join(mt0_lines[header_end:]).split()
+    num_columns = len(columns)
+    num_records = len(tokens) // num_columns
+    if num_records * num_columns != len(tokens):
+        # The simulation is still writing the last record
+        print("WARNING:\t Ignoring the incomplete last record of %s" % mt0_file)
+        tokens = tokens[:num_records * num_columns]
+ 
+    if np is not None:
+        try:
+            values = np.array(tokens, dtype=np.float64)
+        except ValueError:
+            values = np.array([toFloat(x) for x in tokens], dtype=np.float64)
+        return columns, values.reshape(num_records, num_columns)
+ 
+    values = [toFloat(x) for x in tokens]
+    return columns, [values[i:i + num_columns] for i in range(0, len(values), num_columns)]
+ 
+ 
+def getMonteCarloValuesFromMT0File(mc_file, param_names):
+    """
+    Reads the MC samples of several measurements from one read of an MT0 file.
+    Like getMonteCarloDataFromMT0FileByLine, only the first record of a sample
+    number is used and samples whose measurement is not a number are dropped.
+    If param_names is None, every measurement column is read.
+ 
+    Returns:
+        mc_values (OrderedDict):
+            (sample_numbers, values) per measurement name, in the order of
+            param_names, both lists in file order; the values are scaled by 1e12
+    """
+    columns, records = readMT0File(mc_file)
+    if param_names is None:
+        param_names = getMT0MeasurementNames(columns)
+    meas_cols = collections.OrderedDict()
+    for param_name in param_names:
+        if param_name not in columns:
+            errmsg = "Couldn't find the measurement %s in file %s" % (param_name, mc_file)
+            raise Exception(errmsg)
+        meas_cols[param_name] = columns.index(param_name)
+ 
+    mc_values = collections.OrderedDict()
+    if np is not None:
+        sample_index = records[:, 0]
+        rows = np.flatnonzero(~np.isnan(sample_index))
+        _, first_rows = np.unique(sample_index[rows], return_index=True)
+        rows = rows[np.sort(first_rows)]
+        for param_name, meas_col in meas_cols.items():
+            meas_values = records[rows, meas_col]
+            valid = ~np.isnan(meas_values)
+            mc_values[param_name] = (sample_index[rows][valid].astype(int).tolist(),
+                                     (meas_values[valid]*float(1e12)).tolist())
+        return mc_values
+ 
+    existing_samples = set()
+    unique_records = list()
+    for record in records:
+        sample_number = record[0]
+        if sample_number != sample_number or sample_number in existing_samples:
+            continue
+        existing_samples.add(sample_number)
+        unique_records.append(record)
+    for param_name, meas_col in meas_cols.items():
+        valid = [x for x in unique_records if x[meas_col] == x[meas_col]]
+        mc_values[param_name] = ([int(x[0]) for x in valid],
+                                 [x[meas_col]*float(1e12) for x in valid])
+    return mc_values
+ 
+ 
 def getMonteCarloDataFromMT0File(mc_file, param_name):
     if not os.path.exists(mc_file):
         return None
+    sample_numbers, meas_values = getMonteCarloValuesFromMT0File(
+        mc_file, [param_name])[param_name]
+    return dict(zip(sample_numbers, meas_values))
+ 
+ 
+def getMonteCarloDataFromMT0FileByLine(mc_file, param_name):
+    """
+    The line-by-line MT0 reader, kept as the reference for
+    getMonteCarloValuesFromMT0File.
+    """
+    if not os.path.exists(mc_file):
+        return None
     meas_col = getMeasurementColumnIndexMT0File(mc_file, param_name)
  
     mc_lines = fileIO.readFile(mc_file)
@@ -269,6 +680,10 @@ def getPercentileValueFromMeasurements(meas_values, percentile):
     # The data
     meas_values_f = [float(x) for x in meas_values]
     sorted_data = sorted(meas_values_f)
+    return getPercentileValueFromSortedValues(sorted_data, percentile)
+ 
+ 
+def getPercentileValueFromSortedValues(sorted_data, percentile):
     N = len(sorted_data)
     percentile = float(percentile)
  
@@ -288,6 +703,58 @@ def getPercentileValueFromMeasurements(meas_values, percentile):
     return v_p
  
  
+SampleMoments = collections.namedtuple(
+    "SampleMoments", ["num_samples", "mean", "stddev", "skewness", "kurtosis",
+                      "percentiles"])
+ 
+ 
+def computeSampleMoments(data_values, percentiles=()):
+    """
+    Computes the mean, StdDev, skewness, kurtosis and any number of percentiles of
+    the measurements together: one pass over the deviations from the mean and one
+    sort for all the percentiles. The formulas are the same as
+    computeStdDevFromMeasurements, getSkewnessValueFromMeasurements,
+    getKurtosisValueFromMeasurements and getPercentileValueFromMeasurements.
+ 
+    Returns:
+        moments (SampleMoments):
+            percentiles holds one value per requested percentile
+    """
+    if np is not None:
+        values = np.asarray(data_values, dtype=np.float64)
+        num_points = values.size
+        mean_value = float(values.sum()) / num_points
+        diff = values - mean_value
+        diff_squared = diff*diff
+        sum_pow2 = float(diff_squared.sum())
+        sum_pow3 = float((diff_squared*diff).sum())
+        sum_pow4 = float((diff_squared*diff_squared).sum())
+        sorted_data = np.sort(values).tolist()
+    else:
+        values = [float(x) for x in data_values]
+        num_points = len(values)
+        mean_value = sum(values) / num_points
+        sum_pow2 = 0.0
+        sum_pow3 = 0.0
+        sum_pow4 = 0.0
+        for value in values:
+            diff = value - mean_value
+            diff_squared = diff*diff
+            sum_pow2 += diff_squared
+            sum_pow3 += diff_squared*diff
+            sum_pow4 += diff_squared*diff_squared
+        sorted_data = sorted(values)
+ 
+    stdev = pow(sum_pow2 / num_points, 0.5)
+    skewness = sum_pow3 / ((num_points+1)*pow(stdev, 3))
+    kurtosis = sum_pow4 / ((num_points-1)*pow(stdev, 4))
+    percentile_values = [getPercentileValueFromSortedValues(sorted_data, percentile)
+                         for percentile in percentiles]
+ 
+    return SampleMoments(num_points, mean_value, stdev, skewness, kurtosis,
+                         percentile_values)
+ 
+ 
 def computeStdDevFromMeasurements(data_values):
     data_values_f = [float(x) for x in data_values]
     mean_value = computeMeanValueFromMeasurements(data_values_f)
@@ -351,8 +818,90 @@ def printSimpleDataMPP0(mpp0_data, percentile_column_header):
         print('{0:<25} {1:<5} {2:<100}'.format(var, delm, desc))
  
  
-def parseMPP0File(mpp0_file, param_name, percentile_header="*Q99.865*"):
+# Sample moments of the mpp0 Sample_Moments section
+MPP0_MOMENTS = ("mean", "median", "stdDev", "mad", "skewness", "kurtosis")
+MPP0_MOMENTS_HEADER = "*CI*mean*median*stdDev*mad*skewness*kurtosis*"
+# Lines that can hold percentile column headers, e.g. 'Q99.865'
+MPP0_PERCENTILE_RE = re.compile(r"Q[0-9]")
+MPP0_PERCENTILE_COLUMN_RE = re.compile(r"Q[0-9.]+$")
+# Number of parsed mpp0 files kept per process
+MPP0_CACHE_SIZE = 16
+# Measurement names of the sample moments rows
+MPP0_NAME_RE = re.compile(r"[A-Za-z_]")
+ 
+ 
+def indexMPP0Lines(mpp0_file, mpp0_lines):
+    """
+    A function that indexes the sections of an mpp0 file in one forward pass: the
+    number of samples, the sample moments header, the lines that can hold percentile
+    column headers and the line indices of the rows of every name.
+ 
+    Returns:
+        mpp0_info (MPP0Info):
+            The index, which extracts any measurement without re-scanning the file
+    """
+    mpp0_info = MPP0Info(mpp0_file, mpp0_lines)
+    num_samples = None
+    row_line_idxs = mpp0_info.row_line_idxs
+    rows = list()
+    for line_idx, line in enumerate(mpp0_lines):
+        if num_samples is None and line.startswith("Number of Samples:"):
+            num_samples = line.strip().split()[-1]
+        if mpp0_info.moments_line_idx is None and "kurtosis" in line and \
+                fnmatch.fnmatch(line, MPP0_MOMENTS_HEADER):
+            mpp0_info.moments_line_idx = line_idx
+        if MPP0_PERCENTILE_RE.search(line):
+            mpp0_info.percentile_line_idxs.append(line_idx)
+        space_idx = line.find(' ')
+        if space_idx > 0:
+            row_line_idxs.setdefault(line[:space_idx], list()).append(line_idx)
+            rows.append((line_idx, line[:space_idx]))
+ 
+    if num_samples is not None:
+        mpp0_info.num_samples = num_samples
+ 
+    # Measurements: the named rows between the moments header and the percentiles
+    if mpp0_info.moments_line_idx is not None:
+        section_end = next((x for x in mpp0_info.percentile_line_idxs
+                            if x > mpp0_info.moments_line_idx), len(mpp0_lines))
+        seen = set()
+        for line_idx, name in rows:
+            if not mpp0_info.moments_line_idx < line_idx < section_end - 1:
+                continue
+            if name not in seen and MPP0_NAME_RE.match(name):
+                seen.add(name)
+                mpp0_info.measurement_names.append(name)
+    return mpp0_info
+ 
+ 
+@functools.lru_cache(maxsize=MPP0_CACHE_SIZE)
+def loadMPP0Info(mpp0_file, mtime, size):
+    return indexMPP0Lines(mpp0_file, fileIO.readFile(mpp0_file))
  
+ 
+def getMPP0Info(mpp0_file):
+    """
+    Returns the MPP0Info of an mpp0 file. The MPP0_CACHE_SIZE last files are kept
+    (until they are modified), so extracting several measurements reads a file once.
+    """
+    stat = os.stat(mpp0_file)
+    return loadMPP0Info(mpp0_file, stat.st_mtime, stat.st_size)
+ 
+ 
+def parseMPP0File(mpp0_file, param_name, percentile_header="*Q99.865*"):
+    """
+    A function that returns the MPP0Data (sample moments and the percentile of the
+    percentile_header pattern) of one measurement of an mpp0 file and the percentile
+    column header. It is a wrapper of getMPP0Info(mpp0_file).getMPP0Data.
+    """
+    return getMPP0Info(mpp0_file).getMPP0Data(param_name, percentile_header)
+ 
+ 
+def parseMPP0FileByLine(mpp0_file, param_name, percentile_header="*Q99.865*"):
+    """
+    The buffer scanning parser that parseMPP0File replaces; it is kept as the
+    reference implementation.
+    """
     mpp0_data = MPP0Data(mpp0_file)
     mpp0_lines = fileIO.readFile(mpp0_file)
     mpp0_data.num_samples = getNumSamplesMPP0File(mpp0_lines)
@@ -676,4 +1225,3 @@ if __name__ == "__main__":
         sys.exit(main())
     except Exception as err:
         print("ERROR: %s" % err)
- 
@@ -0,0 +1,75 @@
+import random
+import sys
+sys.path.append('./')
+import utilities.hspiceUtilities as hspiceUtilities
+
+NAMES = ["meas_0", "meas_1", "delay", "slew", "half_tt_out"]
+# The percentiles are split over several header blocks
+PERCENTILE_BLOCKS = (("Q0.135", "Q2.275", "Q15.865"),
+                     ("Q50", "Q84.135", "Q97.725", "Q99.865"))
+
+
+def _writeMPP0(mpp0_file):
+    rng = random.Random(5)
+
+    def values(num_values):
+        return " ".join("%.5e" % rng.gauss(2e-11, 1e-12) for _ in range(num_values))
+
+    lines = ["HSPICE Monte Carlo post-processing",
+             "Number of Samples: 5000",
+             "",
+             "Sample_Moments",
+             "   CI   mean   median   stdDev   mad   skewness   kurtosis"]
+    for name in NAMES:
+        lines.extend(["   0.95 %s" % values(6), "%s %s" % (name, values(7)),
+                      "   0.95 %s" % values(6)])
+    for block in PERCENTILE_BLOCKS:
+        lines.extend(["", "Percentiles", "   %s" % "   ".join(block)])
+        for name in NAMES:
+            lines.extend(["   lb %s" % values(len(block)),
+                          "%s %s" % (name, values(len(block))),
+                          "   ub %s" % values(len(block))])
+    with open(mpp0_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _extractAll(parser, mpp0_file):
+    results = list()
+    for name in NAMES:
+        for block in PERCENTILE_BLOCKS:
+            for percentile in block:
+                mpp0_data, column_header = parser(mpp0_file, name, "*%s*" % percentile)
+                results.append((vars(mpp0_data), column_header))
+    return results
+
+
+def _writeMPP0File(tmp_path):
+    mpp0_file = str(tmp_path / "mc_sim.mpp0")
+    _writeMPP0(mpp0_file)
+    hspiceUtilities.loadMPP0Info.cache_clear()
+    return mpp0_file
+
+
+class TestMPP0Parser:
+    def test_same_data_as_buffer_scan(self, tmp_path):
+        mpp0_file = _writeMPP0File(tmp_path)
+        by_line = _extractAll(hspiceUtilities.parseMPP0FileByLine, mpp0_file)
+        indexed = _extractAll(hspiceUtilities.parseMPP0File, mpp0_file)
+        assert len(indexed) == len(NAMES) * sum(len(x) for x in PERCENTILE_BLOCKS)
+        assert indexed == by_line
+
+    def test_all_measurements(self, tmp_path):
+        mpp0_file = _writeMPP0File(tmp_path)
+        measurements = hspiceUtilities.getMPP0Info(mpp0_file).getAllMeasurements()
+        assert list(measurements) == NAMES
+        for name, measurement in measurements.items():
+            for block in PERCENTILE_BLOCKS:
+                for percentile in block:
+                    mpp0_data, column_header = hspiceUtilities.parseMPP0FileByLine(
+                        mpp0_file, name, "*%s*" % percentile)
+                    assert measurement.percentiles[column_header] == (
+                        mpp0_data.perc_lb, mpp0_data.perc_pred, mpp0_data.perc_ub)
+            assert measurement.moments['mean'] == (mpp0_data.mean_lb, mpp0_data.mean_pred,
+                                                   mpp0_data.mean_ub)
+            assert (measurement.ci_lb, measurement.ci_ub) == (mpp0_data.ci_lb,
+                                                              mpp0_data.ci_ub)
@@ -0,0 +1,87 @@
+import math
+import random
+import sys
+
+import pytest
+sys.path.append('./')
+import utilities.hspiceUtilities as hspiceUtilities
+
+MT0_MEASUREMENTS = ("cp2d", "cp2q_del1", "d2q", "temper")
+
+PERCENTILES = ["99.865", "0.135", "50"]
+
+# The NumPy path, if NumPy is installed, and the pure Python path
+NP_PATHS = [None] + ([hspiceUtilities.np] if hspiceUtilities.np is not None else [])
+
+
+def _writeMT0(mt0_file, sample_numbers, rng, wrap, failed_rate):
+    """
+    An MC mt0 file with one record per sample number. With wrap, the header and the
+    records are wrapped over two lines like HSPICE does for many measurements;
+    failed_rate of the first measurement values are 'failed'.
+    """
+    columns = ["index"] + list(MT0_MEASUREMENTS) + ["alter#"]
+    lines = ["$DATA1 SOURCE='HSPICE' VERSION='P-2019.06-SP1' PARAM_COUNT=0",
+             ".TITLE '* synthetic mc_sim'"]
+    if wrap:
+        lines.extend([" ".join(columns[:3]), " ".join(columns[3:])])
+    else:
+        lines.append(" ".join(columns))
+    for sample_number in sample_numbers:
+        values = ["%.6e" % rng.gauss(2e-11, 1e-12) for _ in MT0_MEASUREMENTS]
+        if rng.random() < failed_rate:
+            values[0] = "failed"
+        record = [str(sample_number)] + values + ["1.0000"]
+        if wrap:
+            lines.extend([" ".join(record[:3]), " ".join(record[3:])])
+        else:
+            lines.append(" ".join(record))
+    with open(mt0_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _writeMT0Files(tmp_path):
+    rng = random.Random(1)
+    sample_numbers = list(range(1, 301))
+    # Resumed runs repeat some samples
+    sample_numbers.extend(rng.sample(sample_numbers, 20))
+    mt0_files = list()
+    for wrap in (False, True):
+        mt0_file = str(tmp_path / ("mc_sim_wrapped.mt0" if wrap else "mc_sim.mt0"))
+        _writeMT0(mt0_file, sample_numbers, random.Random(2), wrap, 0.05)
+        mt0_files.append(mt0_file)
+    return mt0_files
+
+
+@pytest.mark.parametrize("np_module", NP_PATHS)
+class TestMT0Reader:
+    def test_same_samples_as_line_reader(self, tmp_path, monkeypatch, np_module):
+        monkeypatch.setattr(hspiceUtilities, 'np', np_module)
+        mt0_file, wrapped_mt0_file = _writeMT0Files(tmp_path)
+        for measurement in MT0_MEASUREMENTS:
+            by_line = hspiceUtilities.getMonteCarloDataFromMT0FileByLine(mt0_file,
+                                                                         measurement)
+            for mc_file in (mt0_file, wrapped_mt0_file):
+                sample_numbers, values = hspiceUtilities.getMonteCarloValuesFromMT0File(
+                    mc_file, MT0_MEASUREMENTS)[measurement]
+                assert dict(zip(sample_numbers, values)) == by_line, (mc_file, measurement)
+        # The failed samples are dropped
+        assert len(by_line) == 300
+        assert len(hspiceUtilities.getMonteCarloDataFromMT0FileByLine(
+            mt0_file, MT0_MEASUREMENTS[0])) < 300
+
+    def test_sample_moments(self, tmp_path, monkeypatch, np_module):
+        monkeypatch.setattr(hspiceUtilities, 'np', np_module)
+        mt0_file, _ = _writeMT0Files(tmp_path)
+        mc_data = hspiceUtilities.getMonteCarloDataFromMT0FileByLine(mt0_file,
+                                                                     MT0_MEASUREMENTS[0])
+        data_values = list(mc_data.values())
+        moments = hspiceUtilities.computeSampleMoments(data_values, PERCENTILES)
+        expected = [hspiceUtilities.getPercentileValueFromMeasurements(data_values, x)
+                    for x in PERCENTILES] + [
+            hspiceUtilities.computeStdDevFromMeasurements(data_values),
+            hspiceUtilities.getSkewnessValueFromMeasurements(data_values),
+            hspiceUtilities.getKurtosisValueFromMeasurements(data_values)]
+        result = moments.percentiles + [moments.stddev, moments.skewness, moments.kurtosis]
+        for expected_value, value in zip(expected, result):
+            assert math.isclose(value, expected_value, rel_tol=1e-9)
@@ -4,6 +4,10 @@ import fnmatch
 
 import re
 
+ 
+
+from . import templateRules
+
 # Globals
 
 delay_arc_types = ["combinational",
@@ -38,23 +42,23 @@ def mapCharacteristicsToTemplate(arc_type=None,
 
  
 
-    template_name = None
+    # The if-chains in getHspiceTemplateName / getThanosTemplateName are compiled
 
-    if template_type.upper() == "HSPICE":
+    # into template_rules.json (mcqc__buildTemplateRules.py); the indexed lookup
 
-        template_name = getHspiceTemplateName(cell_name, arc_type, pin,
+    # returns the same first match without scanning every rule.
 
-                                              pin_dir, rel_pin, rel_pin_dir,
+    template_name = None
 
-                                              when, probe_list)
+    rule_index = templateRules.getTemplateRuleIndex(template_type)
 
-    elif template_type.upper() == "THANOS":
+    if rule_index is not None:
 
-        template_name = getThanosTemplateName(cell_name, arc_type, pin,
+        template_name = rule_index.lookup(cell_name, arc_type, pin,
 
-                                              pin_dir, rel_pin, rel_pin_dir,
+                                          pin_dir, rel_pin, rel_pin_dir,
 
-                                              when, probe_list)
+                                          when, probe_list)
 
     return template_name
 
@@ -64,6 +68,10 @@ def mapCharacteristicsToTemplate(arc_type=None,
 
  
 
+# NOTE: After editing the if-chains below, regenerate template_rules.json with
+
+# mcqc__buildTemplateRules.py; mapCharacteristicsToTemplate only reads the rule table.
+
 def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin,
 
                           rel_pin_dir, when, probe_list):
@@ -7049,7 +7057,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.sp"
 
         return \
-
             template_name
 
  
@@ -7091,7 +7098,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__2.sp"
 
         return \
-
             template_name
 
  
@@ -7137,7 +7143,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__rsdf__Q__rise__fall__pushout__1.sp"
 
         return \
-
             template_name
 
  
@@ -7181,7 +7186,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.sp"
 
         return \
-
             template_name
 
  
@@ -7223,7 +7227,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__2.sp"
 
         return \
-
             template_name
 
  
@@ -7269,7 +7272,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__MB__common__rise__fall__2.sp"
 
         return \
-
             template_name
 
    
@@ -7745,7 +7747,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__SLH__rise__SE__fall__pushout__2.sp"
 
         return \
-
             template_name
 
  
@@ -9007,7 +9008,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.sp"
 
         return \
-
             template_name
 
  
@@ -9093,7 +9093,6 @@ def getHspiceTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.sp"
 
         return \
-
             template_name
 
  
@@ -15089,7 +15088,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -15131,7 +15129,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__2.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -15179,7 +15176,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__rsdf__Q__rise__fall__pushout__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -15225,7 +15221,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -15267,7 +15262,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__2.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -16133,7 +16127,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -16221,7 +16214,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -16307,7 +16299,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
         template_name = "hold/template__common__rise__fall__1.thanos.sp"
 
         return \
-
             template_name
 
  
@@ -17923,7 +17914,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
                 len(probe_list) == 2):
 
         template_name = \
-
             "hold/template__latch__rise__fall__glitch__maxq__minbl_bx__2.thanos.sp"
 
         return template_name
@@ -17977,7 +17967,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
                 len(probe_list) == 2):
 
         template_name = \
-
             "hold/template__latch__rise__fall__glitch__maxq__minsl_ax__2.thanos.sp"
 
         return template_name
@@ -18001,7 +17990,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
                 len(probe_list) == 2):
 
         template_name = \
-
             "hold/template__latch__rise__fall__glitch__maxq__minsl_bx__2.thanos.sp"
 
         return template_name
@@ -18025,7 +18013,6 @@ def getThanosTemplateName(cell_name, arc_type, constr_pin, constr_pin_dir, rel_p
                 len(probe_list) == 2):
 
         template_name = \
-
             "hold/template__latch__rise__fall__glitch__maxq__maxbl_b__2.thanos.sp"
 
         return template_name
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Regenerates template_rules.json (the rule table consumed by templateRules.py)
+from the if-chains in getHspiceTemplateName / getThanosTemplateName.
+
+The if-chains in funcs.py remain the place where new template mappings are
+authored. After editing them, rerun this script so the compiled rule table is
+brought back in sync:
+
+    python3 mcqc__buildTemplateRules.py [--funcs_file funcs.py] [--output template_rules.json]
+
+Every top-level `if` becomes one rule; nested `if`/`else` blocks are flattened
+into the conjunction of the outer and inner conditions (an `else` adds the
+negated inner condition), so first-match order is preserved exactly.
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+
+from templateRules import RULE_TABLE_VERSION
+
+FLOW_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = {"hspice": "getHspiceTemplateName",
+                "thanos": "getThanosTemplateName"}
+
+FIELDS = ("cell_name", "arc_type", "constr_pin", "constr_pin_dir", "rel_pin",
+          "rel_pin_dir", "when", "probe_list")
+
+
+class RuleExtractionError(Exception):
+    pass
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(
+        description="Compile the template-mapping if-chains in funcs.py into a rule table.")
+    parser.add_argument("--funcs_file", default=os.path.join(FLOW_DIR, "funcs.py"),
+                        help="Path to the template mapping funcs.py")
+    parser.add_argument("--output", default=os.path.join(FLOW_DIR, "template_rules.json"),
+                        help="Path of the rule table to write")
+    return parser.parse_args()
+
+
+def _fail(node, msg):
+    source = getattr(ast, "unparse", ast.dump)(node)
+    raise RuleExtractionError("line %s: %s: %s" % (getattr(node, "lineno", "?"),
+                                                   msg, source))
+
+
+def _constant(node, module_consts):
+    if isinstance(node, ast.Name) and node.id in module_consts:
+        return module_consts[node.id]
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        _fail(node, "expected a constant")
+
+
+def _isNone(node):
+    if node is None:
+        return True
+    try:
+        return ast.literal_eval(node) is None
+    except ValueError:
+        return False
+
+
+def _field(node):
+    if isinstance(node, ast.Name) and node.id in FIELDS:
+        return node.id
+    _fail(node, "unknown field")
+
+
+def _isLenOfProbeList(node):
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id == "len" and len(node.args) == 1
+            and isinstance(node.args[0], ast.Name) and node.args[0].id == "probe_list")
+
+
+def _isFnmatch(node):
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "fnmatch" and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "fnmatch" and len(node.args) == 2)
+
+
+def _compare(node, module_consts):
+    if len(node.ops) != 1:
+        _fail(node, "chained comparison")
+    op = node.ops[0]
+    left = node.left
+    right = node.comparators[0]
+
+    if isinstance(op, ast.Eq):
+        if _isLenOfProbeList(left):
+            return ["probe_count", _constant(right, module_consts)]
+        return ["eq", _field(left), _constant(right, module_consts)]
+
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if isinstance(right, ast.Name) and right.id == "probe_list":
+            cond = ["has_probe", _constant(left, module_consts)]
+        elif isinstance(right, ast.Name) and right.id == "when":
+            cond = ["when_has", _constant(left, module_consts)]
+        elif isinstance(left, ast.Name) and left.id in FIELDS:
+            values = _constant(right, module_consts)
+            if not isinstance(values, list):
+                _fail(node, "membership test against a non-list")
+            cond = ["in", left.id, list(values)]
+        else:
+            _fail(node, "unsupported membership test")
+        return cond if isinstance(op, ast.In) else ["not", cond]
+
+    _fail(node, "unsupported comparison")
+
+
+def _anyPrefix(node):
+    # any(item.startswith('QN') for item in probe_list)
+    gen = node.args[0]
+    if (isinstance(gen, ast.GeneratorExp) and len(gen.generators) == 1
+            and isinstance(gen.generators[0].iter, ast.Name)
+            and gen.generators[0].iter.id == "probe_list"
+            and not gen.generators[0].ifs
+            and isinstance(gen.elt, ast.Call)
+            and isinstance(gen.elt.func, ast.Attribute)
+            and gen.elt.func.attr == "startswith"
+            and isinstance(gen.elt.func.value, ast.Name)
+            and gen.elt.func.value.id == gen.generators[0].target.id
+            and len(gen.elt.args) == 1):
+        return ["probe_prefix", _constant(gen.elt.args[0], {})]
+    _fail(node, "unsupported any() expression")
+
+
+def conditionFromNode(node, module_consts):
+    """Translates one boolean expression of the if-chain into a rule condition."""
+    if isinstance(node, ast.BoolOp):
+        conds = [conditionFromNode(value, module_consts) for value in node.values]
+        return ["all" if isinstance(node.op, ast.And) else "any", conds]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ["not", conditionFromNode(node.operand, module_consts)]
+    if isinstance(node, ast.Compare):
+        return _compare(node, module_consts)
+    if _isFnmatch(node):
+        return ["glob", _field(node.args[0]), _constant(node.args[1], module_consts)]
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id == "any" and len(node.args) == 1):
+        return _anyPrefix(node)
+    _fail(node, "unsupported condition")
+
+
+def _topLevelConditions(test, module_consts):
+    cond = conditionFromNode(test, module_consts)
+    if cond[0] == "all":
+        return cond[1]
+    return [cond]
+
+
+def _bodyResult(body):
+    """
+    Returns (True, template) if the statement list ends the lookup, (False, None)
+    if it only assigns template_name and falls through (dead in the if-chain, since
+    the function ends with `return None`), or None if the body has nested ifs.
+    """
+    if len(body) == 1 and isinstance(body[0], ast.Return):
+        if _isNone(body[0].value):
+            return True, None
+        _fail(body[0], "unsupported return")
+    if (len(body) == 2 and isinstance(body[0], ast.Assign)
+            and isinstance(body[1], ast.Return)):
+        assign, ret = body
+        if (len(assign.targets) == 1 and isinstance(assign.targets[0], ast.Name)
+                and assign.targets[0].id == "template_name"
+                and isinstance(ret.value, ast.Name) and ret.value.id == "template_name"):
+            return True, _constant(assign.value, {})
+        _fail(assign, "unsupported assignment/return pair")
+    if len(body) == 1 and isinstance(body[0], ast.Assign):
+        return False, None
+    if all(isinstance(stmt, ast.If) for stmt in body):
+        return None
+    _fail(body[0], "unsupported statement sequence")
+
+
+def _flattenIf(node, prefix, module_consts, rules):
+    conds = prefix + _topLevelConditions(node.test, module_consts)
+    _flattenBody(node.body, conds, node.lineno, module_consts, rules)
+    if node.orelse:
+        negated = prefix + [["not", conditionFromNode(node.test, module_consts)]]
+        if len(node.orelse) == 1 and isinstance(node.orelse[0], ast.If):
+            _flattenIf(node.orelse[0], negated, module_consts, rules)
+        else:
+            _flattenBody(node.orelse, negated, node.orelse[0].lineno, module_consts, rules)
+
+
+def _flattenBody(body, conds, lineno, module_consts, rules):
+    result = _bodyResult(body)
+    if result is None:
+        for stmt in body:
+            _flattenIf(stmt, conds, module_consts, rules)
+        return
+    terminates, template = result
+    if terminates:
+        rules.append({"line": lineno, "template": template, "conditions": conds})
+
+
+def extractRules(func_node, module_consts):
+    rules = list()
+    for stmt in func_node.body:
+        if isinstance(stmt, ast.If):
+            _flattenIf(stmt, [], module_consts, rules)
+        elif isinstance(stmt, ast.Return):
+            # Final `return None` of the chain
+            if not _isNone(stmt.value):
+                _fail(stmt, "chain must end with `return None`")
+            break
+        else:
+            _fail(stmt, "unsupported top-level statement")
+    return rules
+
+
+def extractRuleTable(funcs_file):
+    """
+    Parses funcs.py and returns the rule table dictionary for every entry point
+    listed in ENTRY_POINTS.
+    """
+    with open(funcs_file, 'r') as f:
+        tree = ast.parse(f.read(), filename=funcs_file)
+
+    module_consts = dict()
+    functions = dict()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            try:
+                module_consts[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+        elif isinstance(node, ast.FunctionDef):
+            functions[node.name] = node
+
+    table = {"version": RULE_TABLE_VERSION}
+    for template_type, func_name in ENTRY_POINTS.items():
+        table[template_type] = extractRules(functions[func_name], module_consts)
+    return table
+
+
+def dumpRuleTable(table):
+    """One rule per line so that regenerated tables diff cleanly."""
+    lines = ['{"version": %s,' % json.dumps(table["version"])]
+    template_types = [key for key in table if key != "version"]
+    for i, template_type in enumerate(template_types):
+        lines.append(' %s: [' % json.dumps(template_type))
+        rules = table[template_type]
+        for j, rule in enumerate(rules):
+            lines.append('  %s%s' % (json.dumps(rule),
+                                     "," if j < len(rules) - 1 else ""))
+        lines.append(' ]%s' % ("," if i < len(template_types) - 1 else ""))
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    args = parseArgs()
+    try:
+        table = extractRuleTable(args.funcs_file)
+    except RuleExtractionError as e:
+        print("ERROR:\t Could not compile %s: %s" % (args.funcs_file, e))
+        sys.exit(1)
+    with open(args.output, 'w') as f:
+        f.write(dumpRuleTable(table))
+    for template_type in ENTRY_POINTS:
+        print("INFO:\t %s: %d rules" % (template_type, len(table[template_type])))
+    print("INFO:\t Wrote %s" % args.output)
+
+
+if __name__ == "__main__":
+    main()
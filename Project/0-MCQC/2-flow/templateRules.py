@@ -0,0 +1,261 @@
+"""
+Indexed rule engine for the arc -> template deck mapping.
+
+getHspiceTemplateName / getThanosTemplateName evaluate ~1,150 fnmatch rules one
+after the other for every arc. The same rules are stored as data in
+template_rules.json (generated by mcqc__buildTemplateRules.py) and compiled here
+into TemplateRuleIndex objects:
+
+  * rules are bucketed by arc_type; within a bucket the exact-match constraints
+    on constr_pin_dir / rel_pin_dir / constr_pin / rel_pin are kept as frozensets
+    so a (arc_type, dirs, pins) key narrows the chain down to a handful of
+    candidates, which is itself cached per key
+  * fnmatch patterns are compiled to regexes once, and only evaluated for the
+    candidates that survive the exact-match filter
+  * complete lookups are memoized on (cell, arc_type, pin, pin_dir, rel_pin,
+    rel_pin_dir, when, probes)
+
+Candidates are always evaluated in the original rule order, so first-match
+semantics of the if-chain are preserved.
+"""
+import fnmatch
+import json
+import os
+import re
+
+RULE_TABLE_VERSION = 1
+
+RULE_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "template_rules.json")
+
+# Fields whose exact-match constraints are lifted into the index
+INDEX_FIELDS = ("constr_pin_dir", "rel_pin_dir", "constr_pin", "rel_pin")
+
+_rule_indexes = dict()
+
+
+def _isLiteralPattern(pattern):
+    return not any(c in pattern for c in "*?[")
+
+
+def _exactValues(cond):
+    """
+    Returns (field, frozenset of accepted values) if the condition only accepts
+    an explicit set of values for one field, otherwise None.
+    """
+    op = cond[0]
+    if op == "eq":
+        return cond[1], frozenset([cond[2]])
+    if op == "in":
+        return cond[1], frozenset(cond[2])
+    if op == "glob" and _isLiteralPattern(cond[2]):
+        return cond[1], frozenset([cond[2]])
+    if op == "any":
+        fields = set()
+        values = set()
+        for sub_cond in cond[1]:
+            exact = _exactValues(sub_cond)
+            if exact is None:
+                return None
+            fields.add(exact[0])
+            values.update(exact[1])
+        if len(fields) == 1:
+            return fields.pop(), frozenset(values)
+    return None
+
+
+def _globRegex(patterns):
+    """A single compiled regex matching if any of the fnmatch patterns match."""
+    return re.compile("|".join("(?:%s)" % fnmatch.translate(p) for p in patterns))
+
+
+def compileCondition(cond):
+    """
+    Compiles a rule table condition into a predicate taking the query tuple
+    (cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin, rel_pin_dir, when,
+    probe_list). Predicates use the same operations as the if-chain, so they
+    also fail the same way on None inputs.
+    """
+    op = cond[0]
+    if op == "eq":
+        idx = _FIELD_POS[cond[1]]
+        value = cond[2]
+        return lambda q: q[idx] == value
+    if op == "in":
+        idx = _FIELD_POS[cond[1]]
+        values = frozenset(cond[2])
+        return lambda q: q[idx] in values
+    if op == "glob":
+        idx = _FIELD_POS[cond[1]]
+        match = _globRegex([cond[2]]).match
+        return lambda q: match(q[idx]) is not None
+    if op == "has_probe":
+        name = cond[1]
+        return lambda q: name in q[7]
+    if op == "probe_count":
+        count = cond[1]
+        return lambda q: len(q[7]) == count
+    if op == "probe_prefix":
+        prefix = cond[1]
+        return lambda q: any(item.startswith(prefix) for item in q[7])
+    if op == "when_has":
+        substr = cond[1]
+        return lambda q: substr in q[6]
+    if op == "not":
+        pred = compileCondition(cond[1])
+        return lambda q: not pred(q)
+    if op == "all":
+        preds = [compileCondition(c) for c in cond[1]]
+        return lambda q: all(pred(q) for pred in preds)
+    if op == "any":
+        sub_ops = set(c[0] for c in cond[1])
+        sub_fields = set(c[1] for c in cond[1])
+        if sub_ops == {"glob"} and len(sub_fields) == 1:
+            idx = _FIELD_POS[sub_fields.pop()]
+            match = _globRegex([c[2] for c in cond[1]]).match
+            return lambda q: match(q[idx]) is not None
+        preds = [compileCondition(c) for c in cond[1]]
+        return lambda q: any(pred(q) for pred in preds)
+    raise ValueError("Unknown rule condition %r" % (cond,))
+
+
+_FIELD_POS = {"cell_name": 0, "arc_type": 1, "constr_pin": 2, "constr_pin_dir": 3,
+              "rel_pin": 4, "rel_pin_dir": 5, "when": 6, "probe_list": 7}
+
+
+class TemplateRule(object):
+    """One compiled entry of the rule table."""
+    __slots__ = ("order", "line", "template", "arc_types", "exact", "_preds", "_all_preds")
+
+    def __init__(self, order, rule):
+        self.order = order
+        self.line = rule.get("line")
+        self.template = rule["template"]
+        self.arc_types = None
+        self.exact = dict()
+        self._all_preds = [compileCondition(c) for c in rule["conditions"]]
+        self._preds = list()
+        for cond in rule["conditions"]:
+            exact = _exactValues(cond)
+            if exact is not None and exact[0] == "arc_type" and self.arc_types is None:
+                self.arc_types = exact[1]
+            elif exact is not None and exact[0] in INDEX_FIELDS and exact[0] not in self.exact:
+                self.exact[exact[0]] = exact[1]
+            else:
+                self._preds.append(compileCondition(cond))
+
+    def admits(self, key):
+        """Checks the indexed exact-match constraints against (pdir, rdir, pin, rpin)."""
+        for field, value in zip(INDEX_FIELDS, key):
+            allowed = self.exact.get(field)
+            if allowed is not None and value not in allowed:
+                return False
+        return True
+
+    def matches(self, query):
+        """Evaluates the non-indexed conditions (indexed ones are already satisfied)."""
+        for pred in self._preds:
+            if not pred(query):
+                return False
+        return True
+
+    def matchesAll(self, query):
+        """Evaluates every condition in source order, exactly like the if-chain."""
+        for pred in self._all_preds:
+            if not pred(query):
+                return False
+        return True
+
+
+class TemplateRuleIndex(object):
+    """
+    Compiled form of one rule list (HSPICE or THANOS) of the rule table.
+
+    lookup() returns the same template as the if-chain the table was generated from.
+    """
+
+    def __init__(self, rules):
+        self.rules = [TemplateRule(i, rule) for i, rule in enumerate(rules)]
+        by_arc_type = dict()
+        wildcard = list()
+        for rule in self.rules:
+            if rule.arc_types is None:
+                wildcard.append(rule)
+            else:
+                for arc_type in rule.arc_types:
+                    by_arc_type.setdefault(arc_type, list()).append(rule)
+        # Rules without an arc_type constraint apply to every bucket; merge them
+        # in so every bucket stays in the original rule order
+        self._by_arc_type = dict()
+        for arc_type, bucket in by_arc_type.items():
+            self._by_arc_type[arc_type] = sorted(bucket + wildcard, key=lambda r: r.order)
+        self._wildcard = wildcard
+        self._candidates = dict()
+        self._memo = dict()
+
+    def candidates(self, arc_type, constr_pin_dir, rel_pin_dir, constr_pin, rel_pin):
+        key = (arc_type, constr_pin_dir, rel_pin_dir, constr_pin, rel_pin)
+        try:
+            return self._candidates[key]
+        except KeyError:
+            pass
+        bucket = self._by_arc_type.get(arc_type, self._wildcard)
+        candidates = tuple(rule for rule in bucket if rule.admits(key[1:]))
+        self._candidates[key] = candidates
+        return candidates
+
+    def lookup(self, cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin,
+               rel_pin_dir, when, probe_list):
+        if cell_name is None or when is None or probe_list is None \
+                or constr_pin is None or rel_pin is None:
+            # The if-chain raises (or not) depending on which rule it reaches
+            # first with a None field; replay it in order instead of using the index
+            query = (cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin,
+                     rel_pin_dir, when, probe_list)
+            for rule in self.rules:
+                if rule.matchesAll(query):
+                    return rule.template
+            return None
+
+        memo_key = (cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin,
+                    rel_pin_dir, when, tuple(probe_list))
+        try:
+            return self._memo[memo_key]
+        except KeyError:
+            pass
+        query = (cell_name, arc_type, constr_pin, constr_pin_dir, rel_pin,
+                 rel_pin_dir, when, probe_list)
+        template_name = None
+        for rule in self.candidates(arc_type, constr_pin_dir, rel_pin_dir,
+                                    constr_pin, rel_pin):
+            if rule.matches(query):
+                template_name = rule.template
+                break
+        self._memo[memo_key] = template_name
+        return template_name
+
+
+def loadRuleTable(rule_table_file=RULE_TABLE_FILE):
+    with open(rule_table_file, 'r') as f:
+        table = json.load(f)
+    if table.get("version") != RULE_TABLE_VERSION:
+        raise ValueError("%s has rule table version %s, expected %s; regenerate it with "
+                         "mcqc__buildTemplateRules.py" % (rule_table_file,
+                                                         table.get("version"),
+                                                         RULE_TABLE_VERSION))
+    return table
+
+
+def getTemplateRuleIndex(template_type, rule_table_file=RULE_TABLE_FILE):
+    """
+    Returns the compiled TemplateRuleIndex for template_type ("HSPICE" or "THANOS").
+    The rule table is read and compiled once per process.
+    """
+    key = (rule_table_file, template_type.lower())
+    if key not in _rule_indexes:
+        table = loadRuleTable(rule_table_file)
+        for table_type, rules in table.items():
+            if table_type == "version":
+                continue
+            _rule_indexes[(rule_table_file, table_type)] = TemplateRuleIndex(rules)
+    return _rule_indexes.get(key)
@@ -0,0 +1,198 @@
+import fnmatch
+import itertools
+import os
+import random
+import sys
+import types
+
+FLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FLOW_DIR)
+
+# funcs.py is deployed as the templateFileMap package
+if "templateFileMap" not in sys.modules:
+    _pkg = types.ModuleType("templateFileMap")
+    _pkg.__path__ = [FLOW_DIR]
+    sys.modules["templateFileMap"] = _pkg
+
+import templateFileMap.funcs as templateFileMap  # noqa: E402
+import templateFileMap.templateRules as templateRules  # noqa: E402
+from mcqc__buildTemplateRules import extractRuleTable, dumpRuleTable  # noqa: E402
+
+LEGACY = {"hspice": templateFileMap.getHspiceTemplateName,
+          "thanos": templateFileMap.getThanosTemplateName}
+
+
+def _stringForPattern(pattern, fill):
+    """Builds a string that matches the fnmatch pattern."""
+    out = list()
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "*":
+            out.append(fill)
+        elif c == "?":
+            out.append("X")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            body = pattern[i + 1:j]
+            if body.startswith("!"):
+                out.append(next(ch for ch in "XYZ0123" if ch not in body))
+            else:
+                out.append(body[0])
+            i = j
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _choices(cond):
+    """Alternative ways to satisfy a condition, as lists of atomic conditions."""
+    if cond[0] == "any":
+        return [alt for sub in cond[1] for alt in _choices(sub)]
+    if cond[0] == "all":
+        return [list(itertools.chain(*combo))
+                for combo in itertools.product(*[_choices(c) for c in cond[1]])][:8]
+    return [[cond]]
+
+
+def _witness(conds, fill):
+    values = {"cell_name": None, "arc_type": None, "constr_pin": None,
+              "constr_pin_dir": None, "rel_pin": None, "rel_pin_dir": None,
+              "when": None}
+    globs = dict()
+    probes = list()
+    count = None
+    when_parts = list()
+    for cond in conds:
+        op = cond[0]
+        if op == "eq":
+            values[cond[1]] = cond[2]
+        elif op == "in":
+            values[cond[1]] = values[cond[1]] or cond[2][0]
+        elif op == "glob":
+            globs.setdefault(cond[1], list()).append(cond[2])
+        elif op in ("has_probe", "probe_prefix"):
+            probes.append(cond[1])
+        elif op == "probe_count":
+            count = cond[1]
+        elif op == "when_has":
+            when_parts.append(cond[1])
+    for field, patterns in globs.items():
+        if values[field] is not None:
+            continue
+        # Several patterns on one field (e.g. "*SYNC1P5*" and "*SDF*"): try
+        # concatenations until one string matches all of them
+        values[field] = _stringForPattern(patterns[0], fill)
+        for order in itertools.permutations(patterns):
+            candidate = "".join(_stringForPattern(p, fill) for p in order)
+            if all(fnmatch.fnmatchcase(candidate, p) for p in patterns):
+                values[field] = candidate
+                break
+    if values["when"] is None:
+        values["when"] = "&".join(when_parts) if when_parts else "NO_CONDITION"
+    probes = list(dict.fromkeys(probes))
+    if count is not None:
+        probes = (probes + ["n%d" % i for i in range(count)])[:count]
+    values["probe_list"] = probes or ["Q"]
+    for field in ("cell_name", "constr_pin", "rel_pin"):
+        if values[field] is None:
+            values[field] = "ZZ"
+    for field in ("constr_pin_dir", "rel_pin_dir"):
+        if values[field] is None:
+            values[field] = "rise"
+    if values["arc_type"] is None:
+        values["arc_type"] = "hold"
+    return values
+
+
+def _args(values):
+    return (values["cell_name"], values["arc_type"], values["constr_pin"],
+            values["constr_pin_dir"], values["rel_pin"], values["rel_pin_dir"],
+            values["when"], values["probe_list"])
+
+
+def _perturbations(values):
+    yield values
+    for field, alt in (("constr_pin_dir", {"rise": "fall", "fall": "rise"}),
+                       ("rel_pin_dir", {"rise": "fall", "fall": "rise"})):
+        flipped = dict(values)
+        flipped[field] = alt.get(values[field], "rise")
+        yield flipped
+    fewer = dict(values)
+    fewer["probe_list"] = values["probe_list"][:-1]
+    yield fewer
+    more = dict(values)
+    more["probe_list"] = values["probe_list"] + ["extra"]
+    yield more
+    other_when = dict(values)
+    other_when["when"] = "!" + values["when"]
+    yield other_when
+
+
+class TestTemplateRules:
+    def test_rule_table_in_sync_with_if_chain(self):
+        table = extractRuleTable(os.path.join(FLOW_DIR, "funcs.py"))
+        with open(templateRules.RULE_TABLE_FILE, 'r') as f:
+            assert f.read() == dumpRuleTable(table), \
+                "template_rules.json is stale; rerun mcqc__buildTemplateRules.py"
+
+    def test_every_rule_matches_legacy_chain(self):
+        table = templateRules.loadRuleTable()
+        for template_type, legacy in LEGACY.items():
+            index = templateRules.getTemplateRuleIndex(template_type)
+            satisfied = 0
+            for rule, compiled in zip(table[template_type], index.rules):
+                rule_hit = False
+                for conds in _choices(["all", rule["conditions"]]):
+                    for fill in ("", "X1"):
+                        for values in _perturbations(_witness(conds, fill)):
+                            args = _args(values)
+                            assert index.lookup(*args) == legacy(*args), \
+                                "%s rule at funcs.py:%s diverges for %r" % (
+                                    template_type, rule["line"], args)
+                        rule_hit = rule_hit or compiled.matchesAll(_args(_witness(conds, fill)))
+                satisfied += rule_hit
+            # Every rule must be exercised by at least one input that satisfies it
+            assert satisfied == len(table[template_type])
+
+    def test_random_queries_match_legacy_chain(self):
+        table = templateRules.loadRuleTable()
+        rng = random.Random(20161016)
+        for template_type, legacy in LEGACY.items():
+            index = templateRules.getTemplateRuleIndex(template_type)
+            domain = {"cell_name": set(), "arc_type": set(), "constr_pin": set(),
+                      "rel_pin": set(), "when": {"NO_CONDITION"}, "probe": {"Q"}}
+            for rule in table[template_type]:
+                for conds in _choices(["all", rule["conditions"]]):
+                    values = _witness(conds, "A")
+                    for field in ("cell_name", "arc_type", "constr_pin", "rel_pin", "when"):
+                        domain[field].add(values[field])
+                    domain["probe"].update(values["probe_list"])
+            domain = dict((k, sorted(v)) for k, v in domain.items())
+            for _ in range(20000):
+                args = (rng.choice(domain["cell_name"]), rng.choice(domain["arc_type"]),
+                        rng.choice(domain["constr_pin"]), rng.choice(("rise", "fall")),
+                        rng.choice(domain["rel_pin"]), rng.choice(("rise", "fall")),
+                        rng.choice(domain["when"]),
+                        rng.sample(domain["probe"], rng.randint(1, 4)))
+                assert index.lookup(*args) == legacy(*args), args
+
+    def test_map_characteristics_uses_rule_index(self):
+        template = templateFileMap.mapCharacteristicsToTemplate(
+            arc_type="hold", cell_name="SYNC2DFFQ", pin="D", pin_dir="fall",
+            rel_pin="CP", rel_pin_dir="rise", when="NO_CONDITION", probe_list=["Q1"],
+            template_type="hspice")
+        assert template == templateFileMap.getHspiceTemplateName(
+            "SYNC2DFFQ", "hold", "D", "fall", "CP", "rise", "NO_CONDITION", ["Q1"])
+        assert template is not None
+        assert templateFileMap.mapCharacteristicsToTemplate(
+            arc_type="hold", cell_name="X", pin="D", pin_dir="fall", rel_pin="CP",
+            rel_pin_dir="rise", when="", probe_list=["Q"], template_type="spectre") is None
+
+    def test_none_probe_list_replays_chain_in_order(self):
+        index = templateRules.getTemplateRuleIndex("hspice")
+        args = ("SYNC2DFFQ", "removal", "CD", "rise", "CP", "rise", "NO_CONDITION", None)
+        # The first rule (SYNC2 removal ignore) matches before any probe check
+        assert index.lookup(*args) is None
+        assert templateFileMap.getHspiceTemplateName(*args) is None